@@ -1,11 +1,15 @@
 """
 도메인 메타데이터 모듈
 """
+from .bundle import get_bundle, DomainBundle, DomainBundleError
 from .rules.normalization import normalize, get_normalizer, Normalized
 from .rules.validation import get_validator, Validator
 from .rules.fallback import get_default_metric, get_default_column
 
 __all__ = [
+    "get_bundle",
+    "DomainBundle",
+    "DomainBundleError",
     "normalize",
     "Normalized",
     "get_normalizer",
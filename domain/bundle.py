@@ -0,0 +1,398 @@
+"""
+도메인 번들: 모든 도메인 YAML을 한 번에 검증/컴파일한 공유 인스턴스
+
+원본:
+- domain/schema/{columns,metrics,groups}.yaml
+- domain/synonyms/*.yaml
+- domain/rules/pressure_resolution.yaml
+- semantic_registry.yaml
+
+컴파일 결과(별칭 역색인, 길이순 정렬된 동의어, 컴파일된 정규식, 포맷 규칙 등)는
+data_out/.cache/domain_bundle.pkl에 BUNDLE_VERSION과 원본 지문(mtime/크기)을 붙여 저장하고,
+다음 프로세스는 YAML을 다시 파싱하지 않고 이 파일을 읽는다.
+
+Normalizer/Validator/resolution/semantic_resolver/sql_builder/process_metrics/app은 모두
+get_bundle()의 같은 인스턴스를 쓴다. 원본 YAML이 바뀌면 새 번들을 끝까지 만든 뒤
+참조 하나만 바꿔 끼우므로(원자적 교체) 요청 중간에 반쯤 바뀐 상태를 보지 않는다.
+
+사용법 (배포 시 미리 컴파일/검증):
+    python -m domain.bundle
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import pickle
+import re
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Pattern, Tuple
+
+import yaml
+
+from domain.schema.load_schema import DomainSchema, load_columns_yaml
+
+PROJECT_ROOT = Path(__file__).parent.parent
+DOMAIN_ROOT = PROJECT_ROOT / "domain"
+BUNDLE_FILE = PROJECT_ROOT / "data_out" / ".cache" / "domain_bundle.pkl"
+
+# 번들 구조가 바뀌면 올림 (이전 버전 파일은 무시하고 다시 컴파일)
+BUNDLE_VERSION = 2
+# 원본 변경 확인 주기 (요청마다 stat 하지 않도록)
+CHECK_INTERVAL_S = 2.0
+
+SOURCES: Dict[str, Path] = {
+    "columns": DOMAIN_ROOT / "schema" / "columns.yaml",
+    "metrics": DOMAIN_ROOT / "schema" / "metrics.yaml",
+    "groups": DOMAIN_ROOT / "schema" / "groups.yaml",
+    "column_synonyms": DOMAIN_ROOT / "synonyms" / "columns.yaml",
+    "metric_synonyms": DOMAIN_ROOT / "synonyms" / "metrics.yaml",
+    "group_synonyms": DOMAIN_ROOT / "synonyms" / "groups.yaml",
+    "patterns": DOMAIN_ROOT / "synonyms" / "patterns.yaml",
+    "resolution": DOMAIN_ROOT / "rules" / "pressure_resolution.yaml",
+    "registry": PROJECT_ROOT / "semantic_registry.yaml",
+}
+REQUIRED_SOURCES = {"columns", "registry"}
+
+
+class DomainBundleError(ValueError):
+    """도메인 YAML 검증 실패 (모든 문제를 한 번에 모아서 보고)"""
+
+    def __init__(self, errors: List[str]):
+        self.errors = errors
+        super().__init__("도메인 YAML 검증 실패:\n" + "\n".join(f"  - {e}" for e in errors))
+
+
+@dataclass(frozen=True)
+class DomainBundle:
+    version: int
+    fingerprint: str
+
+    # 원본 (dict 그대로, 하위 호환용)
+    columns_doc: Dict[str, Any]
+    schema: Optional[DomainSchema]
+    metrics: Dict[str, Any]
+    groups: Dict[str, Any]
+    patterns: Dict[str, Any]
+    resolution: Dict[str, Any]
+    registry: Dict[str, Any]
+
+    # Normalizer: 표준명 → 동의어, 동의어(소문자) → (분류, 표준명), 길이 내림차순 목록, 정규식
+    column_synonyms: Dict[str, List[str]]
+    metric_synonyms: Dict[str, List[str]]
+    group_synonyms: Dict[str, List[str]]
+    synonym_to_standard: Dict[str, Tuple[str, str]]
+    sorted_synonyms: Tuple[Tuple[str, Tuple[str, str]], ...]
+    compiled_patterns: Dict[str, Dict[str, Any]]
+
+    # 도메인 키 → 조회 테이블
+    column_info: Dict[str, Dict[str, Any]]        # Validator.columns 형식
+    csv_column: Dict[str, str]                    # 도메인 키 → 첫 CSV 컬럼명 (meta 포함)
+    format_specs: Dict[str, Tuple[int, str]]      # 도메인 키 → (소수점 자리수, 단위 라벨)
+    setpoint_pairs: Dict[str, str]                # 실측 CSV 컬럼 → 설정값 CSV 컬럼
+
+    # semantic_registry: 정규화 별칭 → physical column, physical column → semantic 경로
+    alias_map: Dict[str, str]
+    physical_to_semantic: Dict[str, str]
+    semantic_to_physical: Dict[str, Optional[str]]     # 최종 노드 경로 → 첫 physical column
+    physical_metadata: Dict[str, Dict[str, Any]]       # physical column → unit/scale/normal_range/...
+
+    # 별칭 부분 매칭용: 별칭 → (registry 순서, physical), registry 순서대로 나열한 별칭 정규식(겹침 허용 lookahead),
+    # 별칭의 부분 문자열 → 그 문자열을 포함하는 가장 앞선 (순서, physical)
+    alias_rank: Dict[str, Tuple[int, str]]
+    alias_regex: Optional[Pattern]
+    alias_substrings: Dict[str, Tuple[int, str]]
+
+
+def _load_yaml(path: Path) -> Any:
+    with open(path, "r", encoding="utf-8") as f:
+        return yaml.safe_load(f) or {}
+
+
+def source_fingerprint(sources: Optional[Dict[str, Path]] = None) -> str:
+    """원본 파일들의 (이름, mtime_ns, 크기) 해시 (없는 파일도 '없음'으로 반영)"""
+    h = hashlib.sha1(str(BUNDLE_VERSION).encode())
+    for name, path in sorted((sources or SOURCES).items()):
+        try:
+            st = path.stat()
+            h.update(f"{name}:{st.st_mtime_ns}:{st.st_size};".encode())
+        except OSError:
+            h.update(f"{name}:-;".encode())
+    return h.hexdigest()
+
+
+def normalize_alias(alias: str) -> str:
+    """registry 별칭 정규화 (소문자, 공백/특수문자 제거)"""
+    return re.sub(r"[^\w]", "", alias.lower())
+
+
+def _registry_leaves(registry: Dict[str, Any], prefix: str = ""):
+    """(semantic 경로, 노드) — physical_columns 또는 aliases가 있는 최종 노드"""
+    for key, value in registry.items():
+        path = f"{prefix}.{key}" if prefix else key
+        if not isinstance(value, dict):
+            continue
+        if "physical_columns" in value or "aliases" in value:
+            yield path, value
+        else:
+            yield from _registry_leaves(value, path)
+
+
+def _is_str_list(value: Any) -> bool:
+    return isinstance(value, list) and all(isinstance(v, str) for v in value)
+
+
+def _validate(raw: Dict[str, Any], sources: Dict[str, Path]) -> List[str]:
+    errors: List[str] = []
+    for name in sorted(REQUIRED_SOURCES):
+        if not sources[name].exists():
+            errors.append(f"{name}: 파일 없음 ({sources[name]})")
+
+    columns = (raw.get("columns") or {}).get("columns") or {}
+    csv_names = {c for d in columns.values() if isinstance(d, dict) for c in (d.get("csv_columns") or [])}
+    for key, d in columns.items():
+        if not isinstance(d, dict):
+            errors.append(f"columns.{key}: 매핑이 아님")
+            continue
+        if not _is_str_list(d.get("csv_columns")) or not d.get("csv_columns"):
+            errors.append(f"columns.{key}.csv_columns: 비어 있지 않은 문자열 목록이어야 함")
+        if "aliases" in d and not _is_str_list(d["aliases"]):
+            errors.append(f"columns.{key}.aliases: 문자열 목록이어야 함")
+        if d.get("setpoint") is not None and not isinstance(d["setpoint"], str):
+            errors.append(f"columns.{key}.setpoint: 문자열이어야 함")
+    for key, d in ((raw.get("columns") or {}).get("meta") or {}).items():
+        if not isinstance(d, dict) or not _is_str_list(d.get("csv_columns") or []):
+            errors.append(f"columns.meta.{key}: csv_columns는 문자열 목록이어야 함")
+
+    for source in ("column_synonyms", "metric_synonyms", "group_synonyms"):
+        for key, synonyms in (raw.get(source) or {}).items():
+            if not _is_str_list(synonyms):
+                errors.append(f"{source}.{key}: 문자열 목록이어야 함")
+
+    for name, pattern_def in (raw.get("patterns") or {}).items():
+        if not isinstance(pattern_def, dict):
+            errors.append(f"patterns.{name}: 매핑이 아님")
+            continue
+        for pat in pattern_def.get("patterns") or []:
+            try:
+                re.compile(pat, re.IGNORECASE)
+            except (re.error, TypeError) as e:
+                errors.append(f"patterns.{name}: 정규식 오류 {pat!r} ({e})")
+
+    resolution = (raw.get("resolution") or {}).get("resolution") or {}
+    for group in ("context_overrides", "flow_channel_rules"):
+        for i, rule in enumerate(resolution.get(group) or []):
+            prefer = rule.get("prefer_column") if isinstance(rule, dict) else None
+            if columns and prefer not in columns and prefer not in csv_names:
+                errors.append(f"resolution.{group}[{i}].prefer_column: 알 수 없는 컬럼 {prefer!r}")
+            if isinstance(rule, dict) and not _is_str_list(rule.get("if_any_tokens") or []):
+                errors.append(f"resolution.{group}[{i}].if_any_tokens: 문자열 목록이어야 함")
+
+    for path, node in _registry_leaves(raw.get("registry") or {}):
+        if "physical_columns" in node and not _is_str_list(node["physical_columns"] or []):
+            errors.append(f"registry.{path}.physical_columns: 문자열 목록이어야 함")
+        if "aliases" in node and not isinstance(node["aliases"] or [], list):
+            errors.append(f"registry.{path}.aliases: 목록이어야 함")
+    return errors
+
+
+def compile_bundle(sources: Optional[Dict[str, Path]] = None) -> DomainBundle:
+    """원본 YAML 파싱 + 검증 + 색인 생성 (검증 실패 시 DomainBundleError)"""
+    sources = sources or SOURCES
+    fingerprint = source_fingerprint(sources)
+    raw = {name: (_load_yaml(path) if path.exists() else {}) for name, path in sources.items()}
+    errors = _validate(raw, sources)
+    if errors:
+        raise DomainBundleError(errors)
+
+    schema = load_columns_yaml(sources["columns"]) if sources["columns"].exists() else None
+    if schema is not None:
+        column_synonyms = {key: list(d.aliases) for key, d in schema.columns.items()}
+    else:
+        column_synonyms = raw["column_synonyms"]
+    metric_synonyms = raw["metric_synonyms"]
+    group_synonyms = raw["group_synonyms"]
+
+    # 동의어 -> 표준명 (나중 분류가 같은 동의어를 덮어씀: 컬럼 < 지표 < 그룹)
+    synonym_to_standard: Dict[str, Tuple[str, str]] = {}
+    for category, table in (("column", column_synonyms), ("metric", metric_synonyms), ("group", group_synonyms)):
+        for std_name, synonyms in table.items():
+            for synonym in synonyms:
+                synonym_to_standard[synonym.lower()] = (category, std_name)
+    sorted_synonyms = tuple(sorted(synonym_to_standard.items(), key=lambda x: len(x[0]), reverse=True))
+
+    compiled_patterns: Dict[str, Dict[str, Any]] = {}
+    for name, pattern_def in raw["patterns"].items():
+        if "patterns" not in pattern_def:
+            continue
+        compiled_patterns[name] = {
+            "regexes": [re.compile(p, re.IGNORECASE) for p in pattern_def["patterns"]],
+            "normalize": pattern_def.get("normalize", ""),
+        }
+
+    columns_doc = raw["columns"]
+    defaults = columns_doc.get("defaults") or {}
+    decimals_by_type = defaults.get("decimals_by_type") or {}
+    unit_label = defaults.get("unit_label") or {}
+    column_info: Dict[str, Dict[str, Any]] = {}
+    csv_column: Dict[str, str] = {}
+    format_specs: Dict[str, Tuple[int, str]] = {}
+    for key, meta in (columns_doc.get("columns") or {}).items():
+        decimals = int(decimals_by_type.get(meta.get("physical_type"), 2))
+        if meta.get("decimals") is not None:
+            decimals = int(meta["decimals"])
+        format_specs[key] = (decimals, unit_label.get(meta.get("unit"), meta.get("unit") or ""))
+    if schema is not None:
+        for key, d in schema.columns.items():
+            column_info[key] = {"domain_name": d.domain_name, "unit": d.unit, "type": d.physical_type}
+            csv_column[key] = d.csv_columns[0]
+        for key, meta in schema.meta.items():
+            if meta.get("csv_columns"):
+                csv_column.setdefault(key, meta["csv_columns"][0])
+    setpoint_pairs = {
+        d.csv_columns[0]: d.setpoint for d in (schema.columns.values() if schema else []) if d.setpoint and d.csv_columns
+    }
+
+    alias_map: Dict[str, str] = {}
+    physical_to_semantic: Dict[str, str] = {}
+    semantic_to_physical: Dict[str, Optional[str]] = {}
+    nodes: Dict[str, Dict[str, Any]] = {}
+    for path, node in _registry_leaves(raw["registry"]):
+        nodes[path] = node
+        physical_cols = node.get("physical_columns") or []
+        if "physical_columns" in node:
+            semantic_to_physical[path] = physical_cols[0] if physical_cols else None
+        for col in physical_cols:
+            physical_to_semantic.setdefault(col, path)
+        if physical_cols and "aliases" in node:
+            for alias in node["aliases"]:
+                alias_map.setdefault(normalize_alias(str(alias)), physical_cols[0])
+
+    physical_metadata: Dict[str, Dict[str, Any]] = {}
+    for col, path in physical_to_semantic.items():
+        node = nodes[path]
+        metadata = {key: node[key] for key in ("unit", "scale", "normal_range", "range_source") if key in node}
+        if "description" in node:
+            metadata["description"] = node["description"]
+        elif node.get("aliases"):
+            metadata["description"] = node["aliases"][0]  # description이 없으면 첫 번째 alias
+        if metadata:
+            physical_metadata[col] = metadata
+
+    alias_rank = {alias: (i, col) for i, (alias, col) in enumerate(alias_map.items())}
+    alias_substrings: Dict[str, Tuple[int, str]] = {}
+    for alias, (i, col) in alias_rank.items():
+        for start in range(len(alias)):
+            for end in range(start + 1, len(alias) + 1):
+                alias_substrings.setdefault(alias[start:end], (i, col))
+
+    return DomainBundle(
+        version=BUNDLE_VERSION,
+        fingerprint=fingerprint,
+        columns_doc=columns_doc,
+        schema=schema,
+        metrics=raw["metrics"],
+        groups=raw["groups"],
+        patterns=raw["patterns"],
+        resolution=raw["resolution"],
+        registry=raw["registry"],
+        column_synonyms=column_synonyms,
+        metric_synonyms=metric_synonyms,
+        group_synonyms=group_synonyms,
+        synonym_to_standard=synonym_to_standard,
+        sorted_synonyms=sorted_synonyms,
+        compiled_patterns=compiled_patterns,
+        column_info=column_info,
+        csv_column=csv_column,
+        format_specs=format_specs,
+        setpoint_pairs=setpoint_pairs,
+        alias_map=alias_map,
+        physical_to_semantic=physical_to_semantic,
+        semantic_to_physical=semantic_to_physical,
+        physical_metadata=physical_metadata,
+        alias_rank=alias_rank,
+        # 같은 위치에서는 앞선 대안이 이기므로 위치별로 가장 앞선 순서의 별칭이 잡힘
+        alias_regex=re.compile("(?=(" + "|".join(re.escape(a) for a in alias_rank if a) + "))") if alias_rank else None,
+        alias_substrings=alias_substrings,
+    )
+
+
+def write_bundle(bundle: DomainBundle, path: Optional[Path] = None) -> None:
+    """임시 파일에 쓴 뒤 rename (다른 프로세스가 반쯤 쓴 파일을 읽지 않도록)"""
+    path = path or BUNDLE_FILE
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(bundle, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def read_bundle(fingerprint: str, path: Optional[Path] = None) -> Optional[DomainBundle]:
+    """저장된 번들 (버전/지문이 다르거나 읽을 수 없으면 None)"""
+    try:
+        with open(path or BUNDLE_FILE, "rb") as f:
+            bundle = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+    if not isinstance(bundle, DomainBundle) or bundle.version != BUNDLE_VERSION or bundle.fingerprint != fingerprint:
+        return None
+    return bundle
+
+
+def load_bundle(path: Optional[Path] = None) -> DomainBundle:
+    """저장된 번들이 최신이면 읽고, 아니면 컴파일 후 저장"""
+    fingerprint = source_fingerprint()
+    bundle = read_bundle(fingerprint, path)
+    if bundle is None:
+        bundle = compile_bundle()
+        try:
+            write_bundle(bundle, path)
+        except OSError:
+            pass  # 읽기 전용 배포 환경: 메모리 번들만 사용
+    return bundle
+
+
+_lock = threading.Lock()
+_bundle: Optional[DomainBundle] = None
+_checked_at = 0.0
+
+
+def get_bundle() -> DomainBundle:
+    """프로세스 공용 번들 (CHECK_INTERVAL_S마다 원본 변경 확인, 바뀌었으면 통째로 교체)"""
+    global _bundle, _checked_at
+    bundle = _bundle
+    if bundle is not None and time.monotonic() - _checked_at < CHECK_INTERVAL_S:
+        return bundle
+    with _lock:
+        if _bundle is None or _bundle.fingerprint != source_fingerprint():
+            _bundle = load_bundle()
+        _checked_at = time.monotonic()
+        return _bundle
+
+
+def main() -> int:
+    t0 = time.perf_counter()
+    try:
+        bundle = compile_bundle()
+    except DomainBundleError as e:
+        print(f"❌ {e}")
+        return 1
+    write_bundle(bundle)
+    print(
+        f"✅ 도메인 번들 v{bundle.version} 컴파일: 컬럼 {len(bundle.column_info)}개, 동의어 {len(bundle.synonym_to_standard)}개, "
+        f"registry 별칭 {len(bundle.alias_map)}개 → {BUNDLE_FILE} ({(time.perf_counter() - t0) * 1000:.0f}ms)"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
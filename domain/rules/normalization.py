@@ -6,113 +6,36 @@
 """
 import re
 from dataclasses import dataclass
-from typing import Dict, List, Optional
-import yaml
 from pathlib import Path
 
+from domain.bundle import get_bundle
+
 # 프로젝트 루트
 DOMAIN_ROOT = Path(__file__).parent.parent.parent / "domain"
 
-def load_synonyms(file_path: Path) -> Dict[str, List[str]]:
-    """YAML 파일에서 동의어 사전 로드"""
-    if not file_path.exists():
-        return {}
-    with open(file_path, 'r', encoding='utf-8') as f:
-        return yaml.safe_load(f) or {}
-
-def load_patterns(file_path: Path) -> Dict:
-    """패턴 정의 로드"""
-    if not file_path.exists():
-        return {}
-    with open(file_path, 'r', encoding='utf-8') as f:
-        return yaml.safe_load(f) or {}
-
 class Normalizer:
-    """질문 정규화 클래스"""
+    """질문 정규화 클래스 (동의어/패턴 색인은 도메인 번들에서 가져옴)"""
     
-    def __init__(self):
-        # YAML 기반 스키마 로드 (columns.yaml 우선)
-        try:
-            from domain.schema.load_schema import load_columns_yaml
-            schema_path = DOMAIN_ROOT / "schema" / "columns.yaml"
-            if schema_path.exists():
-                self.schema = load_columns_yaml(schema_path)
-                # 스키마에서 aliases 추출
-                self.column_synonyms = {
-                    key: col_def.aliases 
-                    for key, col_def in self.schema.columns.items()
-                }
-            else:
-                # Fallback: 기존 YAML 파일 사용
-                self.column_synonyms = load_synonyms(DOMAIN_ROOT / "synonyms" / "columns.yaml")
-                self.schema = None
-        except Exception as e:
-            # Fallback: 기존 방식
-            self.column_synonyms = load_synonyms(DOMAIN_ROOT / "synonyms" / "columns.yaml")
-            self.schema = None
-        
-        # 기존 동의어 사전 로드 (metrics, groups)
-        self.metric_synonyms = load_synonyms(DOMAIN_ROOT / "synonyms" / "metrics.yaml")
-        self.group_synonyms = load_synonyms(DOMAIN_ROOT / "synonyms" / "groups.yaml")
-        self.patterns = load_patterns(DOMAIN_ROOT / "synonyms" / "patterns.yaml")
-        
-        # 동의어 치환 맵 생성 (역방향: 동의어 -> 표준명)
-        self._build_synonym_map()
-        self._build_pattern_regex()
-    
-    def _build_synonym_map(self):
-        """동의어 -> 표준명 맵 생성"""
-        self.synonym_to_standard = {}
-        
-        # 컬럼 동의어
-        for std_name, synonyms in self.column_synonyms.items():
-            for synonym in synonyms:
-                self.synonym_to_standard[synonym.lower()] = ("column", std_name)
+    def __init__(self, bundle=None):
+        self.bundle = bundle or get_bundle()
+        self.schema = self.bundle.schema
+        self.column_synonyms = self.bundle.column_synonyms
+        self.metric_synonyms = self.bundle.metric_synonyms
+        self.group_synonyms = self.bundle.group_synonyms
+        self.patterns = self.bundle.patterns
         
-        # 지표 동의어
-        for std_name, synonyms in self.metric_synonyms.items():
-            for synonym in synonyms:
-                self.synonym_to_standard[synonym.lower()] = ("metric", std_name)
-        
-        # 그룹 동의어
-        for std_name, synonyms in self.group_synonyms.items():
-            for synonym in synonyms:
-                self.synonym_to_standard[synonym.lower()] = ("group", std_name)
-    
-    def _build_pattern_regex(self):
-        """패턴 정규식 컴파일"""
-        self.compiled_patterns = {}
-        
-        if not self.patterns:
-            return
-        
-        for pattern_name, pattern_def in self.patterns.items():
-            if "patterns" not in pattern_def:
-                continue
-            
-            compiled = []
-            for pat_str in pattern_def["patterns"]:
-                try:
-                    compiled.append(re.compile(pat_str, re.IGNORECASE))
-                except:
-                    pass
-            
-            self.compiled_patterns[pattern_name] = {
-                "regexes": compiled,
-                "normalize": pattern_def.get("normalize", "")
-            }
+        # 동의어 -> 표준명 맵, 길이순 정렬, 정규식은 번들 컴파일 시 미리 생성
+        self.synonym_to_standard = self.bundle.synonym_to_standard
+        self.sorted_synonyms = self.bundle.sorted_synonyms
+        self.compiled_patterns = self.bundle.compiled_patterns
     
     def _replace_synonyms_internal(self, text: str) -> str:
         """
         내부 동의어 치환 메서드 (normalize()에서 사용)
         사용자 제공 코드의 로직 활용: 단순 replace로 더 정확한 매칭
         """
-        # 동의어를 길이 순으로 정렬 (긴 것부터) - 부분 매칭 방지
-        sorted_synonyms = sorted(
-            self.synonym_to_standard.items(),
-            key=lambda x: len(x[0]),
-            reverse=True
-        )
+        # 동의어는 길이 순(긴 것부터)으로 번들에 미리 정렬됨 - 부분 매칭 방지
+        sorted_synonyms = self.sorted_synonyms
         
         # 이미 변환된 컬럼명 패턴 (mfcmon_xxx, pressact 등)
         # 이런 패턴이 포함된 부분은 다시 변환하지 않음
@@ -190,10 +113,11 @@ class Normalizer:
 _normalizer = None
 
 def get_normalizer() -> Normalizer:
-    """싱글톤 패턴으로 Normalizer 반환"""
+    """싱글톤 패턴으로 Normalizer 반환 (도메인 번들이 교체되면 새로 생성)"""
     global _normalizer
-    if _normalizer is None:
-        _normalizer = Normalizer()
+    bundle = get_bundle()
+    if _normalizer is None or _normalizer.bundle is not bundle:
+        _normalizer = Normalizer(bundle)
     return _normalizer
 
 @dataclass(frozen=True)
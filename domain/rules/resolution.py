@@ -3,20 +3,16 @@
 - "VG11 압력" => vg11 (pressact 제거)
 - "질소 유량" => mfcmon_n2_1
 """
-import yaml
 from pathlib import Path
 from typing import Optional, List, Dict, Any
 
+from domain.bundle import get_bundle
+
 DOMAIN_ROOT = Path(__file__).parent.parent.parent / "domain"
 
 def load_resolution_rules() -> Dict[str, Any]:
-    """압력/유량 해결 규칙 로드"""
-    rules_path = DOMAIN_ROOT / "rules" / "pressure_resolution.yaml"
-    if not rules_path.exists():
-        return {}
-    
-    with open(rules_path, 'r', encoding='utf-8') as f:
-        return yaml.safe_load(f) or {}
+    """압력/유량 해결 규칙 (도메인 번들의 pressure_resolution.yaml)"""
+    return get_bundle().resolution
 
 
 def resolve_column_ambiguity(tokens: List[str], current_column: Optional[str]) -> Optional[str]:
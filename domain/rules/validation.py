@@ -8,6 +8,8 @@ import yaml
 from pathlib import Path
 from typing import Optional, List
 
+from domain.bundle import get_bundle
+
 DOMAIN_ROOT = Path(__file__).parent.parent.parent / "domain"
 
 def load_schema(file_path: Path) -> dict:
@@ -18,37 +20,15 @@ def load_schema(file_path: Path) -> dict:
         return yaml.safe_load(f) or {}
 
 class Validator:
-    """도메인 규칙 검증 클래스"""
+    """도메인 규칙 검증 클래스 (스키마/지표/그룹핑은 도메인 번들에서 가져옴)"""
     
-    def __init__(self):
-        # YAML 기반 스키마 로드 (새 형식 우선)
-        try:
-            from domain.schema.load_schema import load_columns_yaml
-            schema_path = DOMAIN_ROOT / "schema" / "columns.yaml"
-            if schema_path.exists():
-                self.schema = load_columns_yaml(schema_path)
-                # 하위 호환성을 위해 dict 형태로도 제공
-                self.columns = {
-                    key: {
-                        "domain_name": col_def.domain_name,
-                        "unit": col_def.unit,
-                        "type": col_def.physical_type,
-                    }
-                    for key, col_def in self.schema.columns.items()
-                }
-            else:
-                self.columns = load_schema(DOMAIN_ROOT / "schema" / "columns.yaml")
-                self.schema = None
-        except Exception as e:
-            # Fallback: 기존 방식
-            import traceback
-            print(f"[Validator] 스키마 로드 실패: {e}")
-            traceback.print_exc()
-            self.columns = load_schema(DOMAIN_ROOT / "schema" / "columns.yaml")
-            self.schema = None
-        
-        self.metrics = load_schema(DOMAIN_ROOT / "schema" / "metrics.yaml")
-        self.groups = load_schema(DOMAIN_ROOT / "schema" / "groups.yaml")
+    def __init__(self, bundle=None):
+        self.bundle = bundle or get_bundle()
+        self.schema = self.bundle.schema
+        # 하위 호환성을 위해 dict 형태로도 제공
+        self.columns = self.bundle.column_info if self.schema else self.bundle.columns_doc
+        self.metrics = self.bundle.metrics
+        self.groups = self.bundle.groups
     
     def is_valid_column(self, column: str) -> bool:
         """컬럼이 유효한지 확인"""
@@ -96,9 +76,10 @@ class Validator:
 _validator = None
 
 def get_validator() -> Validator:
-    """싱글톤 패턴으로 Validator 반환"""
+    """싱글톤 패턴으로 Validator 반환 (도메인 번들이 교체되면 새로 생성)"""
     global _validator
-    if _validator is None:
-        _validator = Validator()
+    bundle = get_bundle()
+    if _validator is None or _validator.bundle is not bundle:
+        _validator = Validator(bundle)
     return _validator
 
@@ -14,6 +14,7 @@ class ColumnDef:
     unit: str
     csv_columns: List[str]
     aliases: List[str]
+    setpoint: Optional[str] = None
 
 
 @dataclass(frozen=True)
@@ -39,6 +40,7 @@ def load_columns_yaml(path: str | Path) -> DomainSchema:
             unit=d.get("unit", ""),
             csv_columns=d.get("csv_columns", []),
             aliases=d.get("aliases", []),
+            setpoint=d.get("setpoint"),
         )
 
     meta = data.get("meta", {})
@@ -60,3 +62,12 @@ def get_csv_column(schema: DomainSchema, domain_key: str) -> Optional[str]:
         return col_def.csv_columns[0]
     return None
 
+
+
+def get_setpoint_pairs(schema: DomainSchema) -> Dict[str, str]:
+    """실측 CSV 컬럼명 → 설정값 CSV 컬럼명 (setpoint가 정의된 컬럼만)"""
+    return {
+        col_def.csv_columns[0]: col_def.setpoint
+        for col_def in schema.columns.values()
+        if col_def.setpoint and col_def.csv_columns
+    }
@@ -0,0 +1,2 @@
+# Analysis package
+
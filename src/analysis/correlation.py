@@ -0,0 +1,278 @@
+"""
+컬럼 간 상관행렬 엔진 (Pearson / Spearman)
+
+원본 샘플 행렬을 한 번에 만들지 않고, DuckDB 결과를 청크 단위로 읽어
+공통 적률(co-moment)만 누적한다. 컬럼마다 결측이 달라 pairwise 방식으로 센다.
+
+    M = 유효값 마스크, Z = (x - shift)를 결측 0으로 채운 값
+    n   += Mᵀ M          (두 컬럼 모두 유효한 행 수)
+    s   += Zᵀ M          (s[i, j] = j도 유효한 행에서 x_i 합)
+    ss  += (Z∘Z)ᵀ M
+    sxy += Zᵀ Z
+    r = (sxy - s·sᵀ/n) / sqrt((ss - s²/n)(ssᵀ - (sᵀ)²/n))
+
+shift(첫 청크 평균)로 큰 오프셋 신호(압력 수백 mTorr 등)의 자릿수 손실을 줄인다.
+Spearman은 사전에 DuckDB approx_quantile로 구한 분위 경계로 값을 순위(0~1)로 바꾼 뒤
+같은 누적을 수행한다 (근사 순위, 동률은 평균 순위). CLI와 질의 라우팅(build_correlation_sql)이
+같은 엔진을 쓰므로 Spearman 정의도 하나다.
+
+사용법:
+    python -m src.analysis.correlation pressact --step B.FILL --categories pressure gas
+"""
+import sys
+from pathlib import Path
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import numpy as np  # type: ignore
+
+from src.analysis.step_stats import _quote, numeric_columns, TABLE_NAME
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+DB = PROJECT_ROOT / "data_out" / "ald.duckdb"
+
+CHUNK_VECTORS = 64     # fetch_df_chunk 단위 (DuckDB vector = 2048행) → 약 13만 행
+RANK_QUANTILES = 512   # Spearman 근사 순위용 분위 경계 수
+MIN_PAIRS = 3
+DEFAULT_TOP_K = 10
+
+CORRELATION_METHODS = ("pearson", "spearman")
+
+
+class CoMoments:
+    """청크 단위로 누적하는 pairwise 공통 적률"""
+
+    def __init__(self, n_cols: int):
+        self.n_cols = n_cols
+        self.shift: Optional[np.ndarray] = None
+        shape = (n_cols, n_cols)
+        self.n = np.zeros(shape)
+        self.s = np.zeros(shape)
+        self.ss = np.zeros(shape)
+        self.sxy = np.zeros(shape)
+
+    def update(self, x: np.ndarray) -> None:
+        """x: shape (n_rows, n_cols), 결측은 NaN"""
+        if not len(x):
+            return
+        mask = ~np.isnan(x)
+        if self.shift is None:
+            with np.errstate(all="ignore"):
+                self.shift = np.nan_to_num(np.nanmean(x, axis=0))
+        z = np.where(mask, x - self.shift, 0.0)
+        m = mask.astype(float)
+        self.n += m.T @ m
+        self.s += z.T @ m
+        self.ss += (z * z).T @ m
+        self.sxy += z.T @ z
+
+    def correlation(self) -> np.ndarray:
+        """pairwise 상관행렬 (유효 쌍 < MIN_PAIRS 또는 분산 0이면 NaN)"""
+        n, s, ss = self.n, self.s, self.ss
+        with np.errstate(all="ignore"):
+            cov = self.sxy - s * s.T / n
+            var_x = ss - s * s / n
+            var_y = ss.T - s.T * s.T / n
+            r = cov / np.sqrt(var_x * var_y)
+        r[(n < MIN_PAIRS) | ~(var_x > 0) | ~(var_y > 0)] = np.nan
+        np.fill_diagonal(r, np.where(np.diag(n) >= MIN_PAIRS, 1.0, np.nan))
+        return np.clip(r, -1.0, 1.0)
+
+
+def rank_transform(x: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    """
+    분위 경계로 근사 순위(0~1) 변환
+
+    Args:
+        x: shape (n_rows, n_cols)
+        edges: shape (n_quantiles, n_cols), 각 컬럼의 분위 경계 (오름차순)
+    """
+    qs = np.linspace(0.0, 1.0, len(edges))
+    out = np.full(x.shape, np.nan)
+    for j in range(x.shape[1]):
+        col_edges = edges[:, j]
+        if np.isnan(col_edges).all():
+            continue
+        # 같은 경계값(동률)은 평균 분위로 합침
+        uniq, inv = np.unique(col_edges[~np.isnan(col_edges)], return_inverse=True)
+        q_mean = np.bincount(inv, qs[~np.isnan(col_edges)]) / np.bincount(inv)
+        ok = ~np.isnan(x[:, j])
+        out[ok, j] = np.interp(x[ok, j], uniq, q_mean)
+    return out
+
+
+def _where_clause(step_names: Sequence[str], trace_ids: Sequence[str]) -> Tuple[str, List]:
+    conditions, params = [], []
+    if step_names:
+        conditions.append(f"step_name IN ({','.join('?' for _ in step_names)})")
+        params.extend(step_names)
+    if trace_ids:
+        conditions.append(f"trace_id IN ({','.join('?' for _ in trace_ids)})")
+        params.extend(trace_ids)
+    return (f"WHERE {' AND '.join(conditions)}" if conditions else ""), params
+
+
+def _quantile_edges(con, columns: Sequence[str], where_sql: str, params: List) -> np.ndarray:
+    qs = ", ".join(f"{q:.6f}" for q in np.linspace(0.0, 1.0, RANK_QUANTILES))
+    select_cols = ", ".join(f"approx_quantile(CAST({_quote(c)} AS DOUBLE), [{qs}])" for c in columns)
+    row = con.execute(f"SELECT {select_cols} FROM {TABLE_NAME} {where_sql}", params).fetchone()
+    edges = np.full((RANK_QUANTILES, len(columns)), np.nan)
+    for j, values in enumerate(row):
+        if values is not None:
+            edges[:, j] = np.asarray([np.nan if v is None else v for v in values], dtype=float)
+    return np.sort(edges, axis=0)
+
+
+def correlation_matrix(
+    con,
+    columns: Sequence[str],
+    method: str = "pearson",
+    step_names: Sequence[str] = (),
+    trace_ids: Sequence[str] = (),
+    chunk_vectors: int = CHUNK_VECTORS,
+    cancelled: Optional[Callable[[], bool]] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    청크 스트리밍 상관행렬
+
+    Args:
+        cancelled: 청크마다 확인, True면 중단 (실행기 작업이 취소된 경우)
+
+    Returns:
+        (r, n): 각 shape (n_cols, n_cols). n은 pairwise 유효 행 수
+    """
+    if method not in CORRELATION_METHODS:
+        raise ValueError(f"지원하지 않는 상관 방식: {method}")
+    if not columns:
+        raise ValueError("상관 분석할 컬럼이 필요합니다")
+
+    where_sql, params = _where_clause(step_names, trace_ids)
+    edges = _quantile_edges(con, columns, where_sql, params) if method == "spearman" else None
+
+    select_cols = ", ".join(f"CAST({_quote(c)} AS DOUBLE) AS {_quote(c)}" for c in columns)
+    result = con.execute(f"SELECT {select_cols} FROM {TABLE_NAME} {where_sql}", params)
+    acc = CoMoments(len(columns))
+    while True:
+        if cancelled is not None and cancelled():
+            raise RuntimeError("상관 분석이 취소되었습니다")
+        chunk = result.fetch_df_chunk(chunk_vectors)
+        if chunk is None or chunk.empty:
+            break
+        x = chunk.to_numpy(dtype=float, na_value=np.nan)
+        acc.update(rank_transform(x, edges) if edges is not None else x)
+    return acc.correlation(), acc.n
+
+
+def top_pairs(
+    r: np.ndarray,
+    n: np.ndarray,
+    columns: Sequence[str],
+    k: int = DEFAULT_TOP_K,
+    target: Optional[str] = None,
+) -> List[Tuple[str, str, float, int]]:
+    """|r| 기준 상위 k개 쌍 [(column_a, column_b, r, n), ...]. target이 있으면 target과의 쌍만"""
+    if target is not None:
+        if target not in columns:
+            raise ValueError(f"상관 분석 대상 컬럼에 없습니다: {target}")
+        i = list(columns).index(target)
+        rows = np.full(len(columns), i)
+        cols = np.arange(len(columns))
+        keep = cols != i
+        rows, cols = rows[keep], cols[keep]
+    else:
+        rows, cols = np.triu_indices(len(columns), k=1)
+
+    vals = r[rows, cols]
+    ok = ~np.isnan(vals)
+    rows, cols, vals = rows[ok], cols[ok], vals[ok]
+    order = np.argsort(-np.abs(vals), kind="stable")[:k]
+    return [(columns[rows[o]], columns[cols[o]], float(vals[o]), int(n[rows[o], cols[o]])) for o in order]
+
+
+def build_correlation_sql(p, con=None) -> Tuple[str, List]:
+    """
+    상관 상위 쌍: 청크 엔진(correlation_matrix) 결과를 VALUES 절로 반환 (다른 빌더와 동일한 (sql, params) 계약)
+
+    질의를 실행하는 연결(con)에서 계산하므로 실행기 작업 안에서 돌고, 실행기가 취소하면
+    연결 중단(interrupt)과 청크마다의 취소 확인으로 멈춘다. 컬럼 쌍마다 SQL 집계를 만들지 않아
+    전체 카탈로그(수백 컬럼)도 한 번의 스캔 + 행렬 곱으로 끝난다. Spearman은 CLI와 같은 근사 순위.
+
+    결과 스키마: column_a, column_b, value(r), n
+
+    Args:
+        con: 질의를 실행할 DuckDB 연결 (필수)
+
+    flags:
+        corr_method: pearson | spearman
+        corr_categories: catalog 카테고리 목록 (없으면 전체 수치형 컬럼)
+        corr_target: 이 컬럼과의 쌍만 (예: pressact)
+    """
+    if con is None:
+        raise ValueError("상관 분석에는 질의를 실행할 DB 연결이 필요합니다")
+    flags = getattr(p, "flags", None) or {}
+    method = flags.get("corr_method", "pearson")
+    if method not in CORRELATION_METHODS:
+        raise ValueError(f"지원하지 않는 상관 방식: {method}")
+    target = flags.get("corr_target")
+    k = getattr(p, "top_n", None) or getattr(p, "limit", None) or DEFAULT_TOP_K
+
+    columns = numeric_columns(con, categories=flags.get("corr_categories") or None)
+    if target and target not in columns:
+        if target not in numeric_columns(con):
+            raise ValueError(f"상관 분석 대상 컬럼에 없습니다: {target}")
+        columns = [target] + columns
+
+    pairs: List[Tuple[str, str, float, int]] = []
+    if len(columns) >= 2:
+        from src.services.executor import current_job_cancelled
+
+        step_names = p.step_names or ([p.step_name] if p.step_name else [])
+        trace_ids = p.trace_ids or ([p.trace_id] if p.trace_id else [])
+        r, n = correlation_matrix(con, columns, method, step_names, trace_ids, cancelled=current_job_cancelled)
+        pairs = top_pairs(r, n, columns, int(k), target or None)
+    if not pairs:
+        return "SELECT NULL::VARCHAR AS column_a, NULL::VARCHAR AS column_b, NULL::DOUBLE AS value, NULL::BIGINT AS n LIMIT 0", []
+
+    values_sql = ", ".join("(?, ?, ?, ?, ?)" for _ in pairs)
+    params: List = []
+    for i, (a, b, v, cnt) in enumerate(pairs):
+        params.extend([i, a, b, v, cnt])
+    sql = f"""
+    SELECT column_a, column_b, value, n
+    FROM (VALUES {values_sql}) AS pairs(i, column_a, column_b, value, n)
+    ORDER BY i
+    """
+    return sql, params
+
+
+def main():
+    import duckdb  # type: ignore
+
+    args = sys.argv[1:]
+    target, steps, categories, method, k = None, [], [], "pearson", DEFAULT_TOP_K
+    it = iter(args)
+    for a in it:
+        if a == "--step":
+            steps.append(next(it))
+        elif a == "--categories":
+            categories = [c for c in it]
+        elif a == "--spearman":
+            method = "spearman"
+        elif a == "--top":
+            k = int(next(it))
+        else:
+            target = a
+
+    con = duckdb.connect(str(DB), read_only=True)
+    try:
+        columns = numeric_columns(con, categories=categories or None)
+        if target and target not in columns:
+            columns = [target] + columns
+        r, n = correlation_matrix(con, columns, method, steps)
+        for a, b, v, cnt in top_pairs(r, n, columns, k, target):
+            print(f"{a:>24s}  {b:<24s}  r={v:+.3f}  (n={cnt})")
+    finally:
+        con.close()
+
+
+if __name__ == "__main__":
+    main()
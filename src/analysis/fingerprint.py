@@ -0,0 +1,369 @@
+"""
+Trace 핑거프린트와 최근접 이웃(kNN) 유사도 인덱스
+
+핑거프린트: (step, column)별 평균·표준편차를 이어붙인 벡터
+  1. 특징별 표준화 (인덱스 생성 시점의 mu/sigma 고정 → 증분 추가 가능)
+  2. 차원이 크면 고정 시드 랜덤 사영으로 FINGERPRINT_DIM 차원으로 축소
+     (Johnson-Lindenstrauss: 유클리드 거리를 근사 보존)
+인덱스: float32 행렬 + 행 제곱노름. 질의는 BLAS 행렬-벡터 곱 1회 + argpartition.
+행렬은 용량을 두 배씩 늘리는 버퍼라 ingest 묶음 추가는 분할 상환 O(추가 행) (전체 복사 없음).
+생성은 trace 묶음(FINGERPRINT_BATCH) 단위 두 번 읽기 (1차: 특징별 평균/분산 누적, 2차: 변환·추가)라
+전체 (trace, step, column) 큐브를 메모리에 올리지 않는다.
+
+저장: data_out/fingerprints.npz
+
+사용법:
+    python -m src.analysis.fingerprint            # 신규 trace만 추가
+    python -m src.analysis.fingerprint --rebuild  # 전체 재생성
+"""
+import sys
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np  # type: ignore
+
+from src.analysis.step_stats import load_step_cube, numeric_columns, TABLE_NAME
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+DB = PROJECT_ROOT / "data_out" / "ald.duckdb"
+INDEX_FILE = PROJECT_ROOT / "data_out" / "fingerprints.npz"
+
+FINGERPRINT_DIM = 256
+PROJECTION_SEED = 42
+MIN_SIGMA = 1e-9
+MIN_CAPACITY = 64  # 인덱스 행렬 버퍼 최소 행 수
+FINGERPRINT_BATCH = 1000  # 인덱스 생성 시 한 번에 읽는 trace 수 (메모리 상한)
+
+
+def raw_fingerprints(mean_cube: np.ndarray, std_cube: np.ndarray) -> np.ndarray:
+    """(trace, step, column) 평균/표준편차 큐브 → (n_traces, n_steps * n_columns * 2)"""
+    n = mean_cube.shape[0]
+    return np.concatenate([mean_cube.reshape(n, -1), std_cube.reshape(n, -1)], axis=1)
+
+
+class FeatureMoments:
+    """특징별 평균/분산을 trace 묶음 단위로 누적 (NaN 제외, 묶음 간 병합은 Chan 공식)"""
+
+    def __init__(self, dim: int):
+        self.n = np.zeros(dim)
+        self.mean = np.zeros(dim)
+        self.m2 = np.zeros(dim)
+
+    def update(self, raw: np.ndarray) -> None:
+        n_b = (~np.isnan(raw)).sum(axis=0).astype(float)
+        if not n_b.any():
+            return
+        mean_b = np.nansum(raw, axis=0) / np.maximum(n_b, 1.0)
+        m2_b = np.nansum((raw - mean_b) ** 2, axis=0)
+        n = self.n + n_b
+        safe = np.maximum(n, 1.0)
+        delta = mean_b - self.mean
+        self.mean = self.mean + delta * n_b / safe
+        self.m2 = self.m2 + m2_b + delta ** 2 * self.n * n_b / safe
+        self.n = n
+
+    def result(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(mu, sigma) - np.nanmean / np.nanstd(ddof=0)와 같음, 값이 없는 특징은 NaN"""
+        with np.errstate(all="ignore"):
+            mu = np.where(self.n > 0, self.mean, np.nan)
+            sigma = np.where(self.n > 0, np.sqrt(self.m2 / self.n), np.nan)
+        return mu, sigma
+
+
+class FingerprintIndex:
+    """표준화 + 사영된 핑거프린트 행렬 기반 brute-force kNN 인덱스"""
+
+    def __init__(
+        self,
+        step_names: List[str],
+        columns: List[str],
+        mu: np.ndarray,
+        sigma: np.ndarray,
+        projection: Optional[np.ndarray] = None,
+    ):
+        self.step_names = list(step_names)
+        self.columns = list(columns)
+        self.mu = mu
+        self.sigma = sigma
+        self.projection = projection
+        dim = projection.shape[1] if projection is not None else len(mu)
+        self.trace_ids: List[str] = []
+        self._buf = np.empty((0, dim), dtype=np.float32)  # 앞 len(trace_ids)행만 유효
+        self._norm_buf = np.empty(0, dtype=np.float32)
+        self._pos: dict = {}
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """(n_traces, dim) 핑거프린트 행렬 (버퍼의 뷰)"""
+        return self._buf[:len(self.trace_ids)]
+
+    @property
+    def sq_norms(self) -> np.ndarray:
+        return self._norm_buf[:len(self.trace_ids)]
+
+    def _reserve(self, rows: int) -> None:
+        """행 rows개를 더 넣을 수 있게 버퍼 용량을 두 배씩 확장"""
+        n = len(self.trace_ids)
+        if n + rows <= len(self._buf):
+            return
+        capacity = max(n + rows, 2 * len(self._buf), MIN_CAPACITY)
+        buf = np.empty((capacity, self._buf.shape[1]), dtype=np.float32)
+        norms = np.empty(capacity, dtype=np.float32)
+        buf[:n] = self._buf[:n]
+        norms[:n] = self._norm_buf[:n]
+        self._buf, self._norm_buf = buf, norms
+
+    @classmethod
+    def fit(
+        cls,
+        trace_ids: Sequence[str],
+        raw: np.ndarray,
+        step_names: List[str],
+        columns: List[str],
+        dim: int = FINGERPRINT_DIM,
+    ) -> "FingerprintIndex":
+        """raw 핑거프린트로 표준화 파라미터/사영 행렬을 정하고 인덱스 생성"""
+        moments = FeatureMoments(raw.shape[1])
+        moments.update(raw)
+        index = cls.from_moments(step_names, columns, *moments.result(), dim=dim)
+        index.add(trace_ids, raw)
+        return index
+
+    @classmethod
+    def from_moments(
+        cls,
+        step_names: List[str],
+        columns: List[str],
+        mu: np.ndarray,
+        sigma: np.ndarray,
+        dim: int = FINGERPRINT_DIM,
+    ) -> "FingerprintIndex":
+        """특징별 평균/표준편차로 빈 인덱스 생성 (사영 행렬은 고정 시드)"""
+        mu = np.nan_to_num(mu)
+        sigma = np.where(np.isnan(sigma) | (sigma < MIN_SIGMA), 1.0, sigma)
+
+        projection = None
+        if len(mu) > dim:
+            rng = np.random.default_rng(PROJECTION_SEED)
+            projection = (rng.standard_normal((len(mu), dim)) / np.sqrt(dim)).astype(np.float32)
+        return cls(step_names, columns, mu, sigma, projection)
+
+    def transform(self, raw: np.ndarray) -> np.ndarray:
+        """raw 핑거프린트 → 인덱스 공간 (결측은 평균값 = 0으로 대체)"""
+        z = np.nan_to_num((raw - self.mu) / self.sigma).astype(np.float32)
+        if self.projection is not None:
+            z = z @ self.projection
+        return z
+
+    def add(self, trace_ids: Sequence[str], raw: np.ndarray) -> None:
+        """trace 추가 (이미 있으면 갱신)"""
+        vecs = self.transform(raw)
+        norms = np.einsum("ij,ij->i", vecs, vecs)
+        self._reserve(sum(1 for tid in trace_ids if tid not in self._pos))
+        for tid, vec, norm in zip(trace_ids, vecs, norms):
+            i = self._pos.get(tid)
+            if i is None:
+                i = self._pos[tid] = len(self.trace_ids)
+                self.trace_ids.append(tid)
+            self._buf[i] = vec
+            self._norm_buf[i] = norm
+
+    def __contains__(self, trace_id: str) -> bool:
+        return trace_id in self._pos
+
+    def __len__(self) -> int:
+        return len(self.trace_ids)
+
+    def query_vector(self, vec: np.ndarray, k: int = 5, exclude: Optional[str] = None) -> List[Tuple[str, float]]:
+        """인덱스 공간 벡터의 k개 최근접 이웃 [(trace_id, distance), ...]"""
+        if not len(self.trace_ids):
+            return []
+        # ||m - q||² = ||m||² - 2 m·q + ||q||²  (행렬-벡터 곱 1회)
+        d2 = self.sq_norms - 2.0 * (self.matrix @ vec) + float(vec @ vec)
+        if exclude is not None and exclude in self._pos:
+            d2[self._pos[exclude]] = np.inf
+        k = min(k, int(np.isfinite(d2).sum()))
+        if k <= 0:
+            return []
+        top = np.argpartition(d2, k - 1)[:k]
+        top = top[np.argsort(d2[top])]
+        return [(self.trace_ids[i], float(np.sqrt(max(d2[i], 0.0)))) for i in top]
+
+    def query_trace(self, trace_id: str, k: int = 5) -> List[Tuple[str, float]]:
+        """인덱스에 있는 trace와 가장 비슷한 k개 trace (자기 자신 제외)"""
+        if trace_id not in self._pos:
+            raise ValueError(f"핑거프린트 인덱스에 없는 trace_id: {trace_id}")
+        return self.query_vector(self.matrix[self._pos[trace_id]], k, exclude=trace_id)
+
+    def save(self, path: Path = INDEX_FILE) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp.npz")
+        np.savez(
+            tmp,
+            trace_ids=np.asarray(self.trace_ids, dtype=str),
+            step_names=np.asarray(self.step_names, dtype=str),
+            columns=np.asarray(self.columns, dtype=str),
+            mu=self.mu,
+            sigma=self.sigma,
+            projection=self.projection if self.projection is not None else np.empty((0, 0), dtype=np.float32),
+            matrix=self.matrix,
+        )
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: Path = INDEX_FILE) -> "FingerprintIndex":
+        with np.load(path) as data:
+            projection = data["projection"]
+            index = cls(
+                data["step_names"].tolist(),
+                data["columns"].tolist(),
+                data["mu"],
+                data["sigma"],
+                projection if projection.size else None,
+            )
+            index.trace_ids = data["trace_ids"].tolist()
+            index._buf = data["matrix"].astype(np.float32)
+        index._norm_buf = np.einsum("ij,ij->i", index._buf, index._buf)
+        index._pos = {t: i for i, t in enumerate(index.trace_ids)}
+        return index
+
+
+def _aligned_raw(con, trace_ids: Optional[Sequence[str]], step_names: List[str], columns: List[str]) -> Tuple[List[str], np.ndarray]:
+    """인덱스의 (step, column) 배치에 맞춘 raw 핑거프린트"""
+    mean_cube = load_step_cube(con, columns, trace_ids=trace_ids, agg="AVG")
+    std_cube = load_step_cube(con, columns, trace_ids=trace_ids, agg="STDDEV_SAMP")
+    pos = {s: i for i, s in enumerate(mean_cube.step_names)}
+    src = [pos[s] for s in step_names if s in pos]
+    dst = [i for i, s in enumerate(step_names) if s in pos]
+
+    shape = (len(mean_cube.trace_ids), len(step_names), len(columns))
+    mean, std = np.full(shape, np.nan), np.full(shape, np.nan)
+    mean[:, dst, :] = mean_cube.values[:, src, :]
+    std[:, dst, :] = std_cube.values[:, src, :]
+    return mean_cube.trace_ids, raw_fingerprints(mean, std)
+
+
+def build_fingerprint_index(
+    con,
+    columns: Optional[Sequence[str]] = None,
+    batch: int = FINGERPRINT_BATCH,
+) -> FingerprintIndex:
+    """
+    전체 trace로 인덱스 새로 생성
+
+    trace 묶음 단위로 두 번 읽는다 (1차: 표준화 파라미터 누적, 2차: 변환 후 추가).
+    메모리는 묶음 하나의 큐브 + 사영된 float32 행렬만 쓴다.
+    """
+    columns = list(columns) if columns else numeric_columns(con)
+    steps = [r[0] for r in con.execute(f"SELECT DISTINCT step_name FROM {TABLE_NAME} ORDER BY step_name").fetchall()]
+    all_ids = [r[0] for r in con.execute(f"SELECT DISTINCT trace_id FROM {TABLE_NAME} ORDER BY trace_id").fetchall()]
+    batches = [all_ids[i:i + batch] for i in range(0, len(all_ids), batch)]
+
+    moments = FeatureMoments(len(steps) * len(columns) * 2)
+    for ids in batches:
+        moments.update(_aligned_raw(con, ids, steps, columns)[1])
+    index = FingerprintIndex.from_moments(steps, columns, *moments.result())
+    for ids in batches:
+        index.add(*_aligned_raw(con, ids, steps, columns))
+    return index
+
+
+def _new_steps(con, trace_ids: Sequence[str], known: Sequence[str]) -> List[str]:
+    """trace_ids에 나타나지만 인덱스 step 목록에는 없는 step"""
+    placeholders = ",".join("?" for _ in trace_ids)
+    steps = con.execute(
+        f"SELECT DISTINCT step_name FROM {TABLE_NAME} WHERE trace_id IN ({placeholders})", list(trace_ids)
+    ).fetchall()
+    known = set(known)
+    return sorted(s for (s,) in steps if s not in known)
+
+
+def update_fingerprint_index(con, path: Path = INDEX_FILE, rebuild: bool = False) -> int:
+    """
+    ingest 후 인덱스 증분 갱신 (신규 trace만 핑거프린트 계산 후 추가)
+
+    신규 trace에 인덱스가 모르는 step이 있으면 특징 배치가 바뀌므로 전체 재생성한다
+    (그대로 추가하면 그 step의 특징이 조용히 빠짐).
+
+    Returns:
+        추가된 trace 수 (재생성하면 전체 trace 수)
+    """
+    if rebuild or not path.exists():
+        index = build_fingerprint_index(con)
+        index.save(path)
+        return len(index)
+
+    index = FingerprintIndex.load(path)
+    all_ids = [r[0] for r in con.execute(f"SELECT DISTINCT trace_id FROM {TABLE_NAME}").fetchall()]
+    new_ids = [t for t in all_ids if t not in index]
+    if not new_ids:
+        return 0
+    unseen = _new_steps(con, new_ids, index.step_names)
+    if unseen:
+        print(f"⚠️  핑거프린트 인덱스에 없는 step {unseen} → 전체 재생성")
+        index = build_fingerprint_index(con, index.columns)
+        index.save(path)
+        return len(index)
+    trace_ids, raw = _aligned_raw(con, new_ids, index.step_names, index.columns)
+    index.add(trace_ids, raw)
+    index.save(path)
+    return len(trace_ids)
+
+
+# 프로세스 내 인덱스 캐시 (파일 mtime이 바뀌면 다시 로드)
+_index_cache: Optional[Tuple[float, FingerprintIndex]] = None
+
+
+def get_fingerprint_index(path: Path = INDEX_FILE) -> FingerprintIndex:
+    """저장된 인덱스 로드 (캐싱)"""
+    global _index_cache
+    if not path.exists():
+        raise FileNotFoundError(f"핑거프린트 인덱스가 없습니다: {path}\n해결책: python -m src.analysis.fingerprint 실행 필요")
+    mtime = path.stat().st_mtime
+    if _index_cache is None or _index_cache[0] != mtime:
+        _index_cache = (mtime, FingerprintIndex.load(path))
+    return _index_cache[1]
+
+
+def build_similar_traces_sql(p, index: Optional[FingerprintIndex] = None) -> Tuple[str, List]:
+    """
+    유사 trace top-k: kNN 결과를 VALUES 절로 반환 (다른 빌더와 동일한 (sql, params) 계약)
+
+    결과 스키마: trace_id, value(핑거프린트 거리, 작을수록 유사), rank
+    """
+    if not p.trace_id:
+        raise ValueError("유사 공정 검색에는 기준 trace_id가 필요합니다 (예: standard_trace_042와 비슷한 공정 top5)")
+
+    if index is None:
+        index = get_fingerprint_index()
+    k = getattr(p, "top_n", None) or getattr(p, "limit", None) or 5
+    neighbors = index.query_trace(p.trace_id, int(k))
+    if not neighbors:
+        return "SELECT NULL::VARCHAR AS trace_id, NULL::DOUBLE AS value, NULL::INTEGER AS rank LIMIT 0", []
+
+    values_sql = ", ".join("(?, ?, ?)" for _ in neighbors)
+    params: List = []
+    for rank, (tid, dist) in enumerate(neighbors, 1):
+        params.extend([tid, dist, rank])
+    sql = f"""
+    SELECT trace_id, value, rank
+    FROM (VALUES {values_sql}) AS knn(trace_id, value, rank)
+    ORDER BY rank
+    """
+    return sql, params
+
+
+def main():
+    import duckdb  # type: ignore
+
+    rebuild = "--rebuild" in sys.argv[1:]
+    con = duckdb.connect(str(DB), read_only=True)
+    try:
+        n = update_fingerprint_index(con, rebuild=rebuild)
+        print(f"✅ 핑거프린트 인덱스 갱신 완료 (추가 {n}개 trace): {INDEX_FILE}")
+    finally:
+        con.close()
+
+
+if __name__ == "__main__":
+    main()
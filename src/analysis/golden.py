@@ -0,0 +1,360 @@
+"""
+골든 트레이스 기준 프로파일과 편차 점수
+
+흐름:
+1. register_golden_traces(): 기준(blessed) trace 등록 → golden_traces
+2. build_golden_envelope(): 골든 trace들의 (step, column)별 기준 구간 계산 → golden_envelope
+   - sigma: mean ± k·std
+   - percentile: [p_lo, p_hi] 구간 (중심은 중앙값)
+3. score_traces(): 모든 수치형 컬럼에 대해 벡터화된 편차 점수 계산 → trace_deviation
+   - z = (x - center) / half_width  (|z| > 1 이면 구간 밖)
+   - score = RMS(z), max_z, 구간 밖 셀 비율, 가장 큰 편차의 step/column
+
+사용법:
+    python -m src.analysis.golden register standard_trace_001 standard_trace_002
+    python -m src.analysis.golden register standard_trace_001 --method percentile
+    python -m src.analysis.golden score
+"""
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+
+from src.analysis.step_stats import load_step_cube, numeric_columns
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+DB = PROJECT_ROOT / "data_out" / "ald.duckdb"
+
+GOLDEN_TABLE = "golden_traces"
+ENVELOPE_TABLE = "golden_envelope"
+DEVIATION_TABLE = "trace_deviation"
+
+DEFAULT_K = 3.0
+DEFAULT_PERCENTILES = (5.0, 95.0)
+
+# 구간 폭이 0에 가까울 때(골든 1개, 상수 신호) 나눗셈 폭주 방지용 최소 반폭
+MIN_HALF_WIDTH_REL = 0.01  # |center|의 1%
+MIN_HALF_WIDTH_ABS = 1e-6
+
+
+def _ensure_tables(con) -> None:
+    con.execute(f"""
+        CREATE TABLE IF NOT EXISTS {GOLDEN_TABLE} (
+            trace_id VARCHAR PRIMARY KEY,
+            registered_at TIMESTAMP
+        )
+    """)
+
+
+def _table_exists(con, name: str) -> bool:
+    return con.execute(
+        "SELECT COUNT(*) FROM information_schema.tables WHERE table_name = ?", [name]
+    ).fetchone()[0] > 0
+
+
+def get_golden_traces(con) -> List[str]:
+    """등록된 골든 trace 목록"""
+    if not _table_exists(con, GOLDEN_TABLE):
+        return []
+    return [r[0] for r in con.execute(f"SELECT trace_id FROM {GOLDEN_TABLE} ORDER BY trace_id").fetchall()]
+
+
+def compute_envelope(
+    golden_values: np.ndarray,
+    method: str = "sigma",
+    k: float = DEFAULT_K,
+    percentiles: Tuple[float, float] = DEFAULT_PERCENTILES,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    골든 trace 배열로 기준 구간 계산
+
+    Args:
+        golden_values: shape (n_golden, n_steps, n_columns)
+        method: "sigma" | "percentile"
+
+    Returns:
+        (center, lower, upper): 각 shape (n_steps, n_columns)
+    """
+    with np.errstate(all="ignore"):
+        if method == "sigma":
+            center = np.nanmean(golden_values, axis=0)
+            if golden_values.shape[0] > 1:
+                std = np.nan_to_num(np.nanstd(golden_values, axis=0, ddof=1))
+            else:
+                std = np.zeros_like(center)
+            lower, upper = center - k * std, center + k * std
+        elif method == "percentile":
+            center = np.nanmedian(golden_values, axis=0)
+            lower = np.nanpercentile(golden_values, percentiles[0], axis=0)
+            upper = np.nanpercentile(golden_values, percentiles[1], axis=0)
+        else:
+            raise ValueError(f"지원하지 않는 envelope 방식: {method}")
+    return center, lower, upper
+
+
+def deviation_scores(
+    values: np.ndarray,
+    center: np.ndarray,
+    lower: np.ndarray,
+    upper: np.ndarray,
+) -> dict:
+    """
+    trace별 편차 점수 (벡터화)
+
+    Args:
+        values: shape (n_traces, n_steps, n_columns)
+        center/lower/upper: shape (n_steps, n_columns)
+
+    Returns:
+        {"z": (n_traces, n_steps, n_columns), "score", "max_z", "outside_ratio",
+         "worst_step_idx", "worst_col_idx", "n_cells"} (각 shape (n_traces,))
+    """
+    half = (upper - lower) / 2.0
+    floor = np.maximum(np.abs(center) * MIN_HALF_WIDTH_REL, MIN_HALF_WIDTH_ABS)
+    half = np.where(np.isnan(half), np.nan, np.maximum(half, floor))
+
+    with np.errstate(all="ignore"):
+        z = (values - center[None, :, :]) / half[None, :, :]
+    abs_z = np.abs(z)
+    valid = ~np.isnan(abs_z)
+    n_cells = valid.reshape(len(values), -1).sum(axis=1)
+
+    flat = np.where(valid, abs_z, -np.inf).reshape(len(values), -1)
+    worst = flat.argmax(axis=1)
+    max_z = flat.max(axis=1)
+    n_cols = values.shape[2]
+
+    with np.errstate(all="ignore"):
+        score = np.sqrt(np.nansum(z ** 2, axis=(1, 2)) / n_cells)
+        outside = np.where(valid, abs_z > 1.0, False).reshape(len(values), -1).sum(axis=1) / n_cells
+
+    empty = n_cells == 0
+    return {
+        "z": z,
+        "score": np.where(empty, np.nan, score),
+        "max_z": np.where(empty, np.nan, max_z),
+        "outside_ratio": np.where(empty, np.nan, outside),
+        "worst_step_idx": worst // n_cols,
+        "worst_col_idx": worst % n_cols,
+        "n_cells": n_cells,
+    }
+
+
+def build_golden_envelope(
+    con,
+    method: str = "sigma",
+    k: float = DEFAULT_K,
+    percentiles: Tuple[float, float] = DEFAULT_PERCENTILES,
+) -> int:
+    """
+    등록된 골든 trace로 golden_envelope 테이블 재생성
+
+    Returns:
+        생성된 (step, column) 구간 수
+    """
+    golden = get_golden_traces(con)
+    if not golden:
+        raise ValueError("등록된 골든 trace가 없습니다. register_golden_traces()를 먼저 실행하세요.")
+
+    columns = numeric_columns(con)
+    cube = load_step_cube(con, columns, trace_ids=golden)
+    center, lower, upper = compute_envelope(cube.values, method, k, percentiles)
+
+    s_idx, c_idx = np.meshgrid(np.arange(len(cube.step_names)), np.arange(len(columns)), indexing="ij")
+    envelope = pd.DataFrame({
+        "step_name": np.asarray(cube.step_names)[s_idx.ravel()],
+        "column_name": np.asarray(columns)[c_idx.ravel()],
+        "center": center.ravel(),
+        "lower": lower.ravel(),
+        "upper": upper.ravel(),
+        "n_golden": np.sum(~np.isnan(cube.values), axis=0).ravel(),
+    })
+    envelope = envelope[~envelope["center"].isna()]
+    envelope["method"] = method
+    envelope["k"] = float(k) if method == "sigma" else np.nan
+
+    con.register("_golden_envelope_df", envelope)
+    try:
+        con.execute(f"CREATE OR REPLACE TABLE {ENVELOPE_TABLE} AS SELECT * FROM _golden_envelope_df")
+    finally:
+        con.unregister("_golden_envelope_df")
+    return len(envelope)
+
+
+def _load_envelope(con) -> Tuple[List[str], List[str], np.ndarray, np.ndarray, np.ndarray]:
+    df = con.execute(f"SELECT step_name, column_name, center, lower, upper FROM {ENVELOPE_TABLE}").df()
+    steps, s_idx = np.unique(df["step_name"].to_numpy(dtype=str), return_inverse=True)
+    cols, c_idx = np.unique(df["column_name"].to_numpy(dtype=str), return_inverse=True)
+    shape = (len(steps), len(cols))
+    center, lower, upper = (np.full(shape, np.nan) for _ in range(3))
+    center[s_idx, c_idx] = df["center"].to_numpy(dtype=float)
+    lower[s_idx, c_idx] = df["lower"].to_numpy(dtype=float)
+    upper[s_idx, c_idx] = df["upper"].to_numpy(dtype=float)
+    return steps.tolist(), cols.tolist(), center, lower, upper
+
+
+def score_traces(con, trace_ids: Optional[Sequence[str]] = None, only_new: bool = False) -> int:
+    """
+    trace별 편차 점수를 계산하여 trace_deviation 테이블에 반영 (upsert)
+
+    Args:
+        con: DuckDB connection
+        trace_ids: 대상 trace (None이면 전체)
+        only_new: True면 아직 점수가 없는 trace만 계산 (ingest 시 증분 처리)
+
+    Returns:
+        점수가 계산된 trace 수
+    """
+    if not _table_exists(con, ENVELOPE_TABLE):
+        raise ValueError("golden_envelope가 없습니다. build_golden_envelope()를 먼저 실행하세요.")
+
+    steps, columns, center, lower, upper = _load_envelope(con)
+
+    if only_new and _table_exists(con, DEVIATION_TABLE):
+        scored = {r[0] for r in con.execute(f"SELECT trace_id FROM {DEVIATION_TABLE}").fetchall()}
+        all_ids = [r[0] for r in con.execute("SELECT DISTINCT trace_id FROM traces_dedup").fetchall()]
+        trace_ids = [t for t in (trace_ids or all_ids) if t not in scored]
+        if not trace_ids:
+            return 0
+
+    cube = load_step_cube(con, columns, trace_ids=trace_ids)
+    if not cube.trace_ids:
+        return 0
+
+    # envelope의 step 순서에 맞춰 정렬 (envelope에 없는 step은 제외)
+    step_pos = {s: i for i, s in enumerate(cube.step_names)}
+    aligned = np.full((len(cube.trace_ids), len(steps), len(columns)), np.nan)
+    src = [step_pos[s] for s in steps if s in step_pos]
+    dst = [i for i, s in enumerate(steps) if s in step_pos]
+    aligned[:, dst, :] = cube.values[:, src, :]
+
+    result = deviation_scores(aligned, center, lower, upper)
+    has_cells = result["n_cells"] > 0
+    scores = pd.DataFrame({
+        "trace_id": cube.trace_ids,
+        "score": result["score"],
+        "max_z": result["max_z"],
+        "outside_ratio": result["outside_ratio"] * 100.0,
+        "worst_step": np.where(has_cells, np.asarray(steps, dtype=object)[result["worst_step_idx"]], None),
+        "worst_column": np.where(has_cells, np.asarray(columns, dtype=object)[result["worst_col_idx"]], None),
+        "n_cells": result["n_cells"],
+    })
+    scores["computed_at"] = datetime.now()
+
+    con.register("_trace_deviation_df", scores)
+    try:
+        if _table_exists(con, DEVIATION_TABLE):
+            con.execute(f"DELETE FROM {DEVIATION_TABLE} WHERE trace_id IN (SELECT trace_id FROM _trace_deviation_df)")
+            con.execute(f"INSERT INTO {DEVIATION_TABLE} SELECT * FROM _trace_deviation_df")
+        else:
+            con.execute(f"CREATE TABLE {DEVIATION_TABLE} AS SELECT * FROM _trace_deviation_df")
+    finally:
+        con.unregister("_trace_deviation_df")
+    return len(scores)
+
+
+def register_golden_traces(
+    con,
+    trace_ids: Sequence[str],
+    method: str = "sigma",
+    k: float = DEFAULT_K,
+    replace: bool = False,
+) -> int:
+    """
+    골든 trace 등록 → envelope 재계산 → 전체 trace 재채점
+
+    Args:
+        replace: True면 기존 골든 목록을 교체
+
+    Returns:
+        점수가 계산된 trace 수
+    """
+    if not trace_ids:
+        raise ValueError("등록할 trace_id가 필요합니다")
+
+    known = {r[0] for r in con.execute("SELECT DISTINCT trace_id FROM traces_dedup").fetchall()}
+    missing = [t for t in trace_ids if t not in known]
+    if missing:
+        raise ValueError(f"존재하지 않는 trace_id: {', '.join(missing)}")
+
+    _ensure_tables(con)
+    if replace:
+        con.execute(f"DELETE FROM {GOLDEN_TABLE}")
+    now = datetime.now()
+    for t in trace_ids:
+        con.execute(f"INSERT OR REPLACE INTO {GOLDEN_TABLE} VALUES (?, ?)", [t, now])
+
+    build_golden_envelope(con, method=method, k=k)
+    return score_traces(con)
+
+
+def refresh_on_ingest(con) -> int:
+    """전처리(ingest) 후 호출: 골든 envelope가 있으면 새 trace만 채점"""
+    if not _table_exists(con, ENVELOPE_TABLE):
+        return 0
+    return score_traces(con, only_new=True)
+
+
+def build_golden_deviation_sql(p) -> Tuple[str, List]:
+    """골든 대비 편차 랭킹: trace_deviation 테이블 조회"""
+    where_sql, params = "", []
+    if p.trace_id:
+        where_sql = "WHERE trace_id = ?"
+        params = [p.trace_id]
+
+    sql = f"""
+    SELECT
+        trace_id,
+        score AS value,
+        max_z,
+        outside_ratio,
+        worst_step,
+        worst_column,
+        n_cells AS n
+    FROM {DEVIATION_TABLE}
+    {where_sql}
+    ORDER BY value DESC
+    """
+    top_n = getattr(p, "top_n", None) or getattr(p, "limit", None)
+    if top_n:
+        sql += f" LIMIT {int(top_n)}"
+    return sql, params
+
+
+def main():
+    import duckdb  # type: ignore
+
+    args = sys.argv[1:]
+    if not args or args[0] not in ("register", "score"):
+        print("사용법: python -m src.analysis.golden register <trace_id>... [--method sigma|percentile] [--k 3.0] [--replace]")
+        print("        python -m src.analysis.golden score")
+        return
+
+    con = duckdb.connect(str(DB))
+    try:
+        if args[0] == "register":
+            method, k, replace, ids = "sigma", DEFAULT_K, False, []
+            it = iter(args[1:])
+            for a in it:
+                if a == "--method":
+                    method = next(it)
+                elif a == "--k":
+                    k = float(next(it))
+                elif a == "--replace":
+                    replace = True
+                else:
+                    ids.append(a)
+            n = register_golden_traces(con, ids, method=method, k=k, replace=replace)
+            print(f"✅ 골든 trace {len(get_golden_traces(con))}개 기준으로 {n}개 trace 채점 완료")
+        else:
+            n = score_traces(con)
+            print(f"✅ {n}개 trace 채점 완료")
+    finally:
+        con.close()
+
+
+if __name__ == "__main__":
+    main()
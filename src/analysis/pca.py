@@ -0,0 +1,342 @@
+"""
+step별 PCA 다변량 이상 점수 (Hotelling T² / SPE)
+
+단일 컬럼 z-score로는 안 보이는 "센서 간 관계가 깨진" 이상을 잡기 위해,
+step_name마다 trace별 step 평균(모든 수치형 컬럼)으로 PCA 모델을 적합하고 점수를 매긴다.
+
+모델 (step마다):
+- 컬럼 표준화 (상수/결측 컬럼 제외, 결측은 평균 대체)
+- SVD → 누적 설명분산 VARIANCE_TARGET 이상이 되는 주성분 k개 (MAX_COMPONENTS 이하)
+- T² = Σ t_i² / λ_i,  SPE = ||x - x̂||²
+- 관리 한계 (99%): T²는 χ²(k), SPE는 Box 근사 g·χ²(h) (g = v/2m, h = 2m²/v)
+  χ² 분위는 Wilson-Hilferty 근사 (scipy 없이)
+- 기여도: T²는 x_j · Σ_i t_i p_ji / λ_i, SPE는 잔차 e_j²
+
+테이블:
+- pca_models(step_name, column_name, mean, scale, loadings DOUBLE[])
+- pca_limits(step_name, n_components, eigenvalues DOUBLE[], t2_limit, spe_limit, n_train)
+- pca_scores(trace_id, step_name, t2, spe, t2_limit, spe_limit, t2_top_columns, spe_top_columns)
+
+사용법:
+    python -m src.analysis.pca fit     # 모델 (재)적합 후 전체 채점
+    python -m src.analysis.pca score   # 기존 모델로 신규 trace만 채점
+"""
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+
+from src.analysis.step_stats import load_step_cube, numeric_columns, TABLE_NAME
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+DB = PROJECT_ROOT / "data_out" / "ald.duckdb"
+
+MODELS_TABLE = "pca_models"
+LIMITS_TABLE = "pca_limits"
+SCORES_TABLE = "pca_scores"
+
+VARIANCE_TARGET = 0.9
+MAX_COMPONENTS = 10
+MIN_TRAIN_TRACES = 5
+CONFIDENCE_Z = 2.326  # 99% 단측 정규 분위
+TOP_CONTRIBUTORS = 3
+MIN_SCALE = 1e-9
+
+
+def chi2_quantile(df: float, z: float = CONFIDENCE_Z) -> float:
+    """χ² 분위 Wilson-Hilferty 근사"""
+    if df <= 0:
+        return 0.0
+    a = 2.0 / (9.0 * df)
+    return float(df * (1.0 - a + z * np.sqrt(a)) ** 3)
+
+
+class StepPCA:
+    """한 step의 PCA 모델"""
+
+    def __init__(self, columns: List[str], mean: np.ndarray, scale: np.ndarray, loadings: np.ndarray, eigenvalues: np.ndarray):
+        self.columns = columns
+        self.mean = mean
+        self.scale = scale
+        self.loadings = loadings          # shape (n_cols, k)
+        self.eigenvalues = eigenvalues    # shape (k,)
+        self.t2_limit = chi2_quantile(len(eigenvalues))
+        self.spe_limit = np.nan
+        self.n_train = 0
+
+    @classmethod
+    def fit(cls, x: np.ndarray, columns: Sequence[str]) -> "StepPCA":
+        """
+        Args:
+            x: shape (n_traces, n_cols), 결측은 NaN
+        """
+        with np.errstate(all="ignore"):
+            mean = np.nanmean(x, axis=0)
+            scale = np.nanstd(x, axis=0, ddof=1)
+        keep = ~np.isnan(mean) & (np.nan_to_num(scale) > MIN_SCALE)
+        columns = [c for c, k in zip(columns, keep) if k]
+        mean, scale = mean[keep], scale[keep]
+        z = np.nan_to_num((x[:, keep] - mean) / scale)
+
+        n = len(z)
+        _, sv, vt = np.linalg.svd(z, full_matrices=False)
+        eig = sv ** 2 / max(n - 1, 1)
+        total = eig.sum()
+        if total > 0:
+            k = int(np.searchsorted(np.cumsum(eig) / total, VARIANCE_TARGET) + 1)
+        else:
+            k = 1
+        k = max(1, min(k, MAX_COMPONENTS, n - 1, len(eig)))
+
+        model = cls(list(columns), mean, scale, vt[:k].T, np.maximum(eig[:k], MIN_SCALE))
+        model.n_train = n
+        _, spe, _, _ = model.score(x[:, keep], aligned=True)
+        model.spe_limit = spe_limit(spe)
+        return model
+
+    def align(self, x: np.ndarray, columns: Sequence[str]) -> np.ndarray:
+        """입력 컬럼 순서를 모델 컬럼 순서로 맞춤 (없는 컬럼은 NaN → 평균 대체)"""
+        pos = {c: i for i, c in enumerate(columns)}
+        out = np.full((len(x), len(self.columns)), np.nan)
+        for j, c in enumerate(self.columns):
+            if c in pos:
+                out[:, j] = x[:, pos[c]]
+        return out
+
+    def score(self, x: np.ndarray, columns: Sequence[str] = (), aligned: bool = False) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Returns:
+            (t2, spe, t2_contrib, spe_contrib): 기여도는 shape (n_traces, n_model_cols)
+        """
+        if not aligned:
+            x = self.align(x, columns)
+        z = np.nan_to_num((x - self.mean) / self.scale)
+        t = z @ self.loadings
+        t2 = np.sum(t ** 2 / self.eigenvalues, axis=1)
+        resid = z - t @ self.loadings.T
+        spe_contrib = resid ** 2
+        t2_contrib = z * ((t / self.eigenvalues) @ self.loadings.T)
+        return t2, spe_contrib.sum(axis=1), t2_contrib, spe_contrib
+
+
+def spe_limit(spe: np.ndarray) -> float:
+    """Box 근사 SPE 관리 한계: g·χ²(h), g = v/(2m), h = 2m²/v"""
+    m, v = float(np.mean(spe)), float(np.var(spe, ddof=1)) if len(spe) > 1 else 0.0
+    if m <= 0 or v <= 0:
+        return float(np.max(spe)) if len(spe) else 0.0
+    g, h = v / (2.0 * m), 2.0 * m * m / v
+    return g * chi2_quantile(h)
+
+
+def _top_columns(contrib: np.ndarray, columns: Sequence[str], k: int = TOP_CONTRIBUTORS) -> List[str]:
+    """행별 기여도 상위 k개 컬럼명 (쉼표 구분)"""
+    if not len(columns):
+        return [""] * len(contrib)
+    k = min(k, len(columns))
+    top = np.argsort(-contrib, axis=1)[:, :k]
+    names = np.asarray(columns, dtype=object)[top]
+    return [",".join(row) for row in names]
+
+
+def _table_exists(con, name: str) -> bool:
+    return con.execute(
+        "SELECT COUNT(*) FROM information_schema.tables WHERE table_name = ?", [name]
+    ).fetchone()[0] > 0
+
+
+def _write_table(con, name: str, df: pd.DataFrame, replace: bool, key: str = "trace_id") -> None:
+    view = f"_{name}_df"
+    con.register(view, df)
+    try:
+        if replace or not _table_exists(con, name):
+            con.execute(f"CREATE OR REPLACE TABLE {name} AS SELECT * FROM {view}")
+        else:
+            con.execute(f"DELETE FROM {name} WHERE {key} IN (SELECT DISTINCT {key} FROM {view})")
+            con.execute(f"INSERT INTO {name} SELECT * FROM {view}")
+    finally:
+        con.unregister(view)
+
+
+def fit_pca_models(con, columns: Optional[Sequence[str]] = None, min_traces: int = MIN_TRAIN_TRACES) -> Dict[str, StepPCA]:
+    """전체 trace의 step 평균으로 step별 PCA 모델 적합 → pca_models / pca_limits 저장"""
+    columns = list(columns) if columns else numeric_columns(con)
+    cube = load_step_cube(con, columns)
+
+    models: Dict[str, StepPCA] = {}
+    for s, step in enumerate(cube.step_names):
+        x = cube.values[:, s, :]
+        x = x[~np.isnan(x).all(axis=1)]
+        if len(x) < min_traces:
+            continue
+        model = StepPCA.fit(x, columns)
+        if model.columns:
+            models[step] = model
+
+    model_rows = pd.DataFrame([
+        {"step_name": step, "column_name": c, "mean": m.mean[j], "scale": m.scale[j], "loadings": m.loadings[j].tolist()}
+        for step, m in models.items() for j, c in enumerate(m.columns)
+    ], columns=["step_name", "column_name", "mean", "scale", "loadings"])
+    limit_rows = pd.DataFrame([
+        {"step_name": step, "n_components": len(m.eigenvalues), "eigenvalues": m.eigenvalues.tolist(),
+         "t2_limit": m.t2_limit, "spe_limit": m.spe_limit, "n_train": m.n_train}
+        for step, m in models.items()
+    ], columns=["step_name", "n_components", "eigenvalues", "t2_limit", "spe_limit", "n_train"])
+    _write_table(con, MODELS_TABLE, model_rows, replace=True)
+    _write_table(con, LIMITS_TABLE, limit_rows, replace=True)
+    return models
+
+
+def load_pca_models(con) -> Dict[str, StepPCA]:
+    """저장된 step별 PCA 모델 로드"""
+    if not (_table_exists(con, MODELS_TABLE) and _table_exists(con, LIMITS_TABLE)):
+        return {}
+    rows = con.execute(f"SELECT step_name, column_name, mean, scale, loadings FROM {MODELS_TABLE}").df()
+    limits = con.execute(f"SELECT * FROM {LIMITS_TABLE}").df().set_index("step_name")
+
+    models: Dict[str, StepPCA] = {}
+    for step, g in rows.groupby("step_name", sort=False):
+        lim = limits.loc[step]
+        model = StepPCA(
+            g["column_name"].tolist(),
+            g["mean"].to_numpy(dtype=float),
+            g["scale"].to_numpy(dtype=float),
+            np.vstack([np.asarray(v, dtype=float) for v in g["loadings"]]),
+            np.asarray(lim["eigenvalues"], dtype=float),
+        )
+        model.t2_limit = float(lim["t2_limit"])
+        model.spe_limit = float(lim["spe_limit"])
+        model.n_train = int(lim["n_train"])
+        models[step] = model
+    return models
+
+
+def score_pca(con, models: Optional[Dict[str, StepPCA]] = None, trace_ids: Optional[Sequence[str]] = None, only_new: bool = False) -> int:
+    """
+    trace별 step T² / SPE 채점 → pca_scores (trace 단위 upsert)
+
+    Returns:
+        채점된 trace 수
+    """
+    models = models if models is not None else load_pca_models(con)
+    if not models:
+        return 0
+
+    exists = _table_exists(con, SCORES_TABLE)
+    if only_new and exists:
+        done = {r[0] for r in con.execute(f"SELECT DISTINCT trace_id FROM {SCORES_TABLE}").fetchall()}
+        all_ids = [r[0] for r in con.execute(f"SELECT DISTINCT trace_id FROM {TABLE_NAME}").fetchall()]
+        trace_ids = [t for t in (trace_ids or all_ids) if t not in done]
+        if not trace_ids:
+            return 0
+
+    columns = sorted({c for m in models.values() for c in m.columns})
+    cube = load_step_cube(con, columns, trace_ids=trace_ids)
+    if not cube.trace_ids:
+        return 0
+
+    frames = []
+    trace_arr = np.asarray(cube.trace_ids, dtype=object)
+    for s, step in enumerate(cube.step_names):
+        model = models.get(step)
+        if model is None:
+            continue
+        x = cube.values[:, s, :]
+        present = ~np.isnan(x).all(axis=1)
+        if not present.any():
+            continue
+        t2, spe, t2_c, spe_c = model.score(x[present], columns)
+        frames.append(pd.DataFrame({
+            "trace_id": trace_arr[present],
+            "step_name": step,
+            "t2": t2,
+            "spe": spe,
+            "t2_limit": model.t2_limit,
+            "spe_limit": model.spe_limit,
+            "t2_top_columns": _top_columns(t2_c, model.columns),
+            "spe_top_columns": _top_columns(spe_c, model.columns),
+        }))
+    if not frames:
+        return 0
+    scores = pd.concat(frames, ignore_index=True)
+    _write_table(con, SCORES_TABLE, scores, replace=not exists or (trace_ids is None and not only_new))
+    return int(scores["trace_id"].nunique())
+
+
+def refresh_on_ingest(con) -> int:
+    """전처리(ingest) 후 호출: 모델이 없으면 적합 후 전체 채점, 있으면 신규 trace만 채점"""
+    models = load_pca_models(con)
+    if not models:
+        models = fit_pca_models(con)
+        return score_pca(con, models)
+    return score_pca(con, models, only_new=True)
+
+
+def build_pca_anomaly_sql(p) -> Tuple[str, List]:
+    """
+    다변량 이상 공정 랭킹: pca_scores 조회
+
+    value = step 중 최대 max(T²/한계, SPE/한계) (1 초과면 관리 한계 밖)
+    결과 스키마: trace_id, value, worst_step, t2, spe, top_columns, n(채점 step 수)
+    """
+    where, params = [], []
+    if p.trace_id:
+        where.append("trace_id = ?")
+        params.append(p.trace_id)
+    if p.step_name:
+        where.append("step_name = ?")
+        params.append(p.step_name)
+    where_sql = f"WHERE {' AND '.join(where)}" if where else ""
+
+    sql = f"""
+    WITH ratio AS (
+        SELECT
+            *,
+            GREATEST(t2 / NULLIF(t2_limit, 0), spe / NULLIF(spe_limit, 0)) AS r,
+            CASE WHEN spe / NULLIF(spe_limit, 0) >= t2 / NULLIF(t2_limit, 0)
+                 THEN spe_top_columns ELSE t2_top_columns END AS top_columns
+        FROM {SCORES_TABLE}
+        {where_sql}
+    )
+    SELECT
+        trace_id,
+        MAX(r) AS value,
+        arg_max(step_name, r) AS worst_step,
+        arg_max(t2, r) AS t2,
+        arg_max(spe, r) AS spe,
+        arg_max(top_columns, r) AS top_columns,
+        COUNT(*) AS n
+    FROM ratio
+    GROUP BY trace_id
+    ORDER BY value DESC
+    """
+    top_n = getattr(p, "top_n", None) or getattr(p, "limit", None)
+    if top_n:
+        sql += f" LIMIT {int(top_n)}"
+    return sql, params
+
+
+def main():
+    import duckdb  # type: ignore
+
+    args = sys.argv[1:]
+    if not args or args[0] not in ("fit", "score"):
+        print("사용법: python -m src.analysis.pca fit | score")
+        return
+
+    con = duckdb.connect(str(DB))
+    try:
+        if args[0] == "fit":
+            models = fit_pca_models(con)
+            n = score_pca(con, models)
+            print(f"✅ step {len(models)}개 PCA 모델 적합, {n}개 trace 채점 완료")
+        else:
+            n = score_pca(con, only_new=True)
+            print(f"✅ {n}개 trace 채점 완료")
+    finally:
+        con.close()
+
+
+if __name__ == "__main__":
+    main()
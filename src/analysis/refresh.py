@@ -0,0 +1,61 @@
+"""
+사전 계산 분석 테이블 일괄 갱신 (ingest 후 1회)
+
+preprocess_duckdb, create_dummy_data --analysis, 벤치마크(--generate)가 같은 순서로 갱신하도록
+한 곳에 모아 둔다. 순서가 중요하다: step_segments → step_profiles → 골든 편차 → 핑거프린트 →
+SPC → PCA → setpoint 지표 (뒤 단계가 앞 단계 테이블을 읽음). 모두 신규 trace만 증분 갱신.
+
+사용법:
+    python -m src.analysis.refresh
+"""
+from pathlib import Path
+from typing import Dict
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+DB = PROJECT_ROOT / "data_out" / "ald.duckdb"
+
+
+def refresh_analysis_tables(con, verbose: bool = True) -> Dict[str, int]:
+    """
+    ingest 후 분석용 사전 계산 테이블 갱신
+
+    Returns:
+        {단계 이름: 새로 처리한 trace 수}
+    """
+    from src.analysis.fingerprint import update_fingerprint_index
+    from src.analysis.golden import refresh_on_ingest
+    from src.analysis.pca import refresh_on_ingest as refresh_pca_on_ingest
+    from src.analysis.resample import build_step_profiles
+    from src.analysis.segments import build_step_segments
+    from src.analysis.setpoint import build_setpoint_metrics
+    from src.analysis.spc import update_spc
+
+    stages = (
+        ("segments", "step 구간 테이블 생성 완료", lambda: build_step_segments(con, only_new=True)),
+        ("profiles", "스텝 정렬 프로파일 생성 완료", lambda: build_step_profiles(con, only_new=True)),
+        ("golden", "골든 대비 편차 점수 계산 완료", lambda: refresh_on_ingest(con)),
+        ("fingerprint", "핑거프린트 인덱스 갱신 완료", lambda: update_fingerprint_index(con)),
+        ("spc", "SPC 관리도 갱신 완료", lambda: update_spc(con)),
+        ("pca", "PCA 다변량 이상 점수 계산 완료", lambda: refresh_pca_on_ingest(con)),
+        ("setpoint", "설정값 추종 지표 계산 완료", lambda: build_setpoint_metrics(con, only_new=True)),
+    )
+    counts: Dict[str, int] = {}
+    for name, message, run in stages:
+        counts[name] = int(run() or 0)
+        if verbose and counts[name]:
+            print(f"✅ {message} (신규 trace {counts[name]}개)")
+    return counts
+
+
+def main():
+    import duckdb  # type: ignore
+
+    con = duckdb.connect(str(DB))
+    try:
+        refresh_analysis_tables(con)
+    finally:
+        con.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+"""
+스텝 정렬 리샘플링: (trace, step) 구간을 정규화된 진행률 축에 재표본화
+
+step 길이가 run마다 달라 raw timestamp로는 trace 간 비교가 불가능하다.
+각 step 구간을 0~100% 진행률 축의 N개 점으로 선형 보간해
+고정 길이 배열로 저장하면, 수백 개 run의 point-wise overlay/envelope/거리가
+단순 배열 연산이 된다.
+
+구간은 step_segments와 같은 run-length 규칙(trace 안 timestamp 순으로 step_name이 바뀔 때마다 새 구간,
+같은 step 재방문은 별도 seq_no)이라 방문 사이 공백을 가로질러 보간하지 않는다.
+
+저장: step_profiles(trace_id, seq_no, step_name, column_name, duration_s, n_rows, profile FLOAT[N])
+
+사용법:
+    python -m src.analysis.resample            # 아직 프로파일이 없는 trace만
+    python -m src.analysis.resample --rebuild  # 전체 재생성
+"""
+import sys
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+
+from src.analysis.step_stats import numeric_columns, TABLE_NAME
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+DB = PROJECT_ROOT / "data_out" / "ald.duckdb"
+
+PROFILE_TABLE = "step_profiles"
+DEFAULT_POINTS = 64
+TRACE_BATCH = 50  # 한 번에 읽는 trace 수 (메모리 상한)
+
+
+def progress_grid(n_points: int = DEFAULT_POINTS) -> np.ndarray:
+    """정규화 진행률 축 (0.0 ~ 1.0, n_points개)"""
+    return np.linspace(0.0, 1.0, n_points)
+
+
+def resample_segments(
+    seg_idx: np.ndarray,
+    t: np.ndarray,
+    values: np.ndarray,
+    n_points: int = DEFAULT_POINTS,
+) -> np.ndarray:
+    """
+    여러 구간을 한 번에 진행률 축으로 선형 보간 (구간/컬럼 루프 없음)
+
+    Args:
+        seg_idx: 행별 구간 번호 (0..n_seg-1), (seg_idx, t) 순으로 정렬되어 있어야 함
+        t: 행별 시간 (초 등 수치)
+        values: shape (n_rows, n_columns)
+        n_points: 구간당 출력 점 수
+
+    Returns:
+        shape (n_seg, n_points, n_columns)
+    """
+    seg_idx = np.asarray(seg_idx, dtype=np.int64)
+    t = np.asarray(t, dtype=float)
+    values = np.asarray(values, dtype=float)
+    if values.ndim == 1:
+        values = values[:, None]
+    n_seg = int(seg_idx.max()) + 1 if len(seg_idx) else 0
+    if n_seg == 0:
+        return np.empty((0, n_points, values.shape[1]))
+
+    # 구간 경계 (정렬 가정)
+    starts = np.searchsorted(seg_idx, np.arange(n_seg), side="left")
+    ends = np.searchsorted(seg_idx, np.arange(n_seg), side="right") - 1
+    t0, t1 = t[starts], t[ends]
+    span = np.where(t1 > t0, t1 - t0, 1.0)
+
+    # 구간 번호 + 진행률로 전역 단조 키를 만들어 searchsorted 한 번으로 위치 탐색
+    progress = (t - t0[seg_idx]) / span[seg_idx]
+    key = seg_idx * 2.0 + progress
+    grid = progress_grid(n_points)
+    target = (np.arange(n_seg)[:, None] * 2.0 + grid[None, :]).ravel()
+    seg_of_target = np.repeat(np.arange(n_seg), n_points)
+
+    left = np.searchsorted(key, target, side="right") - 1
+    left = np.clip(left, starts[seg_of_target], ends[seg_of_target])
+    right = np.minimum(left + 1, ends[seg_of_target])
+
+    denom = key[right] - key[left]
+    w = np.where(denom > 0, (target - key[left]) / np.where(denom > 0, denom, 1.0), 0.0)
+    w = np.clip(w, 0.0, 1.0)[:, None]
+
+    out = values[left] * (1.0 - w) + values[right] * w
+    return out.reshape(n_seg, n_points, values.shape[1])
+
+
+def _quote(col: str) -> str:
+    return '"' + col.replace('"', '""') + '"'
+
+
+def _table_exists(con, name: str) -> bool:
+    return con.execute(
+        "SELECT COUNT(*) FROM information_schema.tables WHERE table_name = ?", [name]
+    ).fetchone()[0] > 0
+
+
+def _profile_frame(con, trace_ids: Sequence[str], columns: Sequence[str], n_points: int) -> pd.DataFrame:
+    """trace 묶음 하나를 읽어 long-form 프로파일 DataFrame 생성 (구간 = (trace_id, seq_no))"""
+    placeholders = ",".join("?" for _ in trace_ids)
+    select_cols = ", ".join(f"CAST({_quote(c)} AS DOUBLE)" for c in columns)
+    raw = con.execute(f"""
+        SELECT trace_id, step_name, EXTRACT(EPOCH FROM timestamp) AS t, {select_cols}
+        FROM {TABLE_NAME}
+        WHERE trace_id IN ({placeholders})
+        ORDER BY trace_id, timestamp
+    """, list(trace_ids)).fetchnumpy()
+
+    keys = list(raw.keys())
+    trace_col = np.asarray(raw[keys[0]]).astype(str)
+    step_col = np.asarray(raw[keys[1]]).astype(str)
+    if not len(trace_col):
+        return pd.DataFrame()
+
+    t = np.ma.filled(np.ma.asarray(raw[keys[2]], dtype=float), np.nan)
+    vals = np.column_stack([np.ma.filled(np.ma.asarray(raw[k], dtype=float), np.nan) for k in keys[3:]])
+
+    # timestamp 순으로 trace 또는 step이 바뀌는 지점 = 구간 경계 (step_segments와 같은 run-length)
+    new_trace = np.r_[True, trace_col[1:] != trace_col[:-1]]
+    boundary = new_trace | np.r_[True, step_col[1:] != step_col[:-1]]
+    seg_idx = np.cumsum(boundary) - 1
+    first = np.flatnonzero(boundary)
+    last = np.r_[first[1:], len(seg_idx)] - 1
+    # trace 안 구간 순번 (1부터)
+    seg_no = np.arange(len(first))
+    seq_no = seg_no - np.maximum.accumulate(np.where(new_trace[first], seg_no, 0)) + 1
+
+    profiles = resample_segments(seg_idx, t, vals, n_points).astype(np.float32)
+
+    n_seg, n_cols = len(first), len(columns)
+    seg_rep = np.repeat(np.arange(n_seg), n_cols)
+    col_rep = np.tile(np.arange(n_cols), n_seg)
+    return pd.DataFrame({
+        "trace_id": trace_col[first][seg_rep],
+        "seq_no": seq_no.astype(np.int32)[seg_rep],
+        "step_name": step_col[first][seg_rep],
+        "column_name": np.asarray(columns, dtype=object)[col_rep],
+        "duration_s": (t[last] - t[first])[seg_rep],
+        "n_rows": (last - first + 1)[seg_rep],
+        "profile": list(profiles.transpose(0, 2, 1).reshape(n_seg * n_cols, n_points)),
+    })
+
+
+def _needs_rebuild(con, n_points: int) -> bool:
+    """
+    기존 step_profiles가 이전 스키마(seq_no 없음, 가변 길이 FLOAT[])인지
+
+    고정 길이가 n_points와 다르면 ValueError (--rebuild로 다시 만들어야 함)
+    """
+    types = dict(con.execute(
+        "SELECT column_name, data_type FROM information_schema.columns WHERE table_name = ?", [PROFILE_TABLE]
+    ).fetchall())
+    profile_type = types.get("profile", "")
+    if "seq_no" not in types or profile_type.endswith("[]"):
+        return True
+    if profile_type != f"FLOAT[{int(n_points)}]":
+        raise ValueError(f"{PROFILE_TABLE}는 {profile_type}로 만들어져 있습니다 (n_points={n_points}, --rebuild 필요)")
+    return False
+
+
+def build_step_profiles(
+    con,
+    columns: Optional[Sequence[str]] = None,
+    n_points: int = DEFAULT_POINTS,
+    trace_ids: Optional[Sequence[str]] = None,
+    only_new: bool = True,
+) -> int:
+    """
+    step_profiles 테이블 생성/증분 갱신
+
+    Args:
+        columns: 대상 컬럼 (None이면 카탈로그의 수치형 컬럼 전체)
+        n_points: 구간당 점 수
+        trace_ids: 대상 trace (None이면 전체)
+        only_new: True면 아직 프로파일이 없는 trace만 처리
+
+    Returns:
+        처리한 trace 수
+    """
+    columns = list(columns) if columns else numeric_columns(con)
+    if trace_ids is None:
+        trace_ids = [r[0] for r in con.execute(f"SELECT DISTINCT trace_id FROM {TABLE_NAME} ORDER BY trace_id").fetchall()]
+
+    exists = _table_exists(con, PROFILE_TABLE)
+    if exists and _needs_rebuild(con, n_points):
+        # 이전 스키마(같은 step 재방문을 한 구간으로 합침)는 다시 만든다
+        con.execute(f"DROP TABLE {PROFILE_TABLE}")
+        exists = False
+    if exists and only_new:
+        done = {r[0] for r in con.execute(f"SELECT DISTINCT trace_id FROM {PROFILE_TABLE}").fetchall()}
+        trace_ids = [t for t in trace_ids if t not in done]
+    if not trace_ids:
+        return 0
+
+    if not exists:
+        con.execute(f"""
+            CREATE TABLE {PROFILE_TABLE} (
+                trace_id VARCHAR,
+                seq_no INTEGER,
+                step_name VARCHAR,
+                column_name VARCHAR,
+                duration_s DOUBLE,
+                n_rows BIGINT,
+                profile FLOAT[{int(n_points)}]
+            )
+        """)
+
+    for i in range(0, len(trace_ids), TRACE_BATCH):
+        batch = list(trace_ids[i:i + TRACE_BATCH])
+        frame = _profile_frame(con, batch, columns, n_points)
+        if frame.empty:
+            continue
+        placeholders = ",".join("?" for _ in batch)
+        con.execute(f"DELETE FROM {PROFILE_TABLE} WHERE trace_id IN ({placeholders})", batch)
+        con.register("_step_profiles_df", frame)
+        try:
+            con.execute(f"INSERT INTO {PROFILE_TABLE} SELECT * FROM _step_profiles_df")
+        finally:
+            con.unregister("_step_profiles_df")
+    return len(trace_ids)
+
+
+def load_profiles(
+    con,
+    step_name: str,
+    column: str,
+    trace_ids: Optional[Sequence[str]] = None,
+    visit: int = 1,
+) -> Tuple[List[str], np.ndarray]:
+    """
+    한 (step, column)의 프로파일 행렬 로드
+
+    Args:
+        visit: trace 안에서 그 step의 몇 번째 방문 구간인지 (1부터, 재방문이 없는 trace는 빠짐)
+
+    Returns:
+        (trace_ids, matrix): matrix shape (n_traces, n_points)
+    """
+    where = ["lower(step_name) = lower(?)", "column_name = ?"]
+    params: List = [step_name, column]
+    if trace_ids:
+        where.append(f"trace_id IN ({','.join('?' for _ in trace_ids)})")
+        params.extend(trace_ids)
+    params.append(int(visit))
+    raw = con.execute(f"""
+        SELECT trace_id, profile FROM {PROFILE_TABLE}
+        WHERE {' AND '.join(where)}
+        QUALIFY ROW_NUMBER() OVER (PARTITION BY trace_id ORDER BY seq_no) = ?
+        ORDER BY trace_id
+    """, params).fetchnumpy()
+    ids = np.asarray(raw["trace_id"]).astype(str).tolist()
+    if not ids:
+        return [], np.empty((0, 0), dtype=np.float32)
+    return ids, np.stack(raw["profile"]).astype(np.float32)
+
+
+def profile_envelope(matrix: np.ndarray, k: float = 3.0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """point-wise envelope: (mean, mean - k·std, mean + k·std), 각 shape (n_points,)"""
+    with np.errstate(all="ignore"):
+        mean = np.nanmean(matrix, axis=0)
+        std = np.nanstd(matrix, axis=0)
+    return mean, mean - k * std, mean + k * std
+
+
+def profile_distances(matrix: np.ndarray, reference: np.ndarray) -> np.ndarray:
+    """기준 프로파일과의 point-wise RMS 거리, shape (n_traces,)"""
+    with np.errstate(all="ignore"):
+        return np.sqrt(np.nanmean((matrix - reference[None, :]) ** 2, axis=1))
+
+
+def build_profile_compare_sql(p) -> Tuple[str, List]:
+    """
+    두 trace의 스텝 정렬 프로파일 비교 (point-wise)
+
+    build_trace_compare_sql과 동일한 스키마(step_name, trace1_avg, trace2_avg, diff, diff_signed)에
+    rms_diff를 추가한다. diff는 진행률 축 위의 최대 절대 차이.
+    같은 step을 여러 번 방문하면 방문 순번끼리(1번째↔1번째, ...) 맞춰 비교한다.
+    """
+    if len(p.trace_ids) < 2:
+        raise ValueError("비교하려면 최소 2개의 trace_id가 필요합니다")
+
+    trace1, trace2 = p.trace_ids[0], p.trace_ids[1]
+    column = p.col or "pressact"
+
+    sql = f"""
+    WITH v1 AS (
+        SELECT step_name, ROW_NUMBER() OVER (PARTITION BY step_name ORDER BY seq_no) AS visit, profile
+        FROM {PROFILE_TABLE}
+        WHERE trace_id = ? AND column_name = ?
+    ),
+    v2 AS (
+        SELECT step_name, ROW_NUMBER() OVER (PARTITION BY step_name ORDER BY seq_no) AS visit, profile
+        FROM {PROFILE_TABLE}
+        WHERE trace_id = ? AND column_name = ?
+    ),
+    t1 AS (
+        SELECT step_name, visit, UNNEST(profile) AS v, generate_subscripts(profile, 1) AS i FROM v1
+    ),
+    t2 AS (
+        SELECT step_name, visit, UNNEST(profile) AS v, generate_subscripts(profile, 1) AS i FROM v2
+    )
+    SELECT
+        t1.step_name,
+        AVG(t1.v) AS trace1_avg,
+        AVG(t2.v) AS trace2_avg,
+        MAX(ABS(t1.v - t2.v)) AS diff,
+        AVG(t1.v - t2.v) AS diff_signed,
+        SQRT(AVG((t1.v - t2.v) * (t1.v - t2.v))) AS rms_diff
+    FROM t1
+    JOIN t2 ON t1.step_name = t2.step_name AND t1.visit = t2.visit AND t1.i = t2.i
+    GROUP BY t1.step_name
+    ORDER BY diff DESC
+    """
+    top_n = getattr(p, "top_n", None) or getattr(p, "limit", None)
+    sql += f" LIMIT {int(top_n or 5)}"
+    return sql, [trace1, column, trace2, column]
+
+
+def main():
+    import duckdb  # type: ignore
+
+    rebuild = "--rebuild" in sys.argv[1:]
+    con = duckdb.connect(str(DB))
+    try:
+        if rebuild:
+            con.execute(f"DROP TABLE IF EXISTS {PROFILE_TABLE}")
+        n = build_step_profiles(con)
+        print(f"✅ step_profiles 생성 완료 ({n}개 trace, {DEFAULT_POINTS}점)")
+    finally:
+        con.close()
+
+
+if __name__ == "__main__":
+    main()
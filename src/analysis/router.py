@@ -0,0 +1,70 @@
+"""
+분석 엔진 라우팅: Parsed 플래그 → 사전 계산 테이블 기반 SQL
+
+sql_builder / process_metrics와 동일하게 (sql, params)를 반환한다.
+해당하는 분석 플래그가 없으면 None을 반환하므로 호출부에서 기본 빌더로 폴백한다.
+con을 주면 사전 계산 테이블이 있는지 확인해, 없으면 기존 빌더로 폴백할 수 있는 경우
+(오버슈트 → build_overshoot_sql) None을 돌려준다.
+
+    routed = choose_analysis_sql(p, con)
+    sql, params = routed if routed else build_sql(p)
+"""
+from typing import List, Optional, Tuple
+
+from src.analysis.correlation import build_correlation_sql
+from src.analysis.fingerprint import build_similar_traces_sql
+from src.analysis.golden import build_golden_deviation_sql
+from src.analysis.pca import build_pca_anomaly_sql
+from src.analysis.resample import build_profile_compare_sql
+from src.analysis.segments import build_step_sequence_sql
+from src.analysis.setpoint import METRICS_TABLE, build_setpoint_metric_sql, setpoint_pairs
+from src.analysis.spc import build_spc_sql
+
+
+def _flag(p, name: str) -> bool:
+    flags = getattr(p, "flags", None)
+    if isinstance(flags, dict):
+        return bool(flags.get(name, False))
+    return bool(getattr(p, name, False))
+
+
+def _table_exists(con, name: str) -> bool:
+    return con.execute(
+        "SELECT COUNT(*) FROM information_schema.tables WHERE table_name = ?", [name]
+    ).fetchone()[0] > 0
+
+
+def _setpoint_route(p, con) -> Optional[Tuple[str, List]]:
+    """setpoint_metrics 조회, 테이블이 없는 DB(이 기능 이전 ingest)면 오버슈트는 기존 빌더로 폴백"""
+    if con is None or _table_exists(con, METRICS_TABLE):
+        return build_setpoint_metric_sql(p)
+    if (getattr(p, "flags", None) or {}).get("setpoint_metric") == "overshoot":
+        return None
+    raise ValueError(f"{METRICS_TABLE} 테이블이 없습니다.\n해결책: python -m src.analysis.setpoint 실행 필요")
+
+
+def choose_analysis_sql(p, con=None) -> Optional[Tuple[str, List]]:
+    """
+    분석 플래그에 맞는 SQL 선택 (없으면 None)
+
+    Args:
+        p: Parsed (nl_parse_v2)
+        con: 질의를 실행할 DuckDB 연결 (사전 계산 테이블 확인용, None이면 확인 생략)
+    """
+    if _flag(p, "is_golden_deviation"):
+        return build_golden_deviation_sql(p)
+    if _flag(p, "is_pca_anomaly"):
+        return build_pca_anomaly_sql(p)
+    if _flag(p, "is_spc"):
+        return build_spc_sql(p)
+    if _flag(p, "setpoint_metric") and p.column in setpoint_pairs():
+        return _setpoint_route(p, con)
+    if _flag(p, "is_correlation"):
+        return build_correlation_sql(p, con)
+    if _flag(p, "is_step_sequence") and p.trace_id:
+        return build_step_sequence_sql(p)
+    if _flag(p, "is_similar_trace") and p.trace_id:
+        return build_similar_traces_sql(p)
+    if _flag(p, "is_profile_compare") and len(p.trace_ids) >= 2:
+        return build_profile_compare_sql(p)
+    return None
@@ -0,0 +1,277 @@
+"""
+step 구간(step_segments) 테이블
+
+같은 step_name이 연속된 행 묶음 = 구간 1개. 같은 step을 다시 방문하면 별도 구간(seq_no 증가).
+ingest 시 trace별 timestamp 순 run-length(LAG 비교 → 누적합)로 한 번 만들고,
+체류시간 / step 순서 / 구간별 분석은 원본 행 대신 이 작은 테이블을 조회한다.
+
+컬럼:
+- trace_id, seq_no(trace 내 1부터), step_name
+- start_ts, end_ts, duration_s, n_rows
+- row_start, row_end: trace 안에서 timestamp 순 0-based 행 번호 (양끝 포함)
+  원본 행이 필요하면 `WHERE trace_id = ? AND timestamp BETWEEN start_ts AND end_ts`로 바로 접근
+
+사용법:
+    python -m src.analysis.segments            # 신규 trace만
+    python -m src.analysis.segments --rebuild  # 전체 재생성
+"""
+import sys
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+from src.analysis.step_stats import TABLE_NAME
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+DB = PROJECT_ROOT / "data_out" / "ald.duckdb"
+
+SEGMENTS_TABLE = "step_segments"
+
+
+def _table_exists(con, name: str) -> bool:
+    return con.execute(
+        "SELECT COUNT(*) FROM information_schema.tables WHERE table_name = ?", [name]
+    ).fetchone()[0] > 0
+
+
+def _segments_select(where_sql: str) -> str:
+    return f"""
+    WITH ordered AS (
+        SELECT
+            trace_id,
+            step_name,
+            timestamp,
+            ROW_NUMBER() OVER w - 1 AS row_no,
+            LAG(step_name) OVER w AS prev_step
+        FROM {TABLE_NAME}
+        {where_sql}
+        WINDOW w AS (PARTITION BY trace_id ORDER BY timestamp)
+    ),
+    runs AS (
+        SELECT
+            *,
+            SUM(CASE WHEN prev_step IS DISTINCT FROM step_name THEN 1 ELSE 0 END)
+                OVER (PARTITION BY trace_id ORDER BY row_no ROWS UNBOUNDED PRECEDING) AS seq_no
+        FROM ordered
+    )
+    SELECT
+        trace_id,
+        CAST(seq_no AS INTEGER) AS seq_no,
+        step_name,
+        MIN(timestamp) AS start_ts,
+        MAX(timestamp) AS end_ts,
+        EXTRACT(EPOCH FROM (MAX(timestamp) - MIN(timestamp))) AS duration_s,
+        COUNT(*) AS n_rows,
+        MIN(row_no) AS row_start,
+        MAX(row_no) AS row_end
+    FROM runs
+    GROUP BY trace_id, seq_no, step_name
+    """
+
+
+def build_step_segments(con, trace_ids: Optional[Sequence[str]] = None, only_new: bool = True) -> int:
+    """
+    step_segments 테이블 갱신 (trace 단위 upsert)
+
+    Args:
+        trace_ids: 대상 trace (None이면 전체)
+        only_new: True면 아직 구간이 없는 trace만 계산 (ingest 시 증분 처리)
+
+    Returns:
+        처리된 trace 수
+    """
+    exists = _table_exists(con, SEGMENTS_TABLE)
+    if only_new and exists:
+        done = {r[0] for r in con.execute(f"SELECT DISTINCT trace_id FROM {SEGMENTS_TABLE}").fetchall()}
+        all_ids = [r[0] for r in con.execute(f"SELECT DISTINCT trace_id FROM {TABLE_NAME}").fetchall()]
+        trace_ids = [t for t in (trace_ids or all_ids) if t not in done]
+        if not trace_ids:
+            return 0
+
+    where_sql, params = "", []
+    if trace_ids:
+        where_sql = f"WHERE trace_id IN ({','.join('?' for _ in trace_ids)})"
+        params = list(trace_ids)
+
+    select_sql = _segments_select(where_sql)
+    if exists:
+        if trace_ids:
+            con.execute(f"DELETE FROM {SEGMENTS_TABLE} WHERE trace_id IN ({','.join('?' for _ in trace_ids)})", params)
+        else:
+            con.execute(f"DELETE FROM {SEGMENTS_TABLE}")
+        con.execute(f"INSERT INTO {SEGMENTS_TABLE} {select_sql} ORDER BY trace_id, seq_no", params)
+    else:
+        con.execute(f"CREATE TABLE {SEGMENTS_TABLE} AS {select_sql} ORDER BY trace_id, seq_no", params)
+
+    if trace_ids:
+        return len(trace_ids)
+    return con.execute(f"SELECT COUNT(DISTINCT trace_id) FROM {SEGMENTS_TABLE}").fetchone()[0]
+
+
+def has_step_segments(con) -> bool:
+    """step_segments 테이블이 있는지 (이 테이블 이전에 ingest한 DB면 False)"""
+    return _table_exists(con, SEGMENTS_TABLE)
+
+
+def build_dwell_time_sql(p, con=None) -> Tuple[str, List]:
+    """
+    체류시간: step별 구간 유지 시간(초) 평균
+
+    step_segments가 있으면 구간 단위(재방문은 별도 구간), con으로 확인해 없으면
+    원본 행의 (trace, step)별 MIN/MAX로 계산한다 (재방문은 한 구간으로 합쳐짐).
+    con이 None이면 확인 없이 step_segments를 쓴다.
+
+    결과 스키마: step_name, value, n, std
+    """
+    where_sql, params = "", []
+    if p.trace_id:
+        where_sql = "WHERE trace_id = ?"
+        params.append(p.trace_id)
+
+    if con is None or has_step_segments(con):
+        source = f"SELECT step_name, duration_s FROM {SEGMENTS_TABLE} {where_sql}"
+    else:
+        source = f"""
+        SELECT
+            step_name,
+            EXTRACT(EPOCH FROM (MAX(timestamp) - MIN(timestamp))) AS duration_s
+        FROM {TABLE_NAME}
+        {where_sql}
+        GROUP BY trace_id, step_name
+        """
+
+    sql = f"""
+    WITH step_times AS ({source})
+    SELECT
+        step_name,
+        AVG(duration_s) AS value,
+        COUNT(*) AS n,
+        STDDEV(duration_s) AS std
+    FROM step_times
+    GROUP BY step_name
+    ORDER BY value DESC
+    """
+    top_n = getattr(p, "top_n", None) or getattr(p, "limit", None)
+    if top_n:
+        sql += f" LIMIT {int(top_n)}"
+    return sql, params
+
+
+# 안정화 구간 기본값: 각 step 구간의 초반 10%(시간 기준) 제외
+DEFAULT_SETTLE_FRAC = 0.1
+
+
+def build_stable_avg_sql(p, column: str, con=None) -> Tuple[str, List]:
+    """
+    안정화 구간 평균: (trace, step 구간)별로 초반 settle 구간을 제외한 평균
+
+    구간 시작/길이로 안정화 시작 시각을 정해 원본과 조인한다 (전역 정렬/윈도우 없음).
+    - flags["settle_s"]: 구간 시작 후 N초 제외
+    - flags["settle_frac"]: 구간 길이의 비율 제외 (기본 0.1)
+    step_segments가 없으면(con으로 확인) 같은 run-length 규칙으로 구간을 즉석 계산한다.
+    top_n이 있으면 value 순위(order, 기본 내림차순) 상위 N개, 없으면 (trace_id, seq_no) 순.
+
+    Args:
+        column: 실제 DB 컬럼명
+
+    결과 스키마: trace_id, step_name, seq_no, value, n, std
+    """
+    flags = getattr(p, "flags", None) or {}
+    if flags.get("settle_s") is not None:
+        settle_expr = "CAST(? * 1000000 AS BIGINT)"
+        params: List = [float(flags["settle_s"])]
+    else:
+        settle_expr = "CAST(duration_s * ? * 1000000 AS BIGINT)"
+        params = [float(flags.get("settle_frac", DEFAULT_SETTLE_FRAC))]
+
+    if con is None or has_step_segments(con):
+        source, source_params = SEGMENTS_TABLE, []
+    else:
+        # trace 필터는 run-length 계산 전에, step 필터는 후에 (같은 step 재방문 구분 유지)
+        inner_where = "WHERE trace_id = ?" if p.trace_id else ""
+        source = f"({_segments_select(inner_where)})"
+        source_params = [p.trace_id] if p.trace_id else []
+    params.extend(source_params)
+
+    conditions = []
+    if p.trace_id:
+        conditions.append("trace_id = ?")
+        params.append(p.trace_id)
+    if p.step_name:
+        conditions.append("step_name = ?")
+        params.append(p.step_name)
+    where_sql = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    top_n = getattr(p, "top_n", None) or getattr(p, "limit", None)
+    if top_n:
+        direction = "ASC" if getattr(p, "order", None) == "asc" else "DESC"
+        order_sql = f"ORDER BY value {direction} NULLS LAST, s.trace_id, s.seq_no LIMIT {int(top_n)}"
+    else:
+        order_sql = "ORDER BY s.trace_id, s.seq_no"
+
+    col = '"' + column.replace('"', '""') + '"'
+    sql = f"""
+    WITH seg AS (
+        SELECT
+            trace_id, seq_no, step_name, end_ts,
+            start_ts + to_microseconds({settle_expr}) AS stable_from
+        FROM {source}
+        {where_sql}
+    )
+    SELECT
+        s.trace_id,
+        s.step_name,
+        s.seq_no,
+        AVG(t.{col}) AS value,
+        COUNT(t.{col}) AS n,
+        STDDEV(t.{col}) AS std
+    FROM seg s
+    JOIN {TABLE_NAME} t
+      ON t.trace_id = s.trace_id
+     AND t.timestamp BETWEEN s.stable_from AND s.end_ts
+    GROUP BY s.trace_id, s.step_name, s.seq_no
+    {order_sql}
+    """
+    return sql, params
+
+
+def build_step_sequence_sql(p) -> Tuple[str, List]:
+    """
+    trace의 step 진행 순서 (재방문 포함)
+
+    결과 스키마: seq_no, step_name, start_ts, end_ts, value(duration_s), n
+    """
+    if not p.trace_id:
+        raise ValueError("step 순서 조회에는 trace_id가 필요합니다")
+
+    sql = f"""
+    SELECT
+        seq_no,
+        step_name,
+        start_ts,
+        end_ts,
+        duration_s AS value,
+        n_rows AS n
+    FROM {SEGMENTS_TABLE}
+    WHERE trace_id = ?
+    ORDER BY seq_no
+    """
+    top_n = getattr(p, "top_n", None) or getattr(p, "limit", None)
+    if top_n:
+        sql += f" LIMIT {int(top_n)}"
+    return sql, [p.trace_id]
+
+
+def main():
+    import duckdb  # type: ignore
+
+    rebuild = "--rebuild" in sys.argv[1:]
+    con = duckdb.connect(str(DB))
+    try:
+        n = build_step_segments(con, only_new=not rebuild)
+        print(f"✅ step 구간 테이블 갱신 완료 ({n}개 trace)")
+    finally:
+        con.close()
+
+
+if __name__ == "__main__":
+    main()
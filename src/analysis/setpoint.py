@@ -0,0 +1,285 @@
+"""
+설정값 추종(setpoint tracking) 지표: 오버슈트, 상승시간, 정착시간, 정상상태 오차
+
+columns.yaml의 `setpoint`로 짝지어진 (실측, 설정값) 컬럼 쌍마다
+(trace, step 구간)별로 계산한다. step 구간 = 같은 step_name이 연속된 구간 (재방문은 별도 구간).
+
+구간 정의 (y: 실측, target: 구간 마지막 설정값, y0: 구간 첫 실측값, Δ = target - y0):
+- overshoot: Δ 방향으로 target을 넘어선 최대량 (≥ 0), overshoot_pct = overshoot / |Δ| · 100
+- rise_time_s: (y - y0)/Δ 가 처음 10% → 처음 90%에 도달한 시간 차
+- settling_time_s: |y - target| ≤ band 를 끝까지 유지하기 시작한 시각 - 구간 시작
+  band = max(SETTLE_BAND_REL · |Δ|, SETTLE_BAND_ABS). 끝까지 못 들어오면 NULL
+- steady_state_error: 구간 마지막 10% 행의 평균 (y - target)
+
+trace_id, timestamp 순으로 한 번 읽어 구간 경계(run-length)를 찾고,
+구간별 값은 NumPy reduceat으로 한 번에 계산한다. 결과는 setpoint_metrics 테이블.
+
+사용법:
+    python -m src.analysis.setpoint            # 신규 trace만
+    python -m src.analysis.setpoint --rebuild  # 전체 재계산
+"""
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+
+from src.analysis.step_stats import _quote, TABLE_NAME
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+DB = PROJECT_ROOT / "data_out" / "ald.duckdb"
+
+METRICS_TABLE = "setpoint_metrics"
+
+RISE_LOW, RISE_HIGH = 0.1, 0.9
+SETTLE_BAND_REL = 0.02
+SETTLE_BAND_ABS = 1e-6
+STEADY_TAIL = 0.1
+MIN_STEP = 1e-9
+
+# 질문 지표 → (테이블 컬럼, 정렬식)
+SETPOINT_METRICS = {
+    "overshoot": ("overshoot", "overshoot"),
+    "rise_time": ("rise_time_s", "rise_time_s"),
+    "settling_time": ("settling_time_s", "settling_time_s"),
+    "steady_state_error": ("steady_state_error", "ABS(steady_state_error)"),
+}
+
+def setpoint_pairs() -> Dict[str, str]:
+    """columns.yaml 기준 실측 컬럼 → 설정값 컬럼 (도메인 번들)"""
+    from domain.bundle import get_bundle
+    return get_bundle().setpoint_pairs
+
+
+def segment_bounds(trace_codes: np.ndarray, step_codes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    정렬된 행에서 연속 (trace, step) 구간의 시작/끝(포함) 인덱스
+
+    Args:
+        trace_codes, step_codes: 행별 정수 코드 (trace_id, timestamp 순 정렬)
+    """
+    n = len(trace_codes)
+    if n == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    change = np.empty(n, dtype=bool)
+    change[0] = True
+    change[1:] = (trace_codes[1:] != trace_codes[:-1]) | (step_codes[1:] != step_codes[:-1])
+    starts = np.flatnonzero(change)
+    ends = np.append(starts[1:] - 1, n - 1)
+    return starts, ends
+
+
+def tracking_metrics(t: np.ndarray, y: np.ndarray, sp: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    구간별 설정값 추종 지표 (벡터화)
+
+    Args:
+        t: 초 단위 시각, y: 실측, sp: 설정값 (shape (n_rows,), 구간 순으로 정렬)
+        starts, ends: segment_bounds() 결과
+
+    Returns:
+        {"target", "initial", "step_size", "overshoot", "overshoot_pct",
+         "rise_time_s", "settling_time_s", "steady_state_error", "n_rows"} 각 shape (n_segments,)
+    """
+    n_seg = len(starts)
+    lengths = ends - starts + 1
+    seg = np.repeat(np.arange(n_seg), lengths)
+    idx = np.arange(len(y))
+
+    target = sp[ends]
+    initial = y[starts]
+    step = target - initial
+    direction = np.where(step < 0, -1.0, 1.0)
+    movable = np.abs(step) > MIN_STEP
+
+    # 오버슈트: Δ 방향으로 target을 넘어선 최대량
+    beyond = np.nan_to_num((y - target[seg]) * direction[seg], nan=-np.inf)
+    overshoot = np.maximum(np.maximum.reduceat(beyond, starts), 0.0)
+    with np.errstate(all="ignore"):
+        overshoot_pct = np.where(movable, overshoot / np.abs(step) * 100.0, np.nan)
+
+    # 상승시간: 정규화 응답이 10% / 90%를 처음 넘는 행
+    with np.errstate(all="ignore"):
+        frac = (y - initial[seg]) / np.where(movable, step, np.nan)[seg]
+    big = len(y)
+    first_low = np.minimum.reduceat(np.where(frac >= RISE_LOW, idx, big), starts)
+    first_high = np.minimum.reduceat(np.where(frac >= RISE_HIGH, idx, big), starts)
+    reached = movable & (first_high < big) & (first_low < big)
+    rise = np.full(n_seg, np.nan)
+    rise[reached] = t[first_high[reached]] - t[first_low[reached]]
+
+    # 정착시간: band를 마지막으로 벗어난 행의 다음 행부터 끝까지 band 안
+    band = np.maximum(SETTLE_BAND_REL * np.abs(step), SETTLE_BAND_ABS)
+    outside = ~(np.abs(y - target[seg]) <= band[seg])
+    last_out = np.maximum.reduceat(np.where(outside, idx, -1), starts)
+    settle = np.full(n_seg, np.nan)
+    never_out = last_out < 0
+    settle[never_out] = 0.0
+    settled = ~never_out & (last_out < ends)
+    settle[settled] = t[last_out[settled] + 1] - t[starts[settled]]
+
+    # 정상상태 오차: 구간 마지막 10% 행 평균
+    tail_from = starts + np.floor(lengths * (1.0 - STEADY_TAIL)).astype(np.int64)
+    tail_from = np.minimum(tail_from, ends)
+    in_tail = idx >= tail_from[seg]
+    err = np.where(in_tail, y - target[seg], 0.0)
+    valid_tail = in_tail & ~np.isnan(err)
+    with np.errstate(all="ignore"):
+        sse = np.add.reduceat(np.nan_to_num(err), starts) / np.add.reduceat(valid_tail.astype(float), starts)
+
+    return {
+        "target": target,
+        "initial": initial,
+        "step_size": step,
+        "overshoot": overshoot,
+        "overshoot_pct": overshoot_pct,
+        "rise_time_s": rise,
+        "settling_time_s": settle,
+        "steady_state_error": sse,
+        "n_rows": lengths,
+    }
+
+
+def _table_exists(con, name: str) -> bool:
+    return con.execute(
+        "SELECT COUNT(*) FROM information_schema.tables WHERE table_name = ?", [name]
+    ).fetchone()[0] > 0
+
+
+def build_setpoint_metrics(con, trace_ids: Optional[Sequence[str]] = None, only_new: bool = True) -> int:
+    """
+    setpoint_metrics 테이블 갱신 (upsert)
+
+    Args:
+        trace_ids: 대상 trace (None이면 전체)
+        only_new: True면 아직 지표가 없는 trace만 계산 (ingest 시 증분 처리)
+
+    Returns:
+        계산된 trace 수
+    """
+    existing = {r[0] for r in con.execute(f"DESCRIBE {TABLE_NAME}").fetchall()}
+    pairs = {act: sp for act, sp in setpoint_pairs().items() if act in existing and sp in existing}
+    if not pairs:
+        return 0
+
+    exists = _table_exists(con, METRICS_TABLE)
+    if only_new and exists:
+        done = {r[0] for r in con.execute(f"SELECT DISTINCT trace_id FROM {METRICS_TABLE}").fetchall()}
+        all_ids = [r[0] for r in con.execute(f"SELECT DISTINCT trace_id FROM {TABLE_NAME}").fetchall()]
+        trace_ids = [t for t in (trace_ids or all_ids) if t not in done]
+        if not trace_ids:
+            return 0
+
+    where_sql, params = "", []
+    if trace_ids:
+        where_sql = f"WHERE trace_id IN ({','.join('?' for _ in trace_ids)})"
+        params = list(trace_ids)
+
+    value_cols = sorted(set(pairs) | set(pairs.values()))
+    select_cols = ", ".join(f"CAST({_quote(c)} AS DOUBLE) AS {_quote(c)}" for c in value_cols)
+    rows = con.execute(f"""
+        SELECT trace_id, step_name, epoch(timestamp) AS t, {select_cols}
+        FROM {TABLE_NAME}
+        {where_sql}
+        ORDER BY trace_id, timestamp
+    """, params).fetchnumpy()
+
+    trace_col = np.asarray(rows["trace_id"]).astype(str)
+    if not len(trace_col):
+        return 0
+    step_col = np.asarray(rows["step_name"]).astype(str)
+    _, trace_codes = np.unique(trace_col, return_inverse=True)
+    _, step_codes = np.unique(step_col, return_inverse=True)
+    starts, ends = segment_bounds(trace_codes, step_codes)
+
+    # 같은 trace 안에서 step 구간 순번 (1부터)
+    seg_trace = trace_codes[starts]
+    first_of_trace = np.r_[True, seg_trace[1:] != seg_trace[:-1]]
+    seq_no = np.arange(len(starts)) - np.maximum.accumulate(np.where(first_of_trace, np.arange(len(starts)), 0)) + 1
+
+    t = np.asarray(rows["t"], dtype=float)
+    frames = []
+    for act, sp in pairs.items():
+        y = np.ma.filled(np.ma.asarray(rows[act], dtype=float), np.nan)
+        s = np.ma.filled(np.ma.asarray(rows[sp], dtype=float), np.nan)
+        m = tracking_metrics(t, y, s, starts, ends)
+        frames.append(pd.DataFrame({
+            "trace_id": trace_col[starts],
+            "step_name": step_col[starts],
+            "seq_no": seq_no,
+            "column_name": act,
+            "setpoint_column": sp,
+            **m,
+        }))
+    metrics = pd.concat(frames, ignore_index=True)
+    metrics = metrics[~metrics["target"].isna()]
+
+    con.register("_setpoint_metrics_df", metrics)
+    try:
+        if exists:
+            con.execute(f"DELETE FROM {METRICS_TABLE} WHERE trace_id IN (SELECT DISTINCT trace_id FROM _setpoint_metrics_df)")
+            con.execute(f"INSERT INTO {METRICS_TABLE} SELECT * FROM _setpoint_metrics_df")
+        else:
+            con.execute(f"CREATE TABLE {METRICS_TABLE} AS SELECT * FROM _setpoint_metrics_df")
+    finally:
+        con.unregister("_setpoint_metrics_df")
+    return int(len(np.unique(trace_codes)))
+
+
+def build_setpoint_metric_sql(p) -> Tuple[str, List]:
+    """
+    설정값 추종 지표 랭킹: setpoint_metrics 조회 (trace, step 구간 단위)
+
+    결과 스키마: trace_id, step_name, seq_no, value, target, step_size, n_rows
+    """
+    flags = getattr(p, "flags", None) or {}
+    metric = flags.get("setpoint_metric", "overshoot")
+    if metric not in SETPOINT_METRICS:
+        raise ValueError(f"지원하지 않는 설정값 추종 지표: {metric}")
+    value_col, order_expr = SETPOINT_METRICS[metric]
+
+    where = ["column_name = ?", f"{value_col} IS NOT NULL"]
+    params: List = [p.column]
+    if p.trace_id:
+        where.append("trace_id = ?")
+        params.append(p.trace_id)
+    if p.step_name:
+        where.append("step_name = ?")
+        params.append(p.step_name)
+
+    sql = f"""
+    SELECT
+        trace_id,
+        step_name,
+        seq_no,
+        {value_col} AS value,
+        target,
+        step_size,
+        n_rows AS n
+    FROM {METRICS_TABLE}
+    WHERE {" AND ".join(where)}
+    ORDER BY {order_expr} DESC
+    """
+    top_n = getattr(p, "top_n", None) or getattr(p, "limit", None)
+    if top_n:
+        sql += f" LIMIT {int(top_n)}"
+    return sql, params
+
+
+def main():
+    import duckdb  # type: ignore
+
+    rebuild = "--rebuild" in sys.argv[1:]
+    con = duckdb.connect(str(DB))
+    try:
+        if rebuild:
+            con.execute(f"DROP TABLE IF EXISTS {METRICS_TABLE}")
+        n = build_setpoint_metrics(con, only_new=not rebuild)
+        print(f"✅ 설정값 추종 지표 계산 완료 ({n}개 trace)")
+    finally:
+        con.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,496 @@
+"""
+SPC 관리도 엔진 (X̄-R, EWMA, CUSUM)
+
+부분군(subgroup) = 한 trace의 한 step 구간. (step, column)마다 trace 시작 시각 순서로
+X̄(평균), R(최대-최소)을 쌓아 관리도 통계를 계산한다.
+
+관리 한계 (Phase I, 계열별로 값이 있는 처음 baseline개 trace로 고정):
+- X̄: center ± 3σ, σ = MR̄ / d2 (연속 부분군 평균의 이동범위)
+  부분군 크기가 수백 점이고 run마다 달라 A2 상수표 대신 run 간 변동을 쓴다.
+- R: R̄ ± 3σ_R, σ_R = R의 이동범위 / d2 (하한은 0)
+- EWMA: z_t = λ·x_t + (1-λ)·z_{t-1},  center ± L·σ·sqrt(λ/(2-λ)·(1-(1-λ)^(2t)))
+- CUSUM: C⁺ = max(0, C⁺ + (x-μ)/σ - k), C⁻ = max(0, C⁻ - (x-μ)/σ - k), 한계 h
+
+시간 축 루프는 trace 수만큼만 돌고, 각 시점은 모든 (step, column) 계열에 대해 벡터 연산.
+EWMA/CUSUM 상태는 spc_state에 저장되어 새 trace가 들어오면 이어서 계산한다 (증분).
+아직 baseline개를 못 채운 계열(새 step 포함)만 spc_points에 저장된 X̄/R로 Phase I 한계를 다시 잡고
+그 계열의 점을 다시 계산한다 (나머지 계열은 상태 그대로 이어서 계산).
+
+테이블:
+- spc_state(step_name, column_name, center, sigma, r_center, r_sigma, n_baseline, ewma, cusum_pos, cusum_neg, n_points, baseline)
+- spc_points(trace_id, trace_start, seq, step_name, column_name, xbar, r, ewma, ewma_lcl, ewma_ucl, cusum_pos, cusum_neg, *_violation)
+
+사용법:
+    python -m src.analysis.spc            # 신규 trace만 이어서 계산
+    python -m src.analysis.spc --rebuild  # 관리 한계 재설정 후 전체 재계산
+"""
+import sys
+import warnings
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+
+from src.analysis.step_stats import load_step_cube, numeric_columns, TABLE_NAME
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+DB = PROJECT_ROOT / "data_out" / "ald.duckdb"
+
+STATE_TABLE = "spc_state"
+POINTS_TABLE = "spc_points"
+
+D2 = 1.128              # 이동범위(n=2) → σ 변환 상수
+DEFAULT_BASELINE = 20   # Phase I 관리 한계 추정에 쓰는 trace 수
+EWMA_LAMBDA = 0.2
+EWMA_L = 3.0
+CUSUM_K = 0.5
+CUSUM_H = 5.0
+MIN_SIGMA = 1e-9
+
+SPC_CHARTS = ("xbar", "r", "ewma", "cusum")
+
+
+def _table_exists(con, name: str) -> bool:
+    return con.execute(
+        "SELECT COUNT(*) FROM information_schema.tables WHERE table_name = ?", [name]
+    ).fetchone()[0] > 0
+
+
+def _moving_range(a: np.ndarray) -> np.ndarray:
+    """axis 0 방향 이동범위 |x_t - x_prev| (NaN은 건너뛰고 직전 유효값과 비교)"""
+    idx = np.where(np.isnan(a), 0, np.arange(len(a))[:, None])
+    np.maximum.accumulate(idx, axis=0, out=idx)
+    filled = a[idx, np.arange(a.shape[1])[None, :]]
+    mr = np.abs(np.diff(filled, axis=0))
+    mr[np.isnan(a[1:])] = np.nan
+    return mr
+
+
+def estimate_limits(xbar: np.ndarray, r: np.ndarray) -> dict:
+    """
+    Phase I 관리 한계 추정
+
+    Args:
+        xbar, r: shape (n_traces, n_series), 시간 순서. 없는 값은 NaN
+
+    Returns:
+        {"center", "sigma", "r_center", "r_sigma", "n_baseline"} 각 shape (n_series,)
+    """
+    with np.errstate(all="ignore"), warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # 값이 없는 계열 (NaN 유지, 호출부에서 제외)
+        center = np.nanmean(xbar, axis=0)
+        r_center = np.nanmean(r, axis=0)
+        if len(xbar) > 1:
+            sigma = np.nanmean(_moving_range(xbar), axis=0) / D2
+            r_sigma = np.nanmean(_moving_range(r), axis=0) / D2
+        else:
+            sigma, r_sigma = np.zeros_like(center), np.zeros_like(center)
+    floor = np.maximum(np.abs(np.nan_to_num(center)) * 1e-6, MIN_SIGMA)
+    sigma = np.where(np.isnan(sigma), floor, np.maximum(sigma, floor))
+    r_sigma = np.nan_to_num(r_sigma)
+    return {
+        "center": center,
+        "sigma": sigma,
+        "r_center": r_center,
+        "r_sigma": r_sigma,
+        "n_baseline": np.sum(~np.isnan(xbar), axis=0),
+    }
+
+
+def baseline_window(a: np.ndarray, baseline: int) -> np.ndarray:
+    """계열(열)마다 값이 있는 처음 baseline개만 남기고 나머지는 NaN (Phase I 구간)"""
+    valid = ~np.isnan(a)
+    keep = valid & (np.cumsum(valid, axis=0) <= baseline)
+    return np.where(keep, a, np.nan)
+
+
+def ewma_series(
+    x: np.ndarray,
+    center: np.ndarray,
+    sigma: np.ndarray,
+    z0: np.ndarray,
+    n0: np.ndarray,
+    lam: float = EWMA_LAMBDA,
+    L: float = EWMA_L,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    EWMA 통계량과 시점별 관리 한계
+
+    Args:
+        x: shape (n_traces, n_series)
+        z0, n0: 직전 EWMA 값과 누적 점 수 (증분 계산 상태)
+
+    Returns:
+        (z, lcl, ucl, z_last, n_last)
+    """
+    z = np.full(x.shape, np.nan)
+    n = np.zeros(x.shape)
+    cur, cnt = z0.astype(float).copy(), n0.astype(float).copy()
+    for t in range(len(x)):
+        ok = ~np.isnan(x[t])
+        cur = np.where(ok, lam * np.nan_to_num(x[t]) + (1.0 - lam) * cur, cur)
+        cnt = cnt + ok
+        z[t] = np.where(ok, cur, np.nan)
+        n[t] = cnt
+    width = L * sigma * np.sqrt(lam / (2.0 - lam) * (1.0 - (1.0 - lam) ** (2.0 * n)))
+    return z, center - width, center + width, cur, cnt
+
+
+def cusum_series(
+    x: np.ndarray,
+    center: np.ndarray,
+    sigma: np.ndarray,
+    pos0: np.ndarray,
+    neg0: np.ndarray,
+    k: float = CUSUM_K,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    표준화 tabular CUSUM
+
+    Returns:
+        (c_pos, c_neg, pos_last, neg_last)
+    """
+    c_pos = np.full(x.shape, np.nan)
+    c_neg = np.full(x.shape, np.nan)
+    pos, neg = pos0.astype(float).copy(), neg0.astype(float).copy()
+    zs = (x - center) / sigma
+    for t in range(len(x)):
+        ok = ~np.isnan(zs[t])
+        zt = np.nan_to_num(zs[t])
+        pos = np.where(ok, np.maximum(0.0, pos + zt - k), pos)
+        neg = np.where(ok, np.maximum(0.0, neg - zt - k), neg)
+        c_pos[t] = np.where(ok, pos, np.nan)
+        c_neg[t] = np.where(ok, neg, np.nan)
+    return c_pos, c_neg, pos, neg
+
+
+def _trace_order(con, trace_ids: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """trace 시작 시각 순서 (trace_id, trace_start)"""
+    where_sql, params = "", []
+    if trace_ids:
+        where_sql = f"WHERE trace_id IN ({','.join('?' for _ in trace_ids)})"
+        params = list(trace_ids)
+    return con.execute(f"""
+        SELECT trace_id, MIN(timestamp) AS trace_start
+        FROM {TABLE_NAME}
+        {where_sql}
+        GROUP BY trace_id
+        ORDER BY trace_start, trace_id
+    """, params).df()
+
+
+def _subgroups(con, order: pd.DataFrame, steps: List[str], columns: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """시간 순서로 정렬된 X̄, R 배열 (n_traces, n_steps * n_columns)"""
+    ids = order["trace_id"].tolist()
+    mean_cube = load_step_cube(con, columns, trace_ids=ids, agg="AVG")
+    max_cube = load_step_cube(con, columns, trace_ids=ids, agg="MAX")
+    min_cube = load_step_cube(con, columns, trace_ids=ids, agg="MIN")
+
+    t_pos = {t: i for i, t in enumerate(mean_cube.trace_ids)}
+    s_pos = {s: i for i, s in enumerate(mean_cube.step_names)}
+    t_idx = [t_pos[t] for t in ids]
+    src = [s_pos[s] for s in steps if s in s_pos]
+    dst = [i for i, s in enumerate(steps) if s in s_pos]
+
+    shape = (len(ids), len(steps), len(columns))
+    xbar, r = np.full(shape, np.nan), np.full(shape, np.nan)
+    xbar[:, dst, :] = mean_cube.values[t_idx][:, src, :]
+    r[:, dst, :] = (max_cube.values - min_cube.values)[t_idx][:, src, :]
+    return xbar.reshape(len(ids), -1), r.reshape(len(ids), -1)
+
+
+def _new_steps(con, trace_ids: Sequence[str], known: Sequence[str]) -> List[str]:
+    """trace_ids에 나타나지만 known에는 없는 step"""
+    placeholders = ",".join("?" for _ in trace_ids)
+    rows = con.execute(
+        f"SELECT DISTINCT step_name FROM {TABLE_NAME} WHERE trace_id IN ({placeholders})", list(trace_ids)
+    ).fetchall()
+    known = set(known)
+    return sorted(s for (s,) in rows if s not in known)
+
+
+def _load_state(con) -> pd.DataFrame:
+    return con.execute(f"SELECT * FROM {STATE_TABLE} ORDER BY step_name, column_name").df()
+
+
+def _stored_subgroups(con, series: pd.DataFrame) -> Tuple[pd.DataFrame, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    spc_points에 저장된 계열들의 X̄, R (저장된 seq 순서)
+
+    Returns:
+        (order(trace_id, trace_start), seq, xbar, r) - xbar/r shape (n_traces, len(series))
+    """
+    keys = series[["step_name", "column_name"]].reset_index(drop=True)
+    con.register("_spc_series_df", keys)
+    try:
+        rows = con.execute(f"""
+            SELECT pt.seq, pt.trace_id, pt.trace_start, pt.step_name, pt.column_name, pt.xbar, pt.r
+            FROM {POINTS_TABLE} pt
+            JOIN _spc_series_df s ON s.step_name = pt.step_name AND s.column_name = pt.column_name
+            ORDER BY pt.seq
+        """).df()
+    finally:
+        con.unregister("_spc_series_df")
+
+    order = rows.drop_duplicates("seq")[["seq", "trace_id", "trace_start"]].reset_index(drop=True)
+    t_pos = {q: i for i, q in enumerate(order["seq"])}
+    g_pos = {k: i for i, k in enumerate(zip(keys["step_name"], keys["column_name"]))}
+    t_idx = np.array([t_pos[q] for q in rows["seq"]], dtype=int)
+    g_idx = np.array([g_pos[k] for k in zip(rows["step_name"], rows["column_name"])], dtype=int)
+    xbar, r = np.full((len(order), len(keys)), np.nan), np.full((len(order), len(keys)), np.nan)
+    xbar[t_idx, g_idx] = rows["xbar"].to_numpy(dtype=float)
+    r[t_idx, g_idx] = rows["r"].to_numpy(dtype=float)
+    return order[["trace_id", "trace_start"]], order["seq"].to_numpy(), xbar, r
+
+
+def _initial_state(keys: pd.DataFrame, xbar: np.ndarray, r: np.ndarray, baseline: int) -> pd.DataFrame:
+    """계열별로 값이 있는 처음 baseline개로 Phase I 한계를 잡은 초기 상태"""
+    limits = estimate_limits(baseline_window(xbar, baseline), baseline_window(r, baseline))
+    return pd.DataFrame({
+        "step_name": keys["step_name"].to_numpy(),
+        "column_name": keys["column_name"].to_numpy(),
+        **limits,
+        "ewma": limits["center"],
+        "cusum_pos": 0.0,
+        "cusum_neg": 0.0,
+        "n_points": 0,
+        "baseline": int(baseline),
+    })
+
+
+def _series_points(
+    order: pd.DataFrame,
+    seq: np.ndarray,
+    state: pd.DataFrame,
+    xbar: np.ndarray,
+    r: np.ndarray,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """state 계열들의 관리도 점(long 포맷, 값이 있는 부분군만)과 이어서 계산할 갱신된 state"""
+    state = state.reset_index(drop=True).copy()
+    center = state["center"].to_numpy(dtype=float)
+    sigma = state["sigma"].to_numpy(dtype=float)
+    r_center = state["r_center"].to_numpy(dtype=float)
+    r_sigma = state["r_sigma"].to_numpy(dtype=float)
+
+    z, z_lcl, z_ucl, z_last, n_last = ewma_series(
+        xbar, center, sigma, state["ewma"].to_numpy(dtype=float), state["n_points"].to_numpy(dtype=float)
+    )
+    c_pos, c_neg, pos_last, neg_last = cusum_series(
+        xbar, center, sigma, state["cusum_pos"].to_numpy(dtype=float), state["cusum_neg"].to_numpy(dtype=float)
+    )
+
+    t_idx, g_idx = np.nonzero(~np.isnan(xbar) & ~np.isnan(center)[None, :])
+    x = xbar[t_idx, g_idx]
+    rv = r[t_idx, g_idx]
+    points = pd.DataFrame({
+        "trace_id": order["trace_id"].to_numpy()[t_idx],
+        "trace_start": order["trace_start"].to_numpy()[t_idx],
+        "seq": np.asarray(seq)[t_idx],
+        "step_name": state["step_name"].to_numpy()[g_idx],
+        "column_name": state["column_name"].to_numpy()[g_idx],
+        "xbar": x,
+        "r": rv,
+        "ewma": z[t_idx, g_idx],
+        "ewma_lcl": z_lcl[t_idx, g_idx],
+        "ewma_ucl": z_ucl[t_idx, g_idx],
+        "cusum_pos": c_pos[t_idx, g_idx],
+        "cusum_neg": c_neg[t_idx, g_idx],
+        "xbar_violation": np.abs(x - center[g_idx]) > 3.0 * sigma[g_idx],
+        "r_violation": (rv > r_center[g_idx] + 3.0 * r_sigma[g_idx]) | (rv < r_center[g_idx] - 3.0 * r_sigma[g_idx]),
+        "ewma_violation": (z[t_idx, g_idx] < z_lcl[t_idx, g_idx]) | (z[t_idx, g_idx] > z_ucl[t_idx, g_idx]),
+        "cusum_violation": (c_pos[t_idx, g_idx] > CUSUM_H) | (c_neg[t_idx, g_idx] > CUSUM_H),
+    })
+
+    state["ewma"], state["n_points"] = z_last, n_last.astype(np.int64)
+    state["cusum_pos"], state["cusum_neg"] = pos_last, neg_last
+    return points, state
+
+
+def update_spc(
+    con,
+    columns: Optional[Sequence[str]] = None,
+    baseline: Optional[int] = None,
+    rebuild: bool = False,
+) -> int:
+    """
+    spc_points / spc_state 갱신
+
+    상태가 있으면 아직 반영되지 않은 trace만 시간 순으로 이어서 계산한다.
+    다음 경우는 관리 한계를 다시 잡아야 하므로 전체 재계산:
+    - 신규 trace가 마지막 반영 trace보다 앞선 시각 (순서가 깨짐)
+    - columns나 baseline이 저장된 값과 다름
+    아직 baseline개를 못 채운 계열(관리 한계가 없는 새 step 포함)에 신규 값이 있으면
+    그 계열만 저장된 점 + 신규 값으로 Phase I 한계를 마저 추정하고 점을 다시 계산한다.
+    Phase I 한계는 계열별로 시간 순 처음 baseline개 값으로 잡으므로 기존 계열의 한계는 그대로 나온다.
+
+    Args:
+        columns: 대상 컬럼 (None이면 증분 시 저장된 컬럼, 새로 만들 때는 카탈로그 수치형 전체)
+        baseline: Phase I trace 수 (None이면 증분 시 저장된 값, 새로 만들 때는 DEFAULT_BASELINE)
+
+    Returns:
+        반영된 trace 수
+    """
+    incremental = not rebuild and _table_exists(con, STATE_TABLE) and _table_exists(con, POINTS_TABLE)
+    order = _trace_order(con)
+
+    if incremental:
+        state = _load_state(con)
+        stored_baseline = int(state["baseline"].iloc[0]) if "baseline" in state and len(state) else DEFAULT_BASELINE
+        if baseline is not None and baseline != stored_baseline:
+            return update_spc(con, columns=columns, baseline=baseline, rebuild=True)
+        baseline = stored_baseline
+        stored = sorted(state["column_name"].unique().tolist())
+        if columns and sorted(columns) != stored:
+            return update_spc(con, columns=columns, baseline=baseline, rebuild=True)
+        columns = stored
+
+        done = {r[0] for r in con.execute(f"SELECT DISTINCT trace_id FROM {POINTS_TABLE}").fetchall()}
+        order = order[~order["trace_id"].isin(done)].reset_index(drop=True)
+        if order.empty:
+            return 0
+        last_start = con.execute(f"SELECT MAX(trace_start) FROM {POINTS_TABLE}").fetchone()[0]
+        if last_start is not None and order["trace_start"].min() < pd.Timestamp(last_start):
+            return update_spc(con, columns=columns, baseline=baseline, rebuild=True)
+        steps = sorted(state["step_name"].unique().tolist())
+        steps = sorted(steps + _new_steps(con, order["trace_id"].tolist(), steps))
+        seq0 = con.execute(f"SELECT COALESCE(MAX(seq), 0) FROM {POINTS_TABLE}").fetchone()[0]
+
+        # 저장된 계열 순서 = (step, column) 정렬 격자 (새 step 계열은 상태 없음 = 채우는 중)
+        grid = pd.MultiIndex.from_product([steps, columns], names=["step_name", "column_name"])
+        state = state.set_index(["step_name", "column_name"]).reindex(grid).reset_index()
+        xbar, r = _subgroups(con, order, steps, columns)
+        filling = state["n_baseline"].fillna(0).to_numpy() < baseline
+        refill = filling & (~np.isnan(xbar)).any(axis=0)
+    else:
+        if order.empty:
+            return 0
+        seq0 = 0
+        baseline = baseline if baseline is not None else DEFAULT_BASELINE
+        columns = sorted(columns) if columns else sorted(numeric_columns(con))
+        steps = [r[0] for r in con.execute(f"SELECT DISTINCT step_name FROM {TABLE_NAME} ORDER BY step_name").fetchall()]
+        xbar, r = _subgroups(con, order, steps, columns)
+
+        # 나중에 생긴 step도 처음 나타난 trace부터 baseline개로 한계를 잡음
+        s_idx, c_idx = np.meshgrid(np.arange(len(steps)), np.arange(len(columns)), indexing="ij")
+        keys = pd.DataFrame({
+            "step_name": np.asarray(steps)[s_idx.ravel()],
+            "column_name": np.asarray(columns)[c_idx.ravel()],
+        })
+        state = _initial_state(keys, xbar, r, baseline)
+        refill = np.zeros(len(state), dtype=bool)
+
+    seq = seq0 + np.arange(1, len(order) + 1)
+    points, kept = _series_points(order, seq, state[~refill], xbar[:, ~refill], r[:, ~refill])
+    states = [kept]
+    if refill.any():
+        # 채우는 중인 계열: 저장된 점 + 신규 값으로 한계 재추정 → 그 계열 점만 처음부터 다시 계산
+        keys = state.loc[refill, ["step_name", "column_name"]].reset_index(drop=True)
+        old_order, old_seq, old_x, old_r = _stored_subgroups(con, keys)
+        all_x, all_r = np.vstack([old_x, xbar[:, refill]]), np.vstack([old_r, r[:, refill]])
+        refilled, refill_state = _series_points(
+            pd.concat([old_order, order[["trace_id", "trace_start"]]], ignore_index=True),
+            np.concatenate([old_seq, seq]),
+            _initial_state(keys, all_x, all_r, baseline),
+            all_x,
+            all_r,
+        )
+        points = pd.concat([points, refilled], ignore_index=True)
+        states.append(refill_state)
+    state = pd.concat(states, ignore_index=True).sort_values(["step_name", "column_name"], ignore_index=True)
+    state = state[~state["center"].isna()]
+
+    con.register("_spc_points_df", points)
+    con.register("_spc_state_df", state)
+    try:
+        if incremental:
+            if refill.any():
+                con.register("_spc_refill_df", keys)
+                try:
+                    con.execute(f"""
+                        DELETE FROM {POINTS_TABLE}
+                        WHERE EXISTS (
+                            SELECT 1 FROM _spc_refill_df f
+                            WHERE f.step_name = {POINTS_TABLE}.step_name AND f.column_name = {POINTS_TABLE}.column_name
+                        )
+                    """)
+                finally:
+                    con.unregister("_spc_refill_df")
+            con.execute(f"INSERT INTO {POINTS_TABLE} SELECT * FROM _spc_points_df")
+        else:
+            con.execute(f"CREATE OR REPLACE TABLE {POINTS_TABLE} AS SELECT * FROM _spc_points_df")
+        con.execute(f"CREATE OR REPLACE TABLE {STATE_TABLE} AS SELECT * FROM _spc_state_df")
+    finally:
+        con.unregister("_spc_points_df")
+        con.unregister("_spc_state_df")
+    return len(order)
+
+
+def build_spc_sql(p) -> Tuple[str, List]:
+    """
+    관리도 데이터: spc_points + spc_state 조인
+
+    결과 스키마: seq, trace_id, step_name, value, center, lcl, ucl, violation
+    (chart: xbar | r | ewma | cusum, flags["spc_chart"]로 선택)
+    """
+    flags = getattr(p, "flags", None) or {}
+    chart = flags.get("spc_chart", "xbar")
+    if chart not in SPC_CHARTS:
+        raise ValueError(f"지원하지 않는 관리도: {chart}")
+
+    # (value, center, lcl, ucl, violation)
+    select_by_chart = {
+        "xbar": ("pt.xbar", "st.center", "st.center - 3 * st.sigma", "st.center + 3 * st.sigma", "pt.xbar_violation"),
+        "r": ("pt.r", "st.r_center", "GREATEST(st.r_center - 3 * st.r_sigma, 0)", "st.r_center + 3 * st.r_sigma", "pt.r_violation"),
+        "ewma": ("pt.ewma", "st.center", "pt.ewma_lcl", "pt.ewma_ucl", "pt.ewma_violation"),
+        "cusum": ("GREATEST(pt.cusum_pos, pt.cusum_neg)", "0.0", "0.0", str(CUSUM_H), "pt.cusum_violation"),
+    }
+    value, center, lcl, ucl, violation = select_by_chart[chart]
+
+    where = ["pt.column_name = ?"]
+    params: List = [p.column]
+    if p.step_name:
+        where.append("pt.step_name = ?")
+        params.append(p.step_name)
+    if p.trace_id:
+        where.append("pt.trace_id = ?")
+        params.append(p.trace_id)
+    if flags.get("spc_violations_only"):
+        where.append(violation)
+
+    sql = f"""
+    SELECT
+        pt.seq,
+        pt.trace_id,
+        pt.step_name,
+        {value} AS value,
+        {center} AS center,
+        {lcl} AS lcl,
+        {ucl} AS ucl,
+        {violation} AS violation
+    FROM {POINTS_TABLE} pt
+    JOIN {STATE_TABLE} st
+      ON st.step_name = pt.step_name AND st.column_name = pt.column_name
+    WHERE {" AND ".join(where)}
+    ORDER BY pt.step_name, pt.seq
+    """
+    top_n = getattr(p, "top_n", None) or getattr(p, "limit", None)
+    if top_n:
+        sql += f" LIMIT {int(top_n)}"
+    return sql, params
+
+
+def main():
+    import duckdb  # type: ignore
+
+    rebuild = "--rebuild" in sys.argv[1:]
+    con = duckdb.connect(str(DB))
+    try:
+        n = update_spc(con, rebuild=rebuild)
+        print(f"✅ SPC 관리도 갱신 완료 (반영 {n}개 trace)")
+    finally:
+        con.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+(trace, step) 단위 통계 큐브
+
+여러 분석 엔진(골든 트레이스, 핑거프린트, PCA 등)이 공통으로 쓰는
+per-(trace_id, step_name) 집계를 한 번의 GROUP BY로 읽어
+NumPy 3차원 배열 [trace, step, column]로 변환한다.
+"""
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+import numpy as np  # type: ignore
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+CATALOG_FILE = PROJECT_ROOT / "catalog_physical.json"
+
+TABLE_NAME = "traces_dedup"
+
+# 분석 대상에서 제외하는 카테고리/파생 컬럼
+EXCLUDED_CATEGORIES = {"meta"}
+DERIVED_COLUMNS = {"epoch_ms", "time_bucket_second"}
+
+NUMERIC_TYPES = ("DOUBLE", "FLOAT", "REAL", "DECIMAL", "INTEGER", "BIGINT", "SMALLINT", "TINYINT", "HUGEINT", "UBIGINT", "UINTEGER")
+
+
+def load_catalog(path: Path = CATALOG_FILE) -> dict:
+    """catalog_physical.json 로드 (없으면 빈 딕셔너리)"""
+    if not path.exists():
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def numeric_columns(con, categories: Optional[Sequence[str]] = None, table: str = TABLE_NAME) -> List[str]:
+    """
+    분석 가능한 수치형 컬럼 목록
+
+    catalog_physical.json의 카테고리(meta 제외) 중 실제 테이블에 존재하고
+    수치형 타입인 컬럼만 반환한다. 카탈로그가 없으면 테이블의 수치형 컬럼 전체를 사용.
+
+    Args:
+        con: DuckDB connection
+        categories: 대상 카테고리 (예: ["pressure", "gas"]). None이면 전체
+        table: 대상 테이블/뷰
+    """
+    desc = con.execute(f"DESCRIBE {table}").fetchall()
+    numeric = {
+        row[0] for row in desc
+        if str(row[1]).upper().startswith(NUMERIC_TYPES)
+    } - DERIVED_COLUMNS
+
+    catalog = load_catalog()
+    if not catalog:
+        return sorted(numeric)
+
+    cols: List[str] = []
+    for category, names in catalog.items():
+        if category in EXCLUDED_CATEGORIES:
+            continue
+        if categories and category not in categories:
+            continue
+        cols.extend(c for c in names if c in numeric and c not in cols)
+    return cols
+
+
+@dataclass
+class StepCube:
+    """per-(trace, step, column) 집계 배열"""
+    trace_ids: List[str]
+    step_names: List[str]
+    columns: List[str]
+    values: np.ndarray  # shape: (n_traces, n_steps, n_columns), 없는 셀은 NaN
+
+    def trace_index(self, trace_id: str) -> int:
+        return self.trace_ids.index(trace_id)
+
+
+def _quote(col: str) -> str:
+    return '"' + col.replace('"', '""') + '"'
+
+
+def load_step_cube(
+    con,
+    columns: Sequence[str],
+    trace_ids: Optional[Sequence[str]] = None,
+    agg: str = "AVG",
+    table: str = TABLE_NAME,
+) -> StepCube:
+    """
+    (trace_id, step_name)별 집계를 3차원 배열로 로드
+
+    Args:
+        con: DuckDB connection
+        columns: 집계할 수치형 컬럼
+        trace_ids: 대상 trace (None이면 전체)
+        agg: 집계 함수 (AVG, STDDEV_SAMP, MIN, MAX 등)
+        table: 대상 테이블/뷰
+    """
+    if not columns:
+        raise ValueError("집계할 컬럼이 필요합니다")
+
+    select_cols = ", ".join(f"{agg}(CAST({_quote(c)} AS DOUBLE))" for c in columns)
+    where_sql, params = "", []
+    if trace_ids:
+        placeholders = ",".join("?" for _ in trace_ids)
+        where_sql = f"WHERE trace_id IN ({placeholders})"
+        params = list(trace_ids)
+
+    rows = con.execute(f"""
+        SELECT trace_id, step_name, {select_cols}
+        FROM {table}
+        {where_sql}
+        GROUP BY trace_id, step_name
+    """, params).fetchnumpy()
+
+    keys = list(rows.keys())
+    trace_col = np.asarray(rows[keys[0]]).astype(str)
+    step_col = np.asarray(rows[keys[1]]).astype(str)
+    trace_list, t_idx = np.unique(trace_col, return_inverse=True)
+    step_list, s_idx = np.unique(step_col, return_inverse=True)
+
+    values = np.full((len(trace_list), len(step_list), len(columns)), np.nan)
+    if len(trace_col):
+        stacked = np.column_stack([
+            np.ma.filled(np.ma.asarray(rows[k], dtype=float), np.nan) for k in keys[2:]
+        ])
+        values[t_idx, s_idx, :] = stacked
+
+    return StepCube(
+        trace_ids=trace_list.tolist(),
+        step_names=step_list.tolist(),
+        columns=list(columns),
+        values=values,
+    )
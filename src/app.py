@@ -1,19 +1,15 @@
 from pathlib import Path
 from typing import Optional
 from fastapi import FastAPI, Request  # type: ignore
-from fastapi.responses import Response, HTMLResponse, RedirectResponse  # type: ignore
+from fastapi.responses import Response, HTMLResponse, RedirectResponse, StreamingResponse  # type: ignore
+from fastapi.staticfiles import StaticFiles  # type: ignore
 from fastapi.templating import Jinja2Templates  # type: ignore
 import duckdb  # type: ignore
 import pandas as pd  # type: ignore
-import matplotlib.pyplot as plt  # type: ignore
 import io
-import json
-from datetime import datetime
-import yaml  # type: ignore
 
-# 한글 폰트 설정 (모듈 import 시 1회 실행)
-from src.utils.mpl_korean import setup_korean_font
-setup_korean_font()
+# matplotlib/한글 폰트는 첫 차트 요청 때 로드 (기동 시간 단축)
+from src.utils.mpl_korean import pyplot
 # 기존 파서와 새 파서 선택 가능
 try:
     from src.nl_parse_v2 import parse_question  # 새 도메인 메타데이터 기반 파서
@@ -22,6 +18,7 @@ except ImportError:
 
 # 정규화 함수 import
 from domain.rules.normalization import normalize
+from domain.bundle import get_bundle
 from src.sql_builder import build_sql
 from src.process_metrics import (
     build_stable_avg_sql,
@@ -30,11 +27,27 @@ from src.process_metrics import (
     build_outlier_detection_sql,
     build_trace_compare_sql,
 )
+from src.analysis.router import choose_analysis_sql
+from src.services.export import EXPORT_EXECUTOR, EXPORT_FORMATS, export_chunks
+from src.services.payload_format import dumps, encode_payload, PAYLOAD_FORMATS
+from src.services.pagination import RESULT_SETS, CursorExpired, DEFAULT_PAGE_SIZE
+from src.services.executor import QueueFull, QueryTimeout, QueryCancelled
+from src.services.admission import ADMISSION, ClientLimitExceeded, client_id
+from src.services.query_cache import fetch_df
+from src.services.formatting import format_records
+from src.charts.spec import build_chart_spec
+from src.services.history_store import HISTORY, RECENT_LIMIT, user_id as history_user
 <<<<<<< HEAD
 from src.chart_templates import get_chart_template, apply_chart_template
-from src.payload_builder import build_payload
+from src.payload_builder import build_payload, build_payload_frame
 from src.plot_generator import plot_timeseries
-from src.question_suggestions import get_suggestions, get_category_suggestions, get_popular_questions
+from src.question_suggestions import (
+    get_suggestions,
+    get_category_suggestions,
+    get_popular_questions,
+    record_question,
+    get_index as get_suggest_index,
+)
 
 # 프로젝트 루트 기준 경로
 PROJECT_ROOT = Path(__file__).parent.parent
@@ -69,10 +82,15 @@ def validate_database():
 @app.on_event("startup")
 async def startup_event():
     try:
+        get_bundle()  # 도메인 YAML 검증 + 번들 로드 (첫 요청 전에)
         validate_database()
     except (FileNotFoundError, ValueError) as e:
         print(f"⚠️  경고: {e}")
         # 에러를 출력하지만 앱은 계속 실행 (개발 편의를 위해)
+    try:
+        get_suggest_index()  # 자동완성 색인(템플릿 + 이력 + 별칭 질문) 미리 생성
+    except Exception as e:
+        print(f"⚠️  자동완성 색인 생성 실패 (첫 요청 때 다시 시도): {e}")
 
 class QueryIn(BaseModel):
     question: str
@@ -90,77 +108,13 @@ app = FastAPI(title="ALD NL→SQL Stats API")
 templates = Jinja2Templates(directory=str(PROJECT_ROOT / "templates"))
 >>>>>>> 378f42a2115c8718668a2287e9ab54018ecf432a
 
+# 브라우저 차트 라이브러리(vega) 등 정적 파일 (CDN 없이 서버에서 제공)
+app.mount("/static", StaticFiles(directory=str(PROJECT_ROOT / "static")), name="static")
+
 @app.get("/")
 def root():
     return RedirectResponse(url="/view")
 
-def load_schema(path: Path) -> dict:
-    """columns.yaml 로드 (서버 시작 시 1회)"""
-    with open(path, "r", encoding="utf-8") as f:
-        return yaml.safe_load(f)
-
-SCHEMA = load_schema(SCHEMA_PATH)
-COLUMNS_SCHEMA = SCHEMA.get("columns", {})
-DEFAULTS = SCHEMA.get("defaults", {})
-DECIMALS_BY_TYPE = (DEFAULTS.get("decimals_by_type") or {})
-UNIT_LABEL = (DEFAULTS.get("unit_label") or {})
-
-def get_format_spec(col_key: Optional[str]) -> tuple[int, str]:
-    """
-    col_key(canonical key: pressact, mfcmon_n2_1 등) -> (decimals, unit_label) 반환
-    규칙:
-      1) physical_type별 defaults.decimals_by_type 적용
-      2) 컬럼에 decimals가 있으면 override
-      3) unit은 defaults.unit_label로 화면 라벨 변환
-    """
-    if not col_key:
-        return (2, "")
-    meta = COLUMNS_SCHEMA.get(col_key) or {}
-    physical_type = meta.get("physical_type")
-    unit_code = meta.get("unit")
-
-    decimals = int(DECIMALS_BY_TYPE.get(physical_type, 2))
-    if "decimals" in meta and meta["decimals"] is not None:
-        decimals = int(meta["decimals"])
-
-    unit_label = UNIT_LABEL.get(unit_code, unit_code or "")
-    return (decimals, unit_label)
-
-def format_value(value: float, col: Optional[str] = None, agg: str = "avg") -> str:
-    """값 포맷팅 (반올림 + 단위)"""
-    if value is None or (isinstance(value, float) and (value != value)):  # NaN 체크
-        return "N/A"
-    
-    # null_ratio는 퍼센트
-    if agg == "null_ratio":
-        return f"{value:.2f}%"
-
-    decimals, unit_label = get_format_spec(col)
-    formatted = f"{value:.{decimals}f}"
-    return f"{formatted}{' ' + unit_label if unit_label else ''}"
-
-def format_row(row: dict, parsed: dict) -> dict:
-    """행 데이터 포맷팅 (n, std 등 추가 정보 포함)"""
-    formatted = {}
-    col = parsed.get("col") or "pressact"  # 기본값
-    
-    for key, value in row.items():
-        if key == "value" and col:
-            formatted[key] = format_value(value, col, parsed.get("agg", "avg"))
-        elif key in ("std", "min_val", "max_val", "avg_diff", "min_diff", "max_diff") and col:
-            formatted[key] = format_value(value, col, "avg")
-        elif key in ("diff", "diff_signed"):
-            # 비교 차이는 원본 컬럼 기준으로 포맷팅
-            formatted[key] = format_value(value, col, "avg") if col else f"{value:.2f}"
-        elif key == "n" or key == "outlier_count":
-            formatted[key] = int(value) if value else 0
-        elif key in ("trace1_avg", "trace2_avg") and col:
-            formatted[key] = format_value(value, col, "avg")
-        else:
-            formatted[key] = value
-    
-    return formatted
-
 <<<<<<< HEAD
 def make_summary(parsed: dict, rows: list) -> str:
     """
@@ -275,8 +229,11 @@ def query(q: QueryIn):
             ],
         }
 =======
-def choose_sql(parsed_obj):
-    """SQL 빌더 선택 (우선순위: trace_compare > overshoot > outlier > dwell_time > stable_avg > 기본)"""
+def choose_sql(parsed_obj, con=None):
+    """SQL 빌더 선택 (우선순위: 사전 계산 분석 > trace_compare > overshoot > outlier > dwell_time > stable_avg > 기본)"""
+    routed = choose_analysis_sql(parsed_obj, con)
+    if routed:
+        return routed
     if parsed_obj.is_trace_compare:
         return build_trace_compare_sql(parsed_obj)
     if parsed_obj.is_overshoot:
@@ -284,16 +241,16 @@ def choose_sql(parsed_obj):
     if parsed_obj.is_outlier:
         return build_outlier_detection_sql(parsed_obj)
     if parsed_obj.is_dwell_time:
-        return build_dwell_time_sql(parsed_obj)
+        return build_dwell_time_sql(parsed_obj, con)
     if parsed_obj.is_stable_avg:
-        return build_stable_avg_sql(parsed_obj)
+        return build_stable_avg_sql(parsed_obj, con)
     return build_sql(parsed_obj)
 
 def run_query(parsed_obj):
-    """SQL 실행 및 결과 반환"""
-    sql, params = choose_sql(parsed_obj)
-    with duckdb.connect(str(DB), read_only=True) as con:
-        df = con.execute(sql, params).df()
+    """SQL 실행 및 결과 반환 (동기 호출용: 엔드포인트는 ADMISSION 실행기 안에서 choose_sql + fetch_df)"""
+    with duckdb.connect(str(DB)) as con:
+        sql, params = choose_sql(parsed_obj, con)
+        df = fetch_df(con, sql, params, DB)
     return sql.strip(), params, df
 
 def strip_trailing_limit(sql: str) -> str:
@@ -325,11 +282,21 @@ def add_others_row(df_top: pd.DataFrame, df_all: pd.DataFrame) -> pd.DataFrame:
         others_row["max_val"] = float(others_df["max_val"].max())
 
     return pd.concat([df_top, pd.DataFrame([others_row])], ignore_index=True)
+
+def _view_frames(parsed_obj, add_others: bool, con):
+    """/view 결과 (sql, params, df_top, df_all) - 실행기 작업 안에서 호출. df_all은 Others 행용 전체 결과"""
+    sql, params = choose_sql(parsed_obj, con)
+    df_top = fetch_df(con, sql, params, DB)
+    df_all = None
+    if add_others and parsed_obj.group_by == "step_name" and parsed_obj.top_n:
+        df_all = fetch_df(con, strip_trailing_limit(sql), params, DB)
+    return sql.strip(), params, df_top, df_all
 >>>>>>> 378f42a2115c8718668a2287e9ab54018ecf432a
 
 # ✅ HTML 테이블 UI
 @app.get("/view", response_class=HTMLResponse)
-def view(request: Request, q: str | None = None, show_all: str | None = None):
+async def view(request: Request, q: str | None = None, show_all: str | None = None):
+    """질의 결과 HTML 테이블 (질의는 입장 제어를 거쳐 실행기에서, 실행기 오류는 상태 코드와 함께 오류 화면)"""
     if not q:
         return templates.TemplateResponse("index.html", {"request": request, "q": ""})
 
@@ -352,13 +319,15 @@ def view(request: Request, q: str | None = None, show_all: str | None = None):
             show_all_button = False
             add_others = False
         
-        # SQL 실행
-        sql, params, df_top = run_query(parsed_obj)
+        # SQL 실행 (입장 제어 → 실행기, Others 행용 전체 결과도 같은 작업에서)
+        sql, params, df_top, df_all = await ADMISSION.run(
+            lambda con: _view_frames(parsed_obj, add_others, con), DB, parsed_obj, client_id(request), request
+        )
         
 <<<<<<< HEAD
         con = duckdb.connect(str(DB))
         try:
-            df = con.execute(sql, params).df()
+            df = fetch_df(con, sql, params, DB)
             
             # Others 그룹 추가 (스텝별이고 limit이 있을 때)
             if add_others and parsed_obj.group_by == "step_name" and parsed_obj.limit:
@@ -376,18 +345,14 @@ def view(request: Request, q: str | None = None, show_all: str | None = None):
 =======
         # Others 그룹 추가 (스텝별이고 top_n이 있을 때)
         df = df_top
-        if add_others and parsed_obj.group_by == "step_name" and parsed_obj.top_n:
-            # 전체 데이터 가져오기 (LIMIT 제거)
-            sql_all = strip_trailing_limit(sql)
-            with duckdb.connect(str(DB), read_only=True) as con:
+        if df_all is not None:
 >>>>>>> 378f42a2115c8718668a2287e9ab54018ecf432a
-                df_all = con.execute(sql_all, params).df()
             df = add_others_row(df_top, df_all)
         
         rows_raw = df.to_dict(orient="records")
-        # 포맷팅 적용
+        # 포맷팅 적용 (컬럼 단위)
         parsed = to_parsed_dict(parsed_obj)
-        rows = [format_row(row, parsed) for row in rows_raw]
+        rows = format_records(df, parsed)
         summary = make_summary(parsed, rows_raw)
         return templates.TemplateResponse(
             "index.html",
@@ -404,6 +369,21 @@ def view(request: Request, q: str | None = None, show_all: str | None = None):
                 "show_all_button": show_all_button,
             },
         )
+    except (QueueFull, ClientLimitExceeded, QueryTimeout, QueryCancelled) as e:
+        mapped = _executor_error_response(e)
+        headers = {"Retry-After": mapped.headers["retry-after"]} if "retry-after" in mapped.headers else None
+        return templates.TemplateResponse(
+            "index.html",
+            {
+                "request": request,
+                "q": q,
+                "question_raw": norm.raw,
+                "question_normalized": norm.text,
+                "error": str(e) or "요청이 취소되었습니다",
+            },
+            status_code=mapped.status_code,
+            headers=headers,
+        )
     except Exception as e:
         return templates.TemplateResponse(
             "index.html", 
@@ -419,7 +399,19 @@ def view(request: Request, q: str | None = None, show_all: str | None = None):
 # ✅ PNG plot (브라우저에서 바로 열리는 엔드포인트) - 레거시 (하위 호환성)
 @app.get("/plot")
 <<<<<<< HEAD
-def plot_legacy(q: str):
+async def plot_legacy(request: Request, q: str):
+    """PNG 차트 (입장 제어를 거쳐 실행기에서 질의 + 렌더링)"""
+    try:
+        p = parse_question(q)
+    except Exception:
+        p = None  # 파싱 오류는 렌더링 쪽에서 오류 이미지로 처리
+    try:
+        return await ADMISSION.run(lambda con: _render_plot_legacy(q, con), DB, p, client_id(request), request)
+    except (QueueFull, ClientLimitExceeded, QueryTimeout, QueryCancelled) as e:
+        return _executor_error_response(e)
+
+def _render_plot_legacy(q: str, con) -> Response:
+    plt = pyplot()
     try:
         parsed_obj = parse_question(q)
         
@@ -437,14 +429,16 @@ def plot_legacy(q: str):
             # 이상치는 trace별이므로 바 차트
             parsed_obj.chart_type = "bar"
         elif parsed_obj.is_dwell_time:
-            sql, params = build_dwell_time_sql(parsed_obj)
+            sql, params = build_dwell_time_sql(parsed_obj, con)
             parsed_obj.chart_type = "bar"
         elif parsed_obj.is_stable_avg:
-            sql, params = build_stable_avg_sql(parsed_obj)
+            sql, params = build_stable_avg_sql(parsed_obj, con)
         else:
             sql, params = build_sql(parsed_obj)
+        df = fetch_df(con, sql, params, DB)
 =======
-def plot(q: str):
+async def plot(request: Request, q: str):
+    """PNG 차트 (입장 제어를 거쳐 실행기에서 질의 + 렌더링)"""
     parsed_obj = parse_question(q)
     
     # 차트 타입 설정
@@ -452,8 +446,14 @@ def plot(q: str):
         parsed_obj.chart_type = "bar"
     
     # SQL 실행 및 차트 렌더링
-    sql, params, df = run_query(parsed_obj)
-    return render_chart(df, parsed_obj)
+    def _run(con):
+        sql, params = choose_sql(parsed_obj, con)
+        return render_chart(fetch_df(con, sql, params, DB), parsed_obj)
+
+    try:
+        return await ADMISSION.run(_run, DB, parsed_obj, client_id(request), request)
+    except (QueueFull, ClientLimitExceeded, QueryTimeout, QueryCancelled) as e:
+        return _executor_error_response(e)
 >>>>>>> 378f42a2115c8718668a2287e9ab54018ecf432a
 
 
@@ -602,7 +602,8 @@ def plot(q: str):
         plt.savefig(buf, format="png", dpi=150, bbox_inches='tight')
         plt.close(fig)
         buf.seek(0)
-        return Response(content=buf.read(), media_type="image/png")
+        # <img>로 보여야 하므로 200 유지, 오류 여부는 헤더로 (부하 테스트 판정용)
+        return Response(content=buf.read(), media_type="image/png", headers={"X-Plot-Error": "1"})
 
 # ✅ plot을 페이지로 보기(이미지 태그로 렌더링)
 @app.get("/plot_page", response_class=HTMLResponse)
@@ -634,38 +635,47 @@ def get_steps():
 
 # ✅ CSV 다운로드
 @app.get("/api/csv")
-def download_csv(q: str):
+async def download_csv(request: Request, q: str, format: str = "csv"):
+    """
+    질의 결과 내보내기 (csv: BOM 포함 / ndjson / arrow), DuckDB 결과를 청크 단위로 스트리밍
+
+    SQL 생성과 스트리밍은 내보내기 전용 제한 실행기(EXPORT_EXECUTOR)에서 실행
+    (동시 스트림·대기열 상한 503, 청크 생성 시간 초과 504, 연결 끊김 시 중단)
+    """
     try:
+        if format not in EXPORT_FORMATS:
+            raise ValueError(f"지원하지 않는 내보내기 형식: {format} (csv, ndjson, arrow)")
         parsed_obj = parse_question(q)
-        
-        if parsed_obj.is_trace_compare:
-            sql, params = build_trace_compare_sql(parsed_obj)
-        elif parsed_obj.is_overshoot:
-            sql, params = build_overshoot_sql(parsed_obj)
-        elif parsed_obj.is_outlier:
-            sql, params = build_outlier_detection_sql(parsed_obj)
-        elif parsed_obj.is_dwell_time:
-            sql, params = build_dwell_time_sql(parsed_obj)
-        elif parsed_obj.is_stable_avg:
-            sql, params = build_stable_avg_sql(parsed_obj)
-        else:
-            sql, params = build_sql(parsed_obj)
-        
-        con = duckdb.connect(str(DB))
-        try:
-            df = con.execute(sql, params).df()
-        finally:
-            con.close()
-        
-        csv_content = df.to_csv(index=False)
-        
-        return Response(
-            content=csv_content.encode("utf-8-sig"),  # BOM 포함 (Excel 호환)
-            media_type="text/csv; charset=utf-8",
-            headers={"Content-Disposition": f'attachment; filename="query_result_{q[:20]}.csv"'}
+
+        def _export(con):
+            routed = choose_analysis_sql(parsed_obj, con)
+            if routed:
+                sql, params = routed
+            elif parsed_obj.is_trace_compare:
+                sql, params = build_trace_compare_sql(parsed_obj)
+            elif parsed_obj.is_overshoot:
+                sql, params = build_overshoot_sql(parsed_obj)
+            elif parsed_obj.is_outlier:
+                sql, params = build_outlier_detection_sql(parsed_obj)
+            elif parsed_obj.is_dwell_time:
+                sql, params = build_dwell_time_sql(parsed_obj, con)
+            elif parsed_obj.is_stable_avg:
+                sql, params = build_stable_avg_sql(parsed_obj, con)
+            else:
+                sql, params = build_sql(parsed_obj)
+            return export_chunks(con, sql, params, format)
+
+        body = await EXPORT_EXECUTOR.open(_export, DB)
+        spec = EXPORT_FORMATS[format]
+        return StreamingResponse(
+            body,
+            media_type=spec["media_type"],
+            headers={"Content-Disposition": f'attachment; filename="query_result.{spec["ext"]}"'}
         )
+    except (QueueFull, QueryTimeout, QueryCancelled) as e:
+        return _executor_error_response(e)
     except Exception as e:
-        return Response(content=f"오류: {str(e)}".encode("utf-8"), media_type="text/plain")
+        return Response(content=f"오류: {str(e)}".encode("utf-8"), media_type="text/plain", status_code=400)
 
 # ✅ 데이터 탐색: 데이터 범위
 @app.get("/api/range")
@@ -680,30 +690,89 @@ def get_data_range():
         "total_rows": total_rows
     }
 
+def _executor_error_response(e: Exception) -> Response:
+    """실행기/입장 제어 예외 → HTTP 응답 (503 대기열 가득, 429 클라이언트 상한, 504 시간 초과, 499 연결 끊김)"""
+    if isinstance(e, QueueFull):
+        return Response(
+            content=dumps({"ok": False, "error": str(e), "retry_after": e.retry_after}),
+            media_type="application/json",
+            status_code=503,
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    if isinstance(e, ClientLimitExceeded):
+        return Response(
+            content=dumps({"ok": False, "error": str(e), "retry_after": e.retry_after}),
+            media_type="application/json",
+            status_code=429,
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    if isinstance(e, QueryTimeout):
+        return Response(content=dumps({"ok": False, "error": str(e)}), media_type="application/json", status_code=504)
+    return Response(status_code=499)
+
 @app.get("/api/query")
-def query_get(q: str):
-    """GET 방식: 표준 payload 반환: question, summary, sql, columns, data, meta"""
+async def query_get(request: Request, q: str, format: str = "records"):
+    """
+    GET 방식: 표준 payload 반환: question, summary, sql, columns, data, meta
+
+    format:
+        records(기본): data = [{컬럼: 값}, ...]
+        columnar: data = {컬럼: [값, ...]}
+        arrow: Arrow IPC stream (payload 나머지는 스키마 메타데이터 b"payload")
+
+    질의/직렬화는 입장 제어(ADMISSION)가 비용에 따라 고른 실행기에서 실행
+    (타임아웃·연결 끊김 시 중단, 대기열 가득 시 503, 클라이언트 상한 초과 시 429)
+    """
+    def _run(con):
+        payload, df = build_payload_frame(q, con)
+        return encode_payload(payload, df, format)
+
     try:
-        con = duckdb.connect(str(DB))
-        try:
-            payload = build_payload(q, con)
-            return payload
-        finally:
-            con.close()
+        if format not in PAYLOAD_FORMATS:
+            raise ValueError(f"지원하지 않는 payload 형식: {format} (records, columnar, arrow)")
+        body, media_type = await ADMISSION.run(_run, DB, parse_question(q), client_id(request), request)
+        return Response(content=body, media_type=media_type)
+    except (QueueFull, ClientLimitExceeded, QueryTimeout, QueryCancelled) as e:
+        return _executor_error_response(e)
     except Exception as e:
         return {
             "ok": False,
             "error": str(e),
-            "hint_examples": get_popular_questions(5),
+            "hint_examples": get_popular_questions(5, history_user(request)),
         }
 
+@app.get("/api/query/page")
+async def query_page(request: Request, cursor: str, limit: int = DEFAULT_PAGE_SIZE, format: str = "records"):
+    """
+    /api/query의 next_cursor로 다음 페이지 조회 (쿼리 재실행 없이 보관된 결과에서 자름)
+
+    자르기/직렬화는 실행기에서 (DuckDB 연결 없이, cheap 실행기의 대기열·시간 제한 적용)
+    만료된 커서는 410 (질의를 다시 실행해야 함), 잘못된 커서/형식은 400
+    """
+    def _page(_con):
+        df, next_cursor, total_rows = RESULT_SETS.page(cursor, limit)
+        payload = {"columns": list(df.columns), "total_rows": total_rows, "next_cursor": next_cursor}
+        return encode_payload(payload, df, format)
+
+    try:
+        if format not in PAYLOAD_FORMATS:
+            raise ValueError(f"지원하지 않는 payload 형식: {format} (records, columnar, arrow)")
+        body, media_type = await ADMISSION.run(_page, None, None, client_id(request), request)
+    except (QueueFull, ClientLimitExceeded, QueryTimeout, QueryCancelled) as e:
+        return _executor_error_response(e)
+    except CursorExpired as e:
+        return Response(content=dumps({"ok": False, "error": str(e)}), media_type="application/json", status_code=410)
+    except ValueError as e:
+        return Response(content=dumps({"ok": False, "error": str(e)}), media_type="application/json", status_code=400)
+    return Response(content=body, media_type=media_type)
+
 @app.get("/api/suggestions")
-def get_question_suggestions(q: str = "", category: str = None, limit: int = 10):
+def get_question_suggestions(request: Request, q: str = "", category: str = None, limit: int = 10):
     """
-    질문 추천 및 자동완성
+    질문 추천 및 자동완성 (순위는 X-Client-Id 사용자의 이력 기준)
     
     Args:
-        q: 검색어 (부분 매칭)
+        q: 검색어 (질문 앞부분 또는 단어 시작 부분, 조합 중인 한글 포함)
         category: 카테고리 필터
         limit: 반환할 최대 개수
     """
@@ -713,42 +782,57 @@ def get_question_suggestions(q: str = "", category: str = None, limit: int = 10)
             "suggestions": [{"question": q, "category": category} for q in questions[:limit]]
         }
     
-    suggestions = get_suggestions(q, limit)
+    suggestions = get_suggestions(q, limit, history_user(request))
     return {"suggestions": suggestions}
 
 @app.get("/api/popular")
-def get_popular():
-    """인기 질문 목록"""
-    return {"questions": get_popular_questions(10)}
+def get_popular(request: Request):
+    """인기 질문 목록 (X-Client-Id 사용자의 이력 기준)"""
+    return {"questions": get_popular_questions(10, history_user(request))}
 
 @app.get("/api/plot")
-def plot_api(q: str):
-    """시계열 Plot API: Matplotlib PNG 반환"""
+async def plot_api(request: Request, q: str):
+    """시계열 Plot API: Matplotlib PNG 반환 (입장 제어를 거쳐 실행기에서 질의+렌더링)"""
+    from urllib.parse import unquote
+
+    try:
+        p = parse_question(unquote(q))
+    except Exception:
+        p = None  # 파싱 오류는 렌더링 쪽에서 오류 이미지로 처리
+    try:
+        return await ADMISSION.run(lambda con: _render_plot_api(q, con), DB, p, client_id(request), request)
+    except (QueueFull, ClientLimitExceeded, QueryTimeout, QueryCancelled) as e:
+        return _executor_error_response(e)
+
+def _chart_sql(p, con):
+    """차트용 SQL 선택 (사전 계산 분석 > trace_compare > overshoot > outlier > dwell_time > stable_avg > 기본)"""
+    routed = choose_analysis_sql(p, con)
+    if routed:
+        return routed
+    if p.is_trace_compare:
+        return build_trace_compare_sql(p)
+    if p.is_overshoot:
+        return build_overshoot_sql(p)
+    if p.is_outlier:
+        return build_outlier_detection_sql(p)
+    if p.is_dwell_time:
+        return build_dwell_time_sql(p, con)
+    if p.is_stable_avg:
+        return build_stable_avg_sql(p, con)
+    return build_sql(p)
+
+def _render_plot_api(q: str, con) -> Response:
     from urllib.parse import unquote
     
+    plt = pyplot()
     try:
         q_decoded = unquote(q)
         p = parse_question(q_decoded)
         
         # SQL 생성
-        if p.is_trace_compare:
-            sql, params = build_trace_compare_sql(p)
-        elif p.is_overshoot:
-            sql, params = build_overshoot_sql(p)
-        elif p.is_outlier:
-            sql, params = build_outlier_detection_sql(p)
-        elif p.is_dwell_time:
-            sql, params = build_dwell_time_sql(p)
-        elif p.is_stable_avg:
-            sql, params = build_stable_avg_sql(p)
-        else:
-            sql, params = build_sql(p)
+        sql, params = _chart_sql(p, con)
         
-        con = duckdb.connect(str(DB))
-        try:
-            df = con.execute(sql, params).df()
-        finally:
-            con.close()
+        df = fetch_df(con, sql, params, DB)
         
         # 시계열 Plot 생성
         from src.semantic_resolver import get_metadata_by_physical_column
@@ -770,123 +854,79 @@ def plot_api(q: str):
         fig.savefig(buf, format="png")
         buf.seek(0)
         plt.close(fig)
-        return Response(buf.read(), media_type="image/png")
+        return Response(buf.read(), media_type="image/png", headers={"X-Plot-Error": "1"})
 
-# ✅ CSV 다운로드
-@app.get("/api/csv")
-def download_csv(q: str):
+@app.get("/api/chart")
+async def chart_spec_api(request: Request, q: str):
+    """
+    차트 스펙 API: Vega-Lite 스펙 + 컬럼형 데이터 반환 (브라우저가 vega-embed로 렌더링)
+
+    /plot PNG와 같은 템플릿 매핑(get_chart_template)·Others/Top N 규칙을 쓰되 서버에서 그리지 않음.
+    PNG는 내보내기용으로 /plot에 그대로 둠.
+    오류: 질문/SQL 생성 오류 400, 실행기 오류 429/503/504, 그 밖의 실패 500 (본문은 {"ok": false, "error"})
+    """
     try:
-        parsed_obj = parse_question(q)
-        
-        # 공정 친화 지표 또는 이상치 탐지 처리 (우선순위: trace_compare > overshoot > outlier > 기타)
-        if parsed_obj.is_trace_compare:
-            sql, params = build_trace_compare_sql(parsed_obj)
-        elif parsed_obj.is_overshoot:
-            sql, params = build_overshoot_sql(parsed_obj)
-        elif parsed_obj.is_outlier:
-            sql, params = build_outlier_detection_sql(parsed_obj)
-        elif parsed_obj.is_dwell_time:
-            sql, params = build_dwell_time_sql(parsed_obj)
-        elif parsed_obj.is_stable_avg:
-            sql, params = build_stable_avg_sql(parsed_obj)
-        else:
-            sql, params = build_sql(parsed_obj)
-        
-        con = duckdb.connect(str(DB))
-        df = con.execute(sql, params).df()
-        
-        csv_str = df.to_csv(index=False)
-        return Response(content=csv_str, media_type="text/csv", 
-                       headers={"Content-Disposition": f"attachment; filename=query_result.csv"})
+        p = parse_question(q)
     except Exception as e:
-        return {"ok": False, "error": str(e)}
+        return Response(content=dumps({"ok": False, "error": str(e)}), media_type="application/json", status_code=400)
 
-# ✅ 히스토리 저장/조회 (간단한 JSON 파일 기반)
-HISTORY_FILE = PROJECT_ROOT / "data" / "history.json"
+    def _run(con):
+        sql, params = _chart_sql(p, con)
+        df = fetch_df(con, sql, params, DB)
+        return {"ok": True, "question": q, **build_chart_spec(df, p)}
 
+    try:
+        body = await ADMISSION.run(_run, DB, p, client_id(request), request)
+        return Response(content=dumps(body), media_type="application/json")
+    except (QueueFull, ClientLimitExceeded, QueryTimeout, QueryCancelled) as e:
+        return _executor_error_response(e)
+    except ValueError as e:
+        return Response(content=dumps({"ok": False, "error": str(e)}), media_type="application/json", status_code=400)
+    except Exception as e:
+        return Response(content=dumps({"ok": False, "error": str(e)}), media_type="application/json", status_code=500)
+
+# ✅ 히스토리 저장/조회 (SQLite, 추가 전용 / X-Client-Id별)
 @app.post("/api/history")
-def save_history(q: QueryIn):
+def save_history(q: QueryIn, request: Request):
+    user = history_user(request)
     try:
-        if not HISTORY_FILE.parent.exists():
-            HISTORY_FILE.parent.mkdir(parents=True)
-        
-        history = []
-        if HISTORY_FILE.exists():
-            with open(HISTORY_FILE, 'r', encoding='utf-8') as f:
-                history = json.load(f)
-        
-        # 중복 제거 및 최근 것만 유지 (최대 100개)
-        history = [h for h in history if h['question'] != q.question]
-        history.insert(0, {"question": q.question, "timestamp": datetime.now().isoformat()})
-        history = history[:100]
-        
-        with open(HISTORY_FILE, 'w', encoding='utf-8') as f:
-            json.dump(history, f, ensure_ascii=False, indent=2)
-        
-        return {"ok": True}
+        HISTORY.append(q.question, user)
     except Exception as e:
         return {"ok": False, "error": str(e)}
+    try:
+        record_question(q.question, user)  # 자동완성 순위에 바로 반영
+    except Exception as e:
+        # 이력은 이미 저장됨: 색인 반영 실패는 다음 색인 생성 때 이력에서 복구
+        print(f"⚠️  자동완성 색인 반영 실패: {e}")
+    return {"ok": True}
 
 @app.get("/api/history")
-def get_history():
+def get_history(request: Request):
     try:
-        if not HISTORY_FILE.exists():
-            return {"history": []}
-        with open(HISTORY_FILE, 'r', encoding='utf-8') as f:
-            history = json.load(f)
-        return {"history": history[:20]}  # 최근 20개만
+        return {"history": HISTORY.recent(history_user(request), RECENT_LIMIT)}  # 최근 20개만
     except Exception as e:
         return {"ok": False, "error": str(e)}
 
 # ✅ 즐겨찾기 저장/조회
-FAVORITES_FILE = PROJECT_ROOT / "data" / "favorites.json"
-
 @app.post("/api/favorites")
-def save_favorite(q: QueryIn):
+def save_favorite(q: QueryIn, request: Request):
     try:
-        if not FAVORITES_FILE.parent.exists():
-            FAVORITES_FILE.parent.mkdir(parents=True)
-        
-        favorites = []
-        if FAVORITES_FILE.exists():
-            with open(FAVORITES_FILE, 'r', encoding='utf-8') as f:
-                favorites = json.load(f)
-        
-        if q.question not in favorites:
-            favorites.append(q.question)
-        
-        with open(FAVORITES_FILE, 'w', encoding='utf-8') as f:
-            json.dump(favorites, f, ensure_ascii=False, indent=2)
-        
+        HISTORY.add_favorite(q.question, history_user(request))
         return {"ok": True}
     except Exception as e:
         return {"ok": False, "error": str(e)}
 
 @app.get("/api/favorites")
-def get_favorites():
+def get_favorites(request: Request):
     try:
-        if not FAVORITES_FILE.exists():
-            return {"favorites": []}
-        with open(FAVORITES_FILE, 'r', encoding='utf-8') as f:
-            favorites = json.load(f)
-        return {"favorites": favorites}
+        return {"favorites": HISTORY.favorites(history_user(request))}
     except Exception as e:
         return {"ok": False, "error": str(e)}
 
 @app.delete("/api/favorites")
-def delete_favorite(q: QueryIn):
+def delete_favorite(q: QueryIn, request: Request):
     try:
-        if not FAVORITES_FILE.exists():
-            return {"ok": True}
-        
-        with open(FAVORITES_FILE, 'r', encoding='utf-8') as f:
-            favorites = json.load(f)
-        
-        favorites = [f for f in favorites if f != q.question]
-        
-        with open(FAVORITES_FILE, 'w', encoding='utf-8') as f:
-            json.dump(favorites, f, ensure_ascii=False, indent=2)
-        
+        HISTORY.remove_favorite(q.question, history_user(request))
         return {"ok": True}
     except Exception as e:
         return {"ok": False, "error": str(e)}
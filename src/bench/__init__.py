@@ -0,0 +1 @@
+# Bench package
@@ -0,0 +1,284 @@
+"""
+FastAPI 서비스 부하 테스트 (실사용에 가까운 질문 혼합)
+
+질문 출처와 가중치:
+- question_suggestions.QUESTION_TEMPLATES (추천 질문)
+- tests/questions.jsonl (파서 코퍼스)
+- 이력 저장소 services/history_store (실제 사용 이력, 최근 것일수록 가중치 ↑)
+
+엔드포인트(/view, /api/query, /plot, /api/csv)도 가중치로 섞어, 동시성을 단계적으로 올리며
+단계·엔드포인트별 처리량(req/s), 지연 p50/p90/p99(ms), 오류율을 잰다.
+일부 엔드포인트는 오류도 200으로 돌려주므로 응답 내용으로 판정한다 (response_ok 참고).
+
+- 기본은 프로세스 내(httpx ASGITransport로 src.app 직접 호출, 네트워크 없음)
+- --url이 있으면 떠 있는 서버에 로컬 소켓으로 (연결 풀/keep-alive 포함)
+- 결과: data_out/bench/load_test.json
+
+사용법:
+    python -m src.bench.load_test --levels 1 4 16 --duration 20
+    python -m src.bench.load_test --url http://127.0.0.1:8000 --levels 1 2 4 8 16 32
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import httpx  # type: ignore
+import numpy as np  # type: ignore
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+QUESTIONS_FILE = PROJECT_ROOT / "tests" / "questions.jsonl"
+RESULT_FILE = PROJECT_ROOT / "data_out" / "bench" / "load_test.json"
+
+# 엔드포인트 이름 → (경로, 가중치). 화면 조회(/view)와 API 조회가 대부분, 그래프/내보내기는 드묾
+ENDPOINTS: Dict[str, Tuple[str, float]] = {
+    "view": ("/view", 4.0),
+    "api_query": ("/api/query", 4.0),
+    "plot": ("/plot", 1.0),
+    "api_csv": ("/api/csv", 1.0),
+}
+
+# 200 응답 안의 오류 표시
+VIEW_ERROR_MARKER = 'class="error-box"'  # /view: templates/index.html 오류 박스
+PLOT_ERROR_HEADER = "x-plot-error"       # /plot, /api/plot: 오류 메시지 PNG
+
+# 출처별 가중치 (이력은 실제 사용 빈도를 반영하므로 더 무겁게)
+SOURCE_WEIGHTS = {"templates": 1.0, "corpus": 1.0, "history": 3.0}
+
+DEFAULT_LEVELS = (1, 2, 4, 8, 16)
+DEFAULT_DURATION_S = 10.0
+HISTORY_SAMPLE = 1000  # 이력에서 가져올 최근 질문 수 (같은 질문이 반복되면 그만큼 가중)
+REQUEST_TIMEOUT_S = 120.0
+
+
+def _load_corpus(path: Path) -> List[str]:
+    if not path.exists():
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line)["q"] for line in f if line.strip()]
+
+
+def _load_history(limit: int = HISTORY_SAMPLE) -> List[str]:
+    """전체 사용자의 최근 이력 질문 (최신순, 중복 포함)"""
+    from src.services.history_store import HISTORY
+
+    return [q for q, _ in HISTORY.events(limit=limit)]
+
+
+def question_mix(
+    templates: Sequence[str],
+    corpus: Sequence[str],
+    history: Sequence[str],
+    source_weights: Optional[Dict[str, float]] = None,
+) -> Tuple[List[str], np.ndarray]:
+    """
+    (질문 목록, 정규화된 가중치)
+
+    출처마다 총 가중치를 source_weights만큼 나눠 가짐 (출처 크기와 무관).
+    history는 최신순이라 앞쪽일수록 무겁게 (1/(i+1)), 같은 질문이 여러 출처에 있으면 합산.
+    """
+    sw = SOURCE_WEIGHTS if source_weights is None else source_weights
+    weights: Dict[str, float] = {}
+
+    def add(questions: Sequence[str], per_item: np.ndarray, source: str):
+        if not len(questions) or not sw.get(source):
+            return
+        per_item = per_item / per_item.sum() * sw[source]
+        for q, w in zip(questions, per_item):
+            weights[q] = weights.get(q, 0.0) + float(w)
+
+    add(templates, np.ones(len(templates)), "templates")
+    add(corpus, np.ones(len(corpus)), "corpus")
+    add(history, 1.0 / np.arange(1, len(history) + 1), "history")
+    if not weights:
+        raise ValueError("질문 출처가 모두 비어 있습니다")
+    questions = list(weights)
+    w = np.array([weights[q] for q in questions])
+    return questions, w / w.sum()
+
+
+def default_mix() -> Tuple[List[str], np.ndarray]:
+    from src.question_suggestions import QUESTION_TEMPLATES
+
+    return question_mix(
+        [q for q, _ in QUESTION_TEMPLATES],
+        _load_corpus(QUESTIONS_FILE),
+        _load_history(),
+    )
+
+
+def summarize(samples: List[Tuple[str, float, bool]], elapsed_s: float) -> Dict[str, Dict]:
+    """(엔드포인트, 지연 ms, 성공 여부) 표본 → 엔드포인트별 + 전체 통계"""
+    by_ep: Dict[str, List[Tuple[float, bool]]] = {}
+    for ep, ms, ok in samples:
+        by_ep.setdefault(ep, []).append((ms, ok))
+        by_ep.setdefault("all", []).append((ms, ok))
+    out = {}
+    for ep, rows in by_ep.items():
+        lat = np.array([ms for ms, _ in rows])
+        errors = sum(1 for _, ok in rows if not ok)
+        p50, p90, p99 = np.percentile(lat, [50, 90, 99])
+        out[ep] = {
+            "n": len(rows),
+            "errors": errors,
+            "error_rate": errors / len(rows),
+            "rps": len(rows) / elapsed_s if elapsed_s > 0 else 0.0,
+            "p50_ms": float(p50),
+            "p90_ms": float(p90),
+            "p99_ms": float(p99),
+        }
+    return out
+
+
+def response_ok(path: str, r: httpx.Response) -> bool:
+    """
+    엔드포인트별 성공 판정
+
+    - 4xx/5xx는 실패
+    - /api/query: JSON {"ok": false}
+    - /view: 오류 박스가 있는 HTML
+    - /plot, /api/plot: 오류 메시지를 그린 PNG (X-Plot-Error 헤더)
+    """
+    if r.status_code >= 400:
+        return False
+    if path == "/api/query":
+        if not r.headers.get("content-type", "").startswith("application/json"):
+            return True  # arrow 등
+        try:
+            body = r.json()
+        except ValueError:
+            return False
+        return not (isinstance(body, dict) and body.get("ok") is False)
+    if path == "/view":
+        return VIEW_ERROR_MARKER not in r.text
+    if path in ("/plot", "/api/plot"):
+        return PLOT_ERROR_HEADER not in r.headers
+    return True
+
+
+async def run_level(
+    client: httpx.AsyncClient,
+    concurrency: int,
+    questions: Sequence[str],
+    q_weights: np.ndarray,
+    duration_s: float = DEFAULT_DURATION_S,
+    max_requests: Optional[int] = None,
+    endpoints: Optional[Dict[str, Tuple[str, float]]] = None,
+    seed: int = 0,
+) -> Dict[str, Dict]:
+    """
+    concurrency개 작업자가 duration_s 동안(또는 max_requests회까지) 요청을 반복
+
+    작업자마다 X-Client-Id를 달리 보내 클라이언트별 입장 제한이 실사용처럼 적용되게 함.
+    """
+    eps = ENDPOINTS if endpoints is None else endpoints
+    ep_names = list(eps)
+    ep_weights = np.array([eps[e][1] for e in ep_names], dtype=float)
+    ep_weights /= ep_weights.sum()
+    rng = np.random.default_rng(seed)
+    # 요청 순서를 미리 뽑아 두고 작업자들이 공유 (seed 고정 시 같은 혼합)
+    plan_size = max_requests if max_requests is not None else 4096
+    plan_q = rng.choice(len(questions), size=plan_size, p=q_weights)
+    plan_ep = rng.choice(len(ep_names), size=plan_size, p=ep_weights)
+    samples: List[Tuple[str, float, bool]] = []
+    issued = 0
+    deadline = time.perf_counter() + duration_s
+
+    async def worker(wid: int):
+        nonlocal issued
+        headers = {"X-Client-Id": f"load-{wid}"}
+        while time.perf_counter() < deadline and (max_requests is None or issued < max_requests):
+            i = issued % plan_size
+            issued += 1
+            ep = ep_names[plan_ep[i]]
+            t0 = time.perf_counter()
+            try:
+                r = await client.get(eps[ep][0], params={"q": questions[plan_q[i]]}, headers=headers)
+                await r.aread()
+                ok = response_ok(eps[ep][0], r)
+            except httpx.HTTPError:
+                ok = False
+            samples.append((ep, (time.perf_counter() - t0) * 1000.0, ok))
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker(w) for w in range(concurrency)))
+    return summarize(samples, time.perf_counter() - t0)
+
+
+def make_client(app=None, url: Optional[str] = None, max_connections: int = 64) -> httpx.AsyncClient:
+    """url이 있으면 소켓 연결(풀 크기 max_connections), 없으면 ASGI 앱을 프로세스 내에서 호출"""
+    timeout = httpx.Timeout(REQUEST_TIMEOUT_S)
+    if url:
+        limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        return httpx.AsyncClient(base_url=url, timeout=timeout, limits=limits)
+    if app is None:
+        from src.app import app
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://loadtest", timeout=timeout)
+
+
+async def ramp(
+    client: httpx.AsyncClient,
+    levels: Sequence[int],
+    questions: Sequence[str],
+    q_weights: np.ndarray,
+    duration_s: float = DEFAULT_DURATION_S,
+    max_requests: Optional[int] = None,
+    endpoints: Optional[Dict[str, Tuple[str, float]]] = None,
+    seed: int = 0,
+) -> Dict[int, Dict[str, Dict]]:
+    """동시성 단계별 결과 {concurrency: {endpoint|all: 통계}}"""
+    results = {}
+    for level in levels:
+        results[level] = await run_level(client, level, questions, q_weights, duration_s, max_requests, endpoints, seed)
+    return results
+
+
+def format_report(results: Dict[int, Dict[str, Dict]]) -> str:
+    lines = [f"{'conc':>5s} {'endpoint':<10s} {'n':>7s} {'req/s':>8s} {'p50ms':>9s} {'p90ms':>9s} {'p99ms':>9s} {'err%':>6s}"]
+    for level, by_ep in results.items():
+        for ep in sorted(by_ep, key=lambda e: (e == "all", e)):
+            r = by_ep[ep]
+            lines.append(
+                f"{level:>5d} {ep:<10s} {r['n']:>7d} {r['rps']:>8.1f} {r['p50_ms']:>9.1f} "
+                f"{r['p90_ms']:>9.1f} {r['p99_ms']:>9.1f} {r['error_rate'] * 100:>5.1f}%"
+            )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="FastAPI 서비스 부하 테스트")
+    ap.add_argument("--url", help="떠 있는 서버 주소 (없으면 프로세스 내 ASGI 호출)")
+    ap.add_argument("--levels", type=int, nargs="+", default=list(DEFAULT_LEVELS), help="동시성 단계")
+    ap.add_argument("--duration", type=float, default=DEFAULT_DURATION_S, help="단계별 실행 시간(초)")
+    ap.add_argument("--requests", type=int, help="단계별 최대 요청 수 (duration보다 먼저 끝날 수 있음)")
+    ap.add_argument("--endpoints", nargs="+", choices=list(ENDPOINTS), help="대상 엔드포인트 (기본: 전체)")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", type=Path, default=RESULT_FILE)
+    args = ap.parse_args(argv)
+
+    questions, q_weights = default_mix()
+    endpoints = {e: ENDPOINTS[e] for e in args.endpoints} if args.endpoints else None
+    print(f"질문 {len(questions)}개, 동시성 {args.levels}, 단계당 {args.duration:g}초 ({args.url or '프로세스 내'})")
+
+    async def _run():
+        async with make_client(url=args.url, max_connections=max(args.levels)) as client:
+            return await ramp(client, args.levels, questions, q_weights, args.duration, args.requests, endpoints, args.seed)
+
+    results = asyncio.run(_run())
+    print(format_report(results))
+
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(
+            {"target": args.url or "in-process", "duration_s": args.duration, "levels": results},
+            f, ensure_ascii=False, indent=2,
+        )
+    print(f"✅ 결과 저장: {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
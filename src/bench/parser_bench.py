@@ -0,0 +1,295 @@
+"""
+파서 처리량 벤치마크 (tests/questions.jsonl 재생)
+
+질문 코퍼스를 단계별로 흘려 지연/처리량/할당량을 잰다.
+
+    normalize(q) → parse_question(q) (nl_parse_v2) → build_sql(p)
+
+- 코퍼스는 tests/questions.jsonl. --expand N이면 별칭 치환(같은 컬럼의 다른 alias),
+  trace/step/top-N 숫자 바꾸기로 N개까지 합성 질문을 늘린다 (seed 고정)
+- 단계별 p50/p99/평균 지연(µs), 처리량(q/s), 메모리(tracemalloc 표본):
+  호출 중 최대 사용 증가량(peak, 평균/최대)과 호출 후 남은 순증가량(retained, 캐시/누수 지표)
+- build_sql(sql_builder) import가 실패하면 오류로 종료. 생략하려면 --skip-build-sql (보고서에 표시)
+- --save-baseline으로 결과를 저장하고, --baseline으로 비교해 p50/p99가
+  --threshold(기본 10%) 넘게 느려지면 종료 코드 1
+
+사용법:
+    python -m src.bench.parser_bench
+    python -m src.bench.parser_bench --expand 100000 --save-baseline
+    python -m src.bench.parser_bench --expand 100000 --baseline
+"""
+import argparse
+import gc
+import json
+import random
+import re
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np  # type: ignore
+import yaml  # type: ignore
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+QUESTIONS_FILE = PROJECT_ROOT / "tests" / "questions.jsonl"
+REGISTRY_FILE = PROJECT_ROOT / "semantic_registry.yaml"
+BASELINE_FILE = PROJECT_ROOT / "data_out" / "bench" / "parser_baseline.json"
+
+ALLOC_SAMPLE = 500       # tracemalloc 측정 질문 수 (추적 중에는 느려서 표본만)
+DEFAULT_THRESHOLD = 0.10
+
+TRACE_RE = re.compile(r"standard_trace_(\d{3})")
+TOPN_RE = re.compile(r"(top\s*|상위\s*)(\d+)", re.IGNORECASE)
+
+
+def load_questions(path: Path = QUESTIONS_FILE) -> List[str]:
+    questions = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                questions.append(json.loads(line)["q"])
+    return questions
+
+
+def alias_groups(path: Path = REGISTRY_FILE) -> List[List[str]]:
+    """semantic_registry의 같은 컬럼 별칭 묶음 (원문 그대로, 긴 것부터)"""
+    with open(path, "r", encoding="utf-8") as f:
+        registry = yaml.safe_load(f) or {}
+    groups: List[List[str]] = []
+
+    def walk(node):
+        if not isinstance(node, dict):
+            return
+        if "aliases" in node and node.get("physical_columns"):
+            aliases = sorted({str(a) for a in node["aliases"] if a}, key=len, reverse=True)
+            if len(aliases) > 1:
+                groups.append(aliases)
+            return
+        for value in node.values():
+            walk(value)
+
+    walk(registry)
+    return groups
+
+
+def expand_questions(questions: Sequence[str], n: int, seed: int = 0, groups: Optional[List[List[str]]] = None) -> List[str]:
+    """
+    코퍼스를 n개까지 합성 확장 (원본 먼저, 이후 변형)
+
+    변형: 질문에 들어 있는 별칭을 같은 컬럼의 다른 별칭으로, trace 번호/top-N 숫자를 무작위로
+    """
+    if n <= len(questions):
+        return list(questions[:n])
+    rng = random.Random(seed)
+    groups = alias_groups() if groups is None else groups
+    out = list(questions)
+    while len(out) < n:
+        q = rng.choice(questions)
+        for aliases in groups:
+            hit = next((a for a in aliases if a in q), None)
+            if hit is not None:
+                q = q.replace(hit, rng.choice(aliases), 1)
+                break
+        q = TRACE_RE.sub(lambda m: f"standard_trace_{rng.randint(1, 999):03d}", q)
+        q = TOPN_RE.sub(lambda m: f"{m.group(1)}{rng.randint(2, 20)}", q)
+        out.append(q)
+    return out
+
+
+def _stages(skip_build_sql: bool = False) -> List[Tuple[str, Callable]]:
+    """
+    (이름, 함수). normalize/parse_v2는 질문 문자열, build_sql은 parse_v2 출력을 입력으로 받음
+
+    Raises:
+        RuntimeError: sql_builder import 실패 (skip_build_sql=False일 때)
+    """
+    from domain.rules.normalization import normalize
+    from src.nl_parse_v2 import parse_question
+
+    stages: List[Tuple[str, Callable]] = [
+        ("normalize", normalize),
+        ("parse_v2", parse_question),
+    ]
+    if skip_build_sql:
+        return stages
+    try:
+        from src.sql_builder import build_sql
+    except (ImportError, SyntaxError) as e:
+        raise RuntimeError(f"build_sql 단계를 측정할 수 없습니다 (sql_builder import 실패: {e}). 생략하려면 --skip-build-sql")
+    stages.append(("build_sql", build_sql))
+    return stages
+
+
+def _time_stage(fn: Callable, inputs: Sequence) -> Tuple[np.ndarray, int, List]:
+    """호출별 소요(ns), 예외 수, 성공한 호출의 출력"""
+    times = np.empty(len(inputs), dtype=np.int64)
+    errors = 0
+    outputs = []
+    clock = time.perf_counter_ns
+    for i, x in enumerate(inputs):
+        t0 = clock()
+        try:
+            out = fn(x)
+        except Exception:
+            errors += 1
+            times[i] = clock() - t0
+            continue
+        times[i] = clock() - t0
+        outputs.append(out)
+    return times, errors, outputs
+
+
+def _alloc_stage(fn: Callable, inputs: Sequence) -> Tuple[float, int, float]:
+    """
+    호출별 tracemalloc 측정
+
+    Returns:
+        (호출당 평균 peak 증가 바이트, 단일 호출 최대 peak 증가 바이트, 호출당 평균 순증가(retained) 바이트)
+        peak은 호출 중 동시에 살아 있던 할당의 최대치, retained는 호출 후에도 남은 양
+    """
+    peak_total, peak_max, retained = 0, 0, 0
+    tracemalloc.start()
+    try:
+        for x in inputs:
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            try:
+                fn(x)
+            except Exception:
+                pass
+            after, p = tracemalloc.get_traced_memory()
+            peak_total += p - before
+            peak_max = max(peak_max, p - before)
+            retained += max(0, after - before)
+    finally:
+        tracemalloc.stop()
+    n = max(1, len(inputs))
+    return peak_total / n, peak_max, retained / n
+
+
+def run_benchmark(
+    questions: Sequence[str],
+    alloc_sample: int = ALLOC_SAMPLE,
+    warmup: int = 50,
+    skip_build_sql: bool = False,
+) -> Dict[str, Dict]:
+    """
+    단계별 측정 (GC 끈 상태로 시간 측정 후, 표본으로 메모리 측정)
+
+    Returns:
+        {stage: {n, errors, p50_us, p99_us, mean_us, throughput_qps,
+                 alloc_peak_bytes, alloc_peak_max_bytes, retained_bytes}}
+    """
+    stages = _stages(skip_build_sql)
+    results: Dict[str, Dict] = {}
+    parsed: List = []
+    for name, fn in stages:
+        # build_sql은 parse_v2 출력(파싱 성공분)을 입력으로
+        inputs = parsed if name == "build_sql" else list(questions)
+        for x in inputs[:warmup]:
+            try:
+                fn(x)
+            except Exception:
+                pass
+        gc.collect()
+        gc.disable()
+        try:
+            times, errors, outputs = _time_stage(fn, inputs)
+        finally:
+            gc.enable()
+        if name == "parse_v2":
+            parsed = outputs
+        peak, peak_max, retained = _alloc_stage(fn, inputs[:alloc_sample])
+        total_s = times.sum() / 1e9
+        results[name] = {
+            "n": len(inputs),
+            "errors": errors,
+            "p50_us": float(np.percentile(times, 50) / 1e3) if len(times) else 0.0,
+            "p99_us": float(np.percentile(times, 99) / 1e3) if len(times) else 0.0,
+            "mean_us": float(times.mean() / 1e3) if len(times) else 0.0,
+            "throughput_qps": float(len(inputs) / total_s) if total_s > 0 else 0.0,
+            "alloc_peak_bytes": float(peak),
+            "alloc_peak_max_bytes": int(peak_max),
+            "retained_bytes": float(retained),
+        }
+    return results
+
+
+def compare(current: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float = DEFAULT_THRESHOLD) -> List[str]:
+    """baseline 대비 p50/p99가 threshold보다 많이 느려진 항목 목록 (baseline에 있던 단계가 빠져도 항목)"""
+    regressions = [f"{stage}: 현재 측정에 없음 (baseline에는 있음)" for stage in baseline if stage not in current]
+    for stage, cur in current.items():
+        base = baseline.get(stage)
+        if not base:
+            continue
+        for key in ("p50_us", "p99_us"):
+            if base.get(key) and cur[key] > base[key] * (1 + threshold):
+                regressions.append(f"{stage}.{key}: {base[key]:.1f} → {cur[key]:.1f}µs (+{cur[key] / base[key] - 1:.0%})")
+    return regressions
+
+
+def format_report(results: Dict[str, Dict], baseline: Optional[Dict[str, Dict]] = None) -> str:
+    lines = [f"{'stage':<10s} {'n':>8s} {'p50µs':>9s} {'p99µs':>9s} {'q/s':>10s} {'peak/q':>10s} {'peak max':>10s} {'kept/q':>9s} {'err':>5s}"]
+    for stage, r in results.items():
+        line = (
+            f"{stage:<10s} {r['n']:>8d} {r['p50_us']:>9.1f} {r['p99_us']:>9.1f} {r['throughput_qps']:>10.0f} "
+            f"{r['alloc_peak_bytes']:>9.0f}B {r['alloc_peak_max_bytes']:>9d}B {r['retained_bytes']:>8.0f}B {r['errors']:>5d}"
+        )
+        base = (baseline or {}).get(stage)
+        if base and base.get("p50_us"):
+            line += f"   (p50 {r['p50_us'] / base['p50_us'] - 1:+.0%}, p99 {r['p99_us'] / base['p99_us'] - 1:+.0%} vs baseline)"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="파서 처리량 벤치마크")
+    ap.add_argument("--questions", type=Path, default=QUESTIONS_FILE)
+    ap.add_argument("--expand", type=int, default=0, help="합성 변형으로 늘릴 질문 수 (0이면 코퍼스 그대로)")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--save-baseline", nargs="?", const=BASELINE_FILE, type=Path)
+    ap.add_argument("--baseline", nargs="?", const=BASELINE_FILE, type=Path)
+    ap.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    ap.add_argument("--skip-build-sql", action="store_true", help="build_sql 단계 생략 (sql_builder를 import할 수 없는 환경)")
+    args = ap.parse_args(argv)
+
+    questions = load_questions(args.questions)
+    if args.expand:
+        questions = expand_questions(questions, args.expand, args.seed)
+    print(f"질문 {len(questions):,}개")
+
+    try:
+        results = run_benchmark(questions, skip_build_sql=args.skip_build_sql)
+    except RuntimeError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+    if args.skip_build_sql:
+        print("⚠️  build_sql 단계 생략됨 (--skip-build-sql)")
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["stages"]
+    print(format_report(results, baseline))
+
+    if args.save_baseline:
+        args.save_baseline.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump({"n_questions": len(questions), "seed": args.seed, "stages": results}, f, ensure_ascii=False, indent=2)
+        print(f"✅ baseline 저장: {args.save_baseline}")
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print("❌ 성능 저하:")
+            for r in regressions:
+                print(f"  - {r}")
+            return 1
+        print("✅ baseline 대비 성능 저하 없음")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
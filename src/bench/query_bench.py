@@ -0,0 +1,202 @@
+"""
+질의 종단간(end-to-end) 벤치마크: 합성 설비 데이터에 분석 유형별 질문 실행
+
+질문 → parse_v2 → SQL 선택(analysis router → process_metrics → sql_builder) → DuckDB 실행
+각 단계를 분석 유형별 대표 질문으로 repeat회 재고, 결과를 JSON으로 남긴다.
+
+- 데이터가 없으면 --generate N으로 src.create_dummy_data의 합성 설비 데이터부터 만든다
+  (step_segments 포함, 기본으로 골든 trace 등록 + 사전 계산 분석 테이블까지 갱신해 router 경로도 잰다.
+   --no-analysis면 원본 + step_segments만)
+- 결과: data_out/bench/query_bench.json (케이스별 parse/sql/exec 중앙값·최소·최대 ms, 결과 행 수)
+- 선택한 케이스 중 하나라도 실패(error)하면 종료 코드 2 (결과 JSON은 그대로 저장)
+
+사용법:
+    python -m src.bench.query_bench --db data_out/bench/fleet.duckdb --generate 2000 --steps 12
+    python -m src.bench.query_bench --db data_out/bench/fleet.duckdb --repeat 5
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import duckdb  # type: ignore
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+BENCH_DB = PROJECT_ROOT / "data_out" / "bench" / "fleet.duckdb"
+RESULT_FILE = PROJECT_ROOT / "data_out" / "bench" / "query_bench.json"
+GOLDEN_TRACES = ["standard_trace_001"]  # --generate 시 골든 편차 케이스용 기준 trace
+
+# (케이스 이름, 질문) — sql_builder 집계/그룹 유형 + process_metrics 공정 지표 + 사전 계산 분석
+CASES: List[Tuple[str, str]] = [
+    ("scalar_avg", "pressact 평균"),
+    ("scalar_std", "vg11 표준편차"),
+    ("scalar_p50_day", "pressact 일별 중앙값"),
+    ("scalar_count", "pressact count"),
+    ("trace_filter_avg", "standard_trace_001 pressact 평균"),
+    ("step_filter_max", "STANDBY 단계 pressact 최대"),
+    ("date_range_avg", "2024-01-01부터 2024-01-31까지 압력 평균"),
+    ("group_step", "step별 pressact 평균"),
+    ("group_trace_top", "trace별 압력 최대 top5"),
+    ("group_day", "pressact 일별 평균"),
+    ("group_hour", "pressact 시간별 평균"),
+    ("trace_compare", "standard_trace_001과 standard_trace_002 pressact 비교"),
+    ("overshoot", "pressact overshoot top10"),
+    ("outlier", "pressact 이상치 top20"),
+    ("dwell_time", "vg12 체류시간 top10"),
+    ("stable_avg", "pressact 안정화 구간 평균"),
+    ("step_sequence", "standard_trace_001 스텝 순서"),
+    ("golden_deviation", "standard_trace_002 골든 편차"),
+    ("similar_trace", "standard_trace_002와 비슷한 공정 top5"),
+    ("pca_anomaly", "이상 공정 top10"),
+    ("profile_compare", "standard_trace_001과 standard_trace_002 압력 프로파일 비교"),
+    ("spc_ewma", "B.FILL 압력 EWMA 관리도"),
+    ("setpoint_settling", "B.FILL 온도 정착 시간"),
+    ("correlation", "B.FILL 압력과 상관 높은 신호 top10"),
+]
+
+
+def choose_sql(p, con=None) -> Tuple[str, List]:
+    """app과 같은 순서로 SQL 선택: 사전 계산 분석 → 공정 지표 → 기본 빌더"""
+    from src.analysis.router import choose_analysis_sql
+    from src.process_metrics import (
+        build_dwell_time_sql,
+        build_outlier_detection_sql,
+        build_overshoot_sql,
+        build_stable_avg_sql,
+        build_trace_compare_sql,
+    )
+    from src.sql_builder import build_sql
+
+    routed = choose_analysis_sql(p, con)
+    if routed:
+        return routed
+    if p.is_trace_compare:
+        return build_trace_compare_sql(p)
+    if p.is_overshoot:
+        return build_overshoot_sql(p)
+    if p.is_outlier:
+        return build_outlier_detection_sql(p)
+    if p.is_dwell_time:
+        return build_dwell_time_sql(p, con)
+    if p.is_stable_avg:
+        return build_stable_avg_sql(p, con)
+    return build_sql(p)
+
+
+def _timed(fn: Callable, *args):
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return out, (time.perf_counter() - t0) * 1000.0
+
+
+def _summary(ms: Sequence[float]) -> Dict[str, float]:
+    return {"median_ms": statistics.median(ms), "min_ms": min(ms), "max_ms": max(ms)}
+
+
+def run_case(con, question: str, repeat: int = 3, parse: Optional[Callable] = None, choose: Callable = choose_sql) -> Dict:
+    """
+    한 질문을 repeat회 실행 (첫 실행 포함, DuckDB 캐시 영향은 min/median 차이로 확인)
+
+    Returns:
+        {parse, sql, exec: {median_ms, min_ms, max_ms}, rows} 또는 {error}
+    """
+    if parse is None:
+        from src.nl_parse_v2 import parse_question as parse
+    times: Dict[str, List[float]] = {"parse": [], "sql": [], "exec": []}
+    rows = 0
+    try:
+        for _ in range(repeat):
+            p, t_parse = _timed(parse, question)
+            (sql, params), t_sql = _timed(choose, p, con)
+            result, t_exec = _timed(lambda: con.execute(sql, params).fetchall())
+            times["parse"].append(t_parse)
+            times["sql"].append(t_sql)
+            times["exec"].append(t_exec)
+            rows = len(result)
+    except Exception as e:
+        return {"error": f"{type(e).__name__}: {e}"}
+    out = {stage: _summary(ms) for stage, ms in times.items()}
+    out["rows"] = rows
+    return out
+
+
+def dataset_info(con) -> Dict[str, int]:
+    n_rows = con.execute("SELECT COUNT(*) FROM traces").fetchone()[0]
+    n_traces = con.execute("SELECT COUNT(DISTINCT trace_id) FROM traces").fetchone()[0]
+    n_cols = con.execute("SELECT COUNT(*) FROM (DESCRIBE traces)").fetchone()[0]
+    return {"rows": int(n_rows), "traces": int(n_traces), "columns": int(n_cols)}
+
+
+def prepare_analysis(db: Path, golden: Sequence[str] = GOLDEN_TRACES) -> Dict[str, int]:
+    """생성한 DB에 사전 계산 분석 테이블 갱신 (preprocess와 같은 refresh_analysis_tables), 골든이 없으면 등록"""
+    from src.analysis.golden import get_golden_traces, register_golden_traces
+    from src.analysis.refresh import refresh_analysis_tables
+
+    con = duckdb.connect(str(db))
+    try:
+        counts = refresh_analysis_tables(con)
+        if golden and not get_golden_traces(con):
+            counts["golden"] = register_golden_traces(con, golden)
+        return counts
+    finally:
+        con.close()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="분석 유형별 질의 벤치마크")
+    ap.add_argument("--db", type=Path, default=BENCH_DB)
+    ap.add_argument("--generate", type=int, default=0, help="합성 데이터 trace 수 (0이면 기존 DB 사용)")
+    ap.add_argument("--steps", type=int, default=8)
+    ap.add_argument("--no-analysis", dest="analysis", action="store_false",
+                    help="생성 후 사전 계산 분석 테이블 갱신 생략 (step_segments는 항상 생성)")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--only", nargs="*", help="실행할 케이스 이름")
+    ap.add_argument("--out", type=Path, default=RESULT_FILE)
+    args = ap.parse_args(argv)
+
+    if args.generate:
+        from src.create_dummy_data import write_fleet
+        write_fleet(args.generate, args.steps, args.db)
+        if args.analysis:
+            prepare_analysis(args.db)
+
+    if not args.db.exists():
+        print(f"❌ DB가 없습니다: {args.db} (--generate N으로 합성 데이터 생성)")
+        return 1
+
+    con = duckdb.connect(str(args.db), read_only=True)
+    try:
+        info = dataset_info(con)
+        print(f"데이터: {info['rows']:,}행 × {info['columns']}컬럼, trace {info['traces']:,}개")
+        results = {}
+        for name, question in CASES:
+            if args.only and name not in args.only:
+                continue
+            r = run_case(con, question, args.repeat)
+            results[name] = {"question": question, **r}
+            if "error" in r:
+                print(f"{name:<20s} ❌ {r['error']}")
+            else:
+                print(
+                    f"{name:<20s} exec {r['exec']['median_ms']:>9.1f}ms (min {r['exec']['min_ms']:.1f})"
+                    f"  sql {r['sql']['median_ms']:>7.2f}ms  parse {r['parse']['median_ms']:>6.2f}ms  rows {r['rows']}"
+                )
+    finally:
+        con.close()
+
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump({"dataset": info, "repeat": args.repeat, "cases": results}, f, ensure_ascii=False, indent=2)
+    print(f"✅ 결과 저장: {args.out}")
+    failed = [name for name, r in results.items() if "error" in r]
+    if failed:
+        print(f"❌ 실패한 케이스 {len(failed)}개: {', '.join(failed)}")
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,11 +3,13 @@
 
 원칙: 질문 의도 → 분석 유형 → 고정 그래프 (자동 선택 X, 자동 매핑 O)
 """
-from typing import Tuple, Dict, Any, Literal
-import matplotlib.pyplot as plt  # type: ignore
+from typing import TYPE_CHECKING, Tuple, Dict, Any, Literal
 import numpy as np  # type: ignore
 import pandas as pd  # type: ignore
 
+if TYPE_CHECKING:
+    from matplotlib.axes import Axes  # type: ignore
+
 ChartConfig = Dict[str, Any]
 
 def get_chart_template(analysis_type: Literal["ranking", "group_profile", "comparison", "stability"]) -> ChartConfig:
@@ -56,7 +58,7 @@ def get_chart_template(analysis_type: Literal["ranking", "group_profile", "compa
     return templates.get(analysis_type, templates["ranking"])
 
 def apply_chart_template(
-    ax: plt.Axes,
+    ax: "Axes",
     df: pd.DataFrame,
     x_col: str,
     y_col: str,
@@ -92,7 +94,7 @@ def apply_chart_template(
         # 기본값: bar
         _draw_bar(ax, df, x_col, y_col, config, parsed)
 
-def _draw_horizontal_bar(ax: plt.Axes, df: pd.DataFrame, x_col: str, y_col: str, config: ChartConfig, parsed: Any) -> None:
+def _draw_horizontal_bar(ax: "Axes", df: pd.DataFrame, x_col: str, y_col: str, config: ChartConfig, parsed: Any) -> None:
     """랭킹용 가로 막대 차트"""
     y_vals = df[y_col].astype(float).tolist()
     labels = [str(x) for x in df[x_col].astype(str).tolist()]
@@ -119,7 +121,7 @@ def _draw_horizontal_bar(ax: plt.Axes, df: pd.DataFrame, x_col: str, y_col: str,
                 va='center', fontsize=10, fontweight='bold',
                 bbox=dict(boxstyle='round', facecolor='yellow', alpha=0.7))
 
-def _draw_bar(ax: plt.Axes, df: pd.DataFrame, x_col: str, y_col: str, config: ChartConfig, parsed: Any) -> None:
+def _draw_bar(ax: "Axes", df: pd.DataFrame, x_col: str, y_col: str, config: ChartConfig, parsed: Any) -> None:
     """그룹별 분포용 세로 막대 차트"""
     y_vals = df[y_col].astype(float).tolist()
     labels = [str(x) for x in df[x_col].astype(str).tolist()]
@@ -131,7 +133,7 @@ def _draw_bar(ax: plt.Axes, df: pd.DataFrame, x_col: str, y_col: str, config: Ch
     ax.set_xticks(range(len(df)))
     ax.set_xticklabels(labels, rotation=45, ha='right')
 
-def _draw_line(ax: plt.Axes, df: pd.DataFrame, x_col: str, y_col: str, config: ChartConfig, parsed: Any) -> None:
+def _draw_line(ax: "Axes", df: pd.DataFrame, x_col: str, y_col: str, config: ChartConfig, parsed: Any) -> None:
     """시계열 라인 차트"""
     x_vals = df[x_col].tolist()
     y_vals = df[y_col].astype(float).tolist()
@@ -146,7 +148,7 @@ def _draw_line(ax: plt.Axes, df: pd.DataFrame, x_col: str, y_col: str, config: C
     ax.set_xticks(range(len(x_vals)))
     ax.set_xticklabels([str(x) for x in x_vals], rotation=45, ha='right')
 
-def _draw_grouped_bar(ax: plt.Axes, df: pd.DataFrame, x_col: str, y_col: str, config: ChartConfig, parsed: Any) -> None:
+def _draw_grouped_bar(ax: "Axes", df: pd.DataFrame, x_col: str, y_col: str, config: ChartConfig, parsed: Any) -> None:
     """비교용 그룹 막대 차트 (trace 비교)"""
     if "trace1_avg" not in df.columns or "trace2_avg" not in df.columns:
         # 일반 막대로 대체
@@ -182,12 +184,12 @@ def _draw_grouped_bar(ax: plt.Axes, df: pd.DataFrame, x_col: str, y_col: str, co
         bars2[max_diff_pos].set_edgecolor('yellow')
         bars2[max_diff_pos].set_linewidth(3)
 
-def _draw_box(ax: plt.Axes, df: pd.DataFrame, x_col: str, y_col: str, config: ChartConfig, parsed: Any) -> None:
+def _draw_box(ax: "Axes", df: pd.DataFrame, x_col: str, y_col: str, config: ChartConfig, parsed: Any) -> None:
     """이상치/안정성용 박스 플롯"""
     # 간단한 막대로 대체 (박스 플롯은 데이터 구조가 달라야 함)
     _draw_horizontal_bar(ax, df, x_col, y_col, config, parsed)
 
-def _draw_scatter(ax: plt.Axes, df: pd.DataFrame, x_col: str, y_col: str, config: ChartConfig, parsed: Any) -> None:
+def _draw_scatter(ax: "Axes", df: pd.DataFrame, x_col: str, y_col: str, config: ChartConfig, parsed: Any) -> None:
     """이상치 탐지용 산점도"""
     # 간단한 막대로 대체
     _draw_horizontal_bar(ax, df, x_col, y_col, config, parsed)
@@ -4,6 +4,8 @@
 import pandas as pd  # type: ignore
 from typing import Tuple, Optional
 
+from src.chart_templates import ChartConfig, get_chart_template
+
 
 def get_xy_columns(df: pd.DataFrame) -> Tuple[str, str]:
     """x축, y축 컬럼 추출"""
@@ -61,13 +63,44 @@ def add_others_to_chart(
     if df_all_for_others is None or len(df_all_for_others) <= len(df):
         return df
     
-    others_df = df_all_for_others.sort_values(y_col, ascending=False).iloc[len(df):]
-    if others_df.empty:
+    # 값 컬럼만 정렬해 상위 len(df)개를 뺀 나머지 (전체 DataFrame 정렬/리스트 합산 없이)
+    others = df_all_for_others[y_col].astype(float).sort_values(ascending=False).to_numpy()[len(df):]
+    if len(others) == 0:
         return df
     
-    others_value_sum = sum(r for r in others_df[y_col].astype(float).tolist())
-    others_avg = others_value_sum / len(others_df) if len(others_df) > 0 else 0
-    others_row = {x_col: f"Others ({len(others_df)}개)", y_col: others_avg}
+    others_avg = float(others.sum()) / len(others)
+    others_row = {x_col: f"Others ({len(others)}개)", y_col: others_avg}
     
     return pd.concat([df, pd.DataFrame([others_row])], ignore_index=True)
 
+
+def is_line_chart(parsed: dict, config: ChartConfig) -> bool:
+    """라인 차트 여부 (템플릿이 line이거나 날짜/시간 그룹·기간 필터가 있으면)"""
+    return (
+        config["chart_type"] == "line"
+        or parsed.get("group_by") in ("date", "hour", "day")
+        or bool(parsed.get("date_start") or parsed.get("date_end"))
+    )
+
+
+def prepare_chart_data(
+    df: pd.DataFrame,
+    parsed: dict,
+) -> Tuple[pd.DataFrame, ChartConfig, str, str, bool]:
+    """
+    PNG 렌더링(render_chart)과 차트 스펙(build_chart_spec) 공통 데이터 준비
+    템플릿 선택 → Others 준비 → Top N 제한 → (막대 계열이면) Others 행 추가
+
+    Returns: (df, config, x_col, y_col, is_line)
+    """
+    x_col, y_col = get_xy_columns(df)
+    config = get_chart_template(parsed.get("analysis_type", "ranking"))
+    df, df_all_for_others, add_others_for_chart = prepare_chart_data_for_others(df, parsed, config)
+
+    top_n = parsed.get("top_n")
+    df = apply_top_n_limit(df, top_n if config["use_top_n"] else None)
+
+    line = is_line_chart(parsed, config)
+    if not line and add_others_for_chart:
+        df = add_others_to_chart(df, df_all_for_others, x_col, y_col)
+    return df, config, x_col, y_col, line
@@ -4,16 +4,11 @@
 import io
 from typing import Optional
 import pandas as pd  # type: ignore
-import matplotlib.pyplot as plt  # type: ignore
+from src.utils.mpl_korean import pyplot
 from fastapi.responses import Response  # type: ignore
 
-from src.chart_templates import get_chart_template, apply_chart_template
-from src.charts.helpers import (
-    get_xy_columns,
-    apply_top_n_limit,
-    prepare_chart_data_for_others,
-    add_others_to_chart,
-)
+from src.chart_templates import apply_chart_template
+from src.charts.helpers import prepare_chart_data
 from src.charts.title import get_korean_labels, build_chart_title
 
 
@@ -28,6 +23,7 @@ def render_chart(df: pd.DataFrame, parsed_obj) -> Response:
     Returns:
         Response: PNG 이미지
     """
+    plt = pyplot()
     try:
         if df.empty:
             return Response(content=b"No data", media_type="text/plain")
@@ -41,18 +37,8 @@ def render_chart(df: pd.DataFrame, parsed_obj) -> Response:
         from src.utils.parsed import to_parsed_dict
         parsed = to_parsed_dict(parsed_obj)
 
-        # x축, y축 컬럼 추출
-        x_col, y_col = get_xy_columns(df)
-
-        # 차트 템플릿 가져오기
-        config = get_chart_template(parsed.get("analysis_type", "ranking"))
-
-        # Others 추가를 위한 데이터 준비
-        df, df_all_for_others, add_others_for_chart = prepare_chart_data_for_others(df, parsed, config)
-
-        # Top N 제한 적용
-        top_n = parsed.get("top_n")
-        df = apply_top_n_limit(df, top_n if config["use_top_n"] else None)
+        # 템플릿 선택 + Others/Top N 처리 (차트 스펙과 공통)
+        df, config, x_col, y_col, line = prepare_chart_data(df, parsed)
 
         # 한글 레이블 매핑
         labels = get_korean_labels(parsed, x_col)
@@ -62,12 +48,9 @@ def render_chart(df: pd.DataFrame, parsed_obj) -> Response:
         fig.patch.set_facecolor('white')
 
         # 차트 타입에 따른 렌더링
-        if config["chart_type"] == "line" or (parsed.get("group_by") in ("date", "hour", "day") or parsed.get("date_start") or parsed.get("date_end")):
+        if line:
             _render_line_chart(ax, df, x_col, y_col)
         else:
-            # Others 그룹 추가 (요약 모드일 때)
-            if add_others_for_chart:
-                df = add_others_to_chart(df, df_all_for_others, x_col, y_col)
             apply_chart_template(ax, df, x_col, y_col, config, parsed_obj)
 
         # 축 레이블 및 제목 설정
@@ -0,0 +1,231 @@
+"""
+차트 스펙: 브라우저 렌더링용 Vega-Lite 스펙 + 컬럼형 데이터 (서버 matplotlib 없이)
+
+render_chart(PNG)와 같은 템플릿 매핑(get_chart_template)·Others/Top N 처리를 쓰고,
+그리는 대신 선언적 스펙을 돌려준다. PNG(/plot)는 내보내기용으로 그대로 유지.
+
+응답 형태:
+    {
+        "chart_type": "horizontal_bar" | "bar" | "line" | "grouped_bar" | "text" | "empty",
+        "title": [제목 줄, ...],
+        "spec": Vega-Lite v5 스펙 (data는 {"name": "table"}),
+        "data": {컬럼: [값, ...]},   # 스펙이 쓰는 컬럼만
+    }
+브라우저는 data를 행으로 풀어 spec의 table 데이터로 넣고 vega-embed로 그린다.
+"""
+import json
+from typing import Any, Dict, List, Optional
+
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+
+from src.chart_templates import ChartConfig
+from src.charts.helpers import prepare_chart_data
+from src.charts.title import get_korean_labels, build_chart_title
+
+VEGA_LITE_SCHEMA = "https://vega.github.io/schema/vega-lite/v5.json"
+DATA_NAME = "table"
+CHART_HEIGHT = 420
+
+# 막대 템플릿(matplotlib)과 같은 색
+RANK_COLORS = ("#ff6b6b", "#ff8c69", "#ffaa80")
+BASE_COLOR = "#b0b0d0"
+OTHERS_COLOR = "#888888"
+SEQUENTIAL_COLOR = "#667eea"
+COMPARE_COLORS = ("#ff6b6b", "#667eea")
+HIGHLIGHT_COLOR = "#ffd700"
+
+# 스펙이 추가로 쓰는 데이터 필드
+COLOR_FIELD = "_color"
+HIGHLIGHT_FIELD = "_highlight"
+
+
+def _labels(values: pd.Series) -> List[str]:
+    return values.astype(str).tolist()
+
+
+def _numbers(values: pd.Series) -> List[Optional[float]]:
+    """float 리스트 (NaN은 None → JSON null)"""
+    arr = pd.to_numeric(values).to_numpy(dtype=float, na_value=np.nan)
+    return [None if v != v else v for v in arr.tolist()]
+
+
+def _rank_colors(labels: List[str]) -> List[str]:
+    colors = []
+    for i, label in enumerate(labels):
+        if "Others" in label or "기타" in label:
+            colors.append(OTHERS_COLOR)
+        elif i < len(RANK_COLORS):
+            colors.append(RANK_COLORS[i])
+        else:
+            colors.append(BASE_COLOR)
+    return colors
+
+
+def _axis(title: str, **kwargs) -> Dict[str, Any]:
+    return {"title": title, "titleFontWeight": "bold", **kwargs}
+
+
+def _max_label_layer(y_col: str, text: str, **encoding) -> Dict[str, Any]:
+    """최대값 위치에 '최대: v' 라벨 (joinaggregate로 최대 행만 남김)"""
+    return {
+        "transform": [
+            {"joinaggregate": [{"op": "max", "field": y_col, "as": "_max"}]},
+            {"filter": f"datum['{y_col}'] === datum._max"},
+            {"calculate": f"'{text}' + format(datum['{y_col}'], '.2f')", "as": "_max_label"},
+        ],
+        "mark": {"type": "text", "fontWeight": "bold", "dx": 6, "align": "left"},
+        "encoding": {**encoding, "text": {"field": "_max_label"}},
+    }
+
+
+def _horizontal_bar(df: pd.DataFrame, x_col: str, y_col: str, config: ChartConfig, labels: Dict[str, str]):
+    """랭킹용 가로 막대 (상위 3개 강조, Others 회색)"""
+    x_labels = _labels(df[x_col])
+    data = {x_col: x_labels, y_col: _numbers(df[y_col]), COLOR_FIELD: _rank_colors(x_labels)}
+    encoding = {
+        "y": {"field": x_col, "type": "nominal", "sort": None, "axis": _axis(labels["x_col_kr"])},
+        "x": {"field": y_col, "type": "quantitative", "axis": _axis(labels["y_col_kr"])},
+    }
+    bar = {
+        "mark": {"type": "bar", "stroke": "white", "strokeWidth": 1.5},
+        "encoding": {**encoding, "color": {"field": COLOR_FIELD, "type": "nominal", "scale": None}},
+    }
+    layers = [bar]
+    if config["highlight_max"]:
+        layers.append(_max_label_layer(y_col, "최대: ", **encoding))
+    return data, {"layer": layers}
+
+
+def _bar(df: pd.DataFrame, x_col: str, y_col: str, config: ChartConfig, labels: Dict[str, str]):
+    """그룹별 분포용 세로 막대"""
+    data = {x_col: _labels(df[x_col]), y_col: _numbers(df[y_col])}
+    spec = {
+        "mark": {"type": "bar", "color": SEQUENTIAL_COLOR, "stroke": "white", "strokeWidth": 1.5},
+        "encoding": {
+            "x": {"field": x_col, "type": "nominal", "sort": None, "axis": _axis(labels["x_col_kr"], labelAngle=-45)},
+            "y": {"field": y_col, "type": "quantitative", "axis": _axis(labels["y_col_kr"])},
+        },
+    }
+    return data, spec
+
+
+def _line(df: pd.DataFrame, x_col: str, y_col: str, config: ChartConfig, labels: Dict[str, str]):
+    """시계열 라인 (날짜는 정렬, 최대값 강조)"""
+    if x_col == "date":
+        df = df.sort_values("date")
+    data = {x_col: _labels(df[x_col]), y_col: _numbers(df[y_col])}
+    encoding = {
+        "x": {"field": x_col, "type": "ordinal", "sort": None, "axis": _axis(labels["x_col_kr"], labelAngle=-45)},
+        "y": {"field": y_col, "type": "quantitative", "axis": _axis(labels["y_col_kr"])},
+    }
+    line = {
+        "mark": {"type": "line", "point": True, "strokeWidth": 2, "color": SEQUENTIAL_COLOR},
+        "encoding": encoding,
+    }
+    max_point = {
+        "transform": [
+            {"joinaggregate": [{"op": "max", "field": y_col, "as": "_max"}]},
+            {"filter": f"datum['{y_col}'] === datum._max"},
+        ],
+        "mark": {"type": "point", "filled": True, "size": 160, "color": "red"},
+        "encoding": encoding,
+    }
+    label = _max_label_layer(y_col, "최대: ", **encoding)
+    label["mark"] = {"type": "text", "fontWeight": "bold", "dy": -14}
+    return data, {"layer": [line, max_point, label]}
+
+
+def _grouped_bar(df: pd.DataFrame, x_col: str, y_col: str, config: ChartConfig, labels: Dict[str, str], parsed: dict):
+    """trace 비교용 그룹 막대 (trace1/trace2 나란히, 차이 최대 단계 강조)"""
+    trace_ids = parsed.get("trace_ids") or []
+    series = [
+        trace_ids[0] if len(trace_ids) > 0 else "Trace 1",
+        trace_ids[1] if len(trace_ids) > 1 else "Trace 2",
+    ]
+    data = {
+        x_col: _labels(df[x_col]),
+        "trace1_avg": _numbers(df["trace1_avg"]),
+        "trace2_avg": _numbers(df["trace2_avg"]),
+    }
+    highlight = [False] * len(df)
+    if "diff" in df.columns and config["highlight_max"] and len(df):
+        highlight[df.index.get_loc(df["diff"].idxmax())] = True
+    data[HIGHLIGHT_FIELD] = highlight
+
+    spec = {
+        "transform": [
+            {"fold": ["trace1_avg", "trace2_avg"], "as": ["_series_key", "_series_value"]},
+            {"calculate": f"datum._series_key === 'trace1_avg' ? {json.dumps(series[0])} : {json.dumps(series[1])}", "as": "_series"},
+        ],
+        "mark": {"type": "bar", "strokeWidth": 1.5},
+        "encoding": {
+            "x": {"field": x_col, "type": "nominal", "sort": None, "axis": _axis("단계명", labelAngle=-45)},
+            "xOffset": {"field": "_series", "sort": series},
+            "y": {"field": "_series_value", "type": "quantitative", "axis": _axis(f"{labels['col_kr']} 평균 (mTorr)")},
+            "color": {
+                "field": "_series",
+                "type": "nominal",
+                "scale": {"domain": series, "range": list(COMPARE_COLORS)},
+                "legend": {"title": None, "orient": "top-left"},
+            },
+            "stroke": {
+                "condition": {"test": f"datum.{HIGHLIGHT_FIELD}", "value": HIGHLIGHT_COLOR},
+                "value": "white",
+            },
+            "strokeWidth": {"condition": {"test": f"datum.{HIGHLIGHT_FIELD}", "value": 3}, "value": 1.5},
+        },
+    }
+    return data, spec
+
+
+def build_chart_spec(df: pd.DataFrame, parsed_obj) -> Dict[str, Any]:
+    """
+    쿼리 결과 → 브라우저 렌더링용 차트 스펙 (render_chart와 같은 데이터/템플릿 규칙)
+
+    Args:
+        df: 쿼리 결과 DataFrame
+        parsed_obj: Parsed 객체
+
+    Returns:
+        {"chart_type", "title", "spec", "data"} (빈 결과는 "empty", 단일 값은 "text" + "text")
+    """
+    if df.empty:
+        return {"chart_type": "empty", "title": [], "spec": None, "data": {}}
+
+    # 단일 값이면 간단 텍스트로 (render_chart와 동일)
+    if len(df.columns) == 1 and df.columns[0] in ("value", "n"):
+        return {"chart_type": "text", "title": [], "spec": None, "data": {}, "text": df.to_string(index=False)}
+
+    from src.utils.parsed import to_parsed_dict
+    parsed = to_parsed_dict(parsed_obj)
+
+    df, config, x_col, y_col, line = prepare_chart_data(df, parsed)
+    labels = get_korean_labels(parsed, x_col)
+    title = build_chart_title(parsed, labels, df)
+
+    if line:
+        chart_type = "line"
+        data, body = _line(df, x_col, y_col, config, labels)
+    else:
+        chart_type = config["chart_type"]
+        if chart_type == "grouped_bar" and {"trace1_avg", "trace2_avg"} <= set(df.columns):
+            data, body = _grouped_bar(df, x_col, y_col, config, labels, parsed)
+        elif chart_type in ("horizontal_bar", "box", "scatter"):
+            # box/scatter는 PNG 템플릿처럼 가로 막대로 대체
+            chart_type = "horizontal_bar"
+            data, body = _horizontal_bar(df, x_col, y_col, config, labels)
+        else:
+            chart_type = "bar"
+            data, body = _bar(df, x_col, y_col, config, labels)
+
+    spec = {
+        "$schema": VEGA_LITE_SCHEMA,
+        "title": {"text": title, "fontSize": 15, "anchor": "middle"},
+        "width": "container",
+        "height": CHART_HEIGHT,
+        "data": {"name": DATA_NAME},
+        **body,
+        "config": {"axis": {"grid": True, "gridOpacity": 0.3, "gridDash": [4, 4]}, "view": {"stroke": None}},
+    }
+    return {"chart_type": chart_type, "title": title, "spec": spec, "data": data}
@@ -1,125 +1,341 @@
 """
-테스트용 더미 데이터 생성 스크립트
+테스트/벤치마크용 합성 설비 데이터 생성 스크립트
 CSV 파일이 없을 때 사용할 수 있는 샘플 데이터를 생성합니다.
+
+N개 trace × M개 step을 2Hz 연속 timestamp로 만들고, catalog_physical.json의 모든 수치형 컬럼
+(+ columns.yaml 컬럼)을 채운다. 행 단위 Python 루프 없이 배치(기본 10만 행)마다 NumPy로 한 번에
+계산해 DuckDB 테이블(또는 Parquet 파일)로 바로 쓴다. 수억 행도 메모리는 배치 1개 분량.
+DuckDB로 쓸 때는 step_segments(step 구간 테이블)도 함께 만든다 (체류시간/안정구간 평균 경로용).
+
+신호 모델 (컬럼 c, step s):
+    y = level[c, s] + (level[c, s-1] - level[c, s]) · exp(-t / tau[c]) + offset[c, trace] + noise
+- step이 바뀌면 새 레벨로 1차 응답, trace별 오프셋(설비 간 차이 + 완만한 드리프트)
+- columns.yaml의 setpoint 쌍(pressact → pressset 등)은 설정값 컬럼이 step 레벨 그대로(계단)
+
+사용법:
+    python -m src.create_dummy_data                              # 3 trace × 8 step (기본)
+    python -m src.create_dummy_data --traces 2000 --steps 12     # 벤치마크용
+    python -m src.create_dummy_data --traces 2000 --parquet data_out/fleet
 """
-import duckdb
+import argparse
+import json
+from datetime import datetime
 from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import duckdb
+import numpy as np
 import pandas as pd
-from datetime import datetime, timedelta
-import random
 
 # 프로젝트 루트 경로 설정
 PROJECT_ROOT = Path(__file__).parent.parent
 OUT_DB = PROJECT_ROOT / "data_out" / "ald.duckdb"
+CATALOG_PATH = PROJECT_ROOT / "catalog_physical.json"
+SCHEMA_PATH = PROJECT_ROOT / "domain" / "schema" / "columns.yaml"
 
-def create_dummy_data():
-    """더미 데이터 생성"""
-    print("더미 데이터 생성 중...")
-    
-    # 데이터베이스 연결
-    con = duckdb.connect(str(OUT_DB))
-    
-    # 샘플 데이터 생성
-    trace_ids = ['standard_trace_001', 'standard_trace_002', 'standard_trace_003']
-    step_names = ['STANDBY', 'B.FILL', 'B.FILL4', 'B.FILL5', 'B.UP', 'B.DOWN', 'PROCESS', 'PURGE']
-    
-    rows = []
-    base_time = datetime(2024, 1, 1, 0, 0, 0)
-    
-    for trace_id in trace_ids:
-        for step_idx, step_name in enumerate(step_names):
-            # 각 단계마다 50-100개의 데이터 포인트 생성
-            n_points = random.randint(50, 100)
-            for i in range(n_points):
-                timestamp = base_time + timedelta(
-                    days=random.randint(0, 30),
-                    hours=random.randint(0, 23),
-                    minutes=random.randint(0, 59),
-                    seconds=random.randint(0, 59)
-                )
-                
-                # 단계별로 다른 압력 범위 설정
-                if step_name == 'STANDBY':
-                    pressact = random.uniform(0.1, 0.5)
-                    pressset = 0.3
-                elif step_name in ['B.FILL', 'B.FILL4', 'B.FILL5']:
-                    pressact = random.uniform(1.0, 5.0)
-                    pressset = 3.0
-                elif step_name in ['B.UP', 'B.DOWN']:
-                    pressact = random.uniform(5.0, 10.0)
-                    pressset = 7.5
-                else:
-                    pressact = random.uniform(2.0, 8.0)
-                    pressset = 5.0
-                
-                # MFC 유량 데이터 (단계별로 다른 범위)
-                if step_name in ['B.FILL', 'B.FILL4', 'B.FILL5', 'PROCESS']:
-                    mfcmon_n2_1 = random.uniform(10.0, 50.0)  # 질소 유량
-                    mfcmon_n2_2 = random.uniform(5.0, 30.0)   # 질소 유량 2
-                    mfcmon_nh3 = random.uniform(1.0, 20.0)   # 암모니아 유량
-                else:
-                    mfcmon_n2_1 = random.uniform(0.0, 10.0)
-                    mfcmon_n2_2 = random.uniform(0.0, 5.0)
-                    mfcmon_nh3 = random.uniform(0.0, 2.0)
-                
-                # 온도 데이터
-                tempact_c = random.uniform(20.0, 80.0)  # 중앙 온도
-                tempact_u = random.uniform(25.0, 85.0)  # 상부 온도
-                
-                rows.append({
-                    'trace_id': trace_id,
-                    'step_name': step_name,
-                    'timestamp': timestamp,
-                    'pressact': round(pressact, 3),
-                    'pressset': round(pressset, 3),
-                    'vg11': round(random.uniform(0.0, 100.0), 2),
-                    'vg12': round(random.uniform(0.0, 100.0), 2),
-                    'vg13': round(random.uniform(0.0, 100.0), 2),
-                    'apcvalvemon': round(random.uniform(0.0, 100.0), 2),
-                    'apcvalveset': round(random.uniform(0.0, 100.0), 2),
-                    # 추가 컬럼
-                    'mfcmon_n2_1': round(mfcmon_n2_1, 1),
-                    'mfcmon_n2_2': round(mfcmon_n2_2, 1),
-                    'mfcmon_nh3': round(mfcmon_nh3, 1),
-                    'tempact_c': round(tempact_c, 1),
-                    'tempact_u': round(tempact_u, 1),
-                })
-    
-    # DataFrame 생성
-    df = pd.DataFrame(rows)
-    
-    # DuckDB에 테이블 생성
+STEP_NAMES = ['STANDBY', 'B.FILL', 'B.FILL4', 'B.FILL5', 'B.UP', 'B.DOWN', 'PROCESS', 'PURGE']
+BASE_TIME = datetime(2024, 1, 1, 0, 0, 0)
+
+HZ = 2.0
+STEP_SECONDS = (25.0, 50.0)   # step 길이 범위 (trace마다 ±5% 흔들림)
+TRACE_GAP_S = 600.0           # trace 사이 간격
+BATCH_ROWS = 100_000
+
+# meta 컬럼과 뷰에서 계산되는 컬럼은 신호로 만들지 않음
+DERIVED_COLUMNS = {"epoch_ms", "time_bucket_second"}
+
+# 카테고리별 (기본 레벨 범위, 노이즈 비율)
+CATEGORY_LEVELS = {
+    "pressure": ((0.5, 10.0), 0.01),
+    "temp": ((20.0, 650.0), 0.002),
+    "gas": ((0.0, 500.0), 0.01),
+    "apc": ((0.0, 100.0), 0.01),
+    "rf": ((0.0, 300.0), 0.01),
+    "valve": ((0.0, 1.0), 0.0),
+    "aux": ((0.0, 100.0), 0.01),
+    "other": ((0.0, 50.0), 0.01),
+}
+
+
+def step_names(n_steps: int) -> List[str]:
+    """기본 8개 step 이름 + 부족하면 STEP_09, STEP_10, ..."""
+    return STEP_NAMES[:n_steps] + [f"STEP_{i + 1:02d}" for i in range(len(STEP_NAMES), n_steps)]
+
+
+def signal_columns(catalog_path: Path = CATALOG_PATH, schema_path: Path = SCHEMA_PATH) -> List[Tuple[str, str]]:
+    """[(컬럼명, 카테고리)] — catalog 수치형 컬럼 + columns.yaml 컬럼 (meta/파생 컬럼 제외)"""
+    with open(catalog_path, "r", encoding="utf-8") as f:
+        catalog = json.load(f)
+    cols: Dict[str, str] = {}
+    for category, names in catalog.items():
+        if category == "meta":
+            continue
+        for name in names:
+            if name not in DERIVED_COLUMNS:
+                cols.setdefault(name, category)
+
+    from domain.schema.load_schema import load_columns_yaml
+    type_to_category = {"pressure": "pressure", "temperature": "temp", "flow": "gas", "valve": "apc"}
+    for col_def in load_columns_yaml(schema_path).columns.values():
+        for name in col_def.csv_columns:
+            if name not in catalog.get("meta", []):
+                cols.setdefault(name, type_to_category.get(col_def.physical_type, "other"))
+    return sorted(cols.items())
+
+
+def _setpoint_pairs(columns: Sequence[str]) -> Dict[str, str]:
+    from domain.schema.load_schema import get_setpoint_pairs, load_columns_yaml
+    pairs = get_setpoint_pairs(load_columns_yaml(SCHEMA_PATH))
+    present = set(columns)
+    return {act: sp for act, sp in pairs.items() if act in present and sp in present}
+
+
+class FleetModel:
+    """컬럼/step/trace별 난수 파라미터 (seed 고정, 배치 간 공유)"""
+
+    def __init__(self, n_traces: int, n_steps: int, seed: int = 0, hz: float = HZ,
+                 step_seconds: Tuple[float, float] = STEP_SECONDS, columns: Optional[List[Tuple[str, str]]] = None):
+        rng = np.random.default_rng(seed)
+        self.rng = rng
+        self.hz = hz
+        self.n_traces = n_traces
+        self.n_steps = n_steps
+        self.steps = step_names(n_steps)
+        cols = columns if columns is not None else signal_columns()
+        self.columns = [c for c, _ in cols]
+        n_cols = len(self.columns)
+
+        lo = np.array([CATEGORY_LEVELS.get(cat, CATEGORY_LEVELS["other"])[0][0] for _, cat in cols])
+        hi = np.array([CATEGORY_LEVELS.get(cat, CATEGORY_LEVELS["other"])[0][1] for _, cat in cols])
+        noise = np.array([CATEGORY_LEVELS.get(cat, CATEGORY_LEVELS["other"])[1] for _, cat in cols])
+        base = rng.uniform(lo, hi)
+
+        # (step, col) 레벨, 1차 응답 시정수(행 단위), 노이즈 표준편차
+        self.level = (base * rng.uniform(0.3, 1.3, size=(n_steps, n_cols))).astype(np.float32)
+        self.tau = (rng.uniform(1.0, 8.0, size=n_cols) * hz).astype(np.float32)
+        self.sigma = (noise * np.maximum(base, 1e-3) + 1e-4 * (noise > 0)).astype(np.float32)
+        # trace별 오프셋: 설비 간 차이 + 완만한 드리프트
+        drift = np.linspace(-1.0, 1.0, n_traces)[:, None] * (0.01 * base)
+        self.offset = (rng.normal(0.0, 0.01, size=(n_traces, n_cols)) * base + drift).astype(np.float32)
+
+        # setpoint 쌍: 설정값 컬럼은 실측 컬럼의 step 레벨 그대로 (지연/노이즈/오프셋 없음)
+        idx = {c: i for i, c in enumerate(self.columns)}
+        self.setpoint_idx = [(idx[act], idx[sp]) for act, sp in _setpoint_pairs(self.columns).items()]
+        for a, s in self.setpoint_idx:
+            self.level[:, s] = self.level[:, a]
+
+        # trace × step 행 수 (2Hz, step 길이 ±5%)
+        nominal = rng.uniform(step_seconds[0], step_seconds[1], size=n_steps)
+        jitter = 1.0 + rng.normal(0.0, 0.05, size=(n_traces, n_steps))
+        self.lengths = np.maximum(2, np.rint(nominal * jitter * hz)).astype(np.int64)
+        trace_rows = self.lengths.sum(axis=1)
+        gap_rows = int(TRACE_GAP_S * hz)
+        # trace 시작 행 오프셋 (연속 2Hz 시간축, trace 사이 간격 포함)
+        self.trace_start = np.concatenate([[0], np.cumsum(trace_rows + gap_rows)[:-1]])
+
+    @property
+    def total_rows(self) -> int:
+        return int(self.lengths.sum())
+
+    def trace_batches(self, batch_rows: int = BATCH_ROWS) -> Iterator[np.ndarray]:
+        """행 수가 batch_rows 정도가 되도록 trace 인덱스 묶음"""
+        rows = self.lengths.sum(axis=1)
+        start, acc = 0, 0
+        for i, n in enumerate(rows):
+            acc += n
+            if acc >= batch_rows:
+                yield np.arange(start, i + 1)
+                start, acc = i + 1, 0
+        if start < self.n_traces:
+            yield np.arange(start, self.n_traces)
+
+    def generate(self, traces: np.ndarray) -> pd.DataFrame:
+        """trace 묶음의 전체 행 (trace_no, step_idx, no, timestamp, 신호 컬럼...)"""
+        lengths = self.lengths[traces].ravel()                     # (n_tr × n_steps,)
+        n_rows = int(lengths.sum())
+        seg = np.repeat(np.arange(len(lengths)), lengths)
+        seg_start = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+        t = (np.arange(n_rows) - seg_start[seg]).astype(np.float32)  # step 안 경과 행 수
+        step_idx = seg % self.n_steps
+        local = seg // self.n_steps
+        trace_no = traces[local]
+
+        # trace 안 행 번호 (step을 이어 붙인 순서)
+        trace_rows = self.lengths[traces].sum(axis=1)
+        trace_first = np.concatenate([[0], np.cumsum(trace_rows)[:-1]])
+        no = np.arange(n_rows) - trace_first[local]
+
+        cur = self.level[step_idx]
+        prev = self.level[(step_idx - 1) % self.n_steps]
+        decay = np.exp(-t[:, None] / self.tau[None, :])
+        values = cur + (prev - cur) * decay
+        values += self.offset[trace_no]
+        values += self.rng.standard_normal(values.shape, dtype=np.float32) * self.sigma
+        if self.setpoint_idx:
+            sp = [s for _, s in self.setpoint_idx]
+            values[:, sp] = cur[:, sp]  # 설정값은 step 첫 행부터 계단
+
+        ts_rows = self.trace_start[trace_no] + no
+        timestamp = np.datetime64(BASE_TIME, "ms") + np.rint(ts_rows * (1000.0 / self.hz)).astype("timedelta64[ms]")
+
+        df = pd.DataFrame(values, columns=self.columns, copy=False)
+        df.insert(0, "trace_no", (trace_no + 1).astype(np.int32))
+        df.insert(1, "step_idx", step_idx.astype(np.int16))
+        df.insert(2, "no", no.astype(np.int32))
+        df.insert(3, "timestamp", timestamp)
+        return df
+
+
+def _select_sql(model: FleetModel, source: str) -> str:
+    """배치 DataFrame → traces 스키마 (문자열 컬럼은 DuckDB에서 코드로부터 생성)"""
+    steps = "[" + ", ".join(f"'{s}'" for s in model.steps) + "]"
+    signals = ", ".join(f'CAST("{c}" AS DOUBLE) AS "{c}"' for c in model.columns)
+    return f"""
+    SELECT
+        printf('standard_trace_%03d', trace_no) AS trace_id,
+        {steps}[step_idx + 1] AS step_name,
+        CAST(step_idx + 1 AS INTEGER) AS step_id,
+        CAST(timestamp AS TIMESTAMP) AS timestamp,
+        CAST(timestamp AS DATE) AS date,
+        CAST(timestamp AS TIME) AS time,
+        printf('standard_trace_%03d', trace_no) || '.csv' AS filename,
+        printf('standard_trace_%03d', trace_no) || '.csv' AS filename_1,
+        CAST(no AS INTEGER) AS no,
+        'RECIPE_A' AS recipe_table_name,
+        {signals}
+    FROM {source}
+    """
+
+
+def _create_views(con) -> None:
+    # 합성 데이터는 (trace_id, timestamp)가 유일하므로 중복 제거 없이 같은 스키마의 뷰만 만든다
     con.execute("""
-        CREATE OR REPLACE TABLE traces AS
-        SELECT * FROM df
+    CREATE OR REPLACE VIEW traces_dedup AS
+    SELECT
+        *,
+        date_trunc('second', timestamp) AS time_bucket_second,
+        EXTRACT(EPOCH FROM timestamp) * 1000 AS epoch_ms
+    FROM traces
     """)
-    
-    # 분석용 뷰 생성 (모든 주요 컬럼 포함)
     con.execute("""
-        CREATE OR REPLACE VIEW traces_key AS
-        SELECT trace_id, step_name, timestamp, pressact, pressset, vg11, vg12, vg13,
-               mfcmon_n2_1, mfcmon_n2_2, mfcmon_nh3, tempact_c, tempact_u
-        FROM traces
+    CREATE OR REPLACE VIEW traces_key AS
+    SELECT trace_id, step_name, timestamp, pressact, pressset, vg11, vg12, vg13,
+           mfcmon_n2_1, mfcmon_n2_2, mfcmon_nh3, tempact_c, tempact_u
+    FROM traces_dedup
     """)
-    
-    # 결과 확인
-    n_rows = con.execute("SELECT COUNT(*) FROM traces").fetchone()[0]
-    n_traces = con.execute("SELECT COUNT(DISTINCT trace_id) FROM traces").fetchone()[0]
-    n_steps = con.execute("SELECT COUNT(DISTINCT step_name) FROM traces").fetchone()[0]
-    
-    print(f"\n✅ 더미 데이터 생성 완료!")
-    print(f"DB: {OUT_DB}")
-    print(f"총 행 수: {n_rows:,}")
-    print(f"공정 ID 개수: {n_traces}")
-    print(f"단계명 개수: {n_steps}")
-    print(f"\n공정 ID별 데이터 개수:")
-    print(con.execute("SELECT trace_id, COUNT(*) n FROM traces GROUP BY trace_id ORDER BY trace_id").df())
-    
-    con.close()
 
-if __name__ == "__main__":
-    # data_out 디렉토리 생성
-    OUT_DB.parent.mkdir(parents=True, exist_ok=True)
-    
-    create_dummy_data()
 
+def write_fleet(
+    n_traces: int = 3,
+    n_steps: int = 8,
+    db_path: Union[str, Path] = OUT_DB,
+    parquet_dir: Optional[Union[str, Path]] = None,
+    seed: int = 0,
+    hz: float = HZ,
+    step_seconds: Tuple[float, float] = STEP_SECONDS,
+    batch_rows: int = BATCH_ROWS,
+    verbose: bool = True,
+) -> int:
+    """
+    합성 설비 데이터 생성
+
+    parquet_dir가 있으면 배치마다 part-NNNNN.parquet, 없으면 db_path의 traces 테이블(+뷰)과
+    step_segments 구간 테이블로 씀.
+
+    Returns:
+        생성한 행 수
+    """
+    model = FleetModel(n_traces, n_steps, seed, hz, step_seconds)
+    if verbose:
+        print(f"합성 데이터 생성: {n_traces:,} trace × {n_steps} step × {len(model.columns)} 컬럼 → {model.total_rows:,}행")
+
+    if parquet_dir is not None:
+        Path(parquet_dir).mkdir(parents=True, exist_ok=True)
+        con = duckdb.connect()
+    else:
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        con = duckdb.connect(str(db_path))
+        con.execute("DROP VIEW IF EXISTS traces_key")
+        con.execute("DROP VIEW IF EXISTS traces_dedup")
+        con.execute("DROP TABLE IF EXISTS traces")
+
+    written = 0
+    try:
+        for part, traces in enumerate(model.trace_batches(batch_rows)):
+            batch = model.generate(traces)
+            con.register("batch", batch)
+            select_sql = _select_sql(model, "batch")
+            if parquet_dir is not None:
+                out = Path(parquet_dir) / f"part-{part:05d}.parquet"
+                con.execute(f"COPY ({select_sql}) TO '{out}' (FORMAT PARQUET)")
+            elif part == 0:
+                con.execute(f"CREATE TABLE traces AS {select_sql}")
+            else:
+                con.execute(f"INSERT INTO traces {select_sql}")
+            con.unregister("batch")
+            written += len(batch)
+            if verbose:
+                print(f"  {written:,} / {model.total_rows:,}행", end="\r")
+        if parquet_dir is None:
+            _create_views(con)
+            from src.analysis.segments import build_step_segments
+            build_step_segments(con, only_new=False)
+    finally:
+        con.close()
+    if verbose:
+        print()
+    return written
+
+
+def create_dummy_data(n_traces: int = 3, n_steps: int = 8, db_path: Union[str, Path] = OUT_DB, **kwargs) -> None:
+    """더미 데이터 생성 후 요약 출력"""
+    print("더미 데이터 생성 중...")
+    write_fleet(n_traces, n_steps, db_path, **kwargs)
+
+    con = duckdb.connect(str(db_path))
+    try:
+        n_rows = con.execute("SELECT COUNT(*) FROM traces").fetchone()[0]
+        n_trace_ids = con.execute("SELECT COUNT(DISTINCT trace_id) FROM traces").fetchone()[0]
+        n_step_names = con.execute("SELECT COUNT(DISTINCT step_name) FROM traces").fetchone()[0]
+
+        print(f"\n✅ 더미 데이터 생성 완료!")
+        print(f"DB: {db_path}")
+        print(f"총 행 수: {n_rows:,}")
+        print(f"공정 ID 개수: {n_trace_ids}")
+        print(f"단계명 개수: {n_step_names}")
+        if n_trace_ids <= 20:
+            print(f"\n공정 ID별 데이터 개수:")
+            print(con.execute("SELECT trace_id, COUNT(*) n FROM traces GROUP BY trace_id ORDER BY trace_id").df())
+    finally:
+        con.close()
+
+
+def main():
+    ap = argparse.ArgumentParser(description="합성 설비 데이터 생성")
+    ap.add_argument("--traces", type=int, default=3)
+    ap.add_argument("--steps", type=int, default=8)
+    ap.add_argument("--db", type=Path, default=OUT_DB)
+    ap.add_argument("--parquet", type=Path, default=None, help="지정하면 DuckDB 대신 Parquet 디렉토리로")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--step-seconds", type=float, nargs=2, default=STEP_SECONDS)
+    ap.add_argument("--batch-rows", type=int, default=BATCH_ROWS)
+    ap.add_argument("--analysis", action="store_true", help="생성 후 분석용 사전 계산 테이블까지 갱신")
+    args = ap.parse_args()
+
+    options = dict(seed=args.seed, step_seconds=tuple(args.step_seconds), batch_rows=args.batch_rows)
+    if args.parquet is not None:
+        write_fleet(args.traces, args.steps, parquet_dir=args.parquet, **options)
+        return
+
+    create_dummy_data(args.traces, args.steps, args.db, **options)
+    if args.analysis:
+        from src.analysis.refresh import refresh_analysis_tables
+        con = duckdb.connect(str(args.db))
+        try:
+            refresh_analysis_tables(con)
+        finally:
+            con.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -9,8 +9,9 @@
 """
 from typing import Optional
 import pandas as pd
-from src.nl_parse import Parsed
+from src.nl_parse_v2 import Parsed
 from src.semantic_resolver import get_metadata_by_physical_column
+from src.services.formatting import format_counts, format_magnitude
 
 # 컬럼 한글 라벨은 semantic_registry에서 가져옴
 def _get_column_label(physical_col: Optional[str]) -> str:
@@ -145,8 +146,8 @@ def interpret_group(p: Parsed, df: pd.DataFrame, topn: int = 5) -> str:
     overall_min = df["value"].min()
     overall_max = df["value"].max()
 
-    # TopN: value 기준 내림차순
-    top = df.sort_values("value", ascending=False).head(topn)
+    # TopN: value 기준 내림차순 (전체 정렬 없이 상위 N개만)
+    top = df.loc[pd.to_numeric(df["value"]).nlargest(topn).index]
 
     # 그룹명 한글화
     group_label = "공정 ID" if g == "trace_id" else ("단계명" if g == "step_name" else g)
@@ -160,17 +161,11 @@ def interpret_group(p: Parsed, df: pd.DataFrame, topn: int = 5) -> str:
     lines.append(f"값 범위: {min_str} ~ {max_str}")
     
     lines.append(f"상위 {topn}개:")
-    for _, r in top.iterrows():
-        n_val = int(r['n']) if 'n' in df.columns else 'NA'
-        val = r['value']
-        # 값 포맷팅
-        if abs(val) >= 1000:
-            val_str = f"{val:.1f}"
-        elif abs(val) >= 1:
-            val_str = f"{val:.3f}"
-        else:
-            val_str = f"{val:.6f}".rstrip('0').rstrip('.')
-        lines.append(f"  • {r[g]}: {val_str} (표본 {n_val:,}개)")
+    # 값/표본 수는 컬럼 단위로 문자열화
+    val_strs = format_magnitude(top["value"])
+    n_strs = [f"{n:,}" for n in format_counts(top["n"])] if "n" in df.columns else ["NA"] * len(top)
+    for group, val_str, n_str in zip(top[g].tolist(), val_strs, n_strs):
+        lines.append(f"  • {group}: {val_str} (표본 {n_str}개)")
 
     return "\n".join(lines)
 
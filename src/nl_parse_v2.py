@@ -29,6 +29,15 @@ STEP_RE = re.compile(r"step\s*[:=]\s*([a-z0-9_]+)", re.IGNORECASE)
 STEP_FILTER_RE = re.compile(r"\b([A-Z0-9\.\-_]+)\s*(?:스텝|단계)\b", re.IGNORECASE)  # "B.FILL 스텝" 같은 필터
 STEP_NAME_ONLY_RE = re.compile(r"\b([A-Z][A-Z0-9\.\-_]{2,})\b")  # "B.FILL", "PURGE" 같은 단독 step 이름 (최소 3자, "B." 제외)
 STEP_GROUP_RE = re.compile(r"(?:스텝별|단계별|step\s*별|step\s*by\s*step)", re.IGNORECASE)  # "스텝별" 같은 그룹핑 ("별" 필수)
+# 상관 분석 대상 카테고리 (catalog_physical.json 카테고리명)
+CORR_CATEGORY_PATTERNS = [
+    (r"(압력\s*계열|압력\s*신호|pressure)", "pressure"),
+    (r"(온도\s*계열|온도\s*신호|temp)", "temp"),
+    (r"(가스|gas|유량|mfc)", "gas"),
+    (r"(apc)", "apc"),
+    (r"(밸브|valve)", "valve"),
+    (r"(\brf\b|플라즈마)", "rf"),
+]
 # top5, top 5, 상위 5, 5개, 5개 알려주세요 등 다양한 패턴 지원
 TOP_RE = re.compile(r"(?:top\s*(\d+)|상위\s*(\d+)|(\d+)\s*개)", re.IGNORECASE)
 DATE_RE = re.compile(r"(\d{4})[-/](\d{1,2})[-/](\d{1,2})")
@@ -495,8 +504,11 @@ def parse_question(q: str) -> Parsed:
     if date_end:
         filters["date_end"] = date_end
     
+    # 골든 trace 대비 편차 ("골든 대비"의 "대비"는 두 공정 비교가 아님)
+    is_golden = "골든" in original or "golden" in original.lower()
+    
     # 비교 의도 감지 (최우선)
-    has_compare_keyword = any(keyword in original for keyword in COMPARE_KEYWORDS)
+    has_compare_keyword = any(keyword in original for keyword in COMPARE_KEYWORDS) and not is_golden
     has_multiple_traces = len(traces) >= 2
     has_placeholder = has_trace_placeholder
     has_generic_compare = "두 공정" in original or "두 trace" in original.lower()
@@ -507,6 +519,9 @@ def parse_question(q: str) -> Parsed:
         # 실제 trace_id가 2개 이상 발견된 경우에만 trace_ids 채우기
         if has_multiple_traces:
             filters["trace_ids"] = traces
+        # 스텝 정렬 프로파일(파형) 비교: 평균이 아닌 point-wise 비교
+        if re.search(r"(프로파일|파형|profile|waveform)", original):
+            flags["is_profile_compare"] = True
         # trace1/trace2나 "두 공정" 같은 경우는 trace_ids 채우지 않음
     
     # 특수 지표 감지
@@ -518,12 +533,66 @@ def parse_question(q: str) -> Parsed:
         flags["is_overshoot"] = True
     if "안정" in original or "stable" in original.lower():
         flags["is_stable_avg"] = True
+        # 안정화 구간: "초반 20% 제외" / "처음 30초 제외"
+        m = re.search(r"(\d+(?:\.\d+)?)\s*%\s*제외", original)
+        if m:
+            flags["settle_frac"] = float(m.group(1)) / 100.0
+        m = re.search(r"(\d+(?:\.\d+)?)\s*초\s*제외", original)
+        if m:
+            flags["settle_s"] = float(m.group(1))
+    # 설정값 추종 지표 (setpoint가 정의된 컬럼이면 setpoint_metrics 테이블로 라우팅)
+    if re.search(r"(상승\s*시간|rise\s*time)", original, re.IGNORECASE):
+        flags["setpoint_metric"] = "rise_time"
+    elif re.search(r"(정착\s*시간|settling)", original, re.IGNORECASE):
+        flags["setpoint_metric"] = "settling_time"
+    elif re.search(r"(정상\s*상태\s*오차|steady[\s-]*state)", original, re.IGNORECASE):
+        flags["setpoint_metric"] = "steady_state_error"
+    elif flags.get("is_overshoot"):
+        flags["setpoint_metric"] = "overshoot"
+    if is_golden:
+        flags["is_golden_deviation"] = True
+    # SPC 관리도 (X̄-R / EWMA / CUSUM)
+    if re.search(r"(관리도|spc|control\s*chart|ewma|cusum|누적합)", original, re.IGNORECASE):
+        flags["is_spc"] = True
+        if re.search(r"ewma", original, re.IGNORECASE):
+            flags["spc_chart"] = "ewma"
+        elif re.search(r"(cusum|누적합)", original, re.IGNORECASE):
+            flags["spc_chart"] = "cusum"
+        elif re.search(r"(\bR\s*관리도|범위\s*관리도|r\s*chart)", original, re.IGNORECASE):
+            flags["spc_chart"] = "r"
+        else:
+            flags["spc_chart"] = "xbar"
+        if re.search(r"(위반|이탈|violation)", original, re.IGNORECASE):
+            flags["spc_violations_only"] = True
+    # trace의 step 진행 순서 (step_segments)
+    if re.search(r"(스텝|step|단계)\s*(진행\s*)?(순서|시퀀스|sequence|order)", original, re.IGNORECASE):
+        flags["is_step_sequence"] = True
+        # "스텝 순서"의 "스텝"이 step 필터로 잡히지 않도록 (전체 step 순서 조회)
+        filters.pop("step_name", None)
+        filters.pop("step_names", None)
+    # 컬럼 간 상관관계 (청크 누적 상관행렬)
+    if re.search(r"(상관|correlat|같이\s*움직)", original, re.IGNORECASE):
+        flags["is_correlation"] = True
+        if re.search(r"(spearman|스피어만|순위\s*상관)", original, re.IGNORECASE):
+            flags["corr_method"] = "spearman"
+        categories = [cat for pat, cat in CORR_CATEGORY_PATTERNS if re.search(pat, original, re.IGNORECASE)]
+        if categories:
+            flags["corr_categories"] = categories
+        # "압력 계열"처럼 카테고리 전체를 말하면 특정 컬럼 기준이 아님
+        if column and not re.search(r"계열", original):
+            flags["corr_target"] = column
+    # 다변량(PCA T²/SPE) 이상 공정 ("이상치"는 단일 컬럼 z-score로 별도 처리)
+    if re.search(r"(이상\s*(공정|trace|트레이스|run|런)|anomal|hotelling|\bt²|\bt2\b|\bspe\b|다변량)", original, re.IGNORECASE):
+        flags["is_pca_anomaly"] = True
+    # 기준 trace와 핑거프린트가 가까운 공정 검색 (kNN)
+    if len(traces) == 1 and re.search(r"(비슷한|유사한|닮은|similar)", original, re.IGNORECASE):
+        flags["is_similar_trace"] = True
     
     # 분석 유형 결정 (우선순위: comparison > stability > ranking > group_profile)
     # 정책: 단일 집계도 ranking으로 통일 (항상 표 형태로 반환)
     if flags.get("is_trace_compare") or flags.get("is_step_compare"):
         analysis_type = "comparison"
-    elif flags.get("is_outlier") or flags.get("is_overshoot") or flags.get("is_stable_avg") or flags.get("is_dwell_time"):
+    elif flags.get("is_outlier") or flags.get("is_overshoot") or flags.get("is_stable_avg") or flags.get("is_dwell_time") or flags.get("is_golden_deviation") or flags.get("is_spc") or flags.get("setpoint_metric") or flags.get("is_pca_anomaly"):
         analysis_type = "stability"
     elif group_by and top_n:
         # group_by + top_n이면 ranking (상위 N개 그룹)
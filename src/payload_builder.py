@@ -5,10 +5,13 @@ Payload Builder: UI용 표준 payload 생성
 - meta 생성 (시각화 전용 정보)
 - payload 조립 (question, summary, sql, columns, data, meta)
 """
-from typing import Dict, Any
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple, Union
 import pandas as pd
-from src.nl_parse import Parsed
+from src.nl_parse_v2 import Parsed
 from src.semantic_resolver import get_metadata_by_physical_column
+from src.services.pagination import DEFAULT_PAGE_SIZE, paginate
+from src.services.query_cache import DB, fetch_df
 
 
 def build_meta(p: Parsed) -> Dict[str, Any]:
@@ -88,41 +91,51 @@ def build_meta(p: Parsed) -> Dict[str, Any]:
     }
     
     # order와 top_n 추가 (있는 경우만)
-    if hasattr(p, 'order') and p.order:
+    if getattr(p, 'order', None):
         meta["order"] = p.order
-    if hasattr(p, 'limit') and p.limit:
-        meta["top_n"] = p.limit
+    top_n = getattr(p, 'top_n', None) or getattr(p, 'limit', None)
+    if top_n:
+        meta["top_n"] = top_n
     
     return meta
 
 
-def build_payload(question: str, con) -> Dict[str, Any]:
+# payload 첫 페이지 행 수 (나머지는 next_cursor로 /api/query/page에서 조회)
+MAX_ROWS = DEFAULT_PAGE_SIZE
+
+
+def build_payload_frame(
+    question: str,
+    con,
+    page_size: int = MAX_ROWS,
+    db_path: Optional[Union[str, Path]] = None,
+) -> Tuple[Dict[str, Any], pd.DataFrame]:
     """
-    최종 payload 조립
-    
-    Args:
-        question: 사용자 질문
-        con: DuckDB connection
-        
+    payload 조립 (data 제외) + 결과 첫 페이지 DataFrame
+
+    data 직렬화는 호출자가 형식에 맞게 수행한다 (build_payload / services.payload_format).
+    결과가 page_size보다 크면 전체 결과를 RESULT_SETS에 보관하고 next_cursor를 싣는다.
+    질문은 nl_parse_v2로 파싱한다 (flags가 있어야 골든 편차·SPC 등 분석 라우팅이 동작).
+    db_path는 결과 캐시 키의 DB 세대 계산용 (기본: data_out/ald.duckdb).
+
     Returns:
-        표준 payload 딕셔너리:
-        {
-            "question": str,
-            "summary": str,
-            "sql": str,
-            "columns": List[str],
-            "data": List[Dict],
-            "meta": Dict
-        }
+        (payload, df): payload는 question, summary, sql, columns, meta, total_rows, next_cursor.
+        df는 첫 페이지
     """
-    from src.nl_parse import parse_question
-    from src.sql_builder import build_sql
+    from src.nl_parse_v2 import parse_question
+    from src.analysis.router import choose_analysis_sql
     from src.interpreter import interpret
     from urllib.parse import quote
     
     p = parse_question(question)
-    sql, params = build_sql(p)
-    df = con.execute(sql, params).df()
+    # 사전 계산 테이블 기반 분석(골든 편차 등)이면 해당 SQL, 아니면 기본 빌더
+    routed = choose_analysis_sql(p, con)
+    if routed:
+        sql, params = routed
+    else:
+        from src.sql_builder import build_sql
+        sql, params = build_sql(p)
+    df = fetch_df(con, sql, params, db_path if db_path is not None else DB)
     
     # meta 생성 시 질문 문자열 전달 (시계열용)
     p._question = question  # 임시 속성 추가
@@ -137,9 +150,36 @@ def build_payload(question: str, con) -> Dict[str, Any]:
         "summary": interpret(p, df),
         "sql": sql.strip(),
         "columns": list(df.columns),
-        "data": df.head(200).to_dict(orient="records"),
         "meta": meta
     }
     
-    return payload
+    first, next_cursor = paginate(df, page_size)
+    payload["total_rows"] = len(df)
+    payload["next_cursor"] = next_cursor
+    return payload, first
 
+
+def build_payload(question: str, con) -> Dict[str, Any]:
+    """
+    최종 payload 조립
+    
+    Args:
+        question: 사용자 질문
+        con: DuckDB connection
+        
+    Returns:
+        표준 payload 딕셔너리:
+        {
+            "question": str,
+            "summary": str,
+            "sql": str,
+            "columns": List[str],
+            "data": List[Dict],
+            "meta": Dict,
+            "total_rows": int,
+            "next_cursor": Optional[str]
+        }
+    """
+    payload, df = build_payload_frame(question, con)
+    payload["data"] = df.to_dict(orient="records")
+    return payload
@@ -1,17 +1,12 @@
 """
 Plot Generator: 시계열 Plot 생성 (Matplotlib)
 """
-import matplotlib
-matplotlib.use('Agg')  # 서버 환경에서 필요한 백엔드 설정
-import matplotlib.pyplot as plt
-import matplotlib.font_manager as fm
 import pandas as pd
 from typing import Optional
 import io
 
-# 한글 폰트 설정 (macOS에서 사용 가능한 폰트 우선 사용)
-plt.rcParams['font.family'] = 'Apple SD Gothic Neo'  # macOS 기본 한글 폰트
-plt.rcParams['axes.unicode_minus'] = False  # 음수 기호 깨짐 방지
+# matplotlib/한글 폰트는 첫 호출 시 pyplot()에서 설정
+from src.utils.mpl_korean import pyplot
 
 
 def plot_timeseries(
@@ -34,6 +29,7 @@ def plot_timeseries(
     Returns:
         BytesIO: PNG 이미지 데이터
     """
+    plt = pyplot()
     if df.empty or y_col not in df.columns or x_col not in df.columns:
         # 빈 차트 반환
         fig, ax = plt.subplots(figsize=(10, 4))
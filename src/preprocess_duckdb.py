@@ -281,6 +281,10 @@ def main():
     # catalog_physical.json 생성
     _generate_catalog(con, PROJECT_ROOT)
     
+    # 사전 계산 분석 테이블 갱신 (골든 편차 점수 등)
+    from src.analysis.refresh import refresh_analysis_tables
+    refresh_analysis_tables(con)
+    
     con.close()
 
 if __name__ == "__main__":
@@ -18,13 +18,9 @@ DB = Path.home() / "ald_app" / "data_out" / "ald.duckdb"
 
 # columns.yaml 로드 및 도메인키 → 실제 컬럼명 변환
 def _load_schema():
-    """columns.yaml 로드 (싱글톤)"""
-    global _schema_cache
-    if '_schema_cache' not in globals():
-        from domain.schema.load_schema import load_columns_yaml
-        schema_path = PROJECT_ROOT / "domain" / "schema" / "columns.yaml"
-        _schema_cache = load_columns_yaml(schema_path)
-    return _schema_cache
+    """columns.yaml 스키마 (도메인 번들 공유 인스턴스)"""
+    from domain.bundle import get_bundle
+    return get_bundle().schema
 
 def _get_csv_column(domain_key: Optional[str]) -> Optional[str]:
     """
@@ -39,33 +35,19 @@ def _get_csv_column(domain_key: Optional[str]) -> Optional[str]:
         return col_def.csv_columns[0]
     return domain_key  # 매핑이 없으면 도메인키 그대로 반환
 
-def build_stable_avg_sql(p: Parsed) -> Tuple[str, List]:
-    """안정화 구간 평균 (초반 10% 제외)"""
+def build_stable_avg_sql(p: Parsed, con=None) -> Tuple[str, List]:
+    """안정화 구간 평균: (trace, step 구간)별로 초반 settle 구간을 제외한 평균
+
+    step_segments의 구간 시작/길이로 안정화 시작 시각을 정해 원본과 조인 (전역 정렬/윈도우 없음)
+    - flags["settle_s"]: 구간 시작 후 N초 제외
+    - flags["settle_frac"]: 구간 길이의 비율 제외 (기본 0.1)
+    con을 주면 step_segments가 없는 DB는 구간을 즉석 계산 (analysis.segments.build_stable_avg_sql)
+    """
+    from src.analysis.segments import build_stable_avg_sql as build_segment_stable_avg_sql
     csv_col = _get_csv_column(p.col) if p.col else None
     if not csv_col:
         raise ValueError("컬럼이 필요합니다")
-    
-    where_sql = "WHERE step_name = ?" if p.step_name else ""
-    params = [p.step_name] if p.step_name else []
-    
-    sql = f"""
-    WITH ranked AS (
-        SELECT 
-            {csv_col},
-            ROW_NUMBER() OVER (PARTITION BY step_name ORDER BY timestamp) as rn,
-            COUNT(*) OVER (PARTITION BY step_name) as total
-        FROM traces_dedup
-        {where_sql}
-    ),
-    stable AS (
-        SELECT {csv_col}
-        FROM ranked
-        WHERE rn > total * 0.1  -- 초반 10% 제외
-    )
-    SELECT AVG({csv_col}) AS value, COUNT(*) AS n, STDDEV({csv_col}) AS std
-    FROM stable
-    """
-    return sql, params
+    return build_segment_stable_avg_sql(p, csv_col, con)
 
 def build_overshoot_sql(p: Parsed) -> Tuple[str, List]:
     """Overshoot: 최대값 - 설정값"""
@@ -105,37 +87,14 @@ def build_overshoot_sql(p: Parsed) -> Tuple[str, List]:
         sql += f" LIMIT {int(p.limit)}"
     return sql, params
 
-def build_dwell_time_sql(p: Parsed) -> Tuple[str, List]:
-    """체류시간: 각 step의 유지 시간 (초)"""
-    where_sql = ""
-    params = []
-    if p.trace_id:
-        where_sql = "WHERE trace_id = ?"
-        params.append(p.trace_id)
-    
-    sql = f"""
-    WITH step_times AS (
-        SELECT 
-            step_name,
-            MIN(timestamp) AS start_time,
-            MAX(timestamp) AS end_time,
-            EXTRACT(EPOCH FROM (MAX(timestamp) - MIN(timestamp))) AS dwell_seconds
-        FROM traces_dedup
-        {where_sql}
-        GROUP BY trace_id, step_name
-    )
-    SELECT 
-        step_name,
-        AVG(dwell_seconds) AS value,
-        COUNT(*) AS n,
-        STDDEV(dwell_seconds) AS std
-    FROM step_times
-    GROUP BY step_name
-    ORDER BY value DESC
+def build_dwell_time_sql(p: Parsed, con=None) -> Tuple[str, List]:
+    """체류시간: 각 step 구간의 유지 시간 (초) - step_segments 기준, 재방문은 별도 구간
+
+    con을 주면 step_segments가 없는 DB(이전 ingest, --analysis 없이 만든 더미 DB)는
+    원본 행 MIN/MAX 방식으로 폴백 (analysis.segments.build_dwell_time_sql)
     """
-    if p.limit:
-        sql += f" LIMIT {int(p.limit)}"
-    return sql, params
+    from src.analysis.segments import build_dwell_time_sql as build_segment_dwell_sql
+    return build_segment_dwell_sql(p, con)
 
 def build_outlier_detection_sql(p: Parsed) -> Tuple[str, List]:
     """이상치 탐지: z-score > 2.0인 값 비율 (공정별) - 개별 값 기준"""
@@ -1,7 +1,24 @@
 """
 Question Suggestions: 질문 추천 및 자동완성
+
+후보: QUESTION_TEMPLATES + 질문 이력(services/history_store) + 도메인 번들 별칭으로 만든 질문
+순위: 기본 가중치 + 최근 가중 사용 빈도 (services/suggest_index, 자모 단위 접두/단어 시작 검색)
+색인은 이력과 같이 사용자(X-Client-Id)별로 두고, 최근 사용한 MAX_USER_INDEXES명분만 메모리에 유지
 """
-from typing import List, Dict
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import List, Dict, Optional
+
+from src.services.history_store import DEFAULT_USER
+from src.services.suggest_index import SuggestIndex
+
+# 후보 기본 가중치 (사용 1회 = 1.0, 반감기마다 절반)
+TEMPLATE_PRIOR = 1.0
+POPULAR_PRIOR = 2.0
+GENERATED_PRIOR = 0.1
+HISTORY_SAMPLE = 20000  # 색인 생성 시 가져오는 사용자별 최근 이력 행 수
+MAX_USER_INDEXES = 64  # 메모리에 유지하는 사용자별 색인 수 (LRU)
 
 # 예시 질문 템플릿
 QUESTION_TEMPLATES = [
@@ -63,31 +80,116 @@ CATEGORY_QUESTIONS = {
     ],
 }
 
-def get_suggestions(query: str = "", limit: int = 10) -> List[Dict[str, str]]:
+# 인기 질문 (사용 이력이 없을 때의 기본 순위)
+POPULAR_QUESTIONS = [
+    "압력 평균",
+    "스텝별 압력 평균",
+    "변동 큰 스텝",
+    "압력 이상치 상위 10개",
+    "standard_trace_001과 standard_trace_002 압력 비교",
+]
+
+_indexes: "OrderedDict[str, SuggestIndex]" = OrderedDict()
+_index_lock = threading.Lock()
+_generated: Optional[List[str]] = None
+
+
+def generated_questions() -> List[str]:
+    """도메인 번들 별칭 어휘로 만든 질문: [그룹] 컬럼 별칭 + 집계 (예: "스텝별 챔버 압력 평균")"""
+    from domain.bundle import get_bundle
+
+    bundle = get_bundle()
+    aggs = [names[0] for key, names in bundle.metric_synonyms.items() if key in ("avg", "max", "min", "std") and names]
+    groups = [""] + [f"{bundle.group_synonyms[g][0]} " for g in ("step_name", "trace_id") if bundle.group_synonyms.get(g)]
+    out = []
+    for synonyms in bundle.column_synonyms.values():
+        for alias in synonyms:
+            for group in groups:
+                for agg in aggs:
+                    out.append(f"{group}{alias} {agg}")
+    return out
+
+
+def _parse_timestamp(value: str) -> Optional[float]:
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def _generated_questions() -> List[str]:
+    """별칭 질문은 사용자와 무관하므로 한 번만 생성"""
+    global _generated
+    if _generated is None:
+        _generated = generated_questions()
+    return _generated
+
+
+def build_index(history_events=None, generated: Optional[List[str]] = None, user_id: str = DEFAULT_USER) -> SuggestIndex:
+    """
+    템플릿 → 인기 질문 → 생성 질문 → 이력 순으로 색인 생성
+
+    history_events: (question, timestamp ISO) 최신순, None이면 이력 저장소에서 user_id의 HISTORY_SAMPLE행
+    """
+    index = SuggestIndex()
+    index.add_many(QUESTION_TEMPLATES, TEMPLATE_PRIOR)
+    index.add_many(((q, "인기") for q in POPULAR_QUESTIONS), POPULAR_PRIOR - TEMPLATE_PRIOR)
+    index.add_many(((q, "별칭") for q in (_generated_questions() if generated is None else generated)), GENERATED_PRIOR)
+    if history_events is None:
+        from src.services.history_store import HISTORY
+
+        history_events = HISTORY.events(user_id=user_id, limit=HISTORY_SAMPLE)
+    index.record_many((q, _parse_timestamp(ts)) for q, ts in history_events)
+    return index
+
+
+def get_index(user_id: str = DEFAULT_USER) -> SuggestIndex:
+    """사용자별 색인 (첫 호출 시 그 사용자의 이력으로 생성, 오래 안 쓴 사용자 색인부터 버림)"""
+    with _index_lock:
+        index = _indexes.get(user_id)
+        if index is None:
+            index = build_index(user_id=user_id)
+            _indexes[user_id] = index
+            while len(_indexes) > MAX_USER_INDEXES:
+                _indexes.popitem(last=False)
+        else:
+            _indexes.move_to_end(user_id)
+        return index
+
+
+def record_question(question: str, user_id: str = DEFAULT_USER) -> None:
+    """
+    사용한 질문을 그 사용자의 색인에 반영 (이력 저장 뒤 호출)
+
+    색인이 아직 없으면 다음 get_index가 방금 저장한 이력까지 읽으므로 건너뜀 (이중 집계 방지)
+    """
+    with _index_lock:
+        index = _indexes.get(user_id)
+    if index is not None:
+        index.record(question)
+
+
+def get_suggestions(query: str = "", limit: int = 10, user_id: str = DEFAULT_USER) -> List[Dict[str, str]]:
     """
     질문 추천 목록 반환
     
     Args:
-        query: 검색어 (부분 매칭)
+        query: 검색어 (질문 앞부분 또는 단어 시작 부분, 조합 중인 한글 포함)
         limit: 반환할 최대 개수
+        user_id: 순위에 반영할 이력의 사용자 (X-Client-Id)
     
     Returns:
-        질문 목록: [{"question": "...", "category": "..."}, ...]
+        질문 목록: [{"question": "...", "category": "..."}, ...] (점수순)
     """
-    suggestions = []
-    
-    # 검색어가 있으면 부분 매칭
-    if query:
-        query_lower = query.lower()
-        for q, cat in QUESTION_TEMPLATES:
-            if query_lower in q.lower():
-                suggestions.append({"question": q, "category": cat})
+    index = get_index(user_id)
+    suggestions = index.suggest(query, limit) if query else []
     
-    # 검색어가 없거나 매칭 결과가 적으면 전체 목록 반환
-    if not query or len(suggestions) < limit:
-        for q, cat in QUESTION_TEMPLATES:
-            if not any(s["question"] == q for s in suggestions):
-                suggestions.append({"question": q, "category": cat})
+    # 검색어가 없거나 매칭 결과가 적으면 전체 순위로 채움
+    if len(suggestions) < limit:
+        seen = {s["question"] for s in suggestions}
+        for s in index.suggest("", limit + len(suggestions)):
+            if s["question"] not in seen:
+                suggestions.append(s)
     
     return suggestions[:limit]
 
@@ -111,18 +213,11 @@ def get_category_suggestions(category: str = None) -> List[str]:
     
     return list(set(all_questions))  # 중복 제거
 
-def get_popular_questions(limit: int = 5) -> List[str]:
+def get_popular_questions(limit: int = 5, user_id: str = DEFAULT_USER) -> List[str]:
     """
-    인기 질문 목록 (자주 사용되는 질문)
+    인기 질문 목록 (사용자 이력 가중 순위, 이력이 없으면 POPULAR_QUESTIONS 순서)
     
     Returns:
         질문 목록
     """
-    return [
-        "압력 평균",
-        "스텝별 압력 평균",
-        "변동 큰 스텝",
-        "압력 이상치 상위 10개",
-        "standard_trace_001과 standard_trace_002 압력 비교",
-    ][:limit]
-
+    return [s["question"] for s in get_index(user_id).suggest("", limit)]
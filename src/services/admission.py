@@ -0,0 +1,274 @@
+"""
+비용 기반 입장 제어(admission control)
+
+안정성 분석(이상치, 안정구간 윈도 정렬, 분위수)은 단순 평균보다 수십~수백 배 무겁다.
+질의를 실행하기 전에 Parsed로 비용을 추정해 가벼운(cheap) / 무거운(heavy) 실행기로 나누고,
+클라이언트별 동시 실행 수를 제한한다. 한 사람의 전체 설비 p99 스캔이 다른 사람의 단순 조회를
+막지 않도록 하는 것이 목적.
+
+    비용 = 스캔 예상 행 수 × 분석 유형 가중치
+    스캔 예상 행 수 = 전체 행 × (trace 필터 비율) × (step 필터 비율) × (기간 필터 비율)
+
+- 전체 행/trace 수/step 수는 DB 세대별로 한 번 읽어 둔다 (duckdb_tables 추정치 + step_segments)
+- 사전 계산 테이블을 읽는 분석(골든 편차, SPC, PCA, setpoint, 체류시간 등)은 원본을 스캔하지 않아 가중치가 작다.
+  단 플래그만 보지 않고 라우터(choose_analysis_sql / build_dwell_time_sql)가 실제로 고를 경로로 판단한다:
+  step_segments가 없는 DB의 체류시간, setpoint 짝이 없는 컬럼이나 setpoint_metrics가 없는 DB의
+  오버슈트는 원본 스캔 빌더로 폴백하므로 원본 스캔 가중치를 쓴다
+- heavy 판정은 테이블 크기 대비: 비용이 "전체 테이블 단순 집계"(= 전체 행 × 1.0)의
+  HEAVY_RELATIVE_COST배 이상이고 HEAVY_COST 이상이면 heavy. 전체 설비 평균/표준편차처럼
+  가중치가 낮은 집계는 테이블이 커도 cheap, 전체 분위수/이상치/안정구간은 heavy.
+  heavy 실행기는 작고 제한 시간이 길다
+- 클라이언트(X-Client-Id 헤더, 없으면 IP)별 동시 실행 상한을 넘으면 ClientLimitExceeded (→ 429)
+"""
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+import duckdb  # type: ignore
+
+from src.services.executor import QUERY_EXECUTOR, QueryExecutor
+from src.services.query_cache import db_generation
+
+HEAVY_COST = 1_000_000        # 이보다 싼 질의는 항상 cheap (작은 DB)
+HEAVY_RELATIVE_COST = 2.0     # 전체 테이블 단순 집계(가중치 1.0) 대비 배수
+DATE_FILTER_FRACTION = 0.5  # 기간 필터의 선택도를 모를 때 가정
+
+# 분석 유형 가중치 (단순 집계 = 1)
+COST_WEIGHTS = {
+    "simple": 1.0,
+    "std": 1.5,
+    "quantile": 4.0,        # p50/p95/p99/median (정렬/근사 분위)
+    "trace_compare": 2.0,
+    "overshoot": 3.0,
+    "stable_avg": 6.0,      # 구간별 윈도 + 정렬
+    "outlier": 8.0,         # trace별 통계 후 전체 분포 대비
+    "correlation": 5.0,     # 전체 수치형 컬럼 청크 누적
+    "dwell_time": 2.0,      # step_segments 없이 trace×step MIN/MAX 집계
+    "precomputed": 0.02,    # 사전 계산 테이블 조회
+}
+
+QUANTILE_AGGS = {"p50", "p95", "p99", "median"}
+
+# 항상 사전 계산 테이블을 읽는 플래그 (src/analysis/*)
+PRECOMPUTED_FLAGS = ("is_golden_deviation", "is_pca_anomaly", "is_spc")
+
+HEAVY_EXECUTOR = QueryExecutor(max_workers=2, max_queue=4, timeout_s=120.0)
+
+PER_CLIENT_LIMITS = {"cheap": 4, "heavy": 1}
+
+
+class ClientLimitExceeded(RuntimeError):
+    """클라이언트별 동시 실행 상한 초과"""
+
+    def __init__(self, lane: str, limit: int, retry_after: int = 1):
+        super().__init__(f"동시에 실행할 수 있는 {'무거운 ' if lane == 'heavy' else ''}질의는 {limit}개까지입니다")
+        self.lane = lane
+        self.retry_after = retry_after
+
+
+def _flag(p, name: str) -> Any:
+    flags = getattr(p, "flags", None) or {}
+    if name in flags:
+        return flags[name]
+    return getattr(p, name, None)
+
+
+def _trace_ids(p) -> list:
+    return getattr(p, "trace_ids", None) or ([p.trace_id] if getattr(p, "trace_id", None) else [])
+
+
+def is_precomputed_route(p, stats: Optional[Dict[str, int]] = None) -> bool:
+    """
+    라우터가 사전 계산 테이블을 읽는 경로를 고르는지 (choose_analysis_sql과 같은 순서)
+
+    stats에 테이블 존재 여부(has_step_segments / has_setpoint_metrics)가 없으면 없는 것으로 보고
+    원본 스캔 경로로 판단한다 (비용을 낮게 잡아 heavy 실행기를 우회하지 않도록).
+    """
+    stats = stats or {}
+    if any(_flag(p, f) for f in PRECOMPUTED_FLAGS):
+        return True
+    if _flag(p, "setpoint_metric"):
+        from src.analysis.setpoint import setpoint_pairs
+        if getattr(p, "column", None) in setpoint_pairs():
+            # 테이블이 없으면 오버슈트만 build_overshoot_sql로 폴백, 나머지 지표는 즉시 오류
+            return bool(stats.get("has_setpoint_metrics")) or _flag(p, "setpoint_metric") != "overshoot"
+    if _flag(p, "is_correlation"):
+        return False
+    trace_ids = _trace_ids(p)
+    if (_flag(p, "is_step_sequence") or _flag(p, "is_similar_trace")) and trace_ids:
+        return True
+    if _flag(p, "is_profile_compare") and len(trace_ids) >= 2:
+        return True
+    if _flag(p, "is_dwell_time") and stats.get("has_step_segments"):
+        return True
+    return False
+
+
+def analysis_weight(p, stats: Optional[Dict[str, int]] = None) -> Tuple[str, float]:
+    """Parsed → (비용 유형, 가중치). stats는 사전 계산 테이블 존재 여부 확인용"""
+    if is_precomputed_route(p, stats):
+        return "precomputed", COST_WEIGHTS["precomputed"]
+    if _flag(p, "is_correlation"):
+        return "correlation", COST_WEIGHTS["correlation"]
+    if _flag(p, "is_outlier"):
+        return "outlier", COST_WEIGHTS["outlier"]
+    if _flag(p, "is_stable_avg"):
+        return "stable_avg", COST_WEIGHTS["stable_avg"]
+    if _flag(p, "is_overshoot"):
+        return "overshoot", COST_WEIGHTS["overshoot"]
+    if _flag(p, "is_trace_compare"):
+        return "trace_compare", COST_WEIGHTS["trace_compare"]
+    if _flag(p, "is_dwell_time"):
+        return "dwell_time", COST_WEIGHTS["dwell_time"]
+    agg = getattr(p, "agg", None) or getattr(p, "metric", None)
+    if agg in QUANTILE_AGGS:
+        return "quantile", COST_WEIGHTS["quantile"]
+    if agg in ("std", "stddev"):
+        return "std", COST_WEIGHTS["std"]
+    return "simple", COST_WEIGHTS["simple"]
+
+
+def estimate_rows(p, stats: Dict[str, int]) -> float:
+    """필터를 반영한 스캔 예상 행 수"""
+    rows = float(stats.get("rows", 0))
+    n_traces = max(1, stats.get("traces", 1))
+    n_steps = max(1, stats.get("steps", 1))
+
+    trace_ids = _trace_ids(p)
+    if trace_ids:
+        rows *= min(1.0, len(trace_ids) / n_traces)
+    step_names = getattr(p, "step_names", None) or ([p.step_name] if getattr(p, "step_name", None) else [])
+    if step_names:
+        rows *= min(1.0, len(step_names) / n_steps)
+    if getattr(p, "date_start", None) or getattr(p, "date_end", None):
+        rows *= DATE_FILTER_FRACTION
+    return rows
+
+
+def estimate_cost(p, stats: Dict[str, int]) -> Tuple[float, str]:
+    """Returns: (비용, 비용 유형)"""
+    kind, weight = analysis_weight(p, stats)
+    return estimate_rows(p, stats) * weight, kind
+
+
+def read_table_stats(con) -> Dict[str, int]:
+    """
+    원본 행 수(추정) / trace 수 / step 수 / 사전 계산 테이블 존재 여부(0/1).
+    무거운 COUNT(DISTINCT) 없이 메타데이터·구간 테이블만 읽음
+    """
+    from src.analysis.setpoint import METRICS_TABLE
+    stats = {"rows": 0, "traces": 1, "steps": 1, "has_step_segments": 0, "has_setpoint_metrics": 0}
+    row = con.execute(
+        "SELECT SUM(estimated_size) FROM duckdb_tables() WHERE table_name = 'traces'"
+    ).fetchone()
+    stats["rows"] = int(row[0] or 0) if row else 0
+    tables = {
+        name for (name,) in con.execute(
+            "SELECT table_name FROM information_schema.tables WHERE table_name IN ('step_segments', ?)",
+            [METRICS_TABLE],
+        ).fetchall()
+    }
+    stats["has_step_segments"] = int("step_segments" in tables)
+    stats["has_setpoint_metrics"] = int(METRICS_TABLE in tables)
+    if stats["has_step_segments"]:
+        n_traces, n_steps = con.execute(
+            "SELECT COUNT(DISTINCT trace_id), COUNT(DISTINCT step_name) FROM step_segments"
+        ).fetchone()
+        stats["traces"] = max(1, int(n_traces or 1))
+        stats["steps"] = max(1, int(n_steps or 1))
+    return stats
+
+
+class AdmissionController:
+    """비용 추정 → cheap/heavy 실행기 선택 + 클라이언트별 동시 실행 제한"""
+
+    def __init__(
+        self,
+        cheap: QueryExecutor = QUERY_EXECUTOR,
+        heavy: QueryExecutor = HEAVY_EXECUTOR,
+        heavy_cost: float = HEAVY_COST,
+        per_client: Optional[Dict[str, int]] = None,
+        heavy_relative: float = HEAVY_RELATIVE_COST,
+    ):
+        self.lanes = {"cheap": cheap, "heavy": heavy}
+        self.heavy_cost = heavy_cost
+        self.heavy_relative = heavy_relative
+        self.per_client = dict(per_client or PER_CLIENT_LIMITS)
+        self._lock = threading.Lock()
+        self._active: Dict[Tuple[str, str], int] = {}
+        self._stats: Dict[str, Tuple[Tuple, Dict[str, int]]] = {}
+
+    async def table_stats(self, db_path: Union[str, Path]) -> Dict[str, int]:
+        """DB 세대별 통계 캐시 (갱신은 cheap 실행기에서)"""
+        gen = db_generation(db_path)
+        cached = self._stats.get(str(db_path))
+        if cached and cached[0] == gen:
+            return cached[1]
+        try:
+            stats = await self.lanes["cheap"].run(read_table_stats, db_path)
+        except duckdb.Error:
+            stats = {"rows": 0, "traces": 1, "steps": 1, "has_step_segments": 0, "has_setpoint_metrics": 0}
+        self._stats[str(db_path)] = (gen, stats)
+        return stats
+
+    def classify(self, cost: float, stats: Dict[str, int]) -> str:
+        """비용이 최소 비용 이상이고 전체 테이블 단순 집계의 heavy_relative배 이상이면 heavy"""
+        full_scan = float(stats.get("rows", 0)) * COST_WEIGHTS["simple"]
+        if cost >= self.heavy_cost and cost >= self.heavy_relative * full_scan:
+            return "heavy"
+        return "cheap"
+
+    def _enter(self, client: str, lane: str) -> None:
+        limit = self.per_client.get(lane)
+        with self._lock:
+            n = self._active.get((client, lane), 0)
+            if limit is not None and n >= limit:
+                raise ClientLimitExceeded(lane, limit, self.lanes[lane].retry_after())
+            self._active[(client, lane)] = n + 1
+
+    def _leave(self, client: str, lane: str) -> None:
+        with self._lock:
+            n = self._active.get((client, lane), 1) - 1
+            if n <= 0:
+                self._active.pop((client, lane), None)
+            else:
+                self._active[(client, lane)] = n
+
+    async def run(
+        self,
+        fn: Callable,
+        db_path: Union[str, Path],
+        p,
+        client: str = "anonymous",
+        request=None,
+    ) -> Any:
+        """
+        p의 비용으로 실행기를 골라 fn(con) 실행
+
+        Raises:
+            ClientLimitExceeded, QueueFull, QueryTimeout, QueryCancelled, fn이 던진 예외
+        """
+        if p is None:
+            lane = "cheap"
+        else:
+            stats = await self.table_stats(db_path)
+            cost, _ = estimate_cost(p, stats)
+            lane = self.classify(cost, stats)
+        self._enter(client, lane)
+        try:
+            return await self.lanes[lane].run(fn, db_path, request=request)
+        finally:
+            self._leave(client, lane)
+
+
+def client_id(request) -> str:
+    """X-Client-Id 헤더, 없으면 접속 IP"""
+    header = request.headers.get("x-client-id") if request is not None else None
+    if header:
+        return header
+    client = getattr(request, "client", None)
+    return client.host if client else "anonymous"
+
+
+# 프로세스 전역
+ADMISSION = AdmissionController()
@@ -0,0 +1,324 @@
+"""
+DuckDB 질의 실행기: 이벤트 루프 밖 제한된 스레드 풀 + 타임아웃/연결 끊김 시 취소
+
+async 엔드포인트는 DuckDB 작업을 여기로 보내고 결과를 기다린다.
+
+    body = await QUERY_EXECUTOR.run(lambda con: render(con), DB, request=request)
+
+- 동시 실행은 max_workers, 대기열은 max_queue까지. 가득 차면 즉시 QueueFull (→ 503 + Retry-After)
+- timeout_s가 지나거나 클라이언트 연결이 끊기면 해당 연결에 con.interrupt()를 보내 질의를 멈춤
+  (QueryTimeout / QueryCancelled)
+- 연결은 작업 스레드가 열고 닫는다. 아직 대기 중에 취소된 작업은 시작하지 않는다
+  (db_path=None이면 연결 없이 fn(None): 보관된 결과 페이지 직렬화 등)
+- 결과를 청크로 흘려보내는 작업(내보내기)은 StreamExecutor.open
+"""
+import asyncio
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Iterator, Optional, Union
+
+import duckdb  # type: ignore
+
+MAX_WORKERS = 4
+MAX_QUEUE = 16
+QUERY_TIMEOUT_S = 30.0
+POLL_S = 0.2   # 연결 끊김 확인 주기
+
+
+class QueueFull(RuntimeError):
+    """실행기 대기열이 가득 참"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"요청이 많아 잠시 후 다시 시도하세요 ({retry_after}초 후)")
+        self.retry_after = retry_after
+
+
+class QueryTimeout(TimeoutError):
+    """요청별 제한 시간 초과로 질의를 중단함"""
+
+
+class QueryCancelled(Exception):
+    """클라이언트 연결이 끊겨 질의를 중단함"""
+
+
+class _Job:
+    """작업 스레드의 DuckDB 연결 핸들 (취소 시 interrupt 대상)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.con = None
+        self.cancelled = False
+
+    def attach(self, con) -> bool:
+        with self._lock:
+            if self.cancelled:
+                return False
+            self.con = con
+            return True
+
+    def detach(self) -> None:
+        with self._lock:
+            self.con = None
+
+    def cancel(self) -> None:
+        with self._lock:
+            self.cancelled = True
+            if self.con is not None:
+                self.con.interrupt()
+
+
+# 작업 스레드별 현재 _Job (fetch_df의 single-flight 대기가 취소를 확인하는 용도)
+_local = threading.local()
+
+
+def current_job_cancelled() -> bool:
+    """현재 작업 스레드에서 실행 중인 작업이 취소되었는지 (실행기 밖이면 False)"""
+    job = getattr(_local, "job", None)
+    return job is not None and job.cancelled
+
+
+class QueryExecutor:
+    """제한된 스레드 풀에서 DuckDB 작업 실행"""
+
+    def __init__(self, max_workers: int = MAX_WORKERS, max_queue: int = MAX_QUEUE, timeout_s: float = QUERY_TIMEOUT_S):
+        self.max_workers = max_workers
+        self.timeout_s = timeout_s
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="duckdb")
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._capacity = max_workers + max_queue
+        self._in_flight = 0
+        self._count_lock = threading.Lock()
+        self._avg_s = 1.0  # 작업 소요 시간 EWMA (Retry-After 추정용)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def retry_after(self) -> int:
+        """대기열이 한 바퀴 빠지는 데 걸릴 시간 추정 (초)"""
+        return max(1, math.ceil(self._avg_s * self._in_flight / self.max_workers))
+
+    def _acquire(self) -> None:
+        if not self._slots.acquire(blocking=False):
+            raise QueueFull(self.retry_after())
+        with self._count_lock:
+            self._in_flight += 1
+
+    def _release(self, elapsed: Optional[float]) -> None:
+        with self._count_lock:
+            self._in_flight -= 1
+            if elapsed is not None:
+                self._avg_s = 0.8 * self._avg_s + 0.2 * elapsed
+        self._slots.release()
+
+    def _work(self, job: _Job, fn: Callable, db_path: Optional[Union[str, Path]], read_only: bool) -> Any:
+        if job.cancelled:
+            self._release(None)
+            raise QueryCancelled("시작 전에 취소됨")
+        started = time.monotonic()
+        try:
+            if db_path is None:
+                return fn(None)
+            con = duckdb.connect(str(db_path), read_only=read_only)
+            try:
+                if not job.attach(con):
+                    raise QueryCancelled("시작 전에 취소됨")
+                _local.job = job
+                try:
+                    return fn(con)
+                finally:
+                    _local.job = None
+                    job.detach()
+            finally:
+                con.close()
+        finally:
+            self._release(time.monotonic() - started)
+
+    async def run(
+        self,
+        fn: Callable,
+        db_path: Optional[Union[str, Path]],
+        request=None,
+        timeout_s: Optional[float] = None,
+        read_only: bool = False,
+    ) -> Any:
+        """
+        fn(con)을 작업 스레드에서 실행하고 결과 반환
+
+        Args:
+            fn: DuckDB 연결을 받아 결과를 돌려주는 함수 (직렬화까지 여기서 하면 루프가 한가함)
+            db_path: None이면 연결을 열지 않고 fn(None)
+            request: starlette Request (연결 끊김 감지용, 없으면 타임아웃만)
+            timeout_s: None이면 실행기 기본값
+
+        Raises:
+            QueueFull, QueryTimeout, QueryCancelled, fn이 던진 예외
+        """
+        self._acquire()
+        job = _Job()
+        loop = asyncio.get_running_loop()
+        try:
+            fut = loop.run_in_executor(self._pool, self._work, job, fn, db_path, read_only)
+        except BaseException:
+            self._release(None)
+            raise
+
+        deadline = loop.time() + (self.timeout_s if timeout_s is None else timeout_s)
+        try:
+            while True:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    raise QueryTimeout("질의 제한 시간을 초과했습니다")
+                done, _ = await asyncio.wait({fut}, timeout=min(POLL_S, remaining))
+                if done:
+                    return fut.result()
+                if request is not None and await request.is_disconnected():
+                    raise QueryCancelled("클라이언트 연결이 끊겼습니다")
+        except (QueryTimeout, QueryCancelled, asyncio.CancelledError):
+            job.cancel()
+            # 중단된 작업의 예외(InterruptException 등)는 여기서 소비
+            fut.add_done_callback(lambda f: f.cancelled() or f.exception())
+            raise
+
+
+class StreamExecutor(QueryExecutor):
+    """
+    결과를 청크로 흘려보내는 작업(내보내기)용 제한 실행기
+
+    스트림마다 작업 스레드 1개가 연결을 열고 gen_fn(con)이 만드는 바이트 청크를 작은 버퍼로 넘긴다.
+    응답은 async로 버퍼를 비우므로 느린 다운로드가 이벤트 루프나 질의 실행기를 막지 않는다.
+    - 동시 스트림 max_workers, 대기 max_queue까지 (가득 차면 QueueFull)
+    - 청크 하나를 timeout_s 안에 못 만들면 QueryTimeout (연결 interrupt)
+    - 소비를 멈추면(클라이언트 연결 끊김 → 응답 제너레이터 종료) 연결 interrupt 후 작업 종료,
+      응답이 timeout_s 동안 버퍼를 안 비워도 (멈춘 클라이언트) 작업 종료
+    """
+
+    def __init__(self, max_workers: int = 2, max_queue: int = 4, timeout_s: float = 120.0, buffer_chunks: int = 2):
+        super().__init__(max_workers=max_workers, max_queue=max_queue, timeout_s=timeout_s)
+        self.buffer_chunks = buffer_chunks
+
+    def _stream_work(
+        self,
+        job: _Job,
+        gen_fn: Callable[[Any], Iterator[bytes]],
+        db_path: Union[str, Path],
+        read_only: bool,
+        loop: asyncio.AbstractEventLoop,
+        buf: "asyncio.Queue",
+        credits: threading.Semaphore,
+    ) -> None:
+        def put(kind: str, item: Any) -> bool:
+            try:
+                loop.call_soon_threadsafe(buf.put_nowait, (kind, item))
+                return True
+            except RuntimeError:  # 이벤트 루프가 이미 닫힘
+                job.cancel()
+                return False
+
+        def put_chunk(chunk: bytes) -> bool:
+            # 버퍼(credits)가 차 있으면 기다리되, 소비자가 떠나거나(취소) timeout_s 동안 안 가져가면 포기
+            deadline = time.monotonic() + self.timeout_s
+            while not credits.acquire(timeout=POLL_S):
+                if job.cancelled or time.monotonic() > deadline:
+                    job.cancel()
+                    return False
+            return not job.cancelled and put("chunk", chunk)
+
+        started = time.monotonic()
+        outcome: Optional[tuple] = None
+        try:
+            if job.cancelled:
+                return
+            con = duckdb.connect(str(db_path), read_only=read_only)
+            try:
+                if not job.attach(con):
+                    return
+                try:
+                    chunks = gen_fn(con)
+                    try:
+                        for chunk in chunks:
+                            if not put_chunk(chunk):
+                                return
+                    finally:
+                        close = getattr(chunks, "close", None)
+                        if close is not None:
+                            close()
+                finally:
+                    job.detach()
+            finally:
+                con.close()
+            outcome = ("end", None)
+        except Exception as e:
+            outcome = ("error", e)
+        finally:
+            # 슬롯을 먼저 돌려주고 끝을 알림 (응답이 끝나면 바로 다음 내보내기 가능)
+            self._release(time.monotonic() - started)
+            if outcome is not None and not job.cancelled:
+                put(*outcome)
+
+    async def _drain(self, job: _Job, buf: "asyncio.Queue", credits: threading.Semaphore) -> AsyncIterator[bytes]:
+        try:
+            while True:
+                try:
+                    kind, item = await asyncio.wait_for(buf.get(), self.timeout_s)
+                except asyncio.TimeoutError:
+                    raise QueryTimeout("내보내기 청크 생성 시간을 초과했습니다")
+                if kind == "chunk":
+                    credits.release()
+                    yield item
+                elif kind == "error":
+                    raise item
+                else:
+                    return
+        finally:
+            job.cancel()  # 정상 종료면 이미 끝난 작업이라 영향 없음
+
+    async def open(
+        self,
+        gen_fn: Callable[[Any], Iterator[bytes]],
+        db_path: Union[str, Path],
+        read_only: bool = False,
+    ) -> AsyncIterator[bytes]:
+        """
+        gen_fn(con)을 작업 스레드에서 시작하고 첫 청크까지 기다린 뒤 전체 청크의 async 이터레이터 반환
+
+        SQL/형식 오류와 첫 청크의 시간 초과는 여기서 발생한다 (응답 헤더 전에 오류 응답 가능).
+
+        Raises:
+            QueueFull, QueryTimeout, gen_fn이 던진 예외
+        """
+        self._acquire()
+        job = _Job()
+        loop = asyncio.get_running_loop()
+        buf: asyncio.Queue = asyncio.Queue()
+        credits = threading.Semaphore(self.buffer_chunks)
+        try:
+            self._pool.submit(self._stream_work, job, gen_fn, db_path, read_only, loop, buf, credits)
+        except BaseException:
+            self._release(None)
+            raise
+
+        stream = self._drain(job, buf, credits)
+        try:
+            first = await stream.__anext__()
+        except StopAsyncIteration:
+            first = None
+
+        async def _chain() -> AsyncIterator[bytes]:
+            if first is None:
+                return
+            try:
+                yield first
+                async for chunk in stream:
+                    yield chunk
+            finally:
+                await stream.aclose()
+
+        return _chain()
+
+
+# 프로세스 전역 실행기
+QUERY_EXECUTOR = QueryExecutor()
@@ -0,0 +1,168 @@
+"""
+쿼리 결과 스트리밍 내보내기 (CSV / NDJSON / Arrow IPC)
+
+결과 전체를 DataFrame이나 문자열로 만들지 않고, DuckDB 결과를 청크 단위로 읽어
+바로 바이트로 흘려보낸다. 메모리 사용량은 결과 크기와 무관하게 청크 1개 분량.
+
+    body = stream_query(DB, sql, params, fmt="csv")
+    return StreamingResponse(body, media_type=EXPORT_FORMATS["csv"]["media_type"])
+
+Arrow IPC는 pyarrow가 필요하다 (없으면 ValueError).
+
+API(/api/csv)는 내보내기 전용 제한 실행기 EXPORT_EXECUTOR에서 연다 (동시 스트림·대기열 상한,
+청크 생성 시간 제한, 연결 끊김 시 interrupt). 질의 실행기와 풀이 달라 긴 다운로드가 질의를 막지 않는다.
+
+    body = await EXPORT_EXECUTOR.open(lambda con: export_chunks(con, sql, params, "csv"), DB)
+
+연결은 실행기(QueryExecutor)와 같은 모드(기본 read-write)로 연다. DuckDB는 같은 프로세스에서
+같은 DB 파일을 다른 설정(read_only)으로 다시 열면 거부하므로, 실행기 연결이 열려 있는 동안
+read_only=True로 열면 내보내기가 실패한다.
+"""
+from pathlib import Path
+from typing import Iterator, List, Union
+
+import duckdb  # type: ignore
+
+from src.services.executor import StreamExecutor
+
+# DuckDB vector(2048행) 단위 청크 크기 → 약 6만 행
+CHUNK_VECTORS = 32
+
+EXPORT_FORMATS = {
+    "csv": {"media_type": "text/csv; charset=utf-8", "ext": "csv"},
+    "ndjson": {"media_type": "application/x-ndjson", "ext": "ndjson"},
+    "arrow": {"media_type": "application/vnd.apache.arrow.stream", "ext": "arrow"},
+}
+
+CSV_BOM = "\ufeff".encode("utf-8")  # Excel 호환
+
+# 내보내기 전용 실행기 (스트림 하나가 작업 스레드 하나를 다운로드 끝까지 점유)
+EXPORT_EXECUTOR = StreamExecutor(max_workers=2, max_queue=4, timeout_s=120.0)
+
+
+def _csv_chunks(result, chunk_vectors: int) -> Iterator[bytes]:
+    yield CSV_BOM
+    header = True
+    while True:
+        df = result.fetch_df_chunk(chunk_vectors)
+        if df is None or df.empty:
+            if header:
+                # 빈 결과도 헤더는 내보냄
+                yield (",".join(d[0] for d in result.description) + "\n").encode("utf-8")
+            break
+        yield df.to_csv(index=False, header=header).encode("utf-8")
+        header = False
+
+
+def _ndjson_chunks(result, chunk_vectors: int) -> Iterator[bytes]:
+    while True:
+        df = result.fetch_df_chunk(chunk_vectors)
+        if df is None or df.empty:
+            break
+        text = df.to_json(orient="records", lines=True, force_ascii=False, date_format="iso")
+        yield text.encode("utf-8") if text.endswith("\n") else (text + "\n").encode("utf-8")
+
+
+class _ByteSink:
+    """pyarrow IPC writer가 쓰는 file-like 버퍼 (drain()으로 비움)"""
+
+    closed = False
+
+    def __init__(self):
+        self.buf = bytearray()
+
+    def write(self, data) -> int:
+        self.buf += data
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        out = bytes(self.buf)
+        self.buf.clear()
+        return out
+
+
+def _arrow_chunks(result, chunk_vectors: int) -> Iterator[bytes]:
+    try:
+        import pyarrow as pa  # type: ignore
+    except ImportError:
+        raise ValueError("Arrow 내보내기에는 pyarrow가 필요합니다 (pip install pyarrow)")
+
+    # DuckDB 1.4+는 to_arrow_reader, 이전 버전은 fetch_record_batch
+    to_reader = getattr(result, "to_arrow_reader", None) or result.fetch_record_batch
+    reader = to_reader(chunk_vectors * 2048)
+    sink = _ByteSink()
+    with pa.ipc.new_stream(sink, reader.schema) as writer:
+        for batch in reader:
+            writer.write_batch(batch)
+            yield sink.drain()
+    tail = sink.drain()
+    if tail:
+        yield tail
+
+
+def export_chunks(con, sql: str, params: List, fmt: str = "csv", chunk_vectors: int = CHUNK_VECTORS) -> Iterator[bytes]:
+    """주어진 연결에서 쿼리를 실행하고 결과를 fmt 형식의 바이트 청크로 내보내는 제너레이터 (연결은 호출자 소유)"""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"지원하지 않는 내보내기 형식: {fmt} (csv, ndjson, arrow)")
+
+    result = con.execute(sql, params)
+    if fmt == "csv":
+        yield from _csv_chunks(result, chunk_vectors)
+    elif fmt == "ndjson":
+        yield from _ndjson_chunks(result, chunk_vectors)
+    else:
+        yield from _arrow_chunks(result, chunk_vectors)
+
+
+def stream_query(
+    db_path: Union[str, Path],
+    sql: str,
+    params: List,
+    fmt: str = "csv",
+    chunk_vectors: int = CHUNK_VECTORS,
+    read_only: bool = False,
+) -> Iterator[bytes]:
+    """
+    쿼리를 실행하고 결과를 fmt 형식의 바이트 청크로 내보내는 제너레이터
+
+    연결은 제너레이터가 소유하며 소비가 끝나거나 중단되면 닫힌다.
+    SQL 오류는 첫 청크를 만들기 전에 발생하도록 쿼리를 먼저 실행한다 (open_export 참고).
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"지원하지 않는 내보내기 형식: {fmt} (csv, ndjson, arrow)")
+
+    con = duckdb.connect(str(db_path), read_only=read_only)
+    try:
+        yield from export_chunks(con, sql, params, fmt, chunk_vectors)
+    finally:
+        con.close()
+
+
+def open_export(
+    db_path: Union[str, Path],
+    sql: str,
+    params: List,
+    fmt: str = "csv",
+    chunk_vectors: int = CHUNK_VECTORS,
+    read_only: bool = False,
+) -> Iterator[bytes]:
+    """
+    stream_query를 시작해 첫 청크까지 만든 뒤 돌려줌
+
+    StreamingResponse는 응답 헤더를 보낸 뒤에 본문을 만들기 때문에,
+    SQL 오류/형식 오류를 일반 오류 응답으로 돌려주려면 첫 청크를 미리 당겨야 한다.
+    """
+    body = stream_query(db_path, sql, params, fmt, chunk_vectors, read_only)
+    try:
+        first = next(body)
+    except StopIteration:
+        return iter(())
+
+    def _chain() -> Iterator[bytes]:
+        yield first
+        yield from body
+
+    return _chain()
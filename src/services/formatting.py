@@ -0,0 +1,130 @@
+"""
+결과 표시용 포맷팅 (컬럼 단위)
+
+행마다 format_value를 부르면 셀 수만큼 포맷 스펙 조회 + 분기 + 행 딕셔너리 변환이 돌아
+trace 단위 결과(수천 그룹)에서 눈에 띄게 느려진다. 여기서는
+- 컬럼별 (decimals, unit_label)로 포맷 문자열을 한 번만 만들고
+- 컬럼 전체를 float 배열로 바꿔 한 번에 문자열화한 뒤
+- 표시용 컬럼들을 묶어 행 딕셔너리를 만든다 (DataFrame.to_dict 행 변환 없음)
+규칙은 기존 format_value/format_row와 같다.
+
+참고: np.char.mod/np.strings.mod는 원소마다 파이썬 % 연산을 부르는 구조라
+float 리스트에 미리 만든 포맷 문자열을 적용하는 것보다 2~3배 느리다 (NumPy 2.x 기준).
+"""
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+
+from domain.bundle import get_bundle
+
+DEFAULT_SPEC: Tuple[int, str] = (2, "")
+
+# 원본 컬럼(parsed col) 기준으로 포맷팅하는 결과 키 (value는 parsed agg, 나머지는 avg 규칙)
+COL_FORMAT_KEYS = (
+    "std", "min_val", "max_val", "avg_diff", "min_diff", "max_diff",
+    "diff", "diff_signed", "trace1_avg", "trace2_avg",
+)
+# 정수 개수 컬럼 (결측은 0)
+COUNT_KEYS = ("n", "outlier_count")
+
+NA_TEXT = "N/A"
+
+
+def get_format_spec(col_key: Optional[str]) -> Tuple[int, str]:
+    """
+    col_key(canonical key: pressact, mfcmon_n2_1 등) -> (decimals, unit_label) 반환
+    규칙 (도메인 번들 컴파일 시 columns.yaml로 미리 계산):
+      1) physical_type별 defaults.decimals_by_type 적용
+      2) 컬럼에 decimals가 있으면 override
+      3) unit은 defaults.unit_label로 화면 라벨 변환
+    """
+    if not col_key:
+        return DEFAULT_SPEC
+    return get_bundle().format_specs.get(col_key, DEFAULT_SPEC)
+
+
+def format_value(value: float, col: Optional[str] = None, agg: str = "avg") -> str:
+    """값 하나 포맷팅 (반올림 + 단위)"""
+    if value is None or (isinstance(value, float) and (value != value)):  # NaN 체크
+        return NA_TEXT
+
+    # null_ratio는 퍼센트
+    if agg == "null_ratio":
+        return f"{value:.2f}%"
+
+    decimals, unit_label = get_format_spec(col)
+    formatted = f"{value:.{decimals}f}"
+    return f"{formatted}{' ' + unit_label if unit_label else ''}"
+
+
+def _as_float(values) -> np.ndarray:
+    """Series/배열 → float64 ndarray (None/pd.NA/Decimal 포함)"""
+    if isinstance(values, pd.Series):
+        return pd.to_numeric(values).to_numpy(dtype=float, na_value=np.nan)
+    return np.asarray(values, dtype=float)
+
+
+def format_numbers(values, decimals: int, suffix: str = "") -> List[str]:
+    """숫자 컬럼 전체를 '%.{decimals}f' + suffix 문자열 리스트로 (결측은 N/A)"""
+    fmt = f"%.{int(decimals)}f" + suffix.replace("%", "%%")
+    return [NA_TEXT if v != v else fmt % v for v in _as_float(values).tolist()]
+
+
+def format_column(values, col: Optional[str] = None, agg: str = "avg") -> List[str]:
+    """format_value의 컬럼 버전 (스펙은 컬럼당 1회 조회)"""
+    if agg == "null_ratio":
+        return format_numbers(values, 2, "%")
+    decimals, unit_label = get_format_spec(col)
+    return format_numbers(values, decimals, f" {unit_label}" if unit_label else "")
+
+
+def format_counts(values) -> List[int]:
+    """개수 컬럼 → int 리스트 (결측은 0)"""
+    arr = _as_float(values)
+    return np.where(np.isnan(arr), 0, arr).astype(np.int64).tolist()
+
+
+def format_magnitude(values) -> List[str]:
+    """
+    크기에 따라 자릿수를 달리한 해석 문장용 문자열
+    |v| ≥ 1000 → .1f, ≥ 1 → .3f, 그 외 .6f (끝의 0과 소수점 제거)
+    """
+    out = []
+    for v in _as_float(values).tolist():
+        if abs(v) >= 1000:
+            out.append(f"{v:.1f}")
+        elif abs(v) >= 1:
+            out.append(f"{v:.3f}")
+        else:
+            out.append(f"{v:.6f}".rstrip("0").rstrip("."))
+    return out
+
+
+def format_columns(df: pd.DataFrame, parsed: dict) -> Dict[str, list]:
+    """
+    결과 DataFrame → {컬럼: 표시용 값 리스트}
+
+    value는 parsed의 agg 규칙, COL_FORMAT_KEYS는 avg 규칙으로 원본 컬럼(parsed col) 단위를 붙이고,
+    COUNT_KEYS는 정수로, 나머지 컬럼은 값 그대로 둔다.
+    """
+    col = parsed.get("col") or "pressact"  # 기본값
+    agg = parsed.get("agg", "avg")
+    out: Dict[str, list] = {}
+    for key in df.columns:
+        if key == "value":
+            out[key] = format_column(df[key], col, agg)
+        elif key in COL_FORMAT_KEYS:
+            out[key] = format_column(df[key], col, "avg")
+        elif key in COUNT_KEYS:
+            out[key] = format_counts(df[key])
+        else:
+            out[key] = df[key].tolist()
+    return out
+
+
+def format_records(df: pd.DataFrame, parsed: dict) -> List[Dict]:
+    """템플릿용 행 딕셔너리 리스트 (format_row를 모든 행에 적용한 것과 같음)"""
+    columns = format_columns(df, parsed)
+    keys = list(columns)
+    return [dict(zip(keys, values)) for values in zip(*columns.values())]
@@ -0,0 +1,260 @@
+"""
+질문 이력/즐겨찾기 저장소 (SQLite, 추가 전용 이력)
+
+기존 data/history.json·favorites.json은 요청마다 파일 전체를 읽고 리스트를 고쳐 다시 썼다
+(동시 요청 시 쓰기 유실, 파일이 커질수록 느려짐). 여기서는
+- 이력은 행 추가(INSERT)만 하고, 중복 제거는 읽을 때 한다 (같은 질문도 사용 횟수로 남음)
+- (user_id, id) 인덱스로 "최근 N개"는 최신 행부터 필요한 만큼만 읽는다
+- 사용자별 보관 상한(HISTORY_KEEP)을 넘는 오래된 행은 COMPACT_EVERY회 추가마다 정리
+- WAL + busy_timeout이라 여러 스레드/프로세스(uvicorn worker)가 동시에 써도 유실 없음
+
+사용자 구분은 X-Client-Id 헤더 (없으면 DEFAULT_USER, 기존처럼 하나의 공용 이력).
+처음 열 때 기존 JSON 파일이 있으면 DEFAULT_USER로 한 번 가져온다.
+
+    HISTORY.append("pressact 평균", user_id="alice")
+    HISTORY.recent("alice", limit=20)   # [{"question", "timestamp"}, ...] 최신순, 질문 중복 없음
+"""
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+STORE_FILE = PROJECT_ROOT / "data" / "history.sqlite3"
+LEGACY_HISTORY_FILE = PROJECT_ROOT / "data" / "history.json"
+LEGACY_FAVORITES_FILE = PROJECT_ROOT / "data" / "favorites.json"
+
+DEFAULT_USER = "default"
+RECENT_LIMIT = 20
+HISTORY_KEEP = 5000  # 사용자별 보관 이력 행 수 (추천 빈도 집계에도 쓰므로 넉넉히)
+COMPACT_EVERY = 500  # 이 횟수만큼 추가할 때마다 정리
+BUSY_TIMEOUT_MS = 5000
+_FETCH_BATCH = 64
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    question TEXT NOT NULL,
+    timestamp TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS history_user ON history (user_id, id);
+CREATE TABLE IF NOT EXISTS favorites (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    question TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    UNIQUE (user_id, question)
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def user_id(request) -> str:
+    """이력 구분용 사용자: X-Client-Id 헤더, 없으면 DEFAULT_USER"""
+    header = request.headers.get("x-client-id") if request is not None else None
+    return header or DEFAULT_USER
+
+
+def _now() -> str:
+    return datetime.now().isoformat()
+
+
+class HistoryStore:
+    """SQLite 기반 이력/즐겨찾기 (스레드별 연결, 스레드·프로세스 안전)"""
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        legacy_history: Optional[Path] = None,
+        legacy_favorites: Optional[Path] = None,
+        keep: int = HISTORY_KEEP,
+        compact_every: int = COMPACT_EVERY,
+    ):
+        self.path = Path(path) if path is not None else STORE_FILE
+        self.legacy_history = legacy_history if legacy_history is not None else LEGACY_HISTORY_FILE
+        self.legacy_favorites = legacy_favorites if legacy_favorites is not None else LEGACY_FAVORITES_FILE
+        self.keep = keep
+        self.compact_every = compact_every
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+        self._count_lock = threading.Lock()
+        self._appends = 0
+
+    # ── 연결 ────────────────────────────────────────────────
+
+    def _connect(self) -> sqlite3.Connection:
+        con = getattr(self._local, "con", None)
+        if con is not None:
+            return con
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # isolation_level=None: 자동 커밋, 쓰기 묶음은 BEGIN IMMEDIATE로 명시
+        con = sqlite3.connect(str(self.path), timeout=BUSY_TIMEOUT_MS / 1000, isolation_level=None, check_same_thread=False)
+        con.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+        con.execute("PRAGMA journal_mode = WAL")
+        con.execute("PRAGMA synchronous = NORMAL")
+        self._local.con = con
+        if not self._initialized:
+            with self._init_lock:
+                if not self._initialized:
+                    con.executescript(_SCHEMA)
+                    self._import_legacy(con)
+                    self._initialized = True
+        return con
+
+    def close(self) -> None:
+        """현재 스레드의 연결 닫기"""
+        con = getattr(self._local, "con", None)
+        if con is not None:
+            con.close()
+            self._local.con = None
+
+    def _import_legacy(self, con: sqlite3.Connection) -> None:
+        """기존 JSON 이력/즐겨찾기를 DEFAULT_USER로 한 번만 가져오기"""
+        if con.execute("SELECT 1 FROM meta WHERE key = 'legacy_imported'").fetchone():
+            return
+        history, favorites = [], []
+        try:
+            if self.legacy_history.exists():
+                with open(self.legacy_history, "r", encoding="utf-8") as f:
+                    history = json.load(f)
+            if self.legacy_favorites.exists():
+                with open(self.legacy_favorites, "r", encoding="utf-8") as f:
+                    favorites = json.load(f)
+        except (OSError, ValueError):
+            history, favorites = [], []
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            # 다른 프로세스가 먼저 가져갔으면 건너뜀
+            if not con.execute("SELECT 1 FROM meta WHERE key = 'legacy_imported'").fetchone():
+                # JSON 이력은 최신순 → 오래된 것부터 넣어야 id 순서가 시간 순서
+                con.executemany(
+                    "INSERT INTO history (user_id, question, timestamp) VALUES (?, ?, ?)",
+                    [
+                        (DEFAULT_USER, h["question"], h.get("timestamp") or _now())
+                        for h in reversed(history) if isinstance(h, dict) and h.get("question")
+                    ],
+                )
+                con.executemany(
+                    "INSERT OR IGNORE INTO favorites (user_id, question, created_at) VALUES (?, ?, ?)",
+                    [(DEFAULT_USER, q, _now()) for q in favorites if isinstance(q, str)],
+                )
+                con.execute("INSERT INTO meta (key, value) VALUES ('legacy_imported', ?)", (_now(),))
+            con.execute("COMMIT")
+        except Exception:
+            con.execute("ROLLBACK")
+            raise
+
+    # ── 이력 ────────────────────────────────────────────────
+
+    def append(self, question: str, user_id: str = DEFAULT_USER, timestamp: Optional[str] = None) -> None:
+        """이력 한 건 추가 (INSERT 1회, 기존 행은 건드리지 않음)"""
+        con = self._connect()
+        con.execute(
+            "INSERT INTO history (user_id, question, timestamp) VALUES (?, ?, ?)",
+            (user_id, question, timestamp or _now()),
+        )
+        with self._count_lock:
+            self._appends += 1
+            due = self.compact_every > 0 and self._appends % self.compact_every == 0
+        if due:
+            self.compact()
+
+    def recent(self, user_id: str = DEFAULT_USER, limit: int = RECENT_LIMIT) -> List[Dict[str, str]]:
+        """
+        최근 질문 limit개 (최신순, 같은 질문은 가장 최근 것 하나)
+
+        (user_id, id) 인덱스를 역순으로 훑다가 서로 다른 질문 limit개를 모으면 멈춤.
+        """
+        cur = self._connect().execute(
+            "SELECT question, timestamp FROM history WHERE user_id = ? ORDER BY id DESC",
+            (user_id,),
+        )
+        seen = set()
+        out = []
+        try:
+            while len(out) < limit:
+                batch = cur.fetchmany(_FETCH_BATCH)
+                if not batch:
+                    break
+                for question, timestamp in batch:
+                    if question in seen:
+                        continue
+                    seen.add(question)
+                    out.append({"question": question, "timestamp": timestamp})
+                    if len(out) >= limit:
+                        break
+        finally:
+            cur.close()
+        return out
+
+    def events(self, user_id: Optional[str] = None, limit: Optional[int] = None) -> Iterator[Tuple[str, str]]:
+        """이력 원본 (question, timestamp) 최신순 (user_id=None이면 전체 사용자)"""
+        sql = "SELECT question, timestamp FROM history"
+        params: list = []
+        if user_id is not None:
+            sql += " WHERE user_id = ?"
+            params.append(user_id)
+        sql += " ORDER BY id DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        cur = self._connect().execute(sql, params)
+        try:
+            while True:
+                batch = cur.fetchmany(_FETCH_BATCH * 16)
+                if not batch:
+                    break
+                yield from batch
+        finally:
+            cur.close()
+
+    def compact(self) -> int:
+        """사용자별로 최신 keep행만 남기고 삭제, 삭제한 행 수 반환"""
+        con = self._connect()
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            cur = con.execute(
+                """
+                DELETE FROM history WHERE id IN (
+                    SELECT id FROM (
+                        SELECT id, ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY id DESC) AS rn
+                        FROM history
+                    ) WHERE rn > ?
+                )
+                """,
+                (self.keep,),
+            )
+            con.execute("COMMIT")
+        except Exception:
+            con.execute("ROLLBACK")
+            raise
+        return cur.rowcount
+
+    # ── 즐겨찾기 ────────────────────────────────────────────
+
+    def add_favorite(self, question: str, user_id: str = DEFAULT_USER) -> None:
+        self._connect().execute(
+            "INSERT OR IGNORE INTO favorites (user_id, question, created_at) VALUES (?, ?, ?)",
+            (user_id, question, _now()),
+        )
+
+    def remove_favorite(self, question: str, user_id: str = DEFAULT_USER) -> None:
+        self._connect().execute("DELETE FROM favorites WHERE user_id = ? AND question = ?", (user_id, question))
+
+    def favorites(self, user_id: str = DEFAULT_USER) -> List[str]:
+        """즐겨찾기 질문 (추가한 순서)"""
+        rows = self._connect().execute(
+            "SELECT question FROM favorites WHERE user_id = ? ORDER BY id", (user_id,)
+        ).fetchall()
+        return [q for (q,) in rows]
+
+
+# 프로세스 전역 (처음 쓸 때 연결)
+HISTORY = HistoryStore()
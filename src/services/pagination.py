@@ -0,0 +1,135 @@
+"""
+큰 결과의 서버측 결과 집합(result set) + 커서 페이지네이션
+
+첫 요청에서 집계/원본 조회 결과 전체를 한 번 보관하고, 클라이언트는 불투명(opaque) 커서로
+다음 페이지를 가져간다. 페이지 요청은 쿼리를 다시 실행하지 않고 보관된 결과를 잘라서 돌려준다.
+
+    rs_id = RESULT_SETS.put(df)
+    cursor = encode_cursor(rs_id, 200)
+    page, next_cursor, total = RESULT_SETS.page(cursor, 200)
+
+보관 정책:
+- TTL(기본 10분) 지나면 만료, 만료된 커서는 CursorExpired
+- 전체 메모리 예산(기본 512MB)을 넘으면 가장 오래 안 쓴 결과부터 제거 (LRU)
+  크기는 memory_usage(deep=True) 기준 (문자열 컬럼 포함, query_cache와 동일)
+
+주의: 결과 집합은 프로세스 메모리에만 있으므로 커서는 발급한 프로세스에서만 유효하다.
+uvicorn --workers N(N>1)처럼 여러 프로세스로 띄우면 다음 페이지 요청이 다른 워커로 가서
+CursorExpired(410)가 난다. 페이지네이션을 쓰려면 워커 1개로 띄우거나 sticky 라우팅이 필요하다.
+"""
+import base64
+import json
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+import pandas as pd  # type: ignore
+
+DEFAULT_PAGE_SIZE = 200
+MAX_PAGE_SIZE = 5000
+RESULT_TTL_S = 600
+MAX_TOTAL_BYTES = 512 * 1024 * 1024
+
+
+class CursorExpired(LookupError):
+    """커서가 가리키는 결과 집합이 만료/제거됨 (질의를 다시 실행해야 함)"""
+
+
+def encode_cursor(rs_id: str, offset: int) -> str:
+    raw = json.dumps({"rs": rs_id, "o": int(offset)}, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        obj = json.loads(raw)
+        rs_id, offset = str(obj["rs"]), int(obj["o"])
+    except Exception:
+        raise ValueError("잘못된 커서입니다")
+    if offset < 0:
+        raise ValueError("잘못된 커서입니다")
+    return rs_id, offset
+
+
+class ResultSetStore:
+    """TTL + 메모리 예산(LRU)을 가진 결과 집합 보관소 (스레드 안전)"""
+
+    def __init__(self, ttl_s: float = RESULT_TTL_S, max_bytes: int = MAX_TOTAL_BYTES, clock=time.monotonic):
+        self.ttl_s = ttl_s
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._lock = threading.Lock()
+        # rs_id → (df, nbytes, expires_at)
+        self._items: "OrderedDict[str, Tuple[pd.DataFrame, int, float]]" = OrderedDict()
+        self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def _drop(self, rs_id: str) -> None:
+        _, nbytes, _ = self._items.pop(rs_id)
+        self._bytes -= nbytes
+
+    def _evict(self, now: float) -> None:
+        for rs_id in [k for k, (_, _, exp) in self._items.items() if exp <= now]:
+            self._drop(rs_id)
+        while self._bytes > self.max_bytes and self._items:
+            self._drop(next(iter(self._items)))
+
+    def put(self, df: pd.DataFrame) -> str:
+        """결과 전체를 보관하고 결과 집합 id 반환"""
+        nbytes = int(df.memory_usage(index=True, deep=True).sum())
+        rs_id = secrets.token_urlsafe(12)
+        with self._lock:
+            now = self._clock()
+            self._items[rs_id] = (df.reset_index(drop=True), nbytes, now + self.ttl_s)
+            self._bytes += nbytes
+            self._evict(now)
+        return rs_id
+
+    def get(self, rs_id: str) -> pd.DataFrame:
+        """결과 집합 조회 (조회 시 TTL 연장, LRU 갱신)"""
+        with self._lock:
+            now = self._clock()
+            self._evict(now)
+            if rs_id not in self._items:
+                raise CursorExpired("결과가 만료되었습니다. 질의를 다시 실행하세요")
+            df, nbytes, _ = self._items[rs_id]
+            self._items[rs_id] = (df, nbytes, now + self.ttl_s)
+            self._items.move_to_end(rs_id)
+            return df
+
+    def page(self, cursor: str, limit: int = DEFAULT_PAGE_SIZE) -> Tuple[pd.DataFrame, Optional[str], int]:
+        """
+        커서 위치부터 limit행
+
+        Returns:
+            (page_df, next_cursor, total_rows). 마지막 페이지면 next_cursor=None
+        """
+        rs_id, offset = decode_cursor(cursor)
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        df = self.get(rs_id)
+        end = offset + limit
+        next_cursor = encode_cursor(rs_id, end) if end < len(df) else None
+        return df.iloc[offset:end], next_cursor, len(df)
+
+
+def paginate(df: pd.DataFrame, page_size: int = DEFAULT_PAGE_SIZE, store: Optional[ResultSetStore] = None) -> Tuple[pd.DataFrame, Optional[str]]:
+    """
+    첫 페이지와 다음 커서
+
+    결과가 한 페이지에 들어가면 보관하지 않고 next_cursor=None.
+    """
+    if len(df) <= page_size:
+        return df, None
+    if store is None:
+        store = RESULT_SETS
+    rs_id = store.put(df)
+    return df.head(page_size), encode_cursor(rs_id, page_size)
+
+
+# 프로세스 전역 보관소
+RESULT_SETS = ResultSetStore()
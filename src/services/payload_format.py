@@ -0,0 +1,137 @@
+"""
+/api/query payload 직렬화 (records / columnar JSON / Arrow IPC)
+
+- records: 기존 형식. 행마다 {컬럼: 값} dict (키 이름이 행마다 반복됨)
+- columnar: {"컬럼": [값, ...]} 컬럼별 배열. 결과는 DuckDB → DataFrame → NumPy를 거치며,
+  수치/시간 컬럼은 DataFrame에서 꺼낸 numpy 배열을 orjson이 행별 Python 객체 없이 직렬화한다
+- arrow: 결과 표는 Arrow IPC stream, 나머지(question/summary/sql/meta)는 스키마 메타데이터
+  b"payload"에 JSON으로 저장
+
+모든 형식이 DuckDB 결과를 .arrow()/fetchnumpy()로 바로 받지 않고 DataFrame 한 벌에서 만든다.
+그 DataFrame은 요약(interpret), 결과 캐시(query_cache), 다음 페이지 보관(pagination)이 함께 쓰므로
+어차피 만들어지고, 형식별로 결과를 따로 받으면 같은 결과를 두 번 메모리에 올리게 된다.
+수치 컬럼은 DataFrame → numpy/Arrow 변환이 복사 없이 끝나서 추가 비용은 문자열 컬럼 정도다.
+
+선택 의존성 (requirements.txt에 주석으로 표기, 기본 설치에 없음):
+- orjson: 있으면 JSON 계열을 orjson으로, 없으면 표준 json으로 직렬화 (출력 동일, 느림)
+- pyarrow: arrow 형식에만 필요 (없으면 ValueError, records/columnar는 영향 없음)
+"""
+import json
+from datetime import date, datetime
+from typing import Any, Dict, Tuple
+
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+
+try:
+    import orjson  # type: ignore
+except ImportError:  # pragma: no cover - 선택 의존성
+    orjson = None
+
+PAYLOAD_FORMATS = {
+    "records": "application/json",
+    "columnar": "application/json",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+ARROW_PAYLOAD_KEY = b"payload"
+
+
+def _default(obj: Any) -> Any:
+    """orjson/json이 모르는 타입 변환 (pandas Timestamp, numpy 스칼라/배열, Decimal 등)"""
+    if obj is pd.NaT or obj is pd.NA:
+        return None
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    return str(obj)
+
+
+def _json_safe_float(obj: Any) -> Any:
+    """표준 json 경로용: NaN/inf → None (orjson과 같은 출력)"""
+    if isinstance(obj, float) and not np.isfinite(obj):
+        return None
+    if isinstance(obj, dict):
+        return {k: _json_safe_float(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_json_safe_float(v) for v in obj]
+    return obj
+
+
+def dumps(obj: Any) -> bytes:
+    """payload → JSON 바이트 (numpy 배열 직접 직렬화, NaN은 null)"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    text = json.dumps(
+        _json_safe_float(obj),
+        default=lambda o: _json_safe_float(_default(o)),
+        ensure_ascii=False,
+    )
+    return text.encode("utf-8")
+
+
+def columnar_data(df: pd.DataFrame) -> Dict[str, Any]:
+    """
+    DataFrame → {컬럼: 배열}
+
+    결측 없는 bool/int/float, datetime64 컬럼은 DataFrame의 numpy 배열 그대로 (orjson 직렬화),
+    float NaN은 orjson이 null로 쓴다. 문자열/nullable/결측 있는 시간 컬럼만 리스트로 변환.
+    """
+    data: Dict[str, Any] = {}
+    for col in df.columns:
+        s = df[col]
+        kind = s.dtype.kind if isinstance(s.dtype, np.dtype) else None
+        if kind in ("b", "i", "u", "f"):
+            data[str(col)] = s.to_numpy()
+        elif kind == "M" and not s.isna().any():
+            data[str(col)] = s.to_numpy()
+        else:
+            data[str(col)] = s.astype(object).where(s.notna(), None).tolist()
+    return data
+
+
+def records_data(df: pd.DataFrame) -> list:
+    """DataFrame → [{컬럼: 값}, ...] (기존 형식)"""
+    return df.to_dict(orient="records")
+
+
+def arrow_bytes(df: pd.DataFrame, payload: Dict[str, Any]) -> bytes:
+    """결과 표를 Arrow IPC stream 바이트로. data 외 payload 필드는 스키마 메타데이터에 저장"""
+    try:
+        import pyarrow as pa  # type: ignore
+    except ImportError:
+        raise ValueError("Arrow 형식에는 pyarrow가 필요합니다 (pip install pyarrow)")
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    extra = {k: v for k, v in payload.items() if k != "data"}
+    metadata = dict(table.schema.metadata or {})
+    metadata[ARROW_PAYLOAD_KEY] = dumps(extra)
+    table = table.replace_schema_metadata(metadata)
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def encode_payload(payload: Dict[str, Any], df: pd.DataFrame, fmt: str = "records") -> Tuple[bytes, str]:
+    """
+    payload + 결과 DataFrame → (응답 바이트, media_type)
+
+    payload["data"]는 무시하고 df에서 fmt에 맞게 다시 만든다.
+    """
+    if fmt not in PAYLOAD_FORMATS:
+        raise ValueError(f"지원하지 않는 payload 형식: {fmt} (records, columnar, arrow)")
+    if fmt == "arrow":
+        return arrow_bytes(df, payload), PAYLOAD_FORMATS[fmt]
+
+    body = dict(payload)
+    if fmt == "columnar":
+        body["format"] = "columnar"
+        body["data"] = columnar_data(df)
+    else:
+        body["data"] = records_data(df)
+    return dumps(body), PAYLOAD_FORMATS[fmt]
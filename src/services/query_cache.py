@@ -0,0 +1,207 @@
+"""
+질의 결과 캐시 + 동시 동일 질의 합치기(single-flight)
+
+대시보드 로드 시 /view, /plot, /api/plot이 같은 질문으로 동시에 들어오고, 같은 교대조 질문도
+여러 사용자가 동시에 던진다. 같은 (sql, params, DB 세대) 질의는
+
+- 이미 결과가 캐시에 있으면 캐시에서 반환
+- 같은 질의가 실행 중이면 그 실행을 기다려 결과를 공유 (DuckDB 실행 1회)
+- 처음이면 실행 후 캐시에 저장
+
+DB 세대(generation)는 DB 파일과 WAL의 (mtime_ns, size). ingest로 파일이 바뀌면 키가 달라져
+이전 결과는 자연히 쓰이지 않고 LRU로 밀려난다.
+
+    df = fetch_df(con, sql, params)
+"""
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple, Union
+
+import pandas as pd  # type: ignore
+
+from src.services.executor import QueryCancelled, current_job_cancelled
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+DB = PROJECT_ROOT / "data_out" / "ald.duckdb"
+
+MAX_ENTRIES = 256
+MAX_TOTAL_BYTES = 256 * 1024 * 1024
+MAX_ENTRY_BYTES = 32 * 1024 * 1024  # 이보다 큰 결과는 캐시하지 않음 (공유만)
+WAIT_POLL_S = 0.1  # 기다리는 호출이 자기 취소 여부를 확인하는 주기
+
+
+def db_generation(db_path: Union[str, Path] = DB) -> Tuple:
+    """DB 파일 + WAL의 (mtime_ns, size). 파일이 없으면 0"""
+    gen = []
+    for path in (str(db_path), f"{db_path}.wal"):
+        try:
+            st = os.stat(path)
+            gen.append((st.st_mtime_ns, st.st_size))
+        except OSError:
+            gen.append(0)
+    return tuple(gen)
+
+
+def _freeze(value: Any) -> Hashable:
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    return value
+
+
+def query_key(sql: str, params: Sequence, generation: Tuple) -> Tuple:
+    return (" ".join(sql.split()), _freeze(list(params or [])), generation)
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Optional[pd.DataFrame] = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """같은 키의 동시 호출을 1회 실행으로 합침 (스레드용)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights: Dict[Hashable, _Flight] = {}
+        self.shared = 0  # 합쳐진(기다려서 결과를 받은) 호출 수
+
+    def do(
+        self,
+        key: Hashable,
+        fn: Callable[[], Any],
+        retry_on: Optional[Callable[[BaseException], bool]] = None,
+        cancelled: Optional[Callable[[], bool]] = None,
+    ) -> Tuple[Any, bool]:
+        """
+        Args:
+            retry_on: 기다리던 실행이 이 조건의 예외로 끝나면 공유하지 않고 다시 시도
+                      (예: 실행을 맡은 요청이 취소되어 interrupt된 경우)
+            cancelled: 기다리는 호출 자신이 취소되었는지. True가 되면 기다림/재시도를 멈추고
+                       QueryCancelled (연결이 끊긴 요청이 대신 재실행하지 않도록)
+
+        Returns:
+            (결과, shared): shared=True면 다른 호출의 실행 결과를 받음
+        """
+        while True:
+            with self._lock:
+                flight = self._flights.get(key)
+                leader = flight is None
+                if leader:
+                    flight = self._flights[key] = _Flight()
+
+            if leader:
+                break
+            while not flight.done.wait(WAIT_POLL_S if cancelled is not None else None):
+                if cancelled():
+                    raise QueryCancelled("기다리던 요청이 취소되었습니다")
+            if flight.error is None:
+                with self._lock:
+                    self.shared += 1
+                return flight.result, True
+            if retry_on is None or not retry_on(flight.error):
+                raise flight.error
+            if cancelled is not None and cancelled():
+                raise QueryCancelled("기다리던 요청이 취소되었습니다")
+
+        try:
+            flight.result = fn()
+            return flight.result, False
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+
+class ResultCache:
+    """항목 수 + 메모리 예산을 가진 LRU 결과 캐시 (스레드 안전)"""
+
+    def __init__(self, max_entries: int = MAX_ENTRIES, max_bytes: int = MAX_TOTAL_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._items: "OrderedDict[Hashable, Tuple[pd.DataFrame, int]]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, key: Hashable) -> Optional[pd.DataFrame]:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def put(self, key: Hashable, df: pd.DataFrame) -> None:
+        nbytes = int(df.memory_usage(index=True, deep=True).sum())
+        if nbytes > MAX_ENTRY_BYTES:
+            return
+        with self._lock:
+            if key in self._items:
+                self._bytes -= self._items.pop(key)[1]
+            self._items[key] = (df, nbytes)
+            self._bytes += nbytes
+            while self._items and (len(self._items) > self.max_entries or self._bytes > self.max_bytes):
+                _, (_, dropped) = self._items.popitem(last=False)
+                self._bytes -= dropped
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self._bytes = 0
+
+
+def _is_interrupt(e: BaseException) -> bool:
+    return type(e).__name__ == "InterruptException"
+
+
+def fetch_df(
+    con,
+    sql: str,
+    params: Optional[List] = None,
+    db_path: Union[str, Path] = DB,
+    cache: Optional[ResultCache] = None,
+    flights: Optional[SingleFlight] = None,
+) -> pd.DataFrame:
+    """
+    con.execute(sql, params).df()를 캐시 + single-flight로 감싼 것
+
+    반환값은 호출자 소유 사본이라 수정해도 캐시에 영향 없음.
+    실행을 맡은 요청이 중단(interrupt)되면 기다리던 요청 중 하나가 다시 실행한다.
+    기다리던 요청도 취소되었으면(실행기 작업 취소) 재실행하지 않고 QueryCancelled.
+    """
+    cache = RESULT_CACHE if cache is None else cache
+    flights = FLIGHTS if flights is None else flights
+    params = list(params or [])
+    key = query_key(sql, params, db_generation(db_path))
+
+    hit = cache.get(key)
+    if hit is not None:
+        return hit.copy()
+
+    def _execute() -> pd.DataFrame:
+        df = con.execute(sql, params).df()
+        cache.put(key, df)
+        return df
+
+    df, _ = flights.do(key, _execute, retry_on=_is_interrupt, cancelled=current_job_cancelled)
+    return df.copy()
+
+
+# 프로세스 전역
+RESULT_CACHE = ResultCache()
+FLIGHTS = SingleFlight()
@@ -0,0 +1,222 @@
+"""
+질문 자동완성 색인 (자모 단위 접두/단어 시작 검색 + 최근 가중 사용 빈도 순위)
+
+키 입력마다 후보 전체를 부분 문자열로 훑는 대신,
+- 질문의 각 단어 시작 위치부터의 접미사를 한글 자모로 풀어 정렬해 두고 (접두 + 단어 중간 시작 검색)
+- 입력도 자모로 풀어 이분 탐색으로 범위를 찾는다
+  ("압려"·"압ㄹ"처럼 조합 중인 글자도 "압력"의 접두로 매칭, 겹받침/이중모음은 낱자로 분해)
+- 범위가 크면(짧은 입력) 접두별 상위 TOP_K를 캐시하고, 점수가 바뀐 후보만 캐시에 반영
+
+점수 = 기본 가중치(템플릿/인기/생성 질문) + Σ 2^((사용 시각 - 기준 시각) / HALF_LIFE_S)
+(지수 가중을 기준 시각에 고정해 점수는 늘기만 함 → 오래된 사용은 상대적으로 작아지고, 캐시는 증분 갱신 가능)
+
+    index = SuggestIndex()
+    index.add("스텝별 압력 평균", "그룹별", prior=1.0)
+    index.record("스텝별 압력 평균")            # 사용 1회 (지금 시각)
+    index.search("압려", limit=10)             # [후보 id, ...] 점수순
+"""
+import bisect
+import heapq
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+HALF_LIFE_S = 7 * 24 * 3600.0  # 사용 가중치 반감기 (7일)
+TOP_K = 64  # 접두별 캐시 크기 (limit이 이보다 크면 캐시 없이 계산)
+SCAN_LIMIT = 256  # 범위가 이보다 작으면 바로 훑음
+CACHE_PREFIXES = 4096  # 캐시하는 접두 수 (LRU)
+
+# ── 한글 자모 분해 ─────────────────────────────────────────
+
+_CHO = ["ㄱ", "ㄲ", "ㄴ", "ㄷ", "ㄸ", "ㄹ", "ㅁ", "ㅂ", "ㅃ", "ㅅ", "ㅆ", "ㅇ", "ㅈ", "ㅉ", "ㅊ", "ㅋ", "ㅌ", "ㅍ", "ㅎ"]
+_JUNG = [
+    "ㅏ", "ㅐ", "ㅑ", "ㅒ", "ㅓ", "ㅔ", "ㅕ", "ㅖ", "ㅗ", "ㅗㅏ", "ㅗㅐ", "ㅗㅣ", "ㅛ", "ㅜ",
+    "ㅜㅓ", "ㅜㅔ", "ㅜㅣ", "ㅠ", "ㅡ", "ㅡㅣ", "ㅣ",
+]
+_JONG = [
+    "", "ㄱ", "ㄲ", "ㄱㅅ", "ㄴ", "ㄴㅈ", "ㄴㅎ", "ㄷ", "ㄹ", "ㄹㄱ", "ㄹㅁ", "ㄹㅂ", "ㄹㅅ", "ㄹㅌ",
+    "ㄹㅍ", "ㄹㅎ", "ㅁ", "ㅂ", "ㅂㅅ", "ㅅ", "ㅆ", "ㅇ", "ㅈ", "ㅊ", "ㅋ", "ㅌ", "ㅍ", "ㅎ",
+]
+# 입력 중에 나타나는 호환용 겹자모 → 낱자
+_COMPAT = {
+    "ㄳ": "ㄱㅅ", "ㄵ": "ㄴㅈ", "ㄶ": "ㄴㅎ", "ㄺ": "ㄹㄱ", "ㄻ": "ㄹㅁ", "ㄼ": "ㄹㅂ", "ㄽ": "ㄹㅅ",
+    "ㄾ": "ㄹㅌ", "ㄿ": "ㄹㅍ", "ㅀ": "ㄹㅎ", "ㅄ": "ㅂㅅ", "ㅘ": "ㅗㅏ", "ㅙ": "ㅗㅐ", "ㅚ": "ㅗㅣ",
+    "ㅝ": "ㅜㅓ", "ㅞ": "ㅜㅔ", "ㅟ": "ㅜㅣ", "ㅢ": "ㅡㅣ",
+}
+
+
+def _jamo_table() -> Dict[int, str]:
+    table = {ord(k): v for k, v in _COMPAT.items()}
+    base = 0xAC00
+    for c, cho in enumerate(_CHO):
+        for j, jung in enumerate(_JUNG):
+            for t, jong in enumerate(_JONG):
+                table[base + (c * len(_JUNG) + j) * len(_JONG) + t] = cho + jung + jong
+    return table
+
+
+_JAMO = _jamo_table()
+
+
+def normalize_text(text: str) -> str:
+    """소문자 + 공백 정리"""
+    return " ".join(text.lower().split())
+
+
+def to_jamo(text: str) -> str:
+    """한글 음절/겹자모를 낱자 자모열로 (그 외 문자는 그대로)"""
+    return text.translate(_JAMO)
+
+
+def index_keys(question: str) -> List[str]:
+    """질문의 단어 시작 위치마다 그 뒤 접미사의 자모열 (중복 제거)"""
+    norm = normalize_text(question)
+    if not norm:
+        return []
+    starts = [0] + [i + 1 for i, ch in enumerate(norm) if ch == " "]
+    return list(dict.fromkeys(to_jamo(norm[s:]) for s in starts))
+
+
+class SuggestIndex:
+    """자동완성 후보 색인 (스레드 안전, 후보 추가/사용 기록은 증분 반영)"""
+
+    def __init__(self, now: Optional[float] = None, half_life_s: float = HALF_LIFE_S):
+        self.t0 = time.time() if now is None else now
+        self.half_life_s = half_life_s
+        self._lock = threading.RLock()
+        self.questions: List[str] = []
+        self.categories: List[str] = []
+        self._scores: List[float] = []
+        self._keys: List[List[str]] = []
+        self._ids: Dict[str, int] = {}  # normalize_text(질문) → id
+        self._entries: List[Tuple[str, int]] = []  # (자모 키, id) 정렬
+        self._top: "OrderedDict[str, List[int]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.questions)
+
+    def weight(self, timestamp: Optional[float] = None) -> float:
+        """사용 1회의 가중치 (기준 시각 = 1.0, 반감기마다 절반)"""
+        t = time.time() if timestamp is None else timestamp
+        return 2.0 ** ((t - self.t0) / self.half_life_s)
+
+    def _rank(self, i: int) -> Tuple[float, int]:
+        return (-self._scores[i], i)
+
+    # ── 갱신 ────────────────────────────────────────────────
+
+    def _insert(self, norm: str, question: str, category: str) -> Tuple[int, List[str]]:
+        """새 후보 등록 (정렬 목록 반영은 호출 측), (id, 자모 키) 반환"""
+        i = len(self.questions)
+        self._ids[norm] = i
+        self.questions.append(question.strip())
+        self.categories.append(category)
+        self._scores.append(0.0)
+        keys = index_keys(norm)
+        self._keys.append(keys)
+        return i, keys
+
+    def add(self, question: str, category: str, prior: float = 0.0) -> Optional[int]:
+        """후보 추가 (이미 있으면 prior만 더함), id 반환 (빈 질문은 None)"""
+        norm = normalize_text(question)
+        if not norm:
+            return None
+        with self._lock:
+            i = self._ids.get(norm)
+            new = i is None
+            if new:
+                i, keys = self._insert(norm, question, category)
+                for key in keys:
+                    bisect.insort(self._entries, (key, i))
+            if new or prior:
+                self._scores[i] += prior
+                self._refresh_cached(i)
+            return i
+
+    def add_many(self, items: Iterable[Tuple[str, str]], prior: float = 0.0) -> None:
+        """(질문, 카테고리) 여러 개 추가 (정렬은 마지막에 한 번, 색인 생성용)"""
+        with self._lock:
+            fresh: List[Tuple[str, int]] = []
+            for question, category in items:
+                norm = normalize_text(question)
+                if not norm:
+                    continue
+                i = self._ids.get(norm)
+                if i is None:
+                    i, keys = self._insert(norm, question, category)
+                    fresh.extend((key, i) for key in keys)
+                self._scores[i] += prior
+            if fresh:
+                self._entries.extend(fresh)
+                self._entries.sort()
+            self._top.clear()
+
+    def record(self, question: str, timestamp: Optional[float] = None, category: str = "최근") -> Optional[int]:
+        """사용 1회 기록 (없는 질문이면 후보로 추가)"""
+        with self._lock:
+            i = self.add(question, category)
+            if i is not None:
+                self._scores[i] += self.weight(timestamp)
+                self._refresh_cached(i)
+            return i
+
+    def record_many(self, events: Iterable[Tuple[str, Optional[float]]], category: str = "최근") -> None:
+        """(질문, 사용 시각) 여러 건 기록 (색인 생성 시 이력 일괄 반영)"""
+        events = list(events)
+        with self._lock:
+            self.add_many((q, category) for q, _ in events)
+            for q, ts in events:
+                i = self._ids.get(normalize_text(q))
+                if i is not None:
+                    self._scores[i] += self.weight(ts)
+
+    def _refresh_cached(self, i: int) -> None:
+        """점수가 오른(또는 새로 들어온) 후보 i를 캐시된 접두별 상위 목록에 반영"""
+        if not self._top:
+            return
+        prefixes = {key[:n] for key in self._keys[i] for n in range(len(key) + 1)}
+        rank = self._rank
+        for p in prefixes:
+            top = self._top.get(p)
+            if top is None:
+                continue
+            if i in top:
+                top.sort(key=rank)
+            elif len(top) < TOP_K:
+                top.append(i)
+                top.sort(key=rank)
+            elif rank(i) < rank(top[-1]):
+                top[-1] = i
+                top.sort(key=rank)
+
+    # ── 검색 ────────────────────────────────────────────────
+
+    def _range(self, key: str) -> Tuple[int, int]:
+        lo = bisect.bisect_left(self._entries, (key,))
+        hi = bisect.bisect_left(self._entries, (key + "\U0010ffff",))
+        return lo, hi
+
+    def search(self, query: str = "", limit: int = 10) -> List[int]:
+        """입력(접두 또는 단어 시작 부분)과 맞는 후보 id를 점수순으로 최대 limit개"""
+        key = to_jamo(normalize_text(query))
+        with self._lock:
+            top = self._top.get(key)
+            if top is not None and limit <= TOP_K:
+                self._top.move_to_end(key)
+                return top[:limit]
+            lo, hi = self._range(key)
+            if hi - lo > SCAN_LIMIT and limit <= TOP_K:
+                ids = {self._entries[n][1] for n in range(lo, hi)}
+                top = heapq.nsmallest(TOP_K, ids, key=self._rank)
+                self._top[key] = top
+                if len(self._top) > CACHE_PREFIXES:
+                    self._top.popitem(last=False)
+                return top[:limit]
+            ids = {self._entries[n][1] for n in range(lo, hi)}
+            return heapq.nsmallest(limit, ids, key=self._rank)
+
+    def suggest(self, query: str = "", limit: int = 10) -> List[Dict[str, str]]:
+        """[{"question", "category"}, ...] 점수순"""
+        ids = self.search(query, limit)
+        return [{"question": self.questions[i], "category": self.categories[i]} for i in ids]
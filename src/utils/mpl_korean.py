@@ -1,40 +1,103 @@
 """
 Matplotlib 한글 폰트 설정 유틸리티
-모듈 import 시 1회만 실행
+
+matplotlib은 첫 차트 요청 때 pyplot()으로 import (서버 기동/비차트 질의에는 로드하지 않음).
+폰트 선택 결과는 디스크에 캐시해, 다음 프로세스부터는 fontManager 목록을 다시 훑지 않는다.
+한글 폰트를 못 찾은 결과는 캐시하지 않는다 (나중에 폰트를 설치하면 바로 반영되도록).
 """
-import matplotlib  # type: ignore
-matplotlib.use("Agg")  # 서버 환경에서 필요한 백엔드 설정
-import matplotlib.pyplot as plt  # type: ignore
-import matplotlib.font_manager as fm  # type: ignore
+import json
+import threading
+from pathlib import Path
+from typing import Iterable, Optional
 
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+FONT_CACHE_FILE = PROJECT_ROOT / "data_out" / ".cache" / "mpl_font.json"
 
-def setup_korean_font():
-    """한글 폰트 설정 (Linux 환경)"""
-    plt.rcParams["axes.unicode_minus"] = False  # 음수 기호 깨짐 방지
-    
-    font_list = [f.name for f in fm.fontManager.ttflist]
-    candidates = [
-        "NanumGothic",
-        "NanumBarunGothic",
-        "Noto Sans CJK KR",
-        "Noto Sans CJK",
-    ]
-    
-    selected = None
-    for c in candidates:
-        if c in font_list:
-            selected = c
-            break
+FONT_CANDIDATES = [
+    "NanumGothic",
+    "NanumBarunGothic",
+    "Noto Sans CJK KR",
+    "Noto Sans CJK",
+]
+FALLBACK_FONT = "DejaVu Sans"
+
+_lock = threading.Lock()
+_plt = None
+
+
+def select_font(font_names: Iterable[str]) -> Optional[str]:
+    """후보 순서대로 정확히 일치 → 부분 일치(대소문자 무시)하는 폰트 이름"""
+    font_list = list(font_names)
+    names = set(font_list)
+    for c in FONT_CANDIDATES:
+        if c in names:
+            return c
         for name in font_list:
             if c.lower() in name.lower():
-                selected = name
-                break
+                return name
+    return None
+
+
+def _read_cache(version: str) -> Optional[dict]:
+    try:
+        with open(FONT_CACHE_FILE, "r", encoding="utf-8") as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    # matplotlib 버전이 바뀌었거나 폰트 파일이 사라졌으면 다시 탐색
+    if cached.get("matplotlib") != version:
+        return None
+    if not cached.get("font"):
+        return None  # 예전 버전이 남긴 "못 찾음" 항목
+    if cached.get("path") and not Path(cached["path"]).exists():
+        return None
+    return cached
+
+
+def _write_cache(entry: dict) -> None:
+    try:
+        FONT_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        with open(FONT_CACHE_FILE, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False)
+    except OSError:
+        pass  # 캐시는 최적화일 뿐, 쓰기 실패해도 설정은 유효
+
+
+def setup_korean_font():
+    """한글 폰트 설정 (Linux 환경, 선택 결과는 FONT_CACHE_FILE에 캐시)"""
+    import matplotlib  # type: ignore
+    import matplotlib.pyplot as plt  # type: ignore
+
+    plt.rcParams["axes.unicode_minus"] = False  # 음수 기호 깨짐 방지
+
+    cached = _read_cache(matplotlib.__version__)
+    if cached is not None:
+        selected = cached.get("font")
+    else:
+        import matplotlib.font_manager as fm  # type: ignore
+
+        selected = select_font(f.name for f in fm.fontManager.ttflist)
         if selected:
-            break
-    
-    plt.rcParams["font.family"] = selected or "DejaVu Sans"
+            path = next((f.fname for f in fm.fontManager.ttflist if f.name == selected), None)
+            _write_cache({"matplotlib": matplotlib.__version__, "font": selected, "path": path})
+
+    plt.rcParams["font.family"] = selected or FALLBACK_FONT
     if selected:
         print(f"[Font] 한글 폰트 설정: {selected}")
     else:
         print("[Font] 한글 폰트를 찾을 수 없어 DejaVu Sans 사용 (한글 깨짐 가능)")
 
+
+def pyplot():
+    """Agg 백엔드 + 한글 폰트가 설정된 matplotlib.pyplot (첫 호출 시 1회 초기화)"""
+    global _plt
+    if _plt is None:
+        with _lock:
+            if _plt is None:
+                import matplotlib  # type: ignore
+                matplotlib.use("Agg")  # 서버 환경에서 필요한 백엔드 설정
+                import matplotlib.pyplot as plt  # type: ignore
+
+                setup_korean_font()
+                _plt = plt
+    return _plt
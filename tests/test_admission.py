@@ -0,0 +1,133 @@
+"""
+비용 기반 입장 제어(src/services/admission.py) 테스트
+"""
+import asyncio
+import sys
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import duckdb
+from src.nl_parse_v2 import parse_question
+from src.services.admission import (
+    AdmissionController,
+    ClientLimitExceeded,
+    estimate_cost,
+    read_table_stats,
+)
+from src.services.executor import QueryExecutor
+
+STATS = {"rows": 10_000_000, "traces": 100, "steps": 20}
+
+
+def _cost(question):
+    return estimate_cost(parse_question(question), STATS)
+
+
+def test_single_trace_avg_is_cheap():
+    cost, kind = _cost("standard_trace_001 pressact 평균")
+    assert kind == "simple"
+    assert cost == pytest.approx(100_000)
+
+
+def test_fleet_quantile_heavier_than_avg():
+    avg, _ = _cost("pressact 평균")
+    p99, kind = _cost("pressact p99")
+    assert kind == "quantile"
+    assert p99 > avg * 3
+
+
+def test_outlier_is_heavy():
+    cost, kind = _cost("pressact 이상치 공정")
+    assert kind == "outlier"
+    assert AdmissionController().classify(cost, STATS) == "heavy"
+
+
+def test_fleet_simple_aggregates_stay_cheap():
+    """전체 설비 단순 평균/표준편차는 테이블이 커도 cheap, 분위수는 heavy"""
+    ctl = AdmissionController()
+    for question in ("pressact 평균", "pressact 표준편차"):
+        cost, kind = _cost(question)
+        assert kind in ("simple", "std")
+        assert ctl.classify(cost, STATS) == "cheap"
+    assert ctl.classify(_cost("pressact p99")[0], STATS) == "heavy"
+    # 작은 DB는 분위수도 cheap
+    small = {"rows": 100_000, "traces": 10, "steps": 5}
+    assert ctl.classify(estimate_cost(parse_question("pressact p99"), small)[0], small) == "cheap"
+
+
+def test_precomputed_is_tiny():
+    p = SimpleNamespace(flags={"is_spc": True}, trace_ids=[], trace_id=None, step_names=[], step_name=None)
+    cost, kind = estimate_cost(p, STATS)
+    assert kind == "precomputed" and cost < 1_000_000
+
+
+def test_read_table_stats(tmp_path):
+    con = duckdb.connect(str(tmp_path / "s.duckdb"))
+    con.execute("CREATE TABLE traces AS SELECT i AS id FROM range(5000) r(i)")
+    con.execute("CREATE TABLE step_segments AS SELECT 't' || (i % 4) AS trace_id, 's' || (i % 3) AS step_name FROM range(12) r(i)")
+    stats = read_table_stats(con)
+    con.close()
+    assert stats["traces"] == 4 and stats["steps"] == 3
+    assert stats["rows"] > 0
+    assert stats["has_step_segments"] == 1 and stats["has_setpoint_metrics"] == 0
+
+
+def test_dwell_time_without_segments_is_raw_scan():
+    """step_segments가 없으면 build_dwell_time_sql이 원본 MIN/MAX 스캔으로 폴백 → precomputed 아님"""
+    p = parse_question("스텝별 체류시간")
+    cost, kind = estimate_cost(p, {**STATS, "has_step_segments": 0})
+    assert kind == "dwell_time"
+    assert cost == pytest.approx(STATS["rows"] * 2.0)
+    assert estimate_cost(p, STATS)[1] == "dwell_time"  # 존재 여부를 모르면 원본 스캔으로 가정
+    assert estimate_cost(p, {**STATS, "has_step_segments": 1})[1] == "precomputed"
+
+
+def test_overshoot_fallback_is_raw_scan():
+    """setpoint 짝이 없는 컬럼이나 setpoint_metrics가 없는 DB의 오버슈트는 build_overshoot_sql 경로"""
+    with_table = {**STATS, "has_setpoint_metrics": 1}
+    cost, kind = estimate_cost(parse_question("vg11 오버슈트"), with_table)
+    assert kind == "overshoot"
+    assert AdmissionController().classify(cost, with_table) == "heavy"
+    assert estimate_cost(parse_question("pressact 오버슈트"), {**STATS, "has_setpoint_metrics": 0})[1] == "overshoot"
+    assert estimate_cost(parse_question("pressact 오버슈트"), with_table)[1] == "precomputed"
+
+
+@pytest.fixture
+def db(tmp_path):
+    path = tmp_path / "adm.duckdb"
+    con = duckdb.connect(str(path))
+    con.execute("CREATE TABLE traces AS SELECT i AS id FROM range(1000) r(i)")
+    con.close()
+    return path
+
+
+def test_heavy_lane_and_per_client_limit(db):
+    cheap = QueryExecutor(max_workers=2, max_queue=2)
+    heavy = QueryExecutor(max_workers=1, max_queue=2)
+    ctl = AdmissionController(cheap=cheap, heavy=heavy, heavy_cost=100, per_client={"cheap": 4, "heavy": 1})
+    heavy_p = SimpleNamespace(flags={"is_outlier": True}, trace_ids=[], trace_id=None, step_names=[], step_name=None)
+    cheap_p = SimpleNamespace(flags={"is_spc": True}, trace_ids=[], trace_id=None, step_names=[], step_name=None)
+    gate = threading.Event()
+
+    async def scenario():
+        first = asyncio.ensure_future(ctl.run(lambda con: gate.wait(5), db, heavy_p, client="alice"))
+        await asyncio.sleep(0.1)
+        try:
+            # 같은 사람의 두 번째 heavy는 거절, 다른 사람의 heavy/같은 사람의 cheap은 통과
+            with pytest.raises(ClientLimitExceeded):
+                await ctl.run(lambda con: 1, db, heavy_p, client="alice")
+            assert await ctl.run(lambda con: 2, db, cheap_p, client="alice") == 2
+            other = asyncio.ensure_future(ctl.run(lambda con: 3, db, heavy_p, client="bob"))
+        finally:
+            gate.set()
+        assert await first is True
+        assert await other == 3
+
+    asyncio.run(scenario())
+    assert ctl._active == {}
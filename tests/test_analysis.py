@@ -0,0 +1,620 @@
+"""
+분석 엔진(src/analysis) 테스트
+합성 trace 데이터를 메모리 DuckDB에 만들어 사전 계산 테이블과 점수를 검증
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import duckdb
+from src.nl_parse_v2 import Parsed
+from src.analysis.step_stats import load_step_cube
+from src.analysis.golden import (
+    compute_envelope,
+    register_golden_traces,
+    refresh_on_ingest,
+    build_golden_deviation_sql,
+)
+from src.analysis.resample import (
+    resample_segments,
+    build_step_profiles,
+    load_profiles,
+    profile_envelope,
+    profile_distances,
+)
+from src.analysis.fingerprint import (
+    FeatureMoments,
+    FingerprintIndex,
+    build_fingerprint_index,
+    update_fingerprint_index,
+    build_similar_traces_sql,
+)
+from src.analysis.spc import estimate_limits, ewma_series, cusum_series, update_spc
+from src.analysis.setpoint import segment_bounds, tracking_metrics, build_setpoint_metrics
+from src.analysis.segments import build_step_segments, build_dwell_time_sql, build_stable_avg_sql
+from src.analysis.correlation import CoMoments, CORRELATION_METHODS, correlation_matrix, top_pairs, build_correlation_sql
+from src.analysis.pca import StepPCA, refresh_on_ingest as refresh_pca
+from src.analysis.router import choose_analysis_sql
+
+STEPS = ["STANDBY", "B.FILL", "B.UP"]
+COLUMNS = ["pressact", "pressset", "vg11"]
+
+
+def make_traces(n_traces: int = 6, n_points: int = 40, seed: int = 0, offset: dict = None) -> pd.DataFrame:
+    """2Hz 순차 timestamp를 가진 합성 trace (offset: trace_id → pressact 가산값)"""
+    rng = np.random.default_rng(seed)
+    offset = offset or {}
+    frames = []
+    t0 = pd.Timestamp("2024-01-01")
+    for t in range(n_traces):
+        trace_id = f"standard_trace_{t + 1:03d}"
+        start = t0 + pd.Timedelta(hours=t)
+        for s, step in enumerate(STEPS):
+            ts = start + pd.Timedelta(seconds=s * n_points / 2) + pd.to_timedelta(np.arange(n_points) * 0.5, unit="s")
+            setpoint = 100.0 * (s + 1)
+            frames.append(pd.DataFrame({
+                "trace_id": trace_id,
+                "step_name": step,
+                "timestamp": ts,
+                "pressact": setpoint + rng.normal(0, 1, n_points) + offset.get(trace_id, 0.0),
+                "pressset": setpoint,
+                "vg11": 10.0 + rng.normal(0, 0.1, n_points),
+            }))
+    return pd.concat(frames, ignore_index=True)
+
+
+@pytest.fixture
+def con():
+    """traces_dedup 테이블을 가진 메모리 DuckDB"""
+    c = duckdb.connect(":memory:")
+    df = make_traces(offset={"standard_trace_006": 25.0})
+    c.execute("CREATE TABLE traces_dedup AS SELECT * FROM df")
+    yield c
+    c.close()
+
+
+def test_step_cube_shape(con):
+    """(trace, step, column) 큐브 구성"""
+    cube = load_step_cube(con, COLUMNS)
+    assert cube.values.shape == (6, len(STEPS), len(COLUMNS))
+    assert not np.isnan(cube.values).any()
+    b_up = cube.step_names.index("B.UP")
+    assert cube.values[0, b_up, COLUMNS.index("pressset")] == pytest.approx(300.0)
+
+
+def test_compute_envelope_methods():
+    """sigma / percentile 구간 계산"""
+    golden = np.array([[[1.0]], [[3.0]]])
+    center, lower, upper = compute_envelope(golden, "sigma", k=2.0)
+    assert center[0, 0] == pytest.approx(2.0)
+    assert upper[0, 0] - center[0, 0] == pytest.approx(2.0 * np.std([1.0, 3.0], ddof=1))
+
+    center, lower, upper = compute_envelope(golden, "percentile")
+    assert lower[0, 0] < center[0, 0] < upper[0, 0]
+
+
+def test_golden_deviation_ranking(con):
+    """골든 등록 → 채점 → 편차 큰 trace가 1위"""
+    n = register_golden_traces(con, ["standard_trace_001", "standard_trace_002", "standard_trace_003"])
+    assert n == 6
+
+    p = Parsed(top_n=3, flags={"is_golden_deviation": True}, analysis_type="stability")
+    sql, params = choose_analysis_sql(p)
+    assert (sql, params) == build_golden_deviation_sql(p)
+
+    df = con.execute(sql, params).df()
+    assert len(df) == 3
+    assert df["trace_id"].iloc[0] == "standard_trace_006"
+    assert df["worst_column"].iloc[0] == "pressact"
+
+
+def test_golden_refresh_scores_only_new_traces(con):
+    """ingest 시 점수 없는 trace만 채점"""
+    register_golden_traces(con, ["standard_trace_001"])
+    assert refresh_on_ingest(con) == 0
+
+    extra = make_traces(n_traces=7, seed=1).query("trace_id == 'standard_trace_007'")
+    con.execute("INSERT INTO traces_dedup SELECT * FROM extra")
+    assert refresh_on_ingest(con) == 1
+    assert con.execute("SELECT COUNT(*) FROM trace_deviation").fetchone()[0] == 7
+
+
+def test_payload_frame_routes_golden_deviation(tmp_path):
+    """/api/query 경로(build_payload_frame)도 v2 파서 플래그로 골든 편차 테이블 조회"""
+    from src.payload_builder import build_payload_frame
+
+    db = tmp_path / "ald.duckdb"
+    c = duckdb.connect(str(db))
+    try:
+        df = make_traces(offset={"standard_trace_002": 25.0})
+        c.execute("CREATE TABLE traces_dedup AS SELECT * FROM df")
+        register_golden_traces(c, ["standard_trace_001", "standard_trace_003", "standard_trace_004"])
+
+        payload, first = build_payload_frame("standard_trace_002 골든 편차", c, db_path=db)
+    finally:
+        c.close()
+    assert "trace_deviation" in payload["sql"]
+    assert list(first["trace_id"]) == ["standard_trace_002"]
+    assert {"value", "max_z", "worst_step", "worst_column"} <= set(payload["columns"])
+    assert first["worst_column"].iloc[0] == "pressact"
+    assert payload["total_rows"] == 1
+
+
+def test_router_falls_back_without_flags():
+    """분석 플래그가 없으면 None"""
+    assert choose_analysis_sql(Parsed(column="pressact")) is None
+
+
+def test_resample_segments_linear():
+    """길이가 다른 구간도 같은 진행률 축으로 보간"""
+    seg = np.array([0, 0, 0, 1, 1, 1, 1, 1])
+    t = np.array([0.0, 1.0, 2.0, 10.0, 11.0, 12.0, 13.0, 14.0])
+    v = np.column_stack([t * 2.0, np.ones_like(t)])
+    out = resample_segments(seg, t, v, n_points=5)
+    assert out.shape == (2, 5, 2)
+    np.testing.assert_allclose(out[0, :, 0], [0.0, 1.0, 2.0, 3.0, 4.0])
+    np.testing.assert_allclose(out[1, :, 0], [20.0, 22.0, 24.0, 26.0, 28.0])
+    np.testing.assert_allclose(out[:, :, 1], 1.0)
+
+
+def test_step_profiles_and_compare(con):
+    """step_profiles 생성 → 증분 → point-wise 비교 SQL"""
+    assert build_step_profiles(con, columns=COLUMNS, n_points=16) == 6
+    assert build_step_profiles(con, columns=COLUMNS, n_points=16) == 0
+
+    ids, matrix = load_profiles(con, "B.FILL", "pressact")
+    assert matrix.shape == (6, 16)
+    mean, lower, upper = profile_envelope(matrix)
+    assert (lower <= mean).all() and (mean <= upper).all()
+    dist = profile_distances(matrix, mean)
+    assert ids[int(dist.argmax())] == "standard_trace_006"
+
+    p = Parsed(
+        column="pressact",
+        filters={"trace_ids": ["standard_trace_001", "standard_trace_006"]},
+        flags={"is_trace_compare": True, "is_profile_compare": True},
+        analysis_type="comparison",
+    )
+    sql, params = choose_analysis_sql(p)
+    df = con.execute(sql, params).df()
+    assert set(df["step_name"]) == set(STEPS)
+    assert (df["diff_signed"] < -20).all()
+
+
+def test_step_profiles_split_revisits(con):
+    """같은 step 재방문은 별도 구간 (방문 사이 공백을 보간하지 않음), 고정 길이 배열"""
+    revisit = make_traces(n_traces=7, seed=4).query("trace_id == 'standard_trace_007'").copy()
+    revisit.loc[revisit.index[-10:], "step_name"] = "STANDBY"
+    con.execute("INSERT INTO traces_dedup SELECT * FROM revisit")
+    # 이전 스키마(가변 길이, seq_no 없음)는 다시 만든다
+    con.execute("CREATE TABLE step_profiles (trace_id VARCHAR, step_name VARCHAR, column_name VARCHAR, "
+                "duration_s DOUBLE, n_rows BIGINT, profile FLOAT[])")
+
+    assert build_step_profiles(con, columns=["pressact"], n_points=8) == 7
+    assert con.execute(
+        "SELECT data_type FROM information_schema.columns WHERE table_name = 'step_profiles' AND column_name = 'profile'"
+    ).fetchone()[0] == "FLOAT[8]"
+    rows = con.execute(
+        "SELECT seq_no, step_name, n_rows, duration_s, profile FROM step_profiles "
+        "WHERE trace_id = 'standard_trace_007' ORDER BY seq_no"
+    ).fetchall()
+    assert [(r[0], r[1], r[2]) for r in rows] == [(1, "STANDBY", 40), (2, "B.FILL", 40), (3, "B.UP", 30), (4, "STANDBY", 10)]
+    assert rows[3][3] == pytest.approx(4.5)
+    # 두 번째 STANDBY 방문은 B.UP 구간 값(≈300) 그대로, 첫 방문(≈100)과 섞이지 않음
+    assert min(rows[3][4]) > 250 and max(rows[0][4]) < 150
+
+    ids, first = load_profiles(con, "STANDBY", "pressact")
+    assert len(ids) == 7 and first.max() < 150
+    ids, second = load_profiles(con, "STANDBY", "pressact", visit=2)
+    assert ids == ["standard_trace_007"] and second.min() > 250
+
+    with pytest.raises(ValueError):
+        build_step_profiles(con, columns=["pressact"], n_points=16)
+
+
+def test_fingerprint_knn(con):
+    """핑거프린트 kNN: 자기 자신 제외, 편차 trace는 가장 멀리"""
+    index = build_fingerprint_index(con, columns=COLUMNS)
+    assert len(index) == 6
+    neighbors = index.query_trace("standard_trace_001", k=5)
+    assert [t for t, _ in neighbors][-1] == "standard_trace_006"
+    assert "standard_trace_001" not in [t for t, _ in neighbors]
+
+    p = Parsed(filters={"trace_id": "standard_trace_001"}, top_n=2, flags={"is_similar_trace": True})
+    sql, params = build_similar_traces_sql(p, index=index)
+    df = con.execute(sql, params).df()
+    assert list(df["rank"]) == [1, 2]
+    assert df["value"].is_monotonic_increasing
+
+
+def test_fingerprint_index_incremental(con, tmp_path):
+    """저장 → 신규 trace만 증분 추가 → 로드 결과 일치"""
+    path = tmp_path / "fingerprints.npz"
+    assert update_fingerprint_index(con, path=path) == 6
+    assert update_fingerprint_index(con, path=path) == 0
+
+    extra = make_traces(n_traces=7, seed=1).query("trace_id == 'standard_trace_007'")
+    con.execute("INSERT INTO traces_dedup SELECT * FROM extra")
+    assert update_fingerprint_index(con, path=path) == 1
+
+    index = FingerprintIndex.load(path)
+    assert len(index) == 7 and "standard_trace_007" in index
+
+
+def test_fingerprint_build_batched_matches_full(con):
+    """trace 묶음 단위 생성 = 한 번에 생성, 누적 통계 = nanmean/nanstd"""
+    full = build_fingerprint_index(con, columns=COLUMNS, batch=100)
+    batched = build_fingerprint_index(con, columns=COLUMNS, batch=4)
+    assert batched.trace_ids == full.trace_ids
+    np.testing.assert_allclose(batched.matrix, full.matrix, rtol=1e-5, atol=1e-5)
+
+    raw = np.random.default_rng(3).normal(100.0, 5.0, (9, 4))
+    raw[[1, 5], 2] = np.nan
+    raw[:, 3] = np.nan
+    moments = FeatureMoments(4)
+    for chunk in (raw[:2], raw[2:7], raw[7:]):
+        moments.update(chunk)
+    mu, sigma = moments.result()
+    np.testing.assert_allclose(mu[:3], np.nanmean(raw[:, :3], axis=0))
+    np.testing.assert_allclose(sigma[:3], np.nanstd(raw[:, :3], axis=0))
+    assert np.isnan(mu[3]) and np.isnan(sigma[3])
+
+
+def test_fingerprint_add_grows_buffer_geometrically():
+    """작은 묶음 추가를 반복해도 버퍼 재할당은 로그 횟수, 결과는 한 번에 추가한 것과 동일"""
+    rng = np.random.default_rng(5)
+    raw = rng.normal(0.0, 1.0, (300, 6))
+    ids = [f"t{i:03d}" for i in range(300)]
+    one = FingerprintIndex.fit(ids, raw, ["S"], ["a", "b", "c"])
+    inc = FingerprintIndex.from_moments(["S"], ["a", "b", "c"], one.mu, one.sigma)
+
+    reallocations, buf = 0, inc._buf
+    for i in range(0, 300, 7):
+        inc.add(ids[i:i + 7], raw[i:i + 7])
+        reallocations += inc._buf is not buf
+        buf = inc._buf
+    assert reallocations <= 4
+    np.testing.assert_array_equal(inc.matrix, one.matrix)
+    np.testing.assert_allclose(inc.sq_norms, one.sq_norms, rtol=1e-6)
+
+    # 기존 trace 갱신 + 같은 묶음 안 중복
+    inc.add(["t000", "new", "new"], raw[[5, 6, 7]])
+    assert len(inc) == 301
+    np.testing.assert_array_equal(inc.matrix[0], one.matrix[5])
+    np.testing.assert_array_equal(inc.matrix[300], one.matrix[7])
+    assert {t for t, _ in inc.query_vector(one.matrix[7], k=2)} == {"t007", "new"}
+
+
+def test_fingerprint_rebuilds_on_new_step(con, tmp_path):
+    """신규 trace에 인덱스에 없는 step이 있으면 전체 재생성"""
+    path = tmp_path / "fingerprints.npz"
+    update_fingerprint_index(con, path=path)
+    extra = make_traces(n_traces=7, seed=1).query("trace_id == 'standard_trace_007'").copy()
+    extra.loc[extra.index[-5:], "step_name"] = "B.DOWN"
+    con.execute("INSERT INTO traces_dedup SELECT * FROM extra")
+
+    assert update_fingerprint_index(con, path=path) == 7
+    index = FingerprintIndex.load(path)
+    assert "B.DOWN" in index.step_names and "standard_trace_007" in index
+
+
+def test_spc_statistics_incremental_matches_batch():
+    """EWMA/CUSUM을 두 번에 나눠 계산해도 한 번에 계산한 결과와 동일"""
+    rng = np.random.default_rng(3)
+    x = rng.normal(10.0, 1.0, (30, 4))
+    x[5, 1] = np.nan
+    lim = estimate_limits(x, np.abs(rng.normal(2.0, 0.2, (30, 4))))
+    c, s = lim["center"], lim["sigma"]
+
+    z, _, _, _, _ = ewma_series(x, c, s, c, np.zeros(4))
+    z1, _, _, z_last, n_last = ewma_series(x[:12], c, s, c, np.zeros(4))
+    z2, _, _, _, _ = ewma_series(x[12:], c, s, z_last, n_last)
+    np.testing.assert_allclose(np.vstack([z1, z2]), z)
+
+    p, n, _, _ = cusum_series(x, c, s, np.zeros(4), np.zeros(4))
+    p1, n1, p_last, n_last = cusum_series(x[:12], c, s, np.zeros(4), np.zeros(4))
+    p2, n2, _, _ = cusum_series(x[12:], c, s, p_last, n_last)
+    np.testing.assert_allclose(np.vstack([p1, p2]), p)
+    assert np.isnan(p[5, 1])
+
+
+def test_spc_update_and_query(con):
+    """관리도 테이블 생성 → 증분 → 편차 trace가 X̄ 위반"""
+    assert update_spc(con, columns=COLUMNS, baseline=5) == 6
+    assert update_spc(con) == 0
+
+    p = Parsed(column="pressact", filters={"step_name": "B.FILL"}, flags={"is_spc": True, "spc_chart": "xbar"})
+    df = con.execute(*choose_analysis_sql(p)).df()
+    assert list(df["seq"]) == [1, 2, 3, 4, 5, 6]
+    assert (df["lcl"] < df["center"]).all() and (df["center"] < df["ucl"]).all()
+
+    later = make_traces(n_traces=7, seed=2, offset={"standard_trace_007": 25.0})
+    later = later[later["trace_id"] == "standard_trace_007"].assign(timestamp=lambda d: d["timestamp"] + pd.Timedelta(days=1))
+    con.execute("INSERT INTO traces_dedup SELECT * FROM later")
+    assert update_spc(con) == 1
+
+    p.flags["spc_violations_only"] = True
+    df = con.execute(*choose_analysis_sql(p)).df()
+    assert "standard_trace_007" in set(df["trace_id"])
+    assert df["violation"].all()
+
+
+def test_spc_refresh_honors_columns_and_new_steps(con):
+    """증분 갱신: columns가 바뀌면 한계 재설정, 새 step은 그 계열만 추가 (기존 계열 한계는 그대로)"""
+    assert update_spc(con, columns=["pressact"], baseline=5) == 6
+    before = con.execute("SELECT step_name, center, sigma FROM spc_state ORDER BY step_name").fetchall()
+
+    assert update_spc(con, columns=["pressact", "vg11"], baseline=5) == 6
+    assert sorted(r[0] for r in con.execute("SELECT DISTINCT column_name FROM spc_state").fetchall()) == ["pressact", "vg11"]
+
+    later = make_traces(n_traces=7, seed=2).query("trace_id == 'standard_trace_007'").copy()
+    later = later.assign(timestamp=later["timestamp"] + pd.Timedelta(days=1))
+    later.loc[later.index[-10:], "step_name"] = "B.DOWN"
+    con.execute("INSERT INTO traces_dedup SELECT * FROM later")
+    # 새 step은 그 계열만 한계를 잡고 나머지 계열은 이어서 계산 (전체 재계산 아님)
+    assert update_spc(con, baseline=5) == 1
+
+    state = con.execute(
+        "SELECT step_name, center, sigma FROM spc_state WHERE column_name = 'pressact' ORDER BY step_name"
+    ).fetchall()
+    assert "B.DOWN" in [r[0] for r in state]
+    kept = [r for r in state if r[0] != "B.DOWN"]
+    assert [r[0] for r in kept] == [r[0] for r in before]
+    np.testing.assert_allclose([r[1:] for r in kept], [r[1:] for r in before])
+    assert con.execute("SELECT COUNT(*) FROM spc_points WHERE step_name = 'B.DOWN'").fetchone()[0] == 2
+    assert sorted(r[0] for r in con.execute("SELECT DISTINCT column_name FROM spc_state").fetchall()) == ["pressact", "vg11"]
+
+
+def test_spc_filling_series_refit_without_rebuild(monkeypatch):
+    """baseline을 못 채운 계열만 한계 재추정: 한 trace씩 증분 = 한 번에 생성, 전체 재계산 없음"""
+    import src.analysis.spc as spc
+
+    df = make_traces(n_traces=8, seed=4)
+    # 드문 계열: vg11은 B.UP에서 짝수 trace에만 값이 있음
+    df.loc[(df["step_name"] == "B.UP") & df["trace_id"].str[-1].astype(int).mod(2).eq(1), "vg11"] = np.nan
+    inc, full = duckdb.connect(":memory:"), duckdb.connect(":memory:")
+    try:
+        full.execute("CREATE TABLE traces_dedup AS SELECT * FROM df")
+        update_spc(full, columns=COLUMNS, baseline=3)
+
+        ids = sorted(df["trace_id"].unique())
+        first = df[df["trace_id"].isin(ids[:2])]
+        inc.execute("CREATE TABLE traces_dedup AS SELECT * FROM first")
+        update_spc(inc, columns=COLUMNS, baseline=3)
+
+        calls = []
+        real = spc.update_spc
+        monkeypatch.setattr(spc, "update_spc", lambda *a, **kw: calls.append(kw) or real(*a, **kw))
+        for tid in ids[2:]:
+            one = df[df["trace_id"] == tid]
+            inc.execute("INSERT INTO traces_dedup SELECT * FROM one")
+            assert real(inc) == 1
+        assert calls == []
+
+        cols = "step_name, column_name, center, sigma, r_center, r_sigma, n_baseline, ewma, cusum_pos, cusum_neg, n_points"
+        q = f"SELECT {cols} FROM spc_state ORDER BY step_name, column_name"
+        pd.testing.assert_frame_equal(inc.execute(q).df(), full.execute(q).df(), check_dtype=False)
+        q = "SELECT * FROM spc_points ORDER BY step_name, column_name, seq"
+        pd.testing.assert_frame_equal(inc.execute(q).df(), full.execute(q).df(), check_dtype=False)
+    finally:
+        inc.close()
+        full.close()
+
+
+def test_tracking_metrics_step_response():
+    """1차 응답 + 오버슈트 구간의 지표 계산"""
+    t = np.arange(12, dtype=float)
+    y = np.array([0.0, 5.0, 9.5, 11.0, 10.5, 10.1, 10.0, 10.0, 10.0, 10.0, 10.0, 10.0])
+    sp = np.full_like(y, 10.0)
+    starts, ends = segment_bounds(np.zeros(12, dtype=int), np.zeros(12, dtype=int))
+    m = tracking_metrics(t, y, sp, starts, ends)
+    assert m["overshoot"][0] == pytest.approx(1.0)
+    assert m["overshoot_pct"][0] == pytest.approx(10.0)
+    assert m["rise_time_s"][0] == pytest.approx(1.0)
+    assert m["settling_time_s"][0] == pytest.approx(5.0)  # 10.1은 2% band 안
+    assert m["steady_state_error"][0] == pytest.approx(0.0)
+
+
+def test_setpoint_metrics_segments_revisits(con):
+    """같은 step 재방문은 별도 구간, 라우터는 setpoint 있는 컬럼만 처리"""
+    revisit = make_traces(n_traces=7, seed=4).query("trace_id == 'standard_trace_007'").copy()
+    revisit.loc[revisit.index[-10:], "step_name"] = "STANDBY"
+    con.execute("INSERT INTO traces_dedup SELECT * FROM revisit")
+
+    assert build_setpoint_metrics(con) == 7
+    assert build_setpoint_metrics(con) == 0
+    seqs = con.execute(
+        "SELECT seq_no, step_name FROM setpoint_metrics WHERE trace_id = 'standard_trace_007' ORDER BY seq_no"
+    ).fetchall()
+    assert [s for _, s in seqs] == ["STANDBY", "B.FILL", "B.UP", "STANDBY"]
+
+    p = Parsed(column="pressact", top_n=3, flags={"setpoint_metric": "steady_state_error"})
+    df = con.execute(*choose_analysis_sql(p)).df()
+    assert len(df) == 3
+    assert df["trace_id"].iloc[0] == "standard_trace_006"
+
+    assert choose_analysis_sql(Parsed(column="vg11", flags={"is_overshoot": True, "setpoint_metric": "overshoot"})) is None
+
+
+def test_setpoint_route_falls_back_without_table(con):
+    """setpoint_metrics가 없는 DB: 오버슈트는 기존 빌더로 폴백, 다른 지표는 안내 오류"""
+    overshoot = Parsed(column="pressact", flags={"is_overshoot": True, "setpoint_metric": "overshoot"})
+    assert choose_analysis_sql(overshoot, con) is None
+    with pytest.raises(ValueError, match="setpoint_metrics"):
+        choose_analysis_sql(Parsed(column="pressact", flags={"setpoint_metric": "rise_time"}), con)
+
+    build_setpoint_metrics(con)
+    sql, _ = choose_analysis_sql(overshoot, con)
+    assert "setpoint_metrics" in sql
+
+
+def test_step_segments_run_length(con):
+    """연속 구간 단위 분할 (재방문 별도), trace 내 행 번호 오프셋"""
+    revisit = make_traces(n_traces=7, seed=4).query("trace_id == 'standard_trace_007'").copy()
+    revisit.loc[revisit.index[-10:], "step_name"] = "STANDBY"
+    con.execute("INSERT INTO traces_dedup SELECT * FROM revisit")
+
+    assert build_step_segments(con) == 7
+    assert build_step_segments(con) == 0
+
+    p = Parsed(filters={"trace_id": "standard_trace_007"}, flags={"is_step_sequence": True})
+    df = con.execute(*choose_analysis_sql(p)).df()
+    assert list(df["step_name"]) == ["STANDBY", "B.FILL", "B.UP", "STANDBY"]
+    assert list(df["n"]) == [40, 40, 30, 10]
+
+    offsets = con.execute(
+        "SELECT row_start, row_end FROM step_segments WHERE trace_id = 'standard_trace_007' ORDER BY seq_no"
+    ).fetchall()
+    assert offsets == [(0, 39), (40, 79), (80, 109), (110, 119)]
+    assert df["value"].iloc[0] == pytest.approx(19.5)
+
+
+def test_dwell_time_segments_and_raw_fallback(con):
+    """step_segments가 있으면 재방문 별도 구간, 없으면 원본 행 MIN/MAX로 폴백"""
+    revisit = make_traces(n_traces=7, seed=4).query("trace_id == 'standard_trace_007'").copy()
+    revisit.loc[revisit.index[-10:], "step_name"] = "STANDBY"
+    con.execute("INSERT INTO traces_dedup SELECT * FROM revisit")
+    p = Parsed(filters={"trace_id": "standard_trace_007"}, flags={"is_dwell_time": True})
+
+    sql, params = build_dwell_time_sql(p, con)
+    assert "step_segments" not in sql
+    raw = dict(con.execute(f"SELECT step_name, value FROM ({sql})", params).fetchall())
+    # 재방문이 합쳐져 첫 방문 시작 ~ 재방문 끝
+    assert raw["STANDBY"] == pytest.approx(59.5)
+
+    build_step_segments(con)
+    sql, params = build_dwell_time_sql(p, con)
+    assert "step_segments" in sql
+    seg = con.execute(f"SELECT step_name, value, n FROM ({sql})", params).df().set_index("step_name")
+    assert seg.loc["STANDBY", "value"] == pytest.approx((19.5 + 4.5) / 2)
+    assert seg.loc["STANDBY", "n"] == 2
+
+
+def _stable_avg_db(path):
+    """trace 2개: T1 = A→B→A (구간당 10행, 값 = 구간번호*10 + 행번호), T2 = A 30행 (값 100+행번호, 같은 시각)"""
+    ts = pd.Timestamp("2024-01-01") + pd.to_timedelta(np.arange(30), unit="s")
+    df = pd.concat([
+        pd.DataFrame({"trace_id": "T1", "step_name": ["A"] * 10 + ["B"] * 10 + ["A"] * 10,
+                      "timestamp": ts, "pressact": np.arange(30, dtype=float)}),
+        pd.DataFrame({"trace_id": "T2", "step_name": "A",
+                      "timestamp": ts, "pressact": 100.0 + np.arange(30)}),
+    ], ignore_index=True)
+    c = duckdb.connect(str(path))
+    c.execute("CREATE TABLE traces_dedup AS SELECT * FROM df")
+    return c
+
+
+def test_stable_avg_settle_and_trace_boundaries(tmp_path):
+    """settle_frac/settle_s 제외 구간, 재방문 구분, trace 경계, top_n 순위 (step_segments 유무 동일)"""
+    c = _stable_avg_db(tmp_path / "stable.duckdb")
+
+    def run(p):
+        sql, params = build_stable_avg_sql(p, "pressact", c)
+        return [(r[0], r[1], r[2], round(r[3], 6), r[4]) for r in c.execute(sql, params).fetchall()]
+
+    for with_segments in (False, True):
+        if with_segments:
+            build_step_segments(c)
+        # 기본 settle_frac 0.1: 9초 구간 → 0.9초 제외(1행), 29초 구간 → 2.9초 제외(3행)
+        assert run(Parsed(flags={"is_stable_avg": True})) == [
+            ("T1", "A", 1, 5.0, 9), ("T1", "B", 2, 15.0, 9), ("T1", "A", 3, 25.0, 9),
+            ("T2", "A", 1, 116.0, 27),
+        ]
+        assert run(Parsed(flags={"is_stable_avg": True, "settle_s": 5})) == [
+            ("T1", "A", 1, 7.0, 5), ("T1", "B", 2, 17.0, 5), ("T1", "A", 3, 27.0, 5),
+            ("T2", "A", 1, 117.0, 25),
+        ]
+        # 구간은 trace 안에서만 (T2의 같은 시각 행이 섞이지 않음), step 필터는 구간 계산 뒤
+        assert run(Parsed(filters={"trace_id": "T1", "step_name": "A"}, flags={"is_stable_avg": True})) == [
+            ("T1", "A", 1, 5.0, 9), ("T1", "A", 3, 25.0, 9),
+        ]
+        # top_n은 value 순위 상위 N
+        assert run(Parsed(top_n=2, flags={"is_stable_avg": True})) == [
+            ("T2", "A", 1, 116.0, 27), ("T1", "A", 3, 25.0, 9),
+        ]
+    c.close()
+
+
+def test_comoments_chunked_matches_numpy():
+    """청크 누적 상관 = 한 번에 계산한 상관 (결측 없는 경우)"""
+    rng = np.random.default_rng(5)
+    x = rng.normal(size=(1000, 4)) + np.array([500.0, 0.0, -3.0, 1e4])
+    x[:, 1] += 0.8 * x[:, 0]
+    acc = CoMoments(4)
+    for chunk in np.array_split(x, 7):
+        acc.update(chunk)
+    np.testing.assert_allclose(acc.correlation(), np.corrcoef(x, rowvar=False), atol=1e-9)
+
+
+def test_correlation_engine_pairwise_and_spearman(con):
+    """pairwise 결측 처리, Spearman 근사, 라우팅 결과"""
+    con.execute("UPDATE traces_dedup SET vg11 = NULL WHERE step_name = 'STANDBY'")
+    r, n = correlation_matrix(con, COLUMNS, chunk_vectors=1)
+    assert r[0, 1] > 0.99  # pressact ~ pressset (step별 setpoint)
+    assert n[0, 2] == 6 * 40 * 2
+
+    rs, _ = correlation_matrix(con, COLUMNS, method="spearman")
+    assert rs[0, 1] > 0.8
+
+    p = Parsed(column="pressact", top_n=1, flags={"is_correlation": True, "corr_target": "pressact"})
+    sql, params = choose_analysis_sql(p, con)
+    df = con.execute(sql, params).df()
+    assert list(df[["column_a", "column_b"]].iloc[0]) == ["pressact", "pressset"]
+    with pytest.raises(ValueError):
+        build_correlation_sql(p)
+
+    # 라우팅 결과 = 청크 엔진 top_pairs (CLI와 같은 Pearson/Spearman 정의)
+    for method in CORRELATION_METHODS:
+        p = Parsed(top_n=3, flags={"is_correlation": True, "corr_method": method})
+        sql, params = build_correlation_sql(p, con)
+        got = con.execute(sql, params).fetchall()
+        r, n = correlation_matrix(con, COLUMNS, method)
+        assert [tuple(row) for row in got] == top_pairs(r, n, COLUMNS, 3)
+
+
+def test_correlation_stops_when_job_cancelled(con):
+    """실행기 작업이 취소되면 청크 사이에서 중단"""
+    calls = []
+
+    def cancelled():
+        calls.append(1)
+        return len(calls) > 1
+
+    with pytest.raises(RuntimeError):
+        correlation_matrix(con, COLUMNS, chunk_vectors=1, cancelled=cancelled)
+    assert len(calls) == 2
+
+
+def test_step_pca_flags_broken_relationship():
+    """두 센서의 상관이 깨진 샘플은 개별 값이 정상 범위여도 SPE가 큼"""
+    rng = np.random.default_rng(6)
+    a = rng.normal(size=200)
+    x = np.column_stack([a, a + rng.normal(0, 0.05, 200), rng.normal(size=200)])
+    model = StepPCA.fit(x, ["a", "b", "c"])
+    assert len(model.eigenvalues) == 2
+
+    probe = np.array([[1.0, -1.0, 0.0], [1.0, 1.0, 0.0]])
+    t2, spe, _, spe_c = model.score(probe, ["a", "b", "c"])
+    assert spe[0] > model.spe_limit > spe[1]
+    assert set(np.argsort(-spe_c[0])[:2]) == {0, 1}
+
+
+def test_pca_scores_ranking(con):
+    """ingest 갱신 → 이상 공정 랭킹에서 편차 trace가 1위"""
+    extra = make_traces(n_traces=12, seed=7)
+    extra = extra[extra["trace_id"] > "standard_trace_006"]
+    con.execute("INSERT INTO traces_dedup SELECT * FROM extra")
+
+    assert refresh_pca(con) == 12
+    assert refresh_pca(con) == 0
+
+    p = Parsed(top_n=3, flags={"is_pca_anomaly": True}, analysis_type="stability")
+    df = con.execute(*choose_analysis_sql(p)).df()
+    assert df["trace_id"].iloc[0] == "standard_trace_006"
+    assert "pressact" in df["top_columns"].iloc[0]
@@ -0,0 +1,215 @@
+"""
+벤치마크 도구(src/bench) 테스트: 측정 자체가 아니라 입력 생성/비교 로직만 확인
+"""
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import duckdb
+import numpy as np
+from fastapi import FastAPI, Response
+
+from src.bench.load_test import make_client, question_mix, run_level
+
+from src.bench.parser_bench import _alloc_stage, _stages, compare, expand_questions, load_questions
+from src.analysis.router import choose_analysis_sql
+from src.bench import query_bench
+from src.bench.query_bench import CASES, prepare_analysis, run_case
+from src.create_dummy_data import FleetModel, write_fleet
+from src.nl_parse_v2 import parse_question
+
+COLUMNS = [("pressact", "pressure"), ("pressset", "pressure"), ("vg11", "pressure"), ("tempact_c", "temperature")]
+
+
+def test_expand_is_deterministic_and_keeps_corpus():
+    questions = load_questions()
+    groups = [["챔버 압력", "압력", "pressure"]]
+    a = expand_questions(questions, len(questions) + 50, seed=3, groups=groups)
+    b = expand_questions(questions, len(questions) + 50, seed=3, groups=groups)
+    assert a == b
+    assert a[: len(questions)] == questions
+    assert len(a) == len(questions) + 50
+
+
+def test_expand_substitutes_aliases_and_numbers():
+    out = expand_questions(["standard_trace_001 압력 top5"], 200, seed=0, groups=[["챔버 압력", "압력", "pressure"]])
+    assert any("pressure" in q for q in out[1:])
+    assert any("standard_trace_001" not in q for q in out[1:])
+    assert all("top" in q for q in out)
+
+
+def test_compare_flags_slowdown_only():
+    base = {"parse_v2": {"p50_us": 100.0, "p99_us": 400.0}}
+    assert compare({"parse_v2": {"p50_us": 105.0, "p99_us": 300.0}}, base) == []
+    regressions = compare({"parse_v2": {"p50_us": 130.0, "p99_us": 400.0}}, base)
+    assert len(regressions) == 1 and regressions[0].startswith("parse_v2.p50_us")
+
+
+def test_compare_flags_missing_stage():
+    base = {"parse_v2": {"p50_us": 100.0, "p99_us": 400.0}, "build_sql": {"p50_us": 50.0, "p99_us": 90.0}}
+    regressions = compare({"parse_v2": {"p50_us": 100.0, "p99_us": 400.0}}, base)
+    assert len(regressions) == 1 and regressions[0].startswith("build_sql")
+
+
+def test_alloc_stage_reports_peak_not_retained():
+    """호출 중 잠깐 쓰고 버린 메모리는 peak에, 남긴 메모리는 retained에"""
+    kept = []
+    peak, peak_max, retained = _alloc_stage(lambda x: len(bytearray(200_000)), range(4))
+    assert peak >= 200_000 and peak_max >= 200_000 and retained < 10_000
+    _, _, retained = _alloc_stage(lambda x: kept.append(bytearray(200_000)), range(4))
+    assert retained >= 200_000
+
+
+def test_build_sql_stage_fails_loudly(monkeypatch):
+    monkeypatch.setitem(sys.modules, "src.sql_builder", None)  # import 실패 흉내
+    with pytest.raises(RuntimeError, match="--skip-build-sql"):
+        _stages()
+    assert [name for name, _ in _stages(skip_build_sql=True)] == ["normalize", "parse_v2"]
+
+
+def test_fleet_model_is_deterministic_and_step_shaped():
+    a = FleetModel(4, 5, seed=1, columns=COLUMNS)
+    b = FleetModel(4, 5, seed=1, columns=COLUMNS)
+    traces = np.arange(4)
+    df = a.generate(traces)
+    assert len(df) == a.total_rows
+    assert np.array_equal(df["pressact"].to_numpy(), b.generate(traces)["pressact"].to_numpy())
+    # 설정값은 step 안에서 상수, trace 안 행 번호는 0부터 연속
+    assert (df.groupby(["trace_no", "step_idx"])["pressset"].nunique() == 1).all()
+    first = df[df["trace_no"] == 1]
+    assert first["no"].tolist() == list(range(len(first)))
+    assert first["timestamp"].is_monotonic_increasing
+
+
+def test_write_fleet_trace_ids_past_999(tmp_path):
+    db = tmp_path / "fleet.duckdb"
+    rows = write_fleet(1001, 2, db, step_seconds=(1.0, 1.0), batch_rows=500, verbose=False)
+    con = duckdb.connect(str(db), read_only=True)
+    try:
+        n, distinct, wide = con.execute(
+            "SELECT COUNT(*), COUNT(DISTINCT trace_id), COUNT(DISTINCT trace_id) FILTER (WHERE length(trace_id) > 18) FROM traces_dedup"
+        ).fetchone()
+    finally:
+        con.close()
+    assert n == rows
+    assert distinct == 1001 and wide == 2  # standard_trace_1000, standard_trace_1001
+
+
+def test_write_fleet_builds_step_segments(tmp_path):
+    db = tmp_path / "fleet.duckdb"
+    write_fleet(3, 4, db, step_seconds=(1.0, 1.0), verbose=False)
+    con = duckdb.connect(str(db), read_only=True)
+    try:
+        n_traces, n_segments = con.execute("SELECT COUNT(DISTINCT trace_id), COUNT(*) FROM step_segments").fetchone()
+    finally:
+        con.close()
+    assert (n_traces, n_segments) == (3, 12)
+
+
+def test_run_case_reports_stages_and_errors():
+    con = duckdb.connect()
+    con.execute("CREATE TABLE traces AS SELECT range AS x FROM range(10)")
+    ok = run_case(con, "q", repeat=2, parse=lambda q: q, choose=lambda p, con: ("SELECT x FROM traces WHERE x < ?", [3]))
+    assert ok["rows"] == 3 and set(ok) == {"parse", "sql", "exec", "rows"}
+    bad = run_case(con, "q", repeat=2, parse=lambda q: q, choose=lambda p, con: ("SELECT nope FROM traces", []))
+    assert bad["error"].startswith("BinderException")
+    con.close()
+
+
+def test_prepare_analysis_routes_precomputed_cases(tmp_path):
+    """--generate 후 골든/PCA/프로파일 비교 케이스가 사전 계산 테이블로 라우팅되어 결과를 낸다"""
+    db = tmp_path / "fleet.duckdb"
+    write_fleet(6, 4, db, step_seconds=(1.0, 1.0), verbose=False)
+    counts = prepare_analysis(db)
+    assert counts["pca"] == 6 and counts["golden"] == 6
+    cases = dict(CASES)
+    con = duckdb.connect(str(db), read_only=True)
+    try:
+        for name in ("golden_deviation", "pca_anomaly", "profile_compare"):
+            routed = choose_analysis_sql(parse_question(cases[name]), con)
+            assert routed is not None, name
+            assert con.execute(*routed).fetchall(), name
+    finally:
+        con.close()
+
+
+def test_main_exits_nonzero_when_a_case_fails(tmp_path, monkeypatch):
+    db = tmp_path / "q.duckdb"
+    con = duckdb.connect(str(db))
+    con.execute("CREATE TABLE traces AS SELECT 't' || (range % 2) AS trace_id, range AS x FROM range(10)")
+    con.close()
+    ok = {"parse": {"median_ms": 0.0, "min_ms": 0.0, "max_ms": 0.0}, "rows": 1}
+    ok.update(sql=ok["parse"], exec=ok["parse"])
+    monkeypatch.setattr(query_bench, "run_case", lambda con, q, repeat: {"error": "X"} if "이상치" in q else ok)
+    out = tmp_path / "r.json"
+    assert query_bench.main(["--db", str(db), "--only", "scalar_avg", "--out", str(out)]) == 0
+    assert query_bench.main(["--db", str(db), "--only", "scalar_avg", "outlier", "--out", str(out)]) == 2
+    assert "error" in json.loads(out.read_text(encoding="utf-8"))["cases"]["outlier"]
+
+
+def test_question_mix_weights_sources_and_recency():
+    questions, w = question_mix(["a", "b"], ["b", "c"], ["new", "old"], {"templates": 1.0, "corpus": 1.0, "history": 2.0})
+    weight = dict(zip(questions, w))
+    assert abs(w.sum() - 1.0) < 1e-9
+    assert weight["b"] > weight["a"]          # 두 출처에 있으면 합산
+    assert weight["new"] > weight["old"]      # 최근 이력이 더 무거움
+    assert weight["new"] + weight["old"] == pytest.approx(0.5)
+
+
+def test_load_level_reports_per_endpoint_errors():
+    app = FastAPI()
+
+    @app.get("/ok")
+    def ok(q: str):
+        return {"q": q}
+
+    @app.get("/bad")
+    def bad(q: str):
+        return Response(status_code=400)
+
+    async def scenario():
+        async with make_client(app=app) as client:
+            return await run_level(
+                client, 3, ["x", "y"], np.array([0.5, 0.5]), duration_s=30, max_requests=40,
+                endpoints={"ok": ("/ok", 1.0), "bad": ("/bad", 1.0)},
+            )
+
+    r = asyncio.run(scenario())
+    assert r["all"]["n"] == 40
+    assert r["ok"]["errors"] == 0 and r["bad"]["error_rate"] == 1.0
+    assert r["ok"]["n"] + r["bad"]["n"] == 40
+
+
+def test_load_level_detects_errors_returned_as_200():
+    """/api/query {"ok": false}, /view 오류 박스, /plot 오류 PNG는 200이어도 오류로 셈"""
+    app = FastAPI()
+
+    @app.get("/api/query")
+    def api_query(q: str):
+        return {"ok": False, "error": "x"} if q == "bad" else {"question": q, "data": []}
+
+    @app.get("/view")
+    def view(q: str):
+        body = '<div class="error-box">오류</div>' if q == "bad" else "<div>ok</div>"
+        return Response(content=body, media_type="text/html")
+
+    @app.get("/plot")
+    def plot(q: str):
+        return Response(content=b"png", media_type="image/png", headers={"X-Plot-Error": "1"} if q == "bad" else {})
+
+    async def scenario():
+        async with make_client(app=app) as client:
+            return await run_level(
+                client, 2, ["ok", "bad"], np.array([0.5, 0.5]), duration_s=30, max_requests=60,
+                endpoints={"api_query": ("/api/query", 1.0), "view": ("/view", 1.0), "plot": ("/plot", 1.0)},
+            )
+
+    r = asyncio.run(scenario())
+    for ep in ("api_query", "view", "plot"):
+        assert 0 < r[ep]["errors"] < r[ep]["n"]
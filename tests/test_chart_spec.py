@@ -0,0 +1,107 @@
+"""
+브라우저 렌더링용 차트 스펙(src/charts/spec.py) 테스트
+"""
+import json
+import re
+import subprocess
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.charts.spec import build_chart_spec, COLOR_FIELD, HIGHLIGHT_FIELD, OTHERS_COLOR, RANK_COLORS
+
+
+def _parsed(**kw):
+    base = dict(
+        agg="avg", col="pressact", group_by=None, top_n=None, analysis_type="ranking",
+        trace_id=None, trace_ids=[], step_name=None, step_names=[], date_start=None, date_end=None,
+    )
+    base.update(kw)
+    return SimpleNamespace(**base)
+
+
+def _rows(out):
+    data = out["data"]
+    cols = list(data)
+    return [dict(zip(cols, vals)) for vals in zip(*data.values())]
+
+
+def test_ranking_horizontal_bar_top_n_and_colors():
+    df = pd.DataFrame({"trace_id": [f"t{i}" for i in range(10)], "value": np.arange(10, 0, -1.0), "n": 5})
+    out = build_chart_spec(df, _parsed(group_by="trace_id", top_n=5))
+    assert out["chart_type"] == "horizontal_bar"
+    assert out["spec"]["data"] == {"name": "table"}
+    assert out["data"]["trace_id"] == ["t0", "t1", "t2", "t3", "t4"]
+    assert set(out["data"]) == {"trace_id", "value", COLOR_FIELD}
+    assert out["data"][COLOR_FIELD][:3] == list(RANK_COLORS)
+    bar = out["spec"]["layer"][0]
+    assert bar["encoding"]["y"]["sort"] is None
+    json.dumps(out)
+
+
+def test_group_profile_many_steps_summarized_with_others():
+    df = pd.DataFrame({"step_name": [f"S{i:02d}" for i in range(20)], "value": np.arange(20.0)})
+    out = build_chart_spec(df, _parsed(group_by="step_name", analysis_type="group_profile"))
+    assert out["chart_type"] == "horizontal_bar"
+    rows = _rows(out)
+    assert len(rows) == 8
+    assert rows[0]["value"] == 19.0
+    assert rows[-1]["step_name"] == "Others (13개)"
+    assert rows[-1][COLOR_FIELD] == OTHERS_COLOR
+    assert rows[-1]["value"] == np.arange(13.0).mean()
+
+
+def test_group_profile_bar_and_missing_values():
+    df = pd.DataFrame({"step_name": ["A", "B", "C"], "value": [1.0, None, 3.0]})
+    out = build_chart_spec(df, _parsed(group_by="step_name", analysis_type="group_profile"))
+    assert out["chart_type"] == "bar"
+    assert out["data"]["value"] == [1.0, None, 3.0]
+    assert out["spec"]["mark"]["type"] == "bar"
+
+
+def test_date_group_is_sorted_line():
+    df = pd.DataFrame({"date": ["2024-01-03", "2024-01-01", "2024-01-02"], "value": [3.0, 1.0, 2.0]})
+    out = build_chart_spec(df, _parsed(group_by="date", analysis_type="group_profile"))
+    assert out["chart_type"] == "line"
+    assert out["data"]["date"] == ["2024-01-01", "2024-01-02", "2024-01-03"]
+    assert out["spec"]["layer"][0]["mark"]["type"] == "line"
+
+
+def test_comparison_grouped_bar_highlights_max_diff():
+    df = pd.DataFrame({
+        "step_name": ["A", "B", "C"],
+        "trace1_avg": [1.0, 2.0, 3.0],
+        "trace2_avg": [1.5, 5.0, 3.1],
+        "diff": [0.5, 3.0, 0.1],
+    })
+    out = build_chart_spec(df, _parsed(analysis_type="comparison", trace_ids=["tr_a", "tr_b"]))
+    assert out["chart_type"] == "grouped_bar"
+    assert out["data"][HIGHLIGHT_FIELD] == [False, True, False]
+    assert out["spec"]["encoding"]["color"]["scale"]["domain"] == ["tr_a", "tr_b"]
+    assert "tr_a" in out["spec"]["transform"][1]["calculate"]
+
+
+def test_empty_and_single_value():
+    assert build_chart_spec(pd.DataFrame(), _parsed())["chart_type"] == "empty"
+    out = build_chart_spec(pd.DataFrame({"value": [1.25]}), _parsed())
+    assert out["chart_type"] == "text" and out["spec"] is None
+
+
+def test_spec_module_does_not_import_matplotlib():
+    code = "import sys; import src.charts.spec; print('matplotlib' in sys.modules)"
+    out = subprocess.run([sys.executable, "-c", code], cwd=PROJECT_ROOT, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "False"
+
+
+def test_index_page_uses_vendored_vega():
+    html = (PROJECT_ROOT / "templates" / "index.html").read_text(encoding="utf-8")
+    assert "cdn.jsdelivr" not in html
+    for name in re.findall(r'src="/static/(vendor/vega/[^"]+)"', html):
+        assert (PROJECT_ROOT / "static" / name).is_file()
+    assert html.count('src="/static/vendor/vega/') == 3
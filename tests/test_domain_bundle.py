@@ -0,0 +1,105 @@
+"""
+도메인 번들(domain/bundle.py) 테스트: 컴파일 결과, 검증 오류, 저장/재사용, 원본 변경 시 교체
+"""
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from domain import bundle as domain_bundle
+from domain.bundle import DomainBundleError, compile_bundle, read_bundle, source_fingerprint, write_bundle
+
+
+@pytest.fixture(autouse=True)
+def bundle_file(tmp_path, monkeypatch):
+    """번들 저장 위치를 임시 디렉터리로 (data_out/.cache를 건드리지 않음)"""
+    path = tmp_path / "cache" / "bundle.pkl"
+    monkeypatch.setattr(domain_bundle, "BUNDLE_FILE", path)
+    return path
+
+
+@pytest.fixture
+def sources(tmp_path, monkeypatch):
+    """원본 YAML 복사본을 가리키는 SOURCES (테스트에서 수정 가능)"""
+    copied = {}
+    for name, path in domain_bundle.SOURCES.items():
+        dst = tmp_path / "src" / f"{name}.yaml"
+        dst.parent.mkdir(exist_ok=True)
+        shutil.copy(path, dst)
+        copied[name] = dst
+    monkeypatch.setattr(domain_bundle, "SOURCES", copied)
+    monkeypatch.setattr(domain_bundle, "CHECK_INTERVAL_S", 0.0)
+    monkeypatch.setattr(domain_bundle, "_bundle", None)
+    return copied
+
+
+def test_compiled_indexes_match_yaml():
+    b = compile_bundle()
+    assert b.synonym_to_standard["챔버 압력"] == ("column", "pressact")
+    assert [len(s) for s, _ in b.sorted_synonyms] == sorted((len(s) for s in b.synonym_to_standard), reverse=True)
+    assert b.csv_column["step_name"] == "step_name"
+    assert b.format_specs["vg11"] == (2, "mTorr")
+    assert b.format_specs["tempact_c"] == (1, "°C")
+    assert b.setpoint_pairs["pressact"] == "pressset"
+    assert b.alias_map["챔버압력"] == "pressact"
+    assert b.physical_to_semantic["pressact"] == "pressure.chamber.act"
+
+
+def test_validation_collects_all_errors(sources):
+    text = sources["patterns"].read_text(encoding="utf-8")
+    sources["patterns"].write_text(text + '\nbroken:\n  patterns:\n    - "top(\\\\d+"\n', encoding="utf-8")
+    sources["columns"].write_text(
+        sources["columns"].read_text(encoding="utf-8").replace('csv_columns: ["vg12"]', "csv_columns: []"),
+        encoding="utf-8",
+    )
+    with pytest.raises(DomainBundleError) as e:
+        compile_bundle(sources)
+    assert any(m.startswith("patterns.broken") for m in e.value.errors)
+    assert any(m.startswith("columns.vg12.csv_columns") for m in e.value.errors)
+
+
+def test_artifact_reused_only_for_same_fingerprint(sources, tmp_path):
+    b = compile_bundle(sources)
+    path = tmp_path / "b.pkl"
+    write_bundle(b, path)
+    assert read_bundle(b.fingerprint, path).alias_map == b.alias_map
+    assert read_bundle("other", path) is None
+
+
+def test_get_bundle_swaps_when_source_changes(sources):
+    first = domain_bundle.get_bundle()
+    assert domain_bundle.get_bundle() is first
+    assert domain_bundle.BUNDLE_FILE.exists()
+
+    text = sources["metric_synonyms"].read_text(encoding="utf-8")
+    sources["metric_synonyms"].write_text(text + "\nmedian:\n  - 가운데값\n", encoding="utf-8")
+    assert source_fingerprint(sources) != first.fingerprint
+    second = domain_bundle.get_bundle()
+    assert second is not first
+    assert second.synonym_to_standard["가운데값"] == ("metric", "median")
+
+
+def test_resolver_matches_by_registry_order():
+    from src.semantic_resolver import resolve_semantic_to_physical
+
+    assert resolve_semantic_to_physical("pressact") == "pressact"       # 직접
+    assert resolve_semantic_to_physical("챔버 압력 평균") == "pressact"  # 텍스트 안의 별칭
+    assert resolve_semantic_to_physical("vg 11 최대") == "vg11"
+    assert resolve_semantic_to_physical("압") == "pressact"             # 별칭의 일부
+    assert resolve_semantic_to_physical("xyz") is None
+    assert resolve_semantic_to_physical("!!") is None
+
+
+def test_metadata_is_shared_and_read_only():
+    from src.semantic_resolver import get_metadata_by_physical_column
+
+    meta = get_metadata_by_physical_column("pressact")
+    assert meta is get_metadata_by_physical_column("pressact")
+    assert meta["description"] == "챔버 압력"
+    with pytest.raises(TypeError):
+        meta["unit"] = "Pa"
+    assert get_metadata_by_physical_column("nope") is None
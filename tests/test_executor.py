@@ -0,0 +1,160 @@
+"""
+DuckDB 질의 실행기(src/services/executor.py) 테스트
+"""
+import asyncio
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import duckdb
+from src.services.executor import (
+    QueryExecutor, QueueFull, QueryTimeout, QueryCancelled, StreamExecutor, current_job_cancelled,
+)
+
+# 수십 초 이상 걸리는 질의 (interrupt로만 끝남)
+SLOW_SQL = "SELECT COUNT(*) FROM range(1000000000) a, range(1000) b WHERE a.range + b.range < 0"
+
+
+@pytest.fixture
+def db(tmp_path):
+    path = tmp_path / "exec.duckdb"
+    duckdb.connect(str(path)).close()
+    return path
+
+
+class FakeRequest:
+    def __init__(self, after_s):
+        self.t0 = time.monotonic()
+        self.after_s = after_s
+
+    async def is_disconnected(self):
+        return time.monotonic() - self.t0 > self.after_s
+
+
+def test_run_returns_result(db):
+    ex = QueryExecutor(max_workers=2, max_queue=2)
+    out = asyncio.run(ex.run(lambda con: con.execute("SELECT 41 + 1").fetchone()[0], db))
+    assert out == 42
+    assert ex.in_flight == 0
+
+
+def test_timeout_interrupts_query(db):
+    ex = QueryExecutor(max_workers=1, max_queue=0)
+    t0 = time.monotonic()
+    with pytest.raises(QueryTimeout):
+        asyncio.run(ex.run(lambda con: con.execute(SLOW_SQL).fetchall(), db, timeout_s=0.3))
+    # 중단된 작업이 슬롯을 돌려줄 때까지 대기 후 다음 작업 가능
+    while ex.in_flight:
+        time.sleep(0.05)
+    assert time.monotonic() - t0 < 10
+    assert asyncio.run(ex.run(lambda con: 1, db)) == 1
+
+
+def test_disconnect_cancels(db):
+    ex = QueryExecutor(max_workers=1, max_queue=0)
+    with pytest.raises(QueryCancelled):
+        asyncio.run(ex.run(lambda con: con.execute(SLOW_SQL).fetchall(), db, request=FakeRequest(0.2)))
+
+
+def test_queue_full_gives_retry_hint(db):
+    ex = QueryExecutor(max_workers=1, max_queue=1)
+    gate = threading.Event()
+
+    async def scenario():
+        busy = [asyncio.ensure_future(ex.run(lambda con: gate.wait(5), db)) for _ in range(2)]
+        await asyncio.sleep(0.1)
+        try:
+            with pytest.raises(QueueFull) as err:
+                await ex.run(lambda con: 1, db)
+            assert err.value.retry_after >= 1
+        finally:
+            gate.set()
+        await asyncio.gather(*busy)
+
+    asyncio.run(scenario())
+    assert ex.in_flight == 0
+
+
+def test_current_job_cancelled_visible_in_worker(db):
+    """작업 스레드에서 자기 작업의 취소 여부 확인 (fetch_df 대기용), 실행기 밖은 False"""
+    ex = QueryExecutor(max_workers=1, max_queue=0)
+    seen = {}
+    done = threading.Event()
+
+    def wait_for_cancel(con):
+        seen["before"] = current_job_cancelled()
+        deadline = time.monotonic() + 5
+        while not current_job_cancelled() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        seen["after"] = current_job_cancelled()
+        done.set()
+
+    with pytest.raises(QueryTimeout):
+        asyncio.run(ex.run(wait_for_cancel, db, timeout_s=0.2))
+    assert done.wait(5)
+    assert seen == {"before": False, "after": True}
+    assert not current_job_cancelled()
+
+
+def test_run_without_connection():
+    ex = QueryExecutor(max_workers=1, max_queue=0)
+    assert asyncio.run(ex.run(lambda con: con, None)) is None
+    assert ex.in_flight == 0
+
+
+def _rows(con, n=5):
+    for (i,) in con.execute(f"SELECT range FROM range({n})").fetchall():
+        yield f"{i}\n".encode()
+
+
+def test_stream_executor_streams_and_raises_before_first_chunk(db):
+    ex = StreamExecutor(max_workers=1, max_queue=0, buffer_chunks=1)
+
+    async def collect(gen_fn):
+        return [c async for c in await ex.open(gen_fn, db)]
+
+    assert asyncio.run(collect(_rows)) == [b"0\n", b"1\n", b"2\n", b"3\n", b"4\n"]
+    assert asyncio.run(collect(lambda con: iter(()))) == []
+    with pytest.raises(duckdb.Error):
+        asyncio.run(collect(lambda con: iter([con.execute("SELECT no_such_column").fetchall()])))
+    while ex.in_flight:
+        time.sleep(0.05)
+
+
+def test_stream_executor_bounds_and_releases_on_close(db):
+    ex = StreamExecutor(max_workers=1, max_queue=0, buffer_chunks=1)
+
+    async def scenario():
+        body = await ex.open(lambda con: _rows(con, 10_000), db)
+        assert await body.__anext__() == b"0\n"
+        # 스트림이 작업 스레드를 점유 중이면 다음 내보내기는 즉시 QueueFull
+        with pytest.raises(QueueFull):
+            await ex.open(_rows, db)
+        # 응답이 중단되면(연결 끊김) 작업 종료 후 슬롯 반환
+        await body.aclose()
+
+    asyncio.run(scenario())
+    t0 = time.monotonic()
+    while ex.in_flight and time.monotonic() - t0 < 5:
+        time.sleep(0.05)
+    assert ex.in_flight == 0
+
+
+def test_stream_executor_times_out_slow_chunk(db):
+    ex = StreamExecutor(max_workers=1, max_queue=0, timeout_s=0.3)
+
+    async def scenario():
+        await ex.open(lambda con: iter([con.execute(SLOW_SQL).fetchall()]), db)
+
+    with pytest.raises(QueryTimeout):
+        asyncio.run(scenario())
+    t0 = time.monotonic()
+    while ex.in_flight and time.monotonic() - t0 < 10:
+        time.sleep(0.05)
+    assert ex.in_flight == 0
@@ -0,0 +1,92 @@
+"""
+스트리밍 내보내기(src/services/export.py) 테스트
+"""
+import asyncio
+import io
+import json
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import duckdb
+from src.services.executor import StreamExecutor
+from src.services.export import export_chunks, open_export, stream_query
+
+
+@pytest.fixture
+def db(tmp_path):
+    """10만 행 테이블을 가진 임시 DuckDB 파일"""
+    path = tmp_path / "export.duckdb"
+    con = duckdb.connect(str(path))
+    con.execute("""
+        CREATE TABLE t AS
+        SELECT i AS id, 'trace_' || (i % 7) AS trace_id, i * 0.5 AS value
+        FROM range(100000) r(i)
+    """)
+    con.close()
+    return path
+
+
+def test_csv_stream_chunks_with_bom(db):
+    """BOM 1회 + 헤더 1회, 여러 청크로 나뉘어도 전체 행 복원"""
+    chunks = list(stream_query(db, "SELECT * FROM t ORDER BY id", [], fmt="csv", chunk_vectors=4))
+    assert len(chunks) > 3
+    body = b"".join(chunks)
+    assert body.startswith(b"\xef\xbb\xbf") and body.count(b"\xef\xbb\xbf") == 1
+    df = pd.read_csv(io.BytesIO(body), encoding="utf-8-sig")
+    assert list(df.columns) == ["id", "trace_id", "value"]
+    assert len(df) == 100000
+
+
+def test_ndjson_stream_with_params(db):
+    """NDJSON 한 줄 = 한 행, 파라미터 바인딩 유지"""
+    body = b"".join(stream_query(db, "SELECT * FROM t WHERE trace_id = ? ORDER BY id LIMIT 3", ["trace_3"], fmt="ndjson"))
+    rows = [json.loads(line) for line in body.decode("utf-8").splitlines()]
+    assert [r["id"] for r in rows] == [3, 10, 17]
+
+
+def test_open_export_raises_before_streaming(db):
+    """SQL 오류는 응답 시작 전에 발생"""
+    with pytest.raises(duckdb.Error):
+        open_export(db, "SELECT no_such_column FROM t", [])
+    with pytest.raises(ValueError):
+        open_export(db, "SELECT 1", [], fmt="xlsx")
+
+
+def test_stream_alongside_executor_connection(db):
+    """실행기(read-write) 연결이 열려 있어도 같은 프로세스에서 내보내기 가능"""
+    held = duckdb.connect(str(db))
+    try:
+        body = b"".join(stream_query(db, "SELECT COUNT(*) AS n FROM t", [], fmt="ndjson"))
+        assert json.loads(body) == {"n": 100000}
+        with pytest.raises(duckdb.Error):
+            list(stream_query(db, "SELECT 1", [], read_only=True))
+    finally:
+        held.close()
+
+
+def test_arrow_stream_roundtrip(db):
+    """Arrow IPC 스트림 (pyarrow 있을 때만)"""
+    pa = pytest.importorskip("pyarrow")
+    body = b"".join(stream_query(db, "SELECT * FROM t", [], fmt="arrow", chunk_vectors=8))
+    table = pa.ipc.open_stream(body).read_all()
+    assert table.num_rows == 100000
+
+
+def test_export_through_stream_executor(db):
+    """내보내기 전용 실행기: SQL 생성·스트리밍이 작업 스레드 연결에서, 결과는 stream_query와 동일"""
+    ex = StreamExecutor(max_workers=1, max_queue=0)
+    sql = "SELECT * FROM t WHERE trace_id = ? ORDER BY id"
+
+    async def collect():
+        body = await ex.open(lambda con: export_chunks(con, sql, ["trace_2"], "csv", chunk_vectors=2), db)
+        return b"".join([c async for c in body])
+
+    assert asyncio.run(collect()) == b"".join(stream_query(db, sql, ["trace_2"], fmt="csv", chunk_vectors=2))
+    with pytest.raises(ValueError):
+        asyncio.run(ex.open(lambda con: export_chunks(con, "SELECT 1", [], "xlsx"), db))
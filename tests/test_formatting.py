@@ -0,0 +1,104 @@
+"""
+결과 표시용 컬럼 단위 포맷팅(src/services/formatting.py) 테스트
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.services.formatting import (
+    COL_FORMAT_KEYS,
+    COUNT_KEYS,
+    format_column,
+    format_magnitude,
+    format_records,
+    format_value,
+    get_format_spec,
+)
+from src.charts.helpers import add_others_to_chart
+
+
+def _format_row(row: dict, parsed: dict) -> dict:
+    """행 단위 기준 구현 (벡터화 이전 app.format_row 규칙)"""
+    col = parsed.get("col") or "pressact"
+    out = {}
+    for key, value in row.items():
+        if key == "value":
+            out[key] = format_value(value, col, parsed.get("agg", "avg"))
+        elif key in COL_FORMAT_KEYS:
+            out[key] = format_value(value, col, "avg")
+        elif key in COUNT_KEYS:
+            out[key] = int(value) if value else 0
+        else:
+            out[key] = value
+    return out
+
+
+@pytest.fixture
+def df():
+    rng = np.random.default_rng(0)
+    n = 200
+    value = rng.normal(0, 500, n)
+    value[::17] = np.nan
+    return pd.DataFrame({
+        "trace_id": [f"standard_trace_{i:03d}" for i in range(n)],
+        "value": value,
+        "std": rng.random(n) * 3,
+        "min_val": value - 1,
+        "n": rng.integers(0, 10_000, n),
+        "ts": pd.date_range("2024-01-01", periods=n, freq="min"),
+    })
+
+
+@pytest.mark.parametrize("parsed", [
+    {"col": "pressact", "agg": "avg"},
+    {"col": "vg11", "agg": "max"},
+    {"col": "mfcmon_n2_1", "agg": "avg"},
+    {"col": "unknown_col", "agg": "avg"},
+    {"col": "pressact", "agg": "null_ratio"},
+    {"agg": "avg"},
+])
+def test_format_records_matches_row_rules(df, parsed):
+    expected = [_format_row(r, parsed) for r in df.to_dict(orient="records")]
+    assert format_records(df, parsed) == expected
+
+
+def test_format_column_spec_and_missing():
+    decimals, unit = get_format_spec("pressact")
+    out = format_column(pd.Series([1.23456, None, -0.5]), "pressact")
+    assert out[0] == f"{1.23456:.{decimals}f} {unit}"
+    assert out[1] == "N/A"
+    assert format_column([12.345], "pressact", "null_ratio")[0] == "12.35%"
+    assert get_format_spec(None) == (2, "")
+
+
+def test_format_records_counts_and_nullable():
+    df = pd.DataFrame({
+        "step_name": ["A", "B"],
+        "value": pd.array([1.5, None], dtype="Float64"),
+        "outlier_count": [0, 7],
+    })
+    rows = format_records(df, {"col": "pressact", "agg": "avg"})
+    assert rows[1]["value"] == "N/A"
+    assert [r["outlier_count"] for r in rows] == [0, 7]
+    assert rows[0]["step_name"] == "A"
+
+
+def test_format_magnitude():
+    out = format_magnitude(np.array([12345.678, -3.14159, 0.000120, 0.0]))
+    assert list(out) == ["12345.7", "-3.142", "0.00012", "0"]
+
+
+def test_add_others_to_chart_average():
+    df_all = pd.DataFrame({"trace_id": list("abcdef"), "value": [6.0, 5.0, 4.0, 3.0, 2.0, 1.0]})
+    top = df_all.head(2)
+    out = add_others_to_chart(top, df_all, "trace_id", "value")
+    assert len(out) == 3
+    assert out.iloc[-1]["trace_id"] == "Others (4개)"
+    assert out.iloc[-1]["value"] == pytest.approx(2.5)
+    assert add_others_to_chart(df_all, df_all, "trace_id", "value") is df_all
@@ -0,0 +1,105 @@
+"""
+이력/즐겨찾기 저장소(src/services/history_store.py) 테스트
+"""
+import json
+import sys
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.services.history_store import DEFAULT_USER, HistoryStore, user_id
+
+
+@pytest.fixture
+def store(tmp_path):
+    s = HistoryStore(
+        tmp_path / "history.sqlite3",
+        legacy_history=tmp_path / "history.json",
+        legacy_favorites=tmp_path / "favorites.json",
+    )
+    yield s
+    s.close()
+
+
+def test_recent_is_newest_first_and_distinct(store):
+    for q in ["a", "b", "a", "c", "b"]:
+        store.append(q)
+    assert [h["question"] for h in store.recent()] == ["b", "c", "a"]
+    assert [h["question"] for h in store.recent(limit=2)] == ["b", "c"]
+    # 이력 원본은 중복 포함 (사용 빈도)
+    assert [q for q, _ in store.events()] == ["b", "c", "a", "b", "a"]
+
+
+def test_users_are_partitioned(store):
+    store.append("mine", user_id="alice")
+    store.append("theirs", user_id="bob")
+    assert [h["question"] for h in store.recent("alice")] == ["mine"]
+    assert [h["question"] for h in store.recent("bob")] == ["theirs"]
+    assert store.recent() == []
+    assert sorted(q for q, _ in store.events()) == ["mine", "theirs"]
+
+
+def test_concurrent_appends_are_not_lost(store):
+    def worker(i):
+        for j in range(50):
+            store.append(f"q{i}-{j}", user_id=f"u{i % 2}")
+        store.close()
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(list(store.events())) == 400
+    assert len(store.recent("u0", limit=1000)) == 200
+
+
+def test_compact_keeps_latest_per_user(tmp_path):
+    store = HistoryStore(tmp_path / "h.sqlite3", tmp_path / "none.json", tmp_path / "none2.json", keep=3, compact_every=0)
+    for i in range(10):
+        store.append(f"q{i}", user_id="a")
+    store.append("only", user_id="b")
+    assert store.compact() == 7
+    assert [q for q, _ in store.events("a")] == ["q9", "q8", "q7"]
+    assert [q for q, _ in store.events("b")] == ["only"]
+    store.close()
+
+
+def test_favorites(store):
+    store.add_favorite("x")
+    store.add_favorite("y")
+    store.add_favorite("x")
+    store.add_favorite("z", user_id="alice")
+    assert store.favorites() == ["x", "y"]
+    store.remove_favorite("x")
+    assert store.favorites() == ["y"]
+    assert store.favorites("alice") == ["z"]
+
+
+def test_legacy_json_imported_once(tmp_path):
+    (tmp_path / "history.json").write_text(json.dumps([
+        {"question": "newest", "timestamp": "2024-01-02T00:00:00"},
+        {"question": "oldest", "timestamp": "2024-01-01T00:00:00"},
+    ]), encoding="utf-8")
+    (tmp_path / "favorites.json").write_text(json.dumps(["fav"]), encoding="utf-8")
+    args = (tmp_path / "h.sqlite3", tmp_path / "history.json", tmp_path / "favorites.json")
+
+    store = HistoryStore(*args)
+    assert [h["question"] for h in store.recent()] == ["newest", "oldest"]
+    assert store.favorites() == ["fav"]
+    store.close()
+
+    again = HistoryStore(*args)
+    assert len(list(again.events())) == 2
+    again.close()
+
+
+def test_user_id_from_header():
+    assert user_id(SimpleNamespace(headers={"x-client-id": "alice"})) == "alice"
+    assert user_id(SimpleNamespace(headers={})) == DEFAULT_USER
+    assert user_id(None) == DEFAULT_USER
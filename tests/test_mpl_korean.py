@@ -0,0 +1,55 @@
+"""
+한글 폰트 설정(src/utils/mpl_korean.py) 테스트: 지연 import, 폰트 선택, 디스크 캐시
+"""
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.utils import mpl_korean
+from src.utils.mpl_korean import select_font
+
+
+def test_chart_modules_do_not_import_matplotlib():
+    code = (
+        "import sys; import src.charts.renderer, src.plot_generator, src.chart_templates; "
+        "print('matplotlib' in sys.modules)"
+    )
+    out = subprocess.run([sys.executable, "-c", code], cwd=PROJECT_ROOT, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "False"
+
+
+def test_select_font_prefers_candidate_order():
+    assert select_font(["DejaVu Sans", "Noto Sans CJK JP", "NanumGothic"]) == "NanumGothic"
+    assert select_font(["DejaVu Sans", "Noto Sans CJK JP"]) == "Noto Sans CJK JP"
+    assert select_font(["DejaVu Sans"]) is None
+
+
+def test_font_cache_roundtrip_and_invalidation(tmp_path, monkeypatch):
+    monkeypatch.setattr(mpl_korean, "FONT_CACHE_FILE", tmp_path / "font.json")
+    font_file = tmp_path / "nanum.ttf"
+    font_file.write_bytes(b"")
+    mpl_korean._write_cache({"matplotlib": "9.9", "font": "NanumGothic", "path": str(font_file)})
+    assert mpl_korean._read_cache("9.9")["font"] == "NanumGothic"
+    assert mpl_korean._read_cache("9.8") is None   # 버전 변경
+    font_file.unlink()
+    assert mpl_korean._read_cache("9.9") is None   # 폰트 파일 삭제
+
+
+def test_missing_font_is_not_cached(tmp_path, monkeypatch):
+    """한글 폰트를 못 찾은 결과는 쓰지도 읽지도 않음 (폰트 설치 후 재탐색)"""
+    matplotlib = pytest.importorskip("matplotlib")
+    import matplotlib.font_manager as fm
+
+    cache = tmp_path / "font.json"
+    monkeypatch.setattr(mpl_korean, "FONT_CACHE_FILE", cache)
+    monkeypatch.setattr(fm.fontManager, "ttflist", [])
+    mpl_korean.setup_korean_font()
+    assert not cache.exists()
+
+    mpl_korean._write_cache({"matplotlib": matplotlib.__version__, "font": None, "path": None})
+    assert mpl_korean._read_cache(matplotlib.__version__) is None
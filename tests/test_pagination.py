@@ -0,0 +1,90 @@
+"""
+결과 집합 커서 페이지네이션(src/services/pagination.py) 테스트
+"""
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.services.pagination import (
+    ResultSetStore,
+    CursorExpired,
+    decode_cursor,
+    encode_cursor,
+    paginate,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _df(n):
+    return pd.DataFrame({"trace_id": [f"t{i}" for i in range(n)], "value": range(n)})
+
+
+def test_small_result_not_stored():
+    store = ResultSetStore()
+    first, cursor = paginate(_df(5), 10, store)
+    assert len(first) == 5 and cursor is None
+    assert len(store) == 0
+
+
+def test_walk_all_pages():
+    store = ResultSetStore()
+    first, cursor = paginate(_df(25), 10, store)
+    seen = list(first["value"])
+    while cursor:
+        page, cursor, total = store.page(cursor, 10)
+        assert total == 25
+        seen += list(page["value"])
+    assert seen == list(range(25))
+
+
+def test_cursor_roundtrip_and_garbage():
+    assert decode_cursor(encode_cursor("abc", 40)) == ("abc", 40)
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+
+
+def test_ttl_expiry_and_refresh():
+    clock = FakeClock()
+    store = ResultSetStore(ttl_s=10, clock=clock)
+    _, cursor = paginate(_df(30), 10, store)
+    clock.now = 8
+    _, cursor, _ = store.page(cursor, 10)  # 조회하면 TTL 연장
+    clock.now = 16
+    store.page(cursor, 10)
+    clock.now = 30
+    with pytest.raises(CursorExpired):
+        store.page(cursor, 10)
+    assert len(store) == 0
+
+
+def test_memory_budget_evicts_lru():
+    one = int(_df(100).memory_usage(index=True, deep=True).sum())
+    store = ResultSetStore(max_bytes=int(one * 2.5))
+    _, c1 = paginate(_df(100), 10, store)
+    _, c2 = paginate(_df(100), 10, store)
+    store.page(c1, 10)  # c1을 최근 사용으로
+    paginate(_df(100), 10, store)
+    store.page(c1, 10)
+    with pytest.raises(CursorExpired):
+        store.page(c2, 10)
+
+
+def test_memory_budget_counts_string_payload():
+    """문자열 컬럼은 객체 포인터가 아니라 실제 문자열 크기로 계산"""
+    df = pd.DataFrame({"note": pd.Series(["x" * 10_000] * 50, dtype=object)})
+    shallow = int(df.memory_usage(index=True, deep=False).sum())
+    store = ResultSetStore(max_bytes=shallow * 10)
+    paginate(df, 10, store)
+    assert len(store) == 0  # 실제 크기(약 500KB)는 예산 초과 → 바로 제거
@@ -0,0 +1,84 @@
+"""
+/api/query payload 직렬화(src/services/payload_format.py) 테스트
+"""
+import io
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import duckdb
+from src.services import payload_format
+from src.services.payload_format import encode_payload, columnar_data, ARROW_PAYLOAD_KEY
+
+
+@pytest.fixture
+def df():
+    con = duckdb.connect()
+    out = con.execute("""
+        SELECT
+            'trace_' || i AS trace_id,
+            i AS n,
+            CASE WHEN i = 2 THEN NULL ELSE i * 0.5 END AS value,
+            TIMESTAMP '2024-01-01' + INTERVAL (i) MINUTE AS ts
+        FROM range(4) r(i)
+    """).df()
+    con.close()
+    return out
+
+
+PAYLOAD = {"question": "q", "summary": "s", "sql": "SELECT 1", "columns": ["trace_id", "n", "value", "ts"], "meta": {"chart": "bar"}}
+
+
+def test_records_matches_to_dict(df):
+    body, media_type = encode_payload(dict(PAYLOAD), df, "records")
+    out = json.loads(body)
+    assert media_type == "application/json"
+    assert out["meta"] == {"chart": "bar"}
+    assert out["data"][0] == {"trace_id": "trace_0", "n": 0, "value": 0.0, "ts": "2024-01-01T00:00:00"}
+    assert out["data"][2]["value"] is None  # NaN → null
+
+
+def test_columnar_arrays(df):
+    body, _ = encode_payload(dict(PAYLOAD), df, "columnar")
+    out = json.loads(body)
+    assert out["format"] == "columnar"
+    assert out["data"]["trace_id"] == ["trace_0", "trace_1", "trace_2", "trace_3"]
+    assert out["data"]["n"] == [0, 1, 2, 3]
+    assert out["data"]["value"] == [0.0, 0.5, None, 1.5]
+    assert out["data"]["ts"][1] == "2024-01-01T00:01:00"
+
+
+def test_columnar_keeps_numpy_for_numeric(df):
+    data = columnar_data(df)
+    assert isinstance(data["value"], np.ndarray)
+    assert isinstance(data["trace_id"], list)
+
+
+def test_stdlib_fallback_same_output(df, monkeypatch):
+    fast, _ = encode_payload(dict(PAYLOAD), df, "columnar")
+    monkeypatch.setattr(payload_format, "orjson", None)
+    slow, _ = encode_payload(dict(PAYLOAD), df, "columnar")
+    assert json.loads(fast) == json.loads(slow)
+
+
+def test_unknown_format(df):
+    with pytest.raises(ValueError):
+        encode_payload(dict(PAYLOAD), df, "xml")
+
+
+def test_arrow_roundtrip(df):
+    pa = pytest.importorskip("pyarrow")
+    body, media_type = encode_payload(dict(PAYLOAD), df, "arrow")
+    assert media_type == "application/vnd.apache.arrow.stream"
+    table = pa.ipc.open_stream(io.BytesIO(body)).read_all()
+    assert table.num_rows == 4
+    assert table.column("n").to_pylist() == [0, 1, 2, 3]
+    extra = json.loads(table.schema.metadata[ARROW_PAYLOAD_KEY])
+    assert extra["summary"] == "s" and "data" not in extra
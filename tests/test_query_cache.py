@@ -0,0 +1,167 @@
+"""
+질의 결과 캐시 + single-flight(src/services/query_cache.py) 테스트
+"""
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import duckdb
+from src.services.executor import QueryCancelled
+from src.services.query_cache import ResultCache, SingleFlight, db_generation, fetch_df
+
+
+@pytest.fixture
+def db(tmp_path):
+    path = tmp_path / "cache.duckdb"
+    con = duckdb.connect(str(path))
+    con.execute("CREATE TABLE t AS SELECT i AS id, i * 2 AS v FROM range(10) r(i)")
+    con.close()
+    return path
+
+
+class CountingCon:
+    """execute 호출 수를 세고 일부러 느리게 실행하는 연결 래퍼"""
+
+    def __init__(self, con, delay=0.0, counter=None):
+        self.con = con
+        self.delay = delay
+        self.counter = counter if counter is not None else [0]
+
+    def execute(self, sql, params):
+        self.counter[0] += 1
+        time.sleep(self.delay)
+        return self.con.execute(sql, params)
+
+
+def test_cache_hit_and_copy(db):
+    cache, flights = ResultCache(), SingleFlight()
+    con = CountingCon(duckdb.connect(str(db)))
+    sql = "SELECT SUM(v) AS s FROM t WHERE id < ?"
+    a = fetch_df(con, sql, [5], db, cache, flights)
+    a.loc[0, "s"] = -1  # 호출자 수정이 캐시에 새지 않음
+    b = fetch_df(con, "SELECT  SUM(v) AS s\nFROM t WHERE id < ?", [5], db, cache, flights)
+    assert con.counter[0] == 1
+    assert b.loc[0, "s"] == 20
+    fetch_df(con, sql, [6], db, cache, flights)
+    assert con.counter[0] == 2
+
+
+def test_generation_change_misses(db):
+    cache, flights = ResultCache(), SingleFlight()
+    con = duckdb.connect(str(db))
+    wrapped = CountingCon(con)
+    gen = db_generation(db)
+    fetch_df(wrapped, "SELECT COUNT(*) AS n FROM t", [], db, cache, flights)
+    con.execute("INSERT INTO t VALUES (99, 1)")
+    con.execute("CHECKPOINT")
+    os.utime(db, ns=(time.time_ns() + 10**9, time.time_ns() + 10**9))
+    assert db_generation(db) != gen
+    out = fetch_df(wrapped, "SELECT COUNT(*) AS n FROM t", [], db, cache, flights)
+    assert wrapped.counter[0] == 2
+    assert out.loc[0, "n"] == 11
+
+
+def test_concurrent_identical_share_one_execution(db):
+    cache, flights = ResultCache(), SingleFlight()
+    counter = [0]
+    results = []
+
+    def worker():
+        con = CountingCon(duckdb.connect(str(db)), delay=0.3, counter=counter)
+        results.append(fetch_df(con, "SELECT MAX(v) AS m FROM t", [], db, cache, flights))
+
+    threads = [threading.Thread(target=worker) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert counter[0] == 1
+    assert flights.shared == 5
+    assert all(r.loc[0, "m"] == 18 for r in results)
+
+
+def test_followers_retry_when_leader_interrupted():
+    flights = SingleFlight()
+    calls = []
+    gate = threading.Event()
+
+    class InterruptException(Exception):
+        pass
+
+    def leader_fn():
+        calls.append("leader")
+        gate.wait(2)
+        raise InterruptException()
+
+    out = {}
+
+    def follower():
+        out["r"] = flights.do("k", lambda: calls.append("follower") or 7, retry_on=lambda e: isinstance(e, InterruptException))
+
+    t1 = threading.Thread(target=lambda: pytest.raises(InterruptException, flights.do, "k", leader_fn))
+    t1.start()
+    time.sleep(0.1)
+    t2 = threading.Thread(target=follower)
+    t2.start()
+    time.sleep(0.1)
+    gate.set()
+    t1.join()
+    t2.join()
+    assert calls == ["leader", "follower"]
+    assert out["r"] == (7, False)
+
+
+def test_cancelled_follower_stops_waiting_and_does_not_retry():
+    """취소된 대기 호출은 실행 완료를 기다리지 않고, 리더 중단 후에도 재실행하지 않음"""
+    flights = SingleFlight()
+    calls = []
+    gate = threading.Event()
+    cancelled = threading.Event()
+
+    class InterruptException(Exception):
+        pass
+
+    def leader_fn():
+        calls.append("leader")
+        gate.wait(2)
+        raise InterruptException()
+
+    out = {}
+
+    def follower():
+        try:
+            flights.do("k", lambda: calls.append("follower"),
+                       retry_on=lambda e: isinstance(e, InterruptException), cancelled=cancelled.is_set)
+        except QueryCancelled as e:
+            out["error"] = e
+            out["leader_running"] = not gate.is_set()
+
+    t1 = threading.Thread(target=lambda: pytest.raises(InterruptException, flights.do, "k", leader_fn))
+    t1.start()
+    time.sleep(0.1)
+    t2 = threading.Thread(target=follower)
+    t2.start()
+    time.sleep(0.1)
+    cancelled.set()
+    t2.join(2)
+    gate.set()
+    t1.join()
+    assert isinstance(out.get("error"), QueryCancelled)
+    assert out["leader_running"]
+    assert calls == ["leader"]
+
+
+def test_lru_bounds():
+    cache = ResultCache(max_entries=2)
+    for i in range(3):
+        cache.put(i, pd.DataFrame({"x": [i]}))
+    assert len(cache) == 2
+    assert cache.get(0) is None and cache.get(2) is not None
@@ -0,0 +1,139 @@
+"""
+자동완성 색인(src/services/suggest_index.py, src/question_suggestions.py) 테스트
+"""
+import sys
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import src.services.suggest_index as suggest_index
+from src.services.suggest_index import SuggestIndex, index_keys, to_jamo
+import src.question_suggestions as question_suggestions
+
+T0 = 1_700_000_000.0
+DAY = 24 * 3600.0
+
+
+def _index(*questions, prior=1.0):
+    index = SuggestIndex(now=T0)
+    for q in questions:
+        index.add(q, "테스트", prior)
+    return index
+
+
+def _found(index, query, limit=10):
+    return [index.questions[i] for i in index.search(query, limit)]
+
+
+def test_jamo_decomposition_splits_compound_letters():
+    assert to_jamo("압력") == "ㅇㅏㅂㄹㅕㄱ"
+    assert to_jamo("값") == "ㄱㅏㅂㅅ"
+    assert to_jamo("ㅄ") == "ㅂㅅ"
+    assert to_jamo("왜") == "ㅇㅗㅐ"
+    assert index_keys("스텝별  압력 평균") == [to_jamo(s) for s in ("스텝별 압력 평균", "압력 평균", "평균")]
+
+
+def test_partial_syllables_and_word_starts_match():
+    index = _index("스텝별 압력 평균", "온도 최대", "압축 비율")
+    assert _found(index, "압려") == ["스텝별 압력 평균"]
+    assert set(_found(index, "압ㄹ")) == {"스텝별 압력 평균"}
+    assert set(_found(index, "압")) == {"스텝별 압력 평균", "압축 비율"}
+    assert _found(index, "평균") == ["스텝별 압력 평균"]
+    # 단어 중간부터는 매칭하지 않음
+    assert _found(index, "텝별") == []
+    assert _found(index, "  온도   최") == ["온도 최대"]
+
+
+def test_ranking_prefers_recent_usage_over_prior():
+    index = _index("압력 평균", "압력 최대", "압력 최소")
+    assert _found(index, "압력") == ["압력 평균", "압력 최대", "압력 최소"]
+    index.record("압력 최소", T0 - 30 * DAY)
+    index.record("압력 최대", T0)
+    assert _found(index, "압력") == ["압력 최대", "압력 최소", "압력 평균"]
+    # 오래된 사용 여러 번 < 최근 사용 한 번
+    for _ in range(3):
+        index.record("압력 최소", T0 - 30 * DAY)
+    assert _found(index, "압력")[0] == "압력 최대"
+
+
+def test_cached_prefix_updates_incrementally(monkeypatch):
+    monkeypatch.setattr(suggest_index, "SCAN_LIMIT", 2)
+    index = _index(*[f"압력 {i:02d}" for i in range(20)])
+    assert _found(index, "압", 3) == ["압력 00", "압력 01", "압력 02"]
+    assert to_jamo("압") in index._top
+
+    index.record("압력 15", T0)
+    assert _found(index, "압", 3) == ["압력 15", "압력 00", "압력 01"]
+    # 새 질문도 캐시된 접두 목록에 바로 들어감
+    index.record("압력 새 질문", T0 + DAY)
+    index.record("압력 새 질문", T0 + DAY)
+    assert _found(index, "압", 2) == ["압력 새 질문", "압력 15"]
+    assert index.categories[index.search("압력 새", 1)[0]] == "최근"
+
+
+def test_bulk_add_matches_incremental():
+    questions = [f"스텝별 {w} 평균" for w in ("압력", "온도", "유량", "압축")]
+    one = _index(*questions)
+    bulk = SuggestIndex(now=T0)
+    bulk.add_many([(q, "테스트") for q in questions + questions[:1]], 1.0)
+    bulk.record_many([("스텝별 온도 평균", T0), ("", T0)])
+    one.record("스텝별 온도 평균", T0)
+    one.add(questions[0], "테스트", 1.0)
+    assert bulk._entries == one._entries
+    for query in ("", "스텝별", "압", "평"):
+        assert _found(bulk, query) == _found(one, query)
+
+
+def test_get_suggestions_ranks_history_and_fills(monkeypatch):
+    index = question_suggestions.build_index(
+        history_events=[("스텝별 압력 분산", "2024-01-02T00:00:00"), ("스텝별 압력 분산", "bad")],
+        generated=["pressact 평균"],
+    )
+    monkeypatch.setattr(question_suggestions, "_indexes", OrderedDict({question_suggestions.DEFAULT_USER: index}))
+
+    assert question_suggestions.get_suggestions("스텝별 압력 분", 5)[0] == {
+        "question": "스텝별 압력 분산", "category": "최근",
+    }
+    assert [s["question"] for s in question_suggestions.get_suggestions("pressact", 1)] == ["pressact 평균"]
+    # 매칭이 부족하면 전체 순위로 채움
+    filled = question_suggestions.get_suggestions("zzz", 3)
+    assert len(filled) == 3
+    assert [s["question"] for s in filled] == question_suggestions.get_popular_questions(3)
+
+
+def test_indexes_are_per_user(monkeypatch):
+    now = datetime.now().isoformat()
+    events = {
+        "alice": [("스텝별 압력 분산", now)] * 3,
+        "bob": [("스텝별 온도 분산", now)] * 3,
+    }
+    built = []
+    real_build = question_suggestions.build_index
+
+    def build(history_events=None, generated=None, user_id=question_suggestions.DEFAULT_USER):
+        built.append(user_id)
+        return real_build(history_events=events.get(user_id, []), generated=[])
+
+    monkeypatch.setattr(question_suggestions, "build_index", build)
+    monkeypatch.setattr(question_suggestions, "_indexes", OrderedDict())
+    monkeypatch.setattr(question_suggestions, "MAX_USER_INDEXES", 2)
+
+    assert question_suggestions.get_popular_questions(1, "alice") == ["스텝별 압력 분산"]
+    assert question_suggestions.get_popular_questions(1, "bob") == ["스텝별 온도 분산"]
+    assert question_suggestions.get_suggestions("스텝별", 1, "bob")[0]["question"] == "스텝별 온도 분산"
+    assert "스텝별 온도 분산" not in question_suggestions.get_popular_questions(3, "alice")
+
+    # 사용 기록은 그 사용자 색인에만 반영, 색인이 없는 사용자는 건너뜀 (다음 생성 때 이력에서 읽음)
+    for _ in range(4):
+        question_suggestions.record_question("압력 새 질문", "alice")
+    question_suggestions.record_question("압력 새 질문", "carol")
+    assert question_suggestions.get_popular_questions(1, "alice") == ["압력 새 질문"]
+    assert question_suggestions.get_popular_questions(1, "bob") == ["스텝별 온도 분산"]
+    assert built == ["alice", "bob"]
+
+    # LRU: 세 번째 사용자가 들어오면 가장 오래 안 쓴 alice 색인을 버림
+    question_suggestions.get_index("carol")
+    assert list(question_suggestions._indexes) == ["bob", "carol"]